@@ -0,0 +1,161 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Throughput benchmark of batch mode (one program, many files with inputs)
+
+Usage (from src directory): python3 -m benchmark.batch [--inputs n] [--size n] [--workers 1,2,4] [--json file]
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import List
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "interpret.py")
+"""Path to the interpreter's entry point"""
+
+# Reads n and writes the sum of 1..n computed by a loop (about 5 instructions per iteration)
+SUM_PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode22">
+  <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@n</arg1></instruction>
+  <instruction order="2" opcode="DEFVAR"><arg1 type="var">GF@sum</arg1></instruction>
+  <instruction order="3" opcode="READ">
+    <arg1 type="var">GF@n</arg1>
+    <arg2 type="type">int</arg2>
+  </instruction>
+  <instruction order="4" opcode="MOVE">
+    <arg1 type="var">GF@sum</arg1>
+    <arg2 type="int">0</arg2>
+  </instruction>
+  <instruction order="5" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+  <instruction order="6" opcode="JUMPIFEQ">
+    <arg1 type="label">end</arg1>
+    <arg2 type="var">GF@n</arg2>
+    <arg3 type="int">0</arg3>
+  </instruction>
+  <instruction order="7" opcode="ADD">
+    <arg1 type="var">GF@sum</arg1>
+    <arg2 type="var">GF@sum</arg2>
+    <arg3 type="var">GF@n</arg3>
+  </instruction>
+  <instruction order="8" opcode="SUB">
+    <arg1 type="var">GF@n</arg1>
+    <arg2 type="var">GF@n</arg2>
+    <arg3 type="int">1</arg3>
+  </instruction>
+  <instruction order="9" opcode="JUMP"><arg1 type="label">loop</arg1></instruction>
+  <instruction order="10" opcode="LABEL"><arg1 type="label">end</arg1></instruction>
+  <instruction order="11" opcode="WRITE"><arg1 type="var">GF@sum</arg1></instruction>
+</program>
+"""
+"""XML representation of the benchmarked program"""
+
+
+def run_batch(program_file: str, input_dir: str, results_dir: str, workers: int) -> float:
+    """
+    Runs the interpreter in batch mode
+
+    :param program_file: Path to the program
+    :param input_dir: Directory with files with inputs
+    :param results_dir: Directory for results
+    :param workers: Number of worker processes
+    :return: Wall-clock time in seconds
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, SCRIPT, "--source", program_file, "--batch", input_dir, "--results", results_dir,
+                    "--workers", str(workers)], check=True)
+
+    return time.perf_counter() - start
+
+
+def run_separately(program_file: str, input_files: List[str]) -> float:
+    """
+    Runs the interpreter as a new process for every file with inputs (the way used before batch mode)
+
+    :param program_file: Path to the program
+    :param input_files: Paths to files with inputs
+    :return: Wall-clock time in seconds
+    """
+    start = time.perf_counter()
+    for input_file in input_files:
+        subprocess.run([sys.executable, SCRIPT, "--source", program_file, "--input", input_file],
+                       stdout=subprocess.DEVNULL, check=True)
+
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    cpu_count = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+
+    arg_parser = ArgumentParser(description="Throughput benchmark of batch mode")
+    arg_parser.add_argument("--inputs", metavar="n", type=int, default=200, help="Number of files with inputs")
+    arg_parser.add_argument("--size", metavar="n", type=int, default=500,
+                            help="Number of loop iterations of the benchmarked program")
+    arg_parser.add_argument("--workers", metavar="list", type=str, default=",".join(map(str, default_workers)),
+                            help="Comma-separated numbers of worker processes to measure")
+    arg_parser.add_argument("--separate", metavar="n", type=int, default=20,
+                            help="Number of inputs measured with a process per input (0 disables the measurement)")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    args = arg_parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpu_count": cpu_count,
+        "inputs": args.inputs,
+        "size": args.size,
+        "batch": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        program_file = os.path.join(directory, "sum.xml")
+        with open(program_file, "w") as file:
+            file.write(SUM_PROGRAM)
+
+        input_dir = os.path.join(directory, "inputs")
+        os.mkdir(input_dir)
+        input_files = []
+        for number in range(args.inputs):
+            input_files.append(os.path.join(input_dir, f"{number:06}.in"))
+            with open(input_files[-1], "w") as file:
+                file.write(f"{args.size}\n")
+
+        print(f"Python {results['python']}, {cpu_count} CPUs, {args.inputs} inputs, {args.size} iterations")
+        if args.separate > 0:
+            separate_count = min(args.separate, args.inputs)
+            throughput = separate_count / run_separately(program_file, input_files[:separate_count])
+            results["separate"] = throughput
+            print(f"{'process per input':<20} {throughput:10.1f} runs/s")
+
+        single_throughput = None
+        for workers in map(int, args.workers.split(",")):
+            results_dir = os.path.join(directory, f"results-{workers}")
+            throughput = args.inputs / run_batch(program_file, input_dir, results_dir, workers)
+            single_throughput = single_throughput or throughput
+            results["batch"][workers] = throughput
+            speedup = throughput / single_throughput
+            print(f"{f'batch, {workers} workers':<20} {throughput:10.1f} runs/s  speedup {speedup:5.2f}")
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,168 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Benchmark of sharing large programs with spawned worker processes (pickled program vs. shared memory image)
+
+Reported memory is private (anonymous) memory of a worker after running the program, so pages of shared memory
+aren't counted. Linux only (memory is read from /proc).
+
+Usage (from src directory): python3 -m benchmark.image [--instructions n] [--workers 1,2,4] [--json file]
+"""
+
+import json
+import multiprocessing
+import platform
+import time
+from argparse import ArgumentParser
+from typing import Optional, Tuple
+
+from interpreter.code import Program
+from interpreter.image import SharedProgramImage
+from interpreter.runner import load_program_from_bytes, run_in_memory
+
+# Program of the worker (set by initializer)
+worker_program: Optional[Program] = None
+worker_image: Optional[SharedProgramImage] = None
+
+
+def generate_program(instruction_count: int) -> bytes:
+    """
+    Generates large straight-line program (additions of a counter)
+
+    :param instruction_count: Number of instructions
+    :return: XML representation of the program
+    """
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<program language="IPPcode22">\n',
+             '<instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@x</arg1></instruction>\n',
+             '<instruction order="2" opcode="MOVE"><arg1 type="var">GF@x</arg1><arg2 type="int">0</arg2>'
+             '</instruction>\n']
+    for order in range(3, instruction_count):
+        parts.append(f'<instruction order="{order}" opcode="ADD"><arg1 type="var">GF@x</arg1>'
+                     f'<arg2 type="var">GF@x</arg2><arg3 type="int">1</arg3></instruction>\n')
+    parts.append(f'<instruction order="{instruction_count}" opcode="WRITE"><arg1 type="var">GF@x</arg1>'
+                 f'</instruction>\n</program>\n')
+
+    return "".join(parts).encode()
+
+
+def private_memory() -> int:
+    """
+    Finds private memory of the current process
+
+    :return: Resident anonymous memory in KiB
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+
+    return 0
+
+
+def init_pickled(program: Program) -> None:
+    """
+    Initializer of worker receiving pickled program
+
+    :param program: Program (unpickled in the worker)
+    """
+    global worker_program
+
+    worker_program = program
+
+
+def init_image(image_name: str) -> None:
+    """
+    Initializer of worker attaching program image
+
+    :param image_name: Name of shared memory with the image
+    """
+    global worker_program, worker_image
+
+    worker_image = SharedProgramImage(image_name)
+    worker_program = worker_image.program
+
+
+def run_worker(_: int) -> Tuple[bytes, int]:
+    """
+    Runs the program in worker
+
+    :param _: Ignored task number
+    :return: Output of the program and private memory of the worker in KiB
+    """
+    result = run_in_memory(worker_program, b"")
+
+    return result.stdout, private_memory()
+
+
+def measure(program: Program, workers: int, use_image: bool) -> Tuple[float, int]:
+    """
+    Starts spawned workers and runs the program once in each of them
+
+    :param program: Loaded program
+    :param workers: Number of workers
+    :param use_image: Should the program be shared as image in shared memory? (otherwise it is pickled)
+    :return: Wall-clock time in seconds and private memory of the largest worker in KiB
+    """
+    context = multiprocessing.get_context("spawn")
+    image = SharedProgramImage(program=program) if use_image else None
+
+    start = time.perf_counter()
+    try:
+        if image is not None:
+            pool = context.Pool(workers, init_image, (image.name,))
+        else:
+            pool = context.Pool(workers, init_pickled, (program,))
+
+        with pool:
+            results = pool.map(run_worker, range(workers), 1)
+    finally:
+        if image is not None:
+            image.close()
+
+    return time.perf_counter() - start, max(memory for _, memory in results)
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Benchmark of sharing large programs with spawned workers")
+    arg_parser.add_argument("--instructions", metavar="n", type=int, default=200000, help="Size of the program")
+    arg_parser.add_argument("--workers", metavar="list", type=str, default="1,2,4",
+                            help="Comma-separated numbers of worker processes to measure")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    args = arg_parser.parse_args()
+
+    program, exit_code, _ = load_program_from_bytes(generate_program(args.instructions))
+    if program is None:
+        return exit_code
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "instructions": args.instructions,
+        "pickled": {},
+        "image": {},
+    }
+    print(f"Python {results['python']}, {args.instructions} instructions (time in s, worker memory in MiB)")
+    for workers in map(int, args.workers.split(",")):
+        for method in ("pickled", "image"):
+            duration, memory = measure(program, workers, method == "image")
+            results[method][workers] = {"time": duration, "worker_memory": memory}
+            print(f"{method:<8} {workers:3} workers  time {duration:8.3f}  worker memory {memory / 1024:8.1f}")
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,115 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Benchmark of lockstep execution (one arithmetic program, many integer inputs)
+
+Every input is a number n, the program counts steps of Collatz sequence from n to 1 (lanes diverge on every step
+and on the length of the loop). Results of lockstep execution are checked against the scalar interpreter.
+
+Usage (from src directory): python3 -m benchmark.lockstep [--inputs n] [--lanes 64,1024,4096] [--json file]
+"""
+
+import json
+import platform
+import random
+import time
+from argparse import ArgumentParser
+
+from interpreter.lockstep import LockstepProgram, is_available
+from interpreter.runner import load_program_from_bytes, run_in_memory
+from testing.programs import to_xml
+
+# Program in the form: (operation code, arguments as (type, value))
+COLLATZ = [
+    ("DEFVAR", ("var", "GF@n")),
+    ("DEFVAR", ("var", "GF@steps")),
+    ("DEFVAR", ("var", "GF@half")),
+    ("READ", ("var", "GF@n"), ("type", "int")),
+    ("MOVE", ("var", "GF@steps"), ("int", "0")),
+    ("LABEL", ("label", "loop")),
+    ("JUMPIFEQ", ("label", "done"), ("var", "GF@n"), ("int", "1")),
+    ("IDIV", ("var", "GF@half"), ("var", "GF@n"), ("int", "2")),
+    ("MUL", ("var", "GF@half"), ("var", "GF@half"), ("int", "2")),
+    ("JUMPIFEQ", ("label", "even"), ("var", "GF@half"), ("var", "GF@n")),
+    ("MUL", ("var", "GF@n"), ("var", "GF@n"), ("int", "3")),
+    ("ADD", ("var", "GF@n"), ("var", "GF@n"), ("int", "1")),
+    ("JUMP", ("label", "next")),
+    ("LABEL", ("label", "even")),
+    ("IDIV", ("var", "GF@n"), ("var", "GF@n"), ("int", "2")),
+    ("LABEL", ("label", "next")),
+    ("ADD", ("var", "GF@steps"), ("var", "GF@steps"), ("int", "1")),
+    ("JUMP", ("label", "loop")),
+    ("LABEL", ("label", "done")),
+    ("WRITE", ("var", "GF@steps")),
+]
+"""Benchmarked program"""
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Benchmark of lockstep execution")
+    arg_parser.add_argument("--inputs", metavar="n", type=int, default=4096, help="Number of inputs")
+    arg_parser.add_argument("--lanes", metavar="list", type=str, default="64,1024,4096",
+                            help="Comma-separated numbers of lanes executed together")
+    arg_parser.add_argument("--scalar", metavar="n", type=int, default=200,
+                            help="Number of inputs measured (and checked) with the scalar interpreter")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    args = arg_parser.parse_args()
+
+    if not is_available():
+        print("NumPy isn't installed, lockstep execution isn't available")
+        return 1
+
+    program, exit_code, _ = load_program_from_bytes(to_xml(COLLATZ))
+    if program is None:
+        return exit_code
+
+    generator = random.Random(1)
+    inputs = [f"{generator.randint(1, 10 ** 6)}\n".encode() for _ in range(args.inputs)]
+    lockstep_program = LockstepProgram(program)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "inputs": args.inputs,
+        "lockstep": {},
+    }
+    print(f"Python {results['python']}, {args.inputs} inputs (throughput in runs/s)")
+
+    scalar_count = min(args.scalar, args.inputs)
+    start = time.perf_counter()
+    expected = [run_in_memory(program, input_data) for input_data in inputs[:scalar_count]]
+    results["scalar"] = scalar_count / (time.perf_counter() - start)
+    print(f"{'scalar':<16} {results['scalar']:12.1f}")
+
+    for lanes in map(int, args.lanes.split(",")):
+        start = time.perf_counter()
+        lane_results = []
+        for group_start in range(0, len(inputs), lanes):
+            lane_results.extend(lockstep_program.run(inputs[group_start:group_start + lanes]))
+        throughput = len(inputs) / (time.perf_counter() - start)
+
+        mismatches = sum(1 for result, reference in zip(lane_results, expected)
+                         if result is None or (result.exit_code, result.stdout) != (reference.exit_code,
+                                                                                    reference.stdout))
+        results["lockstep"][lanes] = throughput
+        print(f"{f'lockstep {lanes}':<16} {throughput:12.1f}  speedup {throughput / results['scalar']:7.1f}"
+              f"  mismatches {mismatches}")
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
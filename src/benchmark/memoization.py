@@ -0,0 +1,128 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Benchmark of memoization of pure subroutines (naive recursive Fibonacci numbers)
+
+The argument is passed through the temporary frame, the result is returned in it. Outputs with and without
+memoization are checked to be the same.
+
+Usage (from src directory): python3 -m benchmark.memoization [--n 10,15,20] [--json file]
+"""
+
+import json
+import platform
+import time
+from argparse import ArgumentParser
+from io import BytesIO
+
+from interpreter.code import Program
+from interpreter.interpretation import Interpreter
+from interpreter.memoization import Memoizer
+from interpreter.runner import load_program_from_bytes, run_program
+from interpreter.streams import InputReader, OutputSink
+from testing.programs import to_xml
+
+# Program in the form: (operation code, arguments as (type, value))
+FIBONACCI = [
+    ("DEFVAR", ("var", "GF@n")),
+    ("READ", ("var", "GF@n"), ("type", "int")),
+    ("CREATEFRAME",),
+    ("DEFVAR", ("var", "TF@n")),
+    ("MOVE", ("var", "TF@n"), ("var", "GF@n")),
+    ("CALL", ("label", "fib")),
+    ("WRITE", ("var", "TF@result")),
+    ("EXIT", ("int", "0")),
+    ("LABEL", ("label", "fib")),
+    ("PUSHFRAME",),
+    ("DEFVAR", ("var", "LF@result")),
+    ("DEFVAR", ("var", "LF@partial")),
+    ("MOVE", ("var", "LF@result"), ("var", "LF@n")),
+    ("LT", ("var", "LF@partial"), ("var", "LF@n"), ("int", "2")),
+    ("JUMPIFEQ", ("label", "fib_end"), ("var", "LF@partial"), ("bool", "true")),
+    ("CREATEFRAME",),
+    ("DEFVAR", ("var", "TF@n")),
+    ("SUB", ("var", "TF@n"), ("var", "LF@n"), ("int", "1")),
+    ("CALL", ("label", "fib")),
+    ("MOVE", ("var", "LF@partial"), ("var", "TF@result")),
+    ("CREATEFRAME",),
+    ("DEFVAR", ("var", "TF@n")),
+    ("SUB", ("var", "TF@n"), ("var", "LF@n"), ("int", "2")),
+    ("CALL", ("label", "fib")),
+    ("ADD", ("var", "LF@result"), ("var", "LF@partial"), ("var", "TF@result")),
+    ("LABEL", ("label", "fib_end")),
+    ("POPFRAME",),
+    ("RETURN",),
+]
+"""Benchmarked program"""
+
+
+def run(program: Program, n: int, memoize: bool) -> bytes:
+    """
+    Interprets the program
+
+    :param program: Loaded program
+    :param n: Index of computed Fibonacci number
+    :param memoize: Should calls be memoized?
+    :return: Standard output of the program
+    """
+    output = BytesIO()
+    interpreter = Interpreter(InputReader.for_bytes(f"{n}\n".encode()), OutputSink(output), OutputSink(BytesIO()),
+                              memoizer=Memoizer(program) if memoize else None)
+    run_program(interpreter, program)
+
+    return output.getvalue()
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Benchmark of memoization of pure subroutines")
+    arg_parser.add_argument("--n", metavar="list", type=str, default="10,15,20",
+                            help="Comma-separated indexes of computed Fibonacci numbers")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    args = arg_parser.parse_args()
+
+    program, exit_code, _ = load_program_from_bytes(to_xml(FIBONACCI))
+    if program is None:
+        return exit_code
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "memoization": {},
+    }
+    print(f"Python {results['python']} (time in seconds)")
+    print(f"{'n':>4} {'plain':>10} {'memoized':>10} {'speedup':>9}")
+
+    for n in map(int, args.n.split(",")):
+        start = time.perf_counter()
+        expected = run(program, n, False)
+        plain = time.perf_counter() - start
+
+        start = time.perf_counter()
+        output = run(program, n, True)
+        memoized = time.perf_counter() - start
+
+        if output != expected:
+            print(f"Outputs differ for n = {n}")
+            return 1
+
+        results["memoization"][n] = {"plain": plain, "memoized": memoized}
+        print(f"{n:>4} {plain:10.4f} {memoized:10.4f} {plain / memoized:9.1f}")
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
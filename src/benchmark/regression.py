@@ -0,0 +1,216 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Performance regression gate comparing benchmark workloads (see benchmark.suite) with a stored baseline
+
+Every workload is measured repeatedly. Medians of load and run times are compared with the baseline together
+with their confidence intervals (distribution-free, from order statistics), peak memory is compared directly.
+A metric regresses when its median is worse than the baseline by more than the threshold and the whole confidence
+interval is worse than the baseline (so noise of a single run doesn't fail the gate).
+
+Baselines depend on the machine, they should be updated (--update) on the machine running the gate.
+
+Usage (from src directory): python3 -m benchmark.regression [--runs n] [--threshold percent] [--baseline file]
+[--update]
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+from argparse import ArgumentParser
+from math import comb
+from typing import Dict, List, Tuple
+
+from benchmark.suite import OutputMismatchException, current_commit, measure
+from benchmark.workloads import generate_all
+from interpreter.profiling import format_table
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+"""Path to the default baseline"""
+
+COMPARED_METRICS = {"load_time": "load_times", "run_time": "run_times", "peak_memory": "peak_memory"}
+"""Compared metrics (lower is better) and their samples in measurements"""
+
+CONFIDENCE = 0.95
+"""Confidence level of intervals of medians"""
+
+
+def median_interval(samples: List[float], confidence: float = CONFIDENCE) -> Tuple[float, float]:
+    """
+    Computes confidence interval of the median (from order statistics, no assumption about the distribution)
+
+    :param samples: Measured values
+    :param confidence: Confidence level
+    :return: Lower and upper bound (the whole range if there are too few samples for the confidence)
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    # The largest k with P(X < k) <= (1 - confidence) / 2 for X ~ Bi(count, 1/2): the interval is [x_k, x_(n-k+1)]
+    alpha = (1 - confidence) / 2
+    k = 0
+    probability = 0.0
+    while k < count // 2:
+        probability += comb(count, k) / 2 ** count
+        if probability > alpha:
+            break
+        k += 1
+    if k == 0:
+        return ordered[0], ordered[-1]
+
+    return ordered[k - 1], ordered[count - k]
+
+
+def summarize(measurement: Dict[str, object]) -> Dict[str, Dict[str, float]]:
+    """
+    Summarizes measurement of a workload
+
+    :param measurement: Measurement (see benchmark.suite.measure())
+    :return: Median and confidence interval of every compared metric
+    """
+    summary = {}
+    for metric, samples_key in COMPARED_METRICS.items():
+        samples = measurement[samples_key]
+        if not isinstance(samples, list):
+            samples = [samples]
+        low, high = median_interval(samples)
+        summary[metric] = {"median": statistics.median(samples), "low": low, "high": high}
+
+    return summary
+
+
+def compare(current: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Dict[str, Dict[str, float]]],
+            threshold: float) -> Tuple[List[Tuple[str, ...]], List[str]]:
+    """
+    Compares summaries of workloads with the baseline
+
+    :param current: Summaries of workloads by their names (see summarize())
+    :param baseline: Summaries of workloads from the baseline
+    :param threshold: Allowed relative worsening (0.1 for 10 %)
+    :return: Rows of the delta report and descriptions of regressions
+    """
+    rows = []
+    regressions = []
+    for name, summary in current.items():
+        for metric, values in summary.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None or base["median"] <= 0:
+                rows.append((name, metric, format_metric(metric, values["median"]), "-", "-", "new"))
+                continue
+
+            delta = values["median"] / base["median"] - 1
+            regressed = delta > threshold and values["low"] > base["median"]
+            improved = delta < -threshold and values["high"] < base["median"]
+            status = "REGRESSION" if regressed else "improved" if improved else "ok"
+            rows.append((name, metric, format_metric(metric, values["median"]),
+                         f"{format_metric(metric, values['low'])}..{format_metric(metric, values['high'])}",
+                         f"{delta * 100:+.1f} %", status))
+            if regressed:
+                regressions.append(f"{name} {metric}: {delta * 100:+.1f} % (threshold {threshold * 100:.0f} %)")
+
+    return rows, regressions
+
+
+def format_metric(metric: str, value: float) -> str:
+    """
+    Formats value of a metric
+
+    :param metric: Name of the metric
+    :param value: Value (seconds or bytes)
+    :return: Value in milliseconds or KiB
+    """
+    if metric == "peak_memory":
+        return f"{value / 1024:.0f} KiB"
+
+    return f"{value * 1000:.2f} ms"
+
+
+def main() -> int:
+    """
+    Main function of the regression gate
+
+    :return: Exit code (1 if any metric regressed)
+    """
+    arg_parser = ArgumentParser(description="Performance regression gate comparing benchmark workloads with a baseline")
+    arg_parser.add_argument("--runs", metavar="n", type=int, default=9,
+                            help="Number of measured runs per workload (at least 6 for 95%% confidence intervals)")
+    arg_parser.add_argument("--threshold", metavar="percent", type=float, default=10.0,
+                            help="Allowed worsening of medians in percent")
+    arg_parser.add_argument("--scale", metavar="x", type=float, default=None,
+                            help="Multiplier of default sizes of workloads (the baseline's one by default)")
+    arg_parser.add_argument("--baseline", metavar="file", type=str, default=BASELINE, help="Baseline JSON file")
+    arg_parser.add_argument("--update", action="store_true", default=False,
+                            help="Store the results as the new baseline instead of comparing")
+    args = arg_parser.parse_args()
+    if args.runs < 1 or args.threshold < 0:
+        print("--runs must be positive and --threshold mustn't be negative")
+
+        return 1
+
+    baseline = None
+    if not args.update:
+        try:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Baseline can't be loaded (create it by --update): {e}")
+
+            return 1
+
+    scale = args.scale if args.scale is not None else baseline["scale"] if baseline is not None else 1.0
+    if baseline is not None and baseline["scale"] != scale:
+        print(f"Baseline was measured with scale {baseline['scale']}, it can't be compared with scale {scale}")
+
+        return 1
+
+    current = {}
+    for workload in generate_all(scale):
+        try:
+            current[workload.name] = summarize(measure(workload, args.runs))
+        except OutputMismatchException as e:
+            print(e)
+
+            return 1
+
+    if args.update:
+        baseline = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "commit": current_commit(),
+            "runs": args.runs,
+            "scale": scale,
+            "workloads": current,
+        }
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+
+        return 0
+
+    rows, regressions = compare(current, baseline["workloads"], args.threshold / 100)
+    print(f"Baseline: commit {baseline['commit'] or 'unknown'}, Python {baseline['python']}; "
+          f"current: commit {current_commit() or 'unknown'}, Python {platform.python_version()}")
+    print(f"Medians of {args.runs} runs with {CONFIDENCE * 100:.0f} % confidence intervals")
+    print("\n".join(format_table(("Workload", "Metric", "Median", "Interval", "Delta", "Status"), rows)))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+
+        return 1
+
+    print("\nNo regressions")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
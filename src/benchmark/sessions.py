@@ -0,0 +1,195 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Benchmark of concurrent asyncio sessions (aggregate throughput and latency of responses)
+
+Every session runs a program answering requests of its client: it reads a number n, computes the sum 1..n by a loop
+and writes the result. Clients send requests one by one (optionally with think time between them, so READ
+instructions really wait) and measure the time to the response.
+
+Usage (from src directory): python3 -m benchmark.sessions [--sessions 1,10,1000] [--requests n] [--size n]
+"""
+
+import asyncio
+import json
+import platform
+import statistics
+import time
+from argparse import ArgumentParser
+from typing import List, Tuple
+
+from interpreter.code import Program
+from interpreter.interpretation import Interpreter
+from interpreter.runner import load_program_from_bytes
+from interpreter.sessions import SessionScheduler
+from testing.programs import to_xml
+
+# Program in the form: (operation code, arguments as (type, value))
+SUM_SERVER = [
+    ("DEFVAR", ("var", "GF@n")),
+    ("DEFVAR", ("var", "GF@sum")),
+    ("DEFVAR", ("var", "GF@type")),
+    ("LABEL", ("label", "next")),
+    ("READ", ("var", "GF@n"), ("type", "int")),
+    ("TYPE", ("var", "GF@type"), ("var", "GF@n")),
+    ("JUMPIFEQ", ("label", "end"), ("var", "GF@type"), ("string", "nil")),
+    ("MOVE", ("var", "GF@sum"), ("int", "0")),
+    ("LABEL", ("label", "loop")),
+    ("JUMPIFEQ", ("label", "done"), ("var", "GF@n"), ("int", "0")),
+    ("ADD", ("var", "GF@sum"), ("var", "GF@sum"), ("var", "GF@n")),
+    ("SUB", ("var", "GF@n"), ("var", "GF@n"), ("int", "1")),
+    ("JUMP", ("label", "loop")),
+    ("LABEL", ("label", "done")),
+    ("WRITE", ("var", "GF@sum")),
+    ("WRITE", ("string", "\\010")),
+    ("JUMP", ("label", "next")),
+    ("LABEL", ("label", "end")),
+]
+"""Benchmarked program"""
+
+
+class ResponseWriter:
+    """Writer passing program's output to the client"""
+
+    def __init__(self, client_reader: asyncio.StreamReader):
+        """
+        Class constructor
+
+        :param client_reader: Stream read by the client
+        """
+        self.__client_reader = client_reader
+
+    def write(self, data: bytes) -> None:
+        """
+        Passes data to the client
+
+        :param data: Output of the program
+        """
+        self.__client_reader.feed_data(data)
+
+
+async def run_client(scheduler: SessionScheduler, program: Program, requests: int, size: int,
+                     think_time: float) -> List[float]:
+    """
+    Runs one session with its client
+
+    :param scheduler: Scheduler of sessions
+    :param program: Loaded program
+    :param requests: Number of requests sent by the client
+    :param size: Number sent in requests (number of loop iterations)
+    :param think_time: Delay between response and the next request in seconds
+    :return: Latencies of responses in seconds
+    """
+    session_input = asyncio.StreamReader()
+    responses = asyncio.StreamReader()
+    session = asyncio.ensure_future(scheduler.run_session(program, session_input, ResponseWriter(responses)))
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        session_input.feed_data(f"{size}\n".encode())
+        await responses.readline()
+        latencies.append(time.perf_counter() - start)
+
+        if think_time > 0:
+            await asyncio.sleep(think_time)
+
+    session_input.feed_eof()
+    await session
+
+    return latencies
+
+
+async def measure(program: Program, sessions: int, requests: int, size: int, quota: int,
+                  think_time: float) -> Tuple[float, List[float], int]:
+    """
+    Runs concurrent sessions
+
+    :param program: Loaded program
+    :param sessions: Number of sessions
+    :param requests: Number of requests of every client
+    :param size: Number sent in requests
+    :param quota: Instruction quota of sessions
+    :param think_time: Delay between response and the next request in seconds
+    :return: Wall-clock time, latencies of all responses and number of executed instructions
+    """
+    scheduler = SessionScheduler(quota)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_client(scheduler, program, requests, size, think_time)
+                                     for _ in range(sessions)))
+    duration = time.perf_counter() - start
+
+    return duration, [latency for latencies in results for latency in latencies], scheduler.executed_instructions
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Computes percentile (nearest rank)
+
+    :param values: Measured values
+    :param fraction: Wanted percentile as fraction (0.99 for 99th percentile)
+    :return: Value of the percentile
+    """
+    ordered = sorted(values)
+
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Benchmark of concurrent asyncio sessions")
+    arg_parser.add_argument("--sessions", metavar="list", type=str, default="1,10,1000",
+                            help="Comma-separated numbers of concurrent sessions to measure")
+    arg_parser.add_argument("--requests", metavar="n", type=int, default=5, help="Number of requests per session")
+    arg_parser.add_argument("--size", metavar="n", type=int, default=200, help="Loop iterations per request")
+    arg_parser.add_argument("--quota", metavar="n", type=int, default=Interpreter.DEFAULT_QUOTA,
+                            help="Instruction quota of sessions")
+    arg_parser.add_argument("--think", metavar="ms", type=float, default=1.0,
+                            help="Think time of clients between requests in milliseconds")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    args = arg_parser.parse_args()
+
+    program, exit_code, _ = load_program_from_bytes(to_xml(SUM_SERVER))
+    if program is None:
+        return exit_code
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "size": args.size,
+        "quota": args.quota,
+        "sessions": {},
+    }
+    print(f"Python {results['python']}, {args.requests} requests per session, quota {args.quota} (latency in ms)")
+    for sessions in map(int, args.sessions.split(",")):
+        duration, latencies, instructions = asyncio.run(
+            measure(program, sessions, args.requests, args.size, args.quota, args.think / 1000))
+        results["sessions"][sessions] = {
+            "instructions_per_second": instructions / duration,
+            "latency_median": statistics.median(latencies),
+            "latency_p99": percentile(latencies, 0.99),
+            "latency_max": max(latencies),
+        }
+        print(f"{sessions:5} sessions  {instructions / duration:12.0f} instructions/s  "
+              f"latency median {statistics.median(latencies) * 1000:8.2f}  "
+              f"p99 {percentile(latencies, 0.99) * 1000:8.2f}  max {max(latencies) * 1000:8.2f}")
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,130 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Benchmark of interpreter's start (imports and interpretation of an empty program)
+
+Usage (from src directory): python3 -m benchmark.startup [--runs n] [--bundle interpret.pyz] [--json file]
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import List, Dict, Tuple
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "interpret.py")
+"""Path to the interpreter's entry point"""
+
+EMPTY_PROGRAM = '<?xml version="1.0" encoding="UTF-8"?>\n<program language="IPPcode22">\n</program>\n'
+"""XML representation of a program without instructions"""
+
+
+def measure_wall_time(command: List[str], runs: int) -> Dict[str, float]:
+    """
+    Measures wall-clock time of repeated runs of a command
+
+    :param command: Command to run
+    :param runs: Number of runs
+    :return: Statistics of the times in milliseconds (min, median, mean)
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {"min": min(times), "median": statistics.median(times), "mean": statistics.mean(times)}
+
+
+def measure_import_time(command: List[str]) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Measures times of imports done by a Python command (by -X importtime)
+
+    :param command: Arguments of Python interpreter (without -X importtime)
+    :return: Total import time and top-level imports with their cumulative times (both in milliseconds)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime"] + command, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+    # Lines look like: "import time:       123 |        456 |   module" (indentation marks nested imports)
+    total = 0.0
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue
+
+        total += int(self_time) / 1000
+        if not module.startswith("  "):
+            top_level.append((module.strip(), int(cumulative_time) / 1000))
+
+    return total, sorted(top_level, key=lambda item: item[1], reverse=True)
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Benchmark of interpreter's start")
+    arg_parser.add_argument("--runs", metavar="n", type=int, default=20, help="Number of measured runs")
+    arg_parser.add_argument("--bundle", metavar="file", type=str, default=None,
+                            help="Bundled interpreter (make bundle) measured in addition to the script")
+    arg_parser.add_argument("--top", metavar="n", type=int, default=10, help="Number of shown slowest imports")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        program_file = os.path.join(directory, "empty.xml")
+        input_file = os.path.join(directory, "empty.in")
+        with open(program_file, "w") as file:
+            file.write(EMPTY_PROGRAM)
+        open(input_file, "w").close()
+
+        interpreter_args = ["--source", program_file, "--input", input_file]
+        targets = {"script": [SCRIPT]}
+        if args.bundle is not None:
+            targets["bundle"] = [os.path.abspath(args.bundle)]
+
+        results = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "baseline": measure_wall_time([sys.executable, "-c", "pass"], args.runs),
+        }
+        for name, target in targets.items():
+            wall_time = measure_wall_time([sys.executable] + target + interpreter_args, args.runs)
+            import_total, imports = measure_import_time(target + interpreter_args)
+            results[name] = {"wall_time": wall_time, "import_time": import_total,
+                             "imports": dict(imports[:args.top])}
+
+    print(f"Python {results['python']}, {args.runs} runs (times in ms)")
+    print(f"{'python -c pass':<16} min {results['baseline']['min']:8.2f}  median {results['baseline']['median']:8.2f}")
+    for name in targets:
+        wall_time = results[name]["wall_time"]
+        print(f"{name:<16} min {wall_time['min']:8.2f}  median {wall_time['median']:8.2f}  "
+              f"imports {results[name]['import_time']:8.2f}")
+        for module, cumulative_time in results[name]["imports"].items():
+            print(f"    {module:<40} {cumulative_time:8.2f}")
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
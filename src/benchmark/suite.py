@@ -0,0 +1,241 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Benchmark suite running synthetic workloads (see benchmark.workloads)
+
+For every workload it measures load time (parsing and checking of XML), run time, executed instructions per second
+and peak memory of Python allocations (by tracemalloc in a separate run, so it doesn't slow down the measured
+ones). Results can be appended to a JSON Lines file together with the current commit and compared with a previous
+record.
+
+Usage (from src directory): python3 -m benchmark.suite [--runs n] [--scale x] [--only name,...] [--json file]
+[--compare file]
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import ElementTree
+
+from benchmark.workloads import Workload, WORKLOADS, generate_all
+from interpreter.code import Program
+from interpreter.interpretation import Interpreter, Loader
+from interpreter.profiling import format_table
+from interpreter.streams import InputReader, OutputSink
+
+METRICS = ("load_time", "run_time", "instructions_per_second", "peak_memory")
+"""Measured metrics of workloads (times in seconds, memory in bytes)"""
+
+
+class OutputMismatchException(Exception):
+    """Workload produced unexpected output"""
+    pass
+
+
+def load(xml: bytes) -> Program:
+    """
+    Loads program from its XML representation
+
+    :param xml: XML representation of the program
+    :return: Loaded program
+    """
+    return Loader(ElementTree(), BytesIO(xml)).load_program()
+
+
+def run(workload: Workload, program: Program) -> Tuple[int, bytes]:
+    """
+    Interprets program of the workload
+
+    :param workload: Workload (for its input)
+    :param program: Loaded program of the workload
+    :return: Number of executed instructions and standard output
+    """
+    output = BytesIO()
+    interpreter = Interpreter(InputReader.for_bytes(workload.input_data), OutputSink(output), OutputSink(BytesIO()))
+    interpreter.run(program)
+
+    return interpreter.executed_instructions, output.getvalue()
+
+
+def measure(workload: Workload, runs: int) -> Dict[str, object]:
+    """
+    Measures workload
+
+    :param workload: Measured workload
+    :param runs: Number of measured runs
+    :return: Samples of load and run times (lists), executed instructions and peak memory
+    :raise OutputMismatchException: Workload produced unexpected output
+    """
+    xml = workload.to_xml()
+    load_times = []
+    run_times = []
+    executed = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        program = load(xml)
+        loaded = time.perf_counter()
+        executed, output = run(workload, program)
+        end = time.perf_counter()
+
+        if output != workload.expected_output:
+            raise OutputMismatchException(f"Workload {workload.name} produced unexpected output")
+        load_times.append(loaded - start)
+        run_times.append(end - loaded)
+
+    tracemalloc.start()
+    try:
+        run(workload, load(xml))
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"size": workload.size, "instructions": executed, "load_times": load_times, "run_times": run_times,
+            "peak_memory": peak_memory}
+
+
+def summarize(measurement: Dict[str, object]) -> Dict[str, float]:
+    """
+    Summarizes measurement of a workload by medians
+
+    :param measurement: Measurement (see measure())
+    :return: Values of METRICS
+    """
+    run_time = statistics.median(measurement["run_times"])
+
+    return {
+        "load_time": statistics.median(measurement["load_times"]),
+        "run_time": run_time,
+        "instructions_per_second": measurement["instructions"] / run_time if run_time > 0 else 0.0,
+        "peak_memory": measurement["peak_memory"],
+    }
+
+
+def current_commit() -> Optional[str]:
+    """
+    Finds the current commit of the repository
+
+    :return: Abbreviated hash of the commit or None (not in a repository, git not available)
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return result.stdout.strip()
+
+
+def load_previous(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Loads the latest record of a JSON Lines file written by --json
+
+    :param path: Path to the file
+    :return: Summaries of workloads by their names
+    :raise OSError: File can't be read
+    :raise ValueError: File doesn't contain any valid record
+    """
+    with open(path) as file:
+        lines = [line for line in file if line.strip()]
+    if not lines:
+        raise ValueError("No records")
+
+    return json.loads(lines[-1])["workloads"]
+
+
+def format_results(summaries: Dict[str, Dict[str, float]],
+                   previous: Optional[Dict[str, Dict[str, float]]] = None) -> List[str]:
+    """
+    Formats summaries of workloads as a table
+
+    :param summaries: Summaries of workloads by their names (see summarize())
+    :param previous: Summaries of a previous record for comparison or None
+    :return: Lines of the table
+    """
+    header = ("Workload", "Load ms", "Run ms", "Instr./s", "Peak KiB")
+    if previous is not None:
+        header += ("Run vs prev.",)
+
+    rows = []
+    for name, summary in summaries.items():
+        row = (name, f"{summary['load_time'] * 1000:.2f}", f"{summary['run_time'] * 1000:.2f}",
+               f"{summary['instructions_per_second']:.0f}", f"{summary['peak_memory'] / 1024:.0f}")
+        if previous is not None:
+            if name in previous and previous[name]["run_time"] > 0:
+                row += (f"{(summary['run_time'] / previous[name]['run_time'] - 1) * 100:+.1f} %",)
+            else:
+                row += ("-",)
+        rows.append(row)
+
+    return format_table(header, rows)
+
+
+def main() -> int:
+    """
+    Main function of the benchmark
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Benchmark suite running synthetic workloads")
+    arg_parser.add_argument("--runs", metavar="n", type=int, default=5, help="Number of measured runs per workload")
+    arg_parser.add_argument("--scale", metavar="x", type=float, default=1.0,
+                            help="Multiplier of default sizes of workloads")
+    arg_parser.add_argument("--only", metavar="list", type=str, default=None,
+                            help=f"Comma-separated names of run workloads ({', '.join(WORKLOADS)})")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to append results (one JSON object per line) for tracking over time")
+    arg_parser.add_argument("--compare", metavar="file", type=str, default=None,
+                            help="File written by --json whose latest record is compared with the results")
+    args = arg_parser.parse_args()
+
+    workloads = generate_all(args.scale)
+    if args.only is not None:
+        names = args.only.split(",")
+        workloads = [workload for workload in workloads if workload.name in names]
+
+    previous = None
+    if args.compare is not None:
+        try:
+            previous = load_previous(args.compare)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Previous results can't be loaded: {e}")
+
+            return 1
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "commit": current_commit(),
+        "runs": args.runs,
+        "scale": args.scale,
+        "workloads": {},
+    }
+    for workload in workloads:
+        try:
+            measurement = measure(workload, args.runs)
+        except OutputMismatchException as e:
+            print(e)
+
+            return 1
+        results["workloads"][workload.name] = summarize(measurement)
+
+    print(f"Python {results['python']}, commit {results['commit'] or 'unknown'}, {args.runs} runs (medians)")
+    print("\n".join(format_results(results["workloads"], previous)))
+
+    if args.json is not None:
+        with open(args.json, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
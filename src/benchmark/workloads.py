@@ -0,0 +1,350 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Generator of synthetic IPPcode22 workloads for benchmarks
+
+Every workload stresses one part of the interpreter and is parametrised by its size (iterations, recursion depth,
+string length, number of input lines or instructions). Outputs are deterministic, so they can be checked.
+
+Usage (from src directory): python3 -m benchmark.workloads name [--size n] [--output file.xml]
+(the input of the workload is written to file.in)
+"""
+
+from argparse import ArgumentParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+from testing.programs import to_xml
+
+
+class Workload:
+    """Generated program with its input and expected output"""
+
+    def __init__(self, name: str, size: int, instructions: list, input_data: bytes, expected_output: bytes):
+        """
+        Class constructor
+
+        :param name: Name of the workload
+        :param size: Size parameter of the workload
+        :param instructions: Instructions in the form: (operation code, arguments as (type, value))
+        :param input_data: Input of the program
+        :param expected_output: Expected standard output of the program
+        """
+        self.__name = name
+        self.__size = size
+        self.__instructions = instructions
+        self.__input_data = input_data
+        self.__expected_output = expected_output
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for name of the workload
+
+        :return: Name of the workload
+        """
+        return self.__name
+
+    @property
+    def size(self) -> int:
+        """
+        Getter for size parameter of the workload
+
+        :return: Size parameter
+        """
+        return self.__size
+
+    @property
+    def instructions(self) -> list:
+        """
+        Getter for instructions of the program
+
+        :return: Instructions in the form: (operation code, arguments as (type, value))
+        """
+        return self.__instructions
+
+    @property
+    def input_data(self) -> bytes:
+        """
+        Getter for input of the program
+
+        :return: Input data
+        """
+        return self.__input_data
+
+    @property
+    def expected_output(self) -> bytes:
+        """
+        Getter for expected output of the program
+
+        :return: Expected standard output
+        """
+        return self.__expected_output
+
+    def to_xml(self) -> bytes:
+        """
+        Creates XML representation of the program
+
+        :return: XML representation
+        """
+        return to_xml(self.__instructions)
+
+
+def integer_loop(iterations: int) -> Workload:
+    """
+    Generates tight loop with integer arithmetic
+
+    :param iterations: Number of iterations
+    :return: Workload
+    """
+    instructions = [
+        ("DEFVAR", ("var", "GF@i")),
+        ("DEFVAR", ("var", "GF@acc")),
+        ("MOVE", ("var", "GF@i"), ("int", "0")),
+        ("MOVE", ("var", "GF@acc"), ("int", "0")),
+        ("LABEL", ("label", "loop")),
+        ("JUMPIFEQ", ("label", "end"), ("var", "GF@i"), ("int", str(iterations))),
+        ("ADD", ("var", "GF@acc"), ("var", "GF@acc"), ("var", "GF@i")),
+        ("MUL", ("var", "GF@acc"), ("var", "GF@acc"), ("int", "3")),
+        ("IDIV", ("var", "GF@acc"), ("var", "GF@acc"), ("int", "2")),
+        ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1")),
+        ("JUMP", ("label", "loop")),
+        ("LABEL", ("label", "end")),
+        ("WRITE", ("var", "GF@acc")),
+    ]
+
+    acc = 0
+    for i in range(iterations):
+        acc = (acc + i) * 3 // 2
+
+    return Workload("integer_loop", iterations, instructions, b"", str(acc).encode())
+
+
+def recursion(depth: int) -> Workload:
+    """
+    Generates deep recursion (every call has its own local frame)
+
+    :param depth: Depth of the recursion
+    :return: Workload
+    """
+    instructions = [
+        ("DEFVAR", ("var", "GF@n")),
+        ("DEFVAR", ("var", "GF@sum")),
+        ("MOVE", ("var", "GF@n"), ("int", str(depth))),
+        ("MOVE", ("var", "GF@sum"), ("int", "0")),
+        ("CALL", ("label", "down")),
+        ("WRITE", ("var", "GF@sum")),
+        ("EXIT", ("int", "0")),
+        ("LABEL", ("label", "down")),
+        ("CREATEFRAME",),
+        ("DEFVAR", ("var", "TF@n")),
+        ("MOVE", ("var", "TF@n"), ("var", "GF@n")),
+        ("PUSHFRAME",),
+        ("JUMPIFEQ", ("label", "down_end"), ("var", "LF@n"), ("int", "0")),
+        ("SUB", ("var", "GF@n"), ("var", "LF@n"), ("int", "1")),
+        ("CALL", ("label", "down")),
+        ("ADD", ("var", "GF@sum"), ("var", "GF@sum"), ("var", "LF@n")),
+        ("LABEL", ("label", "down_end")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ]
+
+    return Workload("recursion", depth, instructions, b"", str(depth * (depth + 1) // 2).encode())
+
+
+def string_building(length: int) -> Workload:
+    """
+    Generates building of a string by CONCAT and its rewriting by SETCHAR
+
+    :param length: Length of the built string (at least 1)
+    :return: Workload
+    """
+    length = max(1, length)
+    instructions = [
+        ("DEFVAR", ("var", "GF@s")),
+        ("DEFVAR", ("var", "GF@i")),
+        ("DEFVAR", ("var", "GF@length")),
+        # The loader doesn't accept empty string constants
+        ("MOVE", ("var", "GF@s"), ("string", "a")),
+        ("MOVE", ("var", "GF@i"), ("int", "1")),
+        ("LABEL", ("label", "build")),
+        ("JUMPIFEQ", ("label", "build_end"), ("var", "GF@i"), ("int", str(length))),
+        ("CONCAT", ("var", "GF@s"), ("var", "GF@s"), ("string", "a")),
+        ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1")),
+        ("JUMP", ("label", "build")),
+        ("LABEL", ("label", "build_end")),
+        ("MOVE", ("var", "GF@i"), ("int", "0")),
+        ("LABEL", ("label", "rewrite")),
+        ("JUMPIFEQ", ("label", "rewrite_end"), ("var", "GF@i"), ("int", str(length))),
+        ("SETCHAR", ("var", "GF@s"), ("var", "GF@i"), ("string", "b")),
+        ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "2")),
+        ("LT", ("var", "GF@length"), ("var", "GF@i"), ("int", str(length))),
+        ("JUMPIFEQ", ("label", "rewrite"), ("var", "GF@length"), ("bool", "true")),
+        ("LABEL", ("label", "rewrite_end")),
+        ("STRLEN", ("var", "GF@length"), ("var", "GF@s")),
+        ("WRITE", ("var", "GF@length")),
+        ("WRITE", ("string", "\\010")),
+        ("WRITE", ("var", "GF@s")),
+    ]
+
+    expected = "".join("b" if index % 2 == 0 else "a" for index in range(length))
+
+    return Workload("string_building", length, instructions, b"", f"{length}\n{expected}".encode())
+
+
+def stack_expressions(iterations: int) -> Workload:
+    """
+    Generates evaluation of expressions through the data stack
+
+    :param iterations: Number of evaluated expressions
+    :return: Workload
+    """
+    instructions = [
+        ("DEFVAR", ("var", "GF@i")),
+        ("DEFVAR", ("var", "GF@a")),
+        ("DEFVAR", ("var", "GF@b")),
+        ("DEFVAR", ("var", "GF@acc")),
+        ("MOVE", ("var", "GF@i"), ("int", "0")),
+        ("MOVE", ("var", "GF@acc"), ("int", "0")),
+        ("LABEL", ("label", "loop")),
+        ("JUMPIFEQ", ("label", "end"), ("var", "GF@i"), ("int", str(iterations))),
+        # acc = acc + (i * 3 + 7) % 1000 (modulo by IDIV)
+        ("PUSHS", ("var", "GF@i")),
+        ("PUSHS", ("int", "3")),
+        ("POPS", ("var", "GF@b")),
+        ("POPS", ("var", "GF@a")),
+        ("MUL", ("var", "GF@a"), ("var", "GF@a"), ("var", "GF@b")),
+        ("PUSHS", ("var", "GF@a")),
+        ("PUSHS", ("int", "7")),
+        ("POPS", ("var", "GF@b")),
+        ("POPS", ("var", "GF@a")),
+        ("ADD", ("var", "GF@a"), ("var", "GF@a"), ("var", "GF@b")),
+        ("PUSHS", ("var", "GF@a")),
+        ("PUSHS", ("var", "GF@a")),
+        ("POPS", ("var", "GF@b")),
+        ("IDIV", ("var", "GF@b"), ("var", "GF@b"), ("int", "1000")),
+        ("MUL", ("var", "GF@b"), ("var", "GF@b"), ("int", "1000")),
+        ("POPS", ("var", "GF@a")),
+        ("SUB", ("var", "GF@a"), ("var", "GF@a"), ("var", "GF@b")),
+        ("ADD", ("var", "GF@acc"), ("var", "GF@acc"), ("var", "GF@a")),
+        ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1")),
+        ("JUMP", ("label", "loop")),
+        ("LABEL", ("label", "end")),
+        ("WRITE", ("var", "GF@acc")),
+    ]
+
+    acc = sum((i * 3 + 7) % 1000 for i in range(iterations))
+
+    return Workload("stack_expressions", iterations, instructions, b"", str(acc).encode())
+
+
+def io_heavy(lines: int) -> Workload:
+    """
+    Generates copying of integers from the input to the output
+
+    :param lines: Number of input lines
+    :return: Workload
+    """
+    instructions = [
+        ("DEFVAR", ("var", "GF@x")),
+        ("DEFVAR", ("var", "GF@type")),
+        ("LABEL", ("label", "loop")),
+        ("READ", ("var", "GF@x"), ("type", "int")),
+        ("TYPE", ("var", "GF@type"), ("var", "GF@x")),
+        ("JUMPIFEQ", ("label", "end"), ("var", "GF@type"), ("string", "nil")),
+        ("WRITE", ("var", "GF@x")),
+        ("WRITE", ("string", "\\010")),
+        ("JUMP", ("label", "loop")),
+        ("LABEL", ("label", "end")),
+    ]
+
+    data = "".join(f"{number * 7919 % 100003}\n" for number in range(lines)).encode()
+
+    return Workload("io_heavy", lines, instructions, data, data)
+
+
+def straight_line(count: int) -> Workload:
+    """
+    Generates very large program without jumps (for scaling of the loader)
+
+    :param count: Number of generated instructions
+    :return: Workload
+    """
+    instructions = [
+        ("DEFVAR", ("var", "GF@x")),
+        ("MOVE", ("var", "GF@x"), ("int", "0")),
+    ]
+    instructions += [("ADD", ("var", "GF@x"), ("var", "GF@x"), ("int", "1"))] * count
+    instructions.append(("WRITE", ("var", "GF@x")))
+
+    return Workload("straight_line", count, instructions, b"", str(count).encode())
+
+
+WORKLOADS: Dict[str, Tuple[Callable[[int], Workload], int]] = {
+    "integer_loop": (integer_loop, 5000),
+    "recursion": (recursion, 2000),
+    "string_building": (string_building, 5000),
+    "stack_expressions": (stack_expressions, 2000),
+    "io_heavy": (io_heavy, 5000),
+    "straight_line": (straight_line, 20000),
+}
+"""Available workloads: name -> (generator, default size)"""
+
+
+def generate(name: str, size: Optional[int] = None) -> Workload:
+    """
+    Generates workload
+
+    :param name: Name of the workload (one of WORKLOADS)
+    :param size: Size parameter or None for the default one
+    :return: Workload
+    :raise KeyError: Unknown workload
+    """
+    generator, default_size = WORKLOADS[name]
+
+    return generator(size if size is not None else default_size)
+
+
+def generate_all(scale: float = 1.0) -> List[Workload]:
+    """
+    Generates all workloads
+
+    :param scale: Multiplier of default sizes
+    :return: Workloads
+    """
+    return [generator(max(1, round(default_size * scale))) for generator, default_size in WORKLOADS.values()]
+
+
+def main() -> int:
+    """
+    Main function of the generator
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Generator of synthetic IPPcode22 workloads")
+    arg_parser.add_argument("name", choices=list(WORKLOADS), help="Generated workload")
+    arg_parser.add_argument("--size", metavar="n", type=int, default=None,
+                            help="Size parameter of the workload (iterations, depth, length, lines, instructions)")
+    arg_parser.add_argument("--output", metavar="file", type=str, default=None,
+                            help="File for the XML representation (the input is written to file.in), "
+                                 "standard output if not set")
+    args = arg_parser.parse_args()
+
+    workload = generate(args.name, args.size)
+    if args.output is None:
+        print(workload.to_xml().decode())
+
+        return 0
+
+    with open(args.output, "wb") as file:
+        file.write(workload.to_xml())
+    with open(args.output + ".in", "wb") as file:
+        file.write(workload.input_data)
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,187 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Engines interpreting programs for differential fuzzing
+
+The reference engine is the plain run loop of Interpreter. Other engines are the optimised or alternative execution
+paths which must behave the same: programs executed from binary images, memoized calls of pure subroutines,
+interpretation in slices, the instrumented run loop with execution hooks and lockstep execution by NumPy arrays.
+
+Every engine interprets one program with more inputs and returns results comparable with run_in_memory(). An engine
+can return None for an input it doesn't handle (lockstep lanes leaving to the scalar interpreter), such results
+aren't compared.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from interpreter import lockstep
+from interpreter.code import Instruction, OpCode, Program
+from interpreter.hooks import ExecutionHook
+from interpreter.image import ImageProgram, build_image
+from interpreter.memoization import Memoizer
+from interpreter.memory import Value
+from interpreter.runner import RunResult, run_in_memory
+
+# Engine: (program, inputs, instruction limit) -> results of the inputs
+Engine = Callable[[Program, List[bytes], int], List[Optional[RunResult]]]
+
+SLICED_TIME_LIMIT = 3600.0
+"""Time limit making run_in_memory() interpret in slices (it is never reached)"""
+
+LOCKSTEP_TIME_LIMIT = 10.0
+"""Time limit of lockstep groups (lanes over the limit leave to the scalar interpreter)"""
+
+
+class ObservingHook(ExecutionHook):
+    """Hook receiving every event (it forces the instrumented run loop with dispatching of all events)"""
+
+    def __init__(self):
+        """Class constructor"""
+        self.__events = 0
+
+    @property
+    def events(self) -> int:
+        """
+        Getter for number of received events
+
+        :return: Number of events
+        """
+        return self.__events
+
+    def before_instruction(self, interpreter, position: int, instruction: Instruction) -> None:
+        """Counts event of instruction"""
+        self.__events += 1
+
+    def after_instruction(self, interpreter, position: int, instruction: Instruction) -> None:
+        """Counts event of instruction"""
+        self.__events += 1
+
+    def on_call(self, interpreter, position: int, label: str) -> None:
+        """Counts event of call"""
+        self.__events += 1
+
+    def on_return(self, interpreter, position: int) -> None:
+        """Counts event of return"""
+        self.__events += 1
+
+    def on_frame(self, interpreter, position: int, op_code: OpCode) -> None:
+        """Counts event of frame"""
+        self.__events += 1
+
+    def on_variable_write(self, interpreter, position: int, name: str, value: Value) -> None:
+        """Counts event of variable write"""
+        self.__events += 1
+
+    def on_input(self, interpreter, position: int, value: Value) -> None:
+        """Counts event of input"""
+        self.__events += 1
+
+    def on_output(self, interpreter, position: int, stream: str, value: Value) -> None:
+        """Counts event of output"""
+        self.__events += 1
+
+    def on_break(self, interpreter, position: int) -> None:
+        """Counts event of BREAK"""
+        self.__events += 1
+
+
+def run_reference(program: Program, inputs: List[bytes], instruction_limit: int) -> List[Optional[RunResult]]:
+    """
+    Interprets the program by the plain run loop
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param instruction_limit: Maximum number of executed instructions
+    :return: Results of interpretations
+    """
+    return [run_in_memory(program, input_data, instruction_limit) for input_data in inputs]
+
+
+def run_image(program: Program, inputs: List[bytes], instruction_limit: int) -> List[Optional[RunResult]]:
+    """
+    Interprets the program decoded from its binary image
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param instruction_limit: Maximum number of executed instructions
+    :return: Results of interpretations
+    """
+    image_program = ImageProgram(build_image(program))
+
+    return [run_in_memory(image_program, input_data, instruction_limit) for input_data in inputs]
+
+
+def run_memoized(program: Program, inputs: List[bytes], instruction_limit: int) -> List[Optional[RunResult]]:
+    """
+    Interprets the program with memoization of pure subroutines
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param instruction_limit: Maximum number of executed instructions
+    :return: Results of interpretations
+    """
+    return [run_in_memory(program, input_data, instruction_limit, memoizer=Memoizer(program))
+            for input_data in inputs]
+
+
+def run_sliced(program: Program, inputs: List[bytes], instruction_limit: int) -> List[Optional[RunResult]]:
+    """
+    Interprets the program in slices of instructions (like with time limits or in sessions)
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param instruction_limit: Maximum number of executed instructions
+    :return: Results of interpretations
+    """
+    return [run_in_memory(program, input_data, instruction_limit, SLICED_TIME_LIMIT) for input_data in inputs]
+
+
+def run_hooked(program: Program, inputs: List[bytes], instruction_limit: int) -> List[Optional[RunResult]]:
+    """
+    Interprets the program by the instrumented run loop
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param instruction_limit: Maximum number of executed instructions
+    :return: Results of interpretations
+    """
+    return [run_in_memory(program, input_data, instruction_limit, hooks=[ObservingHook()]) for input_data in inputs]
+
+
+def run_lockstep(program: Program, inputs: List[bytes], instruction_limit: int) -> List[Optional[RunResult]]:
+    """
+    Interprets the program with all inputs together by lockstep execution
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param instruction_limit: Maximum number of executed instructions (lockstep execution has no limit, lanes
+        reaching it in the reference engine aren't compared)
+    :return: Results of interpretations (None for lanes left to the scalar interpreter)
+    """
+    return lockstep.run_lockstep(program, inputs, time_limit=LOCKSTEP_TIME_LIMIT)
+
+
+REFERENCE = "reference"
+"""Name of the reference engine"""
+
+ENGINES: Dict[str, Engine] = {
+    REFERENCE: run_reference,
+    "image": run_image,
+    "memoized": run_memoized,
+    "sliced": run_sliced,
+    "hooked": run_hooked,
+    "lockstep": run_lockstep,
+}
+"""Available engines by their names"""
+
+
+def available_engines() -> List[str]:
+    """
+    Lists engines usable in this environment (except the reference one)
+
+    :return: Names of engines
+    """
+    return [name for name in ENGINES if name != REFERENCE and (name != "lockstep" or lockstep.is_available())]
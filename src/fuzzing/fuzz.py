@@ -0,0 +1,356 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Differential fuzzing of interpretation engines
+
+Random programs (well-typed and ill-typed, see fuzzing.generator) are interpreted with random inputs by the reference
+engine and by every optimised engine (see fuzzing.engines). Exit codes, standard outputs and standard error outputs
+must be the same. Internal errors of the reference engine (exit code 99 with a traceback) are reported too, because
+they hide the behaviour the engines should agree on.
+
+Failing cases are minimized and written into the output directory in the layout of the test corpus (name.src,
+name.in, name.out, name.rc) with a report (name.txt), so they can be added to tests directly.
+
+Usage (from src directory): python3 -m fuzzing.fuzz [--cases n] [--seed n] [--engines list] [--output dir]
+"""
+
+import os
+import random
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from fuzzing.engines import ENGINES, REFERENCE, available_engines
+from fuzzing.generator import generate_input, generate_program, to_source
+from fuzzing.minimize import minimize_case
+from interpreter.code import Program
+from interpreter.error import ExitCode
+from interpreter.runner import RunResult, load_program_from_bytes
+from testing.programs import Instruction, to_xml
+
+TRACEBACK = b"Traceback (most recent call last):"
+"""Start of reports of internal errors"""
+
+
+def normalize_stderr(stderr: bytes) -> bytes:
+    """
+    Replaces traceback of internal error by its last line (tracebacks differ by execution paths of engines)
+
+    :param stderr: Standard error output
+    :return: Normalized output
+    """
+    start = stderr.find(TRACEBACK)
+    if start < 0:
+        return stderr
+
+    lines = stderr[start:].strip().split(b"\n")
+
+    return stderr[:start] + lines[-1] + b"\n"
+
+
+def crash_signature(result: RunResult) -> Optional[str]:
+    """
+    Identifies internal error of the interpretation
+
+    :param result: Result of the interpretation
+    :return: Type of the exception and place where it was raised or None if it isn't an internal error
+    """
+    if result.exit_code != ExitCode.INTERNAL_ERROR or result.limit_exceeded or TRACEBACK not in result.stderr:
+        return None
+
+    lines = result.stderr[result.stderr.find(TRACEBACK):].decode(errors="replace").strip().split("\n")
+    places = [line.strip() for line in lines if line.strip().startswith("File ")]
+    exception_type = lines[-1].split(":")[0]
+
+    return f"{exception_type} at {places[-1] if places else 'unknown place'}"
+
+
+def differences(reference: RunResult, result: Optional[RunResult]) -> Tuple[str, ...]:
+    """
+    Compares result of an engine with the reference one
+
+    :param reference: Result of the reference engine
+    :param result: Result of the compared engine or None (not handled by the engine)
+    :return: Names of differing parts (empty if they are the same or incomparable)
+    """
+    if result is None or reference.limit_exceeded or result.limit_exceeded:
+        # Engines can execute different numbers of instructions (memoization)
+        return ()
+
+    differing = []
+    if int(result.exit_code) != int(reference.exit_code):
+        differing.append("exit code")
+    if result.stdout != reference.stdout:
+        differing.append("stdout")
+    if normalize_stderr(result.stderr) != normalize_stderr(reference.stderr):
+        differing.append("stderr")
+
+    return tuple(differing)
+
+
+def load(instructions: List[Instruction]) -> Optional[Program]:
+    """
+    Loads generated program
+
+    :param instructions: Instructions of the program
+    :return: Loaded program or None if it can't be loaded
+    """
+    program, _, _ = load_program_from_bytes(to_xml(instructions))
+
+    return program
+
+
+def run_engine(name: str, program: Program, input_data: bytes, instruction_limit: int) -> Optional[RunResult]:
+    """
+    Interprets the program with one input by the engine
+
+    :param name: Name of the engine
+    :param program: Loaded program
+    :param input_data: Content of the file with inputs
+    :param instruction_limit: Maximum number of executed instructions
+    :return: Result of the interpretation or None if it isn't handled by the engine
+    """
+    return ENGINES[name](program, [input_data], instruction_limit)[0]
+
+
+def describe_result(result: Optional[RunResult]) -> str:
+    """
+    Describes result of interpretation for reports
+
+    :param result: Result or None
+    :return: Description
+    """
+    if result is None:
+        return "  not handled\n"
+
+    return (f"  exit code: {int(result.exit_code)}{' (instruction limit)' if result.limit_exceeded else ''}\n"
+            f"  stdout: {result.stdout!r}\n"
+            f"  stderr: {normalize_stderr(result.stderr)!r}\n")
+
+
+class Fuzzer:
+    """Differential fuzzer collecting failing cases"""
+
+    def __init__(self, engines: List[str], instruction_limit: int, output_dir: str, minimize: bool,
+                 max_reports: int):
+        """
+        Class constructor
+
+        :param engines: Names of compared engines (without the reference one)
+        :param instruction_limit: Maximum number of executed instructions of one interpretation
+        :param output_dir: Directory for failing cases
+        :param minimize: Should be failing cases minimized?
+        :param max_reports: Maximum number of written failing cases
+        """
+        self.__engines = engines
+        self.__instruction_limit = instruction_limit
+        self.__output_dir = output_dir
+        self.__minimize = minimize
+        self.__max_reports = max_reports
+
+        self.__exit_codes: Counter = Counter()
+        self.__compared: Counter = Counter()
+        self.__mismatches: Counter = Counter()
+        self.__crashes: Counter = Counter()
+        self.__reported: Dict[Tuple, str] = {}
+
+    @property
+    def mismatches(self) -> int:
+        """
+        Getter for number of found mismatches
+
+        :return: Number of inputs where an engine differed from the reference
+        """
+        return sum(self.__mismatches.values())
+
+    def run_case(self, instructions: List[Instruction], inputs: List[bytes]) -> None:
+        """
+        Interprets the program with the inputs by all engines and reports differences
+
+        :param instructions: Instructions of the program
+        :param inputs: Contents of files with inputs
+        """
+        program = load(instructions)
+        if program is None:
+            self.__exit_codes["not loaded"] += 1
+            return
+
+        references = ENGINES[REFERENCE](program, inputs, self.__instruction_limit)
+        for input_data, reference in zip(inputs, references):
+            self.__exit_codes["limit" if reference.limit_exceeded else int(reference.exit_code)] += 1
+            signature = crash_signature(reference)
+            if signature is not None:
+                self.__crashes[signature] += 1
+                self.__report(("crash", signature), instructions, input_data, self.__crash_predicate(signature))
+
+        for engine in self.__engines:
+            results = ENGINES[engine](program, inputs, self.__instruction_limit)
+            for input_data, reference, result in zip(inputs, references, results):
+                if result is None or reference.limit_exceeded:
+                    continue
+                self.__compared[engine] += 1
+
+                differing = differences(reference, result)
+                if differing:
+                    self.__mismatches[engine] += 1
+                    self.__report(("mismatch", engine, differing, int(reference.exit_code)), instructions, input_data,
+                                  self.__mismatch_predicate(engine, differing))
+
+    def summary(self) -> str:
+        """
+        Summarizes results of fuzzing
+
+        :return: Text summary
+        """
+        lines = ["Exit codes of the reference engine:"]
+        exit_codes = sorted(self.__exit_codes.items(), key=lambda item: str(item[0]).rjust(3))
+        lines += [f"  {code}: {count}" for code, count in exit_codes]
+        lines.append("Compared results (mismatches):")
+        lines += [f"  {engine}: {self.__compared[engine]} ({self.__mismatches[engine]})" for engine in self.__engines]
+        if self.__crashes:
+            lines.append("Internal errors of the reference engine:")
+            lines += [f"  {count}x {signature}" for signature, count in self.__crashes.most_common()]
+        if self.__reported:
+            lines.append(f"Failing cases written to {self.__output_dir}:")
+            lines += [f"  {name}" for name in self.__reported.values()]
+
+        return "\n".join(lines)
+
+    def __crash_predicate(self, signature: str):
+        """
+        Creates predicate of minimization of internal errors
+
+        :param signature: Signature of the internal error
+        :return: Predicate
+        """
+        def still_fails(instructions: List[Instruction], input_data: bytes) -> bool:
+            program = load(instructions)
+            if program is None:
+                return False
+
+            return crash_signature(run_engine(REFERENCE, program, input_data, self.__instruction_limit)) == signature
+
+        return still_fails
+
+    def __mismatch_predicate(self, engine: str, differing: Tuple[str, ...]):
+        """
+        Creates predicate of minimization of mismatches
+
+        :param engine: Name of the differing engine
+        :param differing: Differing parts of results
+        :return: Predicate
+        """
+        def still_fails(instructions: List[Instruction], input_data: bytes) -> bool:
+            program = load(instructions)
+            if program is None:
+                return False
+
+            reference = run_engine(REFERENCE, program, input_data, self.__instruction_limit)
+            result = run_engine(engine, program, input_data, self.__instruction_limit)
+
+            return differences(reference, result) == differing
+
+        return still_fails
+
+    def __report(self, key: Tuple, instructions: List[Instruction], input_data: bytes, still_fails) -> None:
+        """
+        Minimizes and writes failing case (once for every kind of failure)
+
+        :param key: Kind of the failure
+        :param instructions: Instructions of the failing program
+        :param input_data: Input of the failing program
+        :param still_fails: Predicate of minimization
+        """
+        if key in self.__reported or len(self.__reported) >= self.__max_reports:
+            return
+
+        if self.__minimize:
+            instructions, input_data = minimize_case(instructions, input_data, still_fails)
+
+        name = f"{key[0]}-{len(self.__reported) + 1:03d}"
+        self.__reported[key] = name
+        print(f"Found {' '.join(str(part) for part in key)} -> {name}")
+
+        program = load(instructions)
+        reference = run_engine(REFERENCE, program, input_data, self.__instruction_limit)
+        report = f"Failure: {key}\n\nProgram:\n{to_source(instructions)}\nInput: {input_data!r}\n\n"
+        report += f"{REFERENCE}:\n{describe_result(reference)}"
+        for engine in self.__engines:
+            result = run_engine(engine, program, input_data, self.__instruction_limit)
+            report += f"{engine}:\n{describe_result(result)}"
+
+        os.makedirs(self.__output_dir, exist_ok=True)
+        path = os.path.join(self.__output_dir, name)
+        with open(path + ".src", "wb") as file:
+            file.write(to_xml(instructions))
+        with open(path + ".in", "wb") as file:
+            file.write(input_data)
+        with open(path + ".out", "wb") as file:
+            file.write(reference.stdout)
+        with open(path + ".rc", "w") as file:
+            file.write(f"{int(reference.exit_code)}")
+        with open(path + ".txt", "w") as file:
+            file.write(report)
+
+
+def main() -> int:
+    """
+    Main function of the fuzzer
+
+    :return: Exit code (1 if any engine differed from the reference)
+    """
+    arg_parser = ArgumentParser(description="Differential fuzzing of interpretation engines")
+    arg_parser.add_argument("--cases", metavar="n", type=int, default=200, help="Number of generated programs")
+    arg_parser.add_argument("--inputs", metavar="n", type=int, default=4, help="Number of inputs of every program")
+    arg_parser.add_argument("--seed", metavar="n", type=int, default=None,
+                            help="Seed of generation (random if not set)")
+    arg_parser.add_argument("--size", metavar="n", type=int, default=30, help="Number of statements of programs")
+    arg_parser.add_argument("--ill-typed", metavar="ratio", type=float, default=0.5,
+                            help="Ratio of ill-typed programs")
+    arg_parser.add_argument("--numeric", metavar="ratio", type=float, default=0.3,
+                            help="Ratio of numeric programs (interpretable by lockstep execution)")
+    arg_parser.add_argument("--engines", metavar="list", type=str, default=None,
+                            help=f"Comma-separated compared engines (all available by default: "
+                                 f"{', '.join(available_engines())})")
+    arg_parser.add_argument("--instruction-limit", metavar="n", type=int, default=10000,
+                            help="Maximum number of executed instructions of one interpretation")
+    arg_parser.add_argument("--output", metavar="dir", type=str, default="fuzz-failures",
+                            help="Directory for minimized failing cases")
+    arg_parser.add_argument("--max-reports", metavar="n", type=int, default=20,
+                            help="Maximum number of written failing cases (every kind of failure is written once)")
+    arg_parser.add_argument("--no-minimize", action="store_true", default=False,
+                            help="Write failing cases without minimization")
+    args = arg_parser.parse_args()
+
+    engines = args.engines.split(",") if args.engines is not None else available_engines()
+    unknown = [engine for engine in engines if engine not in ENGINES or engine == REFERENCE]
+    if unknown:
+        print(f"Unknown engines: {', '.join(unknown)}")
+
+        return 1
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    print(f"Seed {seed}, {args.cases} programs with {args.inputs} inputs, engines: {', '.join(engines)}")
+
+    fuzzer = Fuzzer(engines, args.instruction_limit, args.output, not args.no_minimize, args.max_reports)
+    start = time.perf_counter()
+    for case in range(args.cases):
+        case_random = random.Random(seed * 1_000_003 + case)
+        well_typed = case_random.random() >= args.ill_typed
+        numeric = case_random.random() < args.numeric
+        instructions = generate_program(case_random, well_typed, args.size, numeric)
+        inputs = [generate_input(case_random, numeric) for _ in range(args.inputs)]
+        fuzzer.run_case(instructions, inputs)
+
+    print(fuzzer.summary())
+    print(f"Finished in {time.perf_counter() - start:.1f} s")
+
+    return 1 if fuzzer.mismatches > 0 else 0
+
+
+if __name__ == '__main__':
+    exit(main())
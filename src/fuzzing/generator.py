@@ -0,0 +1,495 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Generator of random IPPcode22 programs and their inputs
+
+Well-typed programs track data types of global variables, so operands have the types expected by
+instructions and values stay valid (rare divisions by zero and invalid exit codes aside), most of them are interpreted
+to their end. Ill-typed programs choose operands of any type, leave variables undefined or uninitialized and use
+frames without creating them. Both kinds prefer corner cases: nil operands, bounds of strings, uninitialized
+variables, big integers and escape sequences.
+
+Numeric programs use only integers, booleans, nil, global variables and jumps, so they can be interpreted by lockstep
+execution (other programs leave it at their first string or frame instruction).
+
+Every program can be loaded (labels are unique and defined), loops are bounded by counters and subroutines
+aren't recursive.
+"""
+
+from random import Random
+from typing import Dict, List, Optional, Tuple
+
+from testing.programs import Instruction
+
+DATA_TYPES = ("int", "bool", "string", "nil")
+"""Data types of values"""
+
+NUMERIC_DATA_TYPES = ("int", "bool", "nil")
+"""Data types of values of numeric programs"""
+
+NUMERIC_KINDS = ("string", "conversion", "type", "stack", "frame", "call", "misuse")
+"""Kinds of statements which aren't generated into numeric programs"""
+
+VARIABLES = ("GF@a", "GF@b", "GF@c", "GF@d", "GF@e")
+"""Global variables used by programs"""
+
+INTEGERS = ("0", "1", "-1", "2", "7", "-13", "65", "255", "1114111", "1114112", "4611686018427387904",
+            "-9223372036854775808", "100000000000000000000")
+"""Interesting integer constants"""
+
+STRINGS = ("a", "abc", "x\\032y", "\\092", "\\035", "\\010", "č", "€uro", "<&>", "0", "42", "true", "nil")
+"""Interesting string constants (in IPPcode22 notation with escape sequences)"""
+
+INPUT_LINES = ("0", "42", "-7", "+5", " 3", "abc", "true", "TRUE", "false", "nil", "", "9999999999999999999999",
+               "č€", "1.5")
+"""Interesting lines of inputs"""
+
+NUMERIC_INPUT_LINES = ("0", "42", "-7", "9223372036854775807", "9999999999999999999999")
+"""Lines of inputs of numeric programs (invalid integers make the reference engine crash)"""
+
+
+class ProgramGenerator:
+    """Generator of one random program"""
+
+    def __init__(self, random: Random, well_typed: bool, size: int = 30, numeric: bool = False):
+        """
+        Class constructor
+
+        :param random: Source of randomness
+        :param well_typed: Should operands have the expected types?
+        :param size: Approximate number of statements of the main body
+        :param numeric: Should the program use only integers, booleans and nil in global variables?
+        """
+        self.__random = random
+        self.__numeric = numeric
+        self.__data_types = NUMERIC_DATA_TYPES if numeric else DATA_TYPES
+        self.__well_typed = well_typed
+        self.__size = size
+
+        self.__instructions: List[Instruction] = []
+        self.__subroutines: List[List[Instruction]] = []
+        # Known data types of global variables (None for uninitialized ones)
+        self.__types: Dict[str, Optional[str]] = {}
+        self.__label_count = 0
+        self.__depth = 0
+        # Counters of loops (defined at the start, loops can be repeated by outer loops)
+        self.__counters: List[str] = []
+        # Values surely on the data stack (pushed in the main body outside of blocks)
+        self.__pushed = 0
+
+    def generate(self) -> List[Instruction]:
+        """
+        Generates the program
+
+        :return: Instructions of the program
+        """
+        random = self.__random
+        for variable in VARIABLES:
+            if self.__well_typed or random.random() < 0.8:
+                self.__emit("DEFVAR", ("var", variable))
+                self.__types[variable] = None
+                if self.__well_typed or random.random() < 0.7:
+                    self.__move(variable, random.choice(self.__data_types))
+
+        for _ in range(self.__size):
+            self.__statement()
+
+        if random.random() < 0.3:
+            self.__emit("EXIT", self.__exit_code())
+        elif self.__subroutines:
+            self.__emit("EXIT", ("int", "0"))
+        for subroutine in self.__subroutines:
+            self.__instructions += subroutine
+
+        return [("DEFVAR", ("var", counter)) for counter in self.__counters] + self.__instructions
+
+    def __statement(self) -> None:
+        """Generates a random statement (one or more instructions)"""
+        random = self.__random
+        kinds = ("arithmetic", "relation", "logic", "string", "conversion", "type", "move", "stack", "io", "frame",
+                 "jump", "loop", "call", "exit", "misuse")
+        weights = [10, 8, 5, 10, 6, 4, 6, 6, 8, 4, 4, 2, 2, 1, 0 if self.__well_typed else 4]
+        if self.__numeric:
+            weights = [0 if kind in NUMERIC_KINDS else weight for kind, weight in zip(kinds, weights)]
+        kind = random.choices(kinds, weights)[0]
+
+        if kind == "arithmetic":
+            destination = self.__destination()
+            op_code = random.choice(("ADD", "SUB", "MUL", "IDIV"))
+            if random.random() < (0.02 if self.__well_typed else 0.2):
+                second = ("int", "0")
+            elif op_code == "IDIV" and self.__well_typed:
+                second = ("int", random.choice(("1", "-1", "2", "7", "-13", "65")))
+            else:
+                second = self.__symbol("int")
+            self.__emit(op_code, destination, self.__symbol("int"), second)
+            self.__set_type(destination, "int")
+        elif kind == "relation":
+            destination = self.__destination()
+            op_code = random.choice(("LT", "GT", "EQ"))
+            data_type = random.choice(self.__data_types if op_code == "EQ" else
+                                      [data_type for data_type in self.__data_types if data_type != "nil"])
+            second_type = "nil" if op_code == "EQ" and not self.__well_typed and random.random() < 0.2 else data_type
+            self.__emit(op_code, destination, self.__symbol(data_type), self.__symbol(second_type))
+            self.__set_type(destination, "bool")
+        elif kind == "logic":
+            destination = self.__destination()
+            if random.random() < 0.3:
+                self.__emit("NOT", destination, self.__symbol("bool"))
+            else:
+                self.__emit(random.choice(("AND", "OR")), destination, self.__symbol("bool"), self.__symbol("bool"))
+            self.__set_type(destination, "bool")
+        elif kind == "string":
+            self.__string_statement()
+        elif kind == "conversion":
+            destination = self.__destination()
+            if random.random() < 0.5:
+                code_point = ("int", str(random.randint(32, 0x17f))) if self.__well_typed else self.__symbol("int")
+                self.__emit("INT2CHAR", destination, code_point)
+                self.__set_type(destination, "string")
+            else:
+                # Only one-character strings in well-typed programs (wider ones make the reference engine crash)
+                string = ("string", random.choice(("a", "č", "\\035"))) if self.__well_typed else \
+                    self.__symbol("string")
+                self.__emit("STRI2INT", destination, string, self.__index())
+                # The reference engine stores the code as a string value, so its type isn't tracked
+                self.__set_type(destination, None)
+        elif kind == "type":
+            destination = self.__destination()
+            self.__emit("TYPE", destination, self.__symbol(random.choice(self.__data_types), allow_uninitialized=True))
+            # The name of the type can be empty (uninitialized variable), so it isn't used as a string
+            self.__set_type(destination, None)
+        elif kind == "move":
+            self.__move(self.__destination(), random.choice(self.__data_types))
+        elif kind == "stack":
+            if random.random() < 0.6 or (self.__well_typed and (self.__pushed == 0 or self.__depth > 0)):
+                self.__emit("PUSHS", self.__symbol(random.choice(self.__data_types)))
+                if self.__depth == 0:
+                    self.__pushed += 1
+            else:
+                self.__pushed = max(self.__pushed - 1, 0)
+                destination = self.__destination()
+                self.__emit("POPS", destination)
+                # The type of the popped value isn't tracked
+                self.__types.pop(destination[1], None)
+        elif kind == "io":
+            self.__io_statement()
+        elif kind == "frame":
+            self.__frame_statement()
+        elif kind == "jump":
+            self.__jump_statement()
+        elif kind == "loop":
+            self.__loop_statement()
+        elif kind == "call":
+            self.__call_statement()
+        elif kind == "exit":
+            if random.random() < 0.3:
+                self.__emit("EXIT", self.__exit_code())
+        else:
+            self.__emit(random.choice(("POPFRAME", "PUSHFRAME", "RETURN", "CREATEFRAME")))
+
+    def __string_statement(self) -> None:
+        """Generates instruction working with strings"""
+        random = self.__random
+        op_code = random.choice(("CONCAT", "STRLEN", "GETCHAR", "SETCHAR"))
+        if op_code == "SETCHAR":
+            destination = self.__destination("string")
+            if self.__types.get(destination[1], "") != "string" and self.__well_typed:
+                self.__move(destination, "string")
+            self.__emit("SETCHAR", destination, self.__index(), self.__symbol("string"))
+            return
+
+        destination = self.__destination()
+        if op_code == "CONCAT":
+            self.__emit("CONCAT", destination, self.__symbol("string"), self.__symbol("string"))
+            self.__set_type(destination, "string")
+        elif op_code == "STRLEN":
+            self.__emit("STRLEN", destination, self.__symbol("string"))
+            self.__set_type(destination, "int")
+        else:
+            self.__emit("GETCHAR", destination, self.__symbol("string"), self.__index())
+            self.__set_type(destination, "string")
+
+    def __io_statement(self) -> None:
+        """Generates READ, WRITE or DPRINT"""
+        random = self.__random
+        choice = random.random()
+        if choice < 0.35:
+            destination = self.__destination()
+            data_type = random.choice(("int", "bool") if self.__numeric else ("int", "bool", "string"))
+            self.__emit("READ", destination, ("type", data_type))
+            # nil is read for invalid or missing inputs
+            self.__types.pop(destination[1], None)
+        elif choice < 0.9 or self.__numeric:
+            self.__emit("WRITE", self.__symbol(random.choice(self.__data_types)))
+        else:
+            self.__emit("DPRINT", self.__symbol(random.choice(self.__data_types)))
+
+    def __frame_statement(self) -> None:
+        """Generates work with temporary and local frames"""
+        random = self.__random
+        if not self.__well_typed and random.random() < 0.5:
+            self.__emit(random.choice(("CREATEFRAME", "PUSHFRAME", "POPFRAME")))
+            if random.random() < 0.5:
+                self.__emit("DEFVAR", ("var", random.choice(("TF@x", "LF@x"))))
+            return
+
+        data_type = random.choice(self.__data_types)
+        self.__emit("CREATEFRAME")
+        self.__emit("DEFVAR", ("var", "TF@x"))
+        if self.__well_typed or random.random() < 0.8:
+            self.__emit("MOVE", ("var", "TF@x"), self.__constant(data_type))
+        self.__emit("PUSHFRAME")
+        self.__emit(random.choice(("WRITE", "PUSHS")), ("var", "LF@x"))
+        self.__emit("POPFRAME")
+        if random.random() < 0.5:
+            self.__emit("WRITE", ("var", "TF@x"))
+
+    def __jump_statement(self) -> None:
+        """Generates forward conditional or unconditional jump over a few statements"""
+        random = self.__random
+        label = self.__new_label()
+        if random.random() < 0.2:
+            self.__emit("JUMP", ("label", label))
+        else:
+            data_type = random.choice(self.__data_types)
+            second_type = "nil" if not self.__well_typed and random.random() < 0.2 else data_type
+            self.__emit(random.choice(("JUMPIFEQ", "JUMPIFNEQ")), ("label", label), self.__symbol(data_type),
+                        self.__symbol(second_type))
+        self.__block(random.randint(1, 3))
+        self.__emit("LABEL", ("label", label))
+
+    def __loop_statement(self) -> None:
+        """Generates loop with a counter"""
+        if self.__depth > 1:
+            return
+
+        label = self.__new_label()
+        counter = f"GF@{label}"
+        self.__counters.append(counter)
+        self.__emit("MOVE", ("var", counter), ("int", "0"))
+        self.__emit("LABEL", ("label", label))
+        self.__block(self.__random.randint(1, 4), repeated=True)
+        self.__emit("ADD", ("var", counter), ("var", counter), ("int", "1"))
+        self.__emit("JUMPIFNEQ", ("label", label), ("var", counter), ("int", str(self.__random.randint(1, 5))))
+
+    def __call_statement(self) -> None:
+        """Generates call of a new subroutine (subroutines don't call others)"""
+        if self.__depth > 0:
+            return
+
+        label = self.__new_label()
+        self.__emit("CALL", ("label", label))
+
+        main_instructions = self.__instructions
+        types = dict(self.__types)
+        self.__instructions = [("LABEL", ("label", label))]
+        self.__block(self.__random.randint(1, 4))
+        self.__emit("RETURN")
+        self.__subroutines.append(self.__instructions)
+        self.__instructions = main_instructions
+        # Types after the call are the ones at the end of the subroutine (it doesn't jump back)
+        self.__types = {variable: data_type for variable, data_type in self.__types.items() if
+                        types.get(variable, "") == data_type}
+
+    def __block(self, statements: int, repeated: bool = False) -> None:
+        """
+        Generates nested statements
+
+        :param statements: Number of statements
+        :param repeated: Is the block body of a loop?
+        """
+        # Types inside the block don't hold after it (the block can be skipped or repeated)
+        types = dict(self.__types)
+        self.__depth += 1
+        for _ in range(statements):
+            self.__statement()
+        if repeated:
+            # The next iteration expects the types from the start of the block
+            for variable, data_type in types.items():
+                if data_type is not None and self.__types.get(variable) != data_type:
+                    self.__emit("MOVE", ("var", variable), self.__constant(data_type))
+                    self.__types[variable] = data_type
+        self.__depth -= 1
+        self.__types = {variable: data_type for variable, data_type in types.items() if
+                        self.__types.get(variable, "") == data_type}
+
+    def __move(self, destination, data_type: str) -> None:
+        """
+        Generates MOVE of a value of the data type
+
+        :param destination: Variable name or argument of the destination
+        :param data_type: Data type of the moved value
+        """
+        if isinstance(destination, str):
+            destination = ("var", destination)
+        self.__emit("MOVE", destination, self.__symbol(data_type))
+        self.__set_type(destination, data_type)
+
+    def __destination(self, data_type: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Chooses variable for writing
+
+        :param data_type: Preferred data type of the current value or None
+        :return: Argument with the variable
+        """
+        random = self.__random
+        if not self.__well_typed and random.random() < 0.1:
+            return "var", random.choice(("GF@undefined", "TF@x", "LF@x"))
+
+        candidates = [variable for variable, known_type in self.__types.items() if known_type == data_type]
+        if data_type is not None and candidates and random.random() < 0.8:
+            return "var", random.choice(candidates)
+
+        return "var", random.choice(VARIABLES)
+
+    def __symbol(self, data_type: str, allow_uninitialized: bool = False) -> Tuple[str, str]:
+        """
+        Chooses operand of the data type (of any type in ill-typed programs with some probability)
+
+        :param data_type: Expected data type
+        :param allow_uninitialized: Can be chosen uninitialized variable (even in well-typed programs)?
+        :return: Argument with a constant or a variable
+        """
+        random = self.__random
+        if not self.__well_typed and random.random() < 0.3:
+            if random.random() < 0.5:
+                return "var", random.choice(VARIABLES + ("GF@undefined", "TF@x", "LF@x"))
+            data_type = random.choice(self.__data_types)
+
+        if allow_uninitialized and random.random() < 0.3:
+            uninitialized = [variable for variable, known_type in self.__types.items() if known_type is None]
+            if uninitialized:
+                return "var", random.choice(uninitialized)
+
+        variables = [variable for variable, known_type in self.__types.items() if known_type == data_type]
+        if variables and random.random() < 0.5:
+            return "var", random.choice(variables)
+
+        return self.__constant(data_type)
+
+    def __constant(self, data_type: str) -> Tuple[str, str]:
+        """
+        Chooses constant of the data type
+
+        :param data_type: Data type
+        :return: Argument with the constant
+        """
+        random = self.__random
+        if data_type == "int":
+            if random.random() < 0.3:
+                return "int", str(random.randint(-100, 100))
+            return "int", random.choice(INTEGERS)
+        elif data_type == "bool":
+            return "bool", random.choice(("true", "false"))
+        elif data_type == "string":
+            return "string", random.choice(STRINGS)
+
+        return "nil", "nil"
+
+    def __index(self) -> Tuple[str, str]:
+        """
+        Chooses index into a string (around bounds of usual strings)
+
+        :return: Argument with the index
+        """
+        if self.__well_typed:
+            # Strings of known type have at least one character
+            return "int", "0"
+        if self.__random.random() < 0.7:
+            return "int", str(self.__random.randint(-1, 4))
+
+        return self.__symbol("int")
+
+    def __exit_code(self) -> Tuple[str, str]:
+        """
+        Chooses operand of EXIT (sometimes outside the valid range or of invalid type)
+
+        :return: Argument
+        """
+        random = self.__random
+        if self.__well_typed and random.random() < 0.9:
+            return "int", str(random.choice((0, 1, 9, 49)))
+        if random.random() < 0.7:
+            return "int", str(random.choice((0, 1, 9, 49, 50, -1)))
+
+        return self.__symbol(random.choice(self.__data_types))
+
+    def __set_type(self, destination: Tuple[str, str], data_type: Optional[str]) -> None:
+        """
+        Remembers data type of a global variable
+
+        :param destination: Argument with the written variable
+        :param data_type: Data type of its new value
+        """
+        if destination[1] in VARIABLES and destination[1] in self.__types:
+            self.__types[destination[1]] = data_type
+
+    def __new_label(self) -> str:
+        """
+        Creates unique label
+
+        :return: Label
+        """
+        self.__label_count += 1
+
+        return f"l{self.__label_count}"
+
+    def __emit(self, op_code: str, *args: Tuple[str, str]) -> None:
+        """
+        Appends instruction
+
+        :param op_code: Operation code
+        :param args: Arguments
+        """
+        self.__instructions.append((op_code,) + args)
+
+
+def generate_program(random: Random, well_typed: bool, size: int = 30, numeric: bool = False) -> List[Instruction]:
+    """
+    Generates random program
+
+    :param random: Source of randomness
+    :param well_typed: Should operands have the expected types?
+    :param size: Approximate number of statements of the main body
+    :param numeric: Should the program use only integers, booleans and nil in global variables?
+    :return: Instructions of the program
+    """
+    return ProgramGenerator(random, well_typed, size, numeric).generate()
+
+
+def generate_input(random: Random, numeric: bool = False) -> bytes:
+    """
+    Generates random input of a program
+
+    :param random: Source of randomness
+    :param numeric: Is the input for a numeric program?
+    :return: Content of the file with inputs
+    """
+    input_lines = NUMERIC_INPUT_LINES if numeric else INPUT_LINES
+    lines = [random.choice(input_lines) if random.random() < 0.8 else str(random.randint(-1000, 1000))
+             for _ in range(random.randint(0, 6))]
+    data = "\n".join(lines)
+    if lines and random.random() < 0.7:
+        data += "\n"
+
+    return data.encode()
+
+
+def to_source(instructions: List[Instruction]) -> str:
+    """
+    Creates IPPcode22 source code of the program (for reports)
+
+    :param instructions: Instructions of the program
+    :return: Source code
+    """
+    lines = [".IPPcode22"]
+    for op_code, *args in instructions:
+        operands = [value if arg_type in ("var", "label", "type") else f"{arg_type}@{value}"
+                    for arg_type, value in args]
+        lines.append(" ".join([op_code] + operands))
+
+    return "\n".join(lines) + "\n"
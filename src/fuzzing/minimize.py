@@ -0,0 +1,61 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Minimization of failing fuzzing cases (delta debugging)
+
+Chunks of instructions and lines of the input are removed while the case still fails. Candidates which can't be
+loaded (e.g. a removed label is still used) don't fail, so they are rejected naturally.
+"""
+
+from typing import Callable, List, Tuple
+
+from testing.programs import Instruction
+
+# Predicate: (instructions, input) -> does the case still fail?
+FailurePredicate = Callable[[List[Instruction], bytes], bool]
+
+
+def minimize_list(items: list, still_fails: Callable[[list], bool]) -> list:
+    """
+    Removes items while the failure persists (ddmin: chunks of decreasing size)
+
+    :param items: Items of the failing case
+    :param still_fails: Predicate checking whether a subset still fails
+    :return: Subset of the items which still fails and no single removed item keeps it failing
+    """
+    chunks = 2
+    while items:
+        chunk_size = max(1, -(-len(items) // chunks))
+        for start in range(0, len(items), chunk_size):
+            candidate = items[:start] + items[start + chunk_size:]
+            if still_fails(candidate):
+                items = candidate
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if chunk_size == 1:
+                break
+            chunks = min(chunks * 2, len(items))
+
+    return items
+
+
+def minimize_case(instructions: List[Instruction], input_data: bytes,
+                  still_fails: FailurePredicate) -> Tuple[List[Instruction], bytes]:
+    """
+    Minimizes failing case
+
+    :param instructions: Instructions of the failing program
+    :param input_data: Input of the failing program
+    :param still_fails: Predicate checking whether a reduced case still fails
+    :return: Reduced instructions and input
+    """
+    instructions = minimize_list(instructions, lambda candidate: still_fails(candidate, input_data))
+
+    lines = input_data.split(b"\n")
+    lines = minimize_list(lines, lambda candidate: still_fails(instructions, b"\n".join(candidate)))
+
+    return instructions, b"\n".join(lines)
@@ -3,19 +3,23 @@
 # Author: Michal Šmahel (xsmahe01)
 # Date: 2022
 
-import traceback
+import sys
+import time
+from typing import Dict, Optional, TYPE_CHECKING
 from xml.etree.ElementTree import ElementTree
 
 from interpreter.interpretation import Loader, Interpreter
 from interpreter.error import ExitCode, InvalidInputArgException, TooManyInputArgsException, \
-    MissingRequiredInputArgException, InvalidFileArgException, BadInstructionOrderException, BadXmlStructureException, \
-    XmlParsingErrorException, InvalidDataTypeException, NonExistingVarException, GetValueFromNotInitVarException, \
-    UsingUndefinedMemoryFrameException, MissingInstructionArgException, TooFewInstructionArgsException, \
-    ZeroDivisionException, ExitValueOutOfRangeException, EmptyLocalMemoryException, UsingUndefinedLabelException, \
-    PopEmptyStackException, InvalidAsciiPositionException, IndexingOutsideStringException, \
-    VariableRedefinitionException, InvalidInstructionOpCode, InvalidInstructionArgumentValueException, \
-    DuplicateLabelException
+    MissingRequiredInputArgException, InvalidFileArgException, InvalidRecordingException
 from interpreter.cli import CliArgParser
+from interpreter.code import Program
+from interpreter.runner import load_program, run_program
+from interpreter.streams import OutputSink, InputReader
+
+# Modules needed only by some modes (sharded loading, recording, replaying, caching, checkpoints, profiling, error
+# reports) are imported where they are used, so they don't slow down the start of ordinary short runs
+if TYPE_CHECKING:
+    from interpreter.metrics import Metrics
 
 
 def main() -> int:
@@ -32,61 +36,449 @@ def main() -> int:
     except InvalidFileArgException:
         return ExitCode.INPUT_FILE_ERROR
 
+    metrics = None
+    if cli_arg_parser.metrics is not None:
+        from interpreter.metrics import Metrics
+
+        metrics = Metrics(cli_arg_parser.metrics)
+        try:
+            metrics.open()
+        except OSError:
+            return ExitCode.OUTPUT_FILE_ERROR
+
+    if cli_arg_parser.server is not None:
+        from interpreter.server import serve
+
+        try:
+            serve(cli_arg_parser.server, cli_arg_parser.server_cache, metrics)
+        finally:
+            if metrics is not None:
+                metrics.close()
+
+        return ExitCode.SUCCESS
+
+    start = time.perf_counter()
+    cache_status = "disabled"
+    if cli_arg_parser.cache is not None:
+        if uses_locale_encoding(cli_arg_parser.input is None):
+            return run_cached_program(cli_arg_parser, start)
+
+        # Cached outputs are encoded like outputs redirected to files, they wouldn't match these streams
+        cache_status = "bypass"
+
+    # Recording, replaying and checkpoints need the source for identification of the program
+    source = None
+    if cli_arg_parser.record is not None or cli_arg_parser.replay is not None \
+            or cli_arg_parser.checkpoint is not None or cli_arg_parser.resume is not None:
+        source = read_source(cli_arg_parser.source)
+
     # Needed objects
     element_tree = ElementTree()
-    loader = Loader(element_tree, cli_arg_parser.source)
-    interpreter = Interpreter(cli_arg_parser.input)
+    if cli_arg_parser.jobs > 1 and cli_arg_parser.source is not None:
+        from interpreter.sharding import ShardedLoader
+
+        loader = ShardedLoader(cli_arg_parser.source, cli_arg_parser.jobs)
+    elif cli_arg_parser.source is None and source is not None:
+        from io import BytesIO
+
+        loader = Loader(element_tree, BytesIO(source))
+    else:
+        loader = Loader(element_tree, cli_arg_parser.source)
+
+    if cli_arg_parser.replay is not None:
+        return replay(cli_arg_parser.replay, loader, source)
+
+    if cli_arg_parser.batch is not None:
+        try:
+            return batch(cli_arg_parser, loader, metrics)
+        finally:
+            if metrics is not None:
+                metrics.close()
+
+    stdout_stream = None
+    if cli_arg_parser.record is not None:
+        from interpreter.replay import TeeStream
+
+        stdout_stream = TeeStream(sys.stdout.buffer)
+    tracer = None
+    stdout_target = stdout_stream
+    stderr_target = None
+    if cli_arg_parser.trace is not None:
+        from interpreter.tracing import Tracer
+
+        tracer = Tracer()
+        stdout_target = tracer.wrap_stream(stdout_stream or sys.stdout.buffer, "stdout")
+        stderr_target = tracer.wrap_stream(sys.stderr.buffer, "stderr")
+    stdout = OutputSink.for_text_stream(sys.stdout, cli_arg_parser.output_buffer, cli_arg_parser.line_buffered,
+                                        stdout_target)
+    stderr = OutputSink.for_text_stream(sys.stderr, cli_arg_parser.output_buffer, cli_arg_parser.line_buffered,
+                                        stderr_target)
+    if cli_arg_parser.input is not None:
+        input_reader = InputReader.for_file(cli_arg_parser.input)
+    else:
+        input_reader = InputReader.for_text_stream(sys.stdin)
+    if cli_arg_parser.record is not None:
+        from interpreter.replay import RecordingInputReader
+
+        input_reader = RecordingInputReader(input_reader)
+
+    memoizer = None
+    program, exit_code = load_program(loader)
+    if program is not None:
+        if cli_arg_parser.memoize:
+            from interpreter.memoization import Memoizer
+
+            memoizer = Memoizer(program, cli_arg_parser.memoize_size)
+
+        # Execution hooks (the interpreter uses its plain run loop without them)
+        hooks = []
+        profiler = None
+        if cli_arg_parser.profile is not None:
+            from interpreter.profiling import Profiler
+
+            profiler = Profiler(cli_arg_parser.profile_interval)
+            hooks.append(profiler)
+        call_graph_profiler = None
+        if cli_arg_parser.call_graph is not None:
+            from interpreter.callgraph import CallGraphProfiler
+
+            call_graph_profiler = CallGraphProfiler()
+            hooks.append(call_graph_profiler)
+        if tracer is not None:
+            hooks.append(tracer)
+        history = None
+        if cli_arg_parser.crash_dump is not None:
+            from interpreter.postmortem import InstructionHistory
+
+            history = InstructionHistory(cli_arg_parser.crash_dump_size)
+            hooks.append(history)
+        debugger_commands = None
+        if cli_arg_parser.debug:
+            from interpreter.debugger import Debugger
+
+            try:
+                # Standard input can be used by the program
+                debugger_commands = open("/dev/tty")
+                hooks.append(Debugger(program, debugger_commands, sys.stderr, cli_arg_parser.breakpoints))
+            except OSError:
+                print("Debugger: terminal isn't available", file=sys.stderr)
+
+        run_start = time.perf_counter()
+        interpreter = Interpreter(input_reader, stdout, stderr, memoizer=memoizer, hooks=hooks)
+        if cli_arg_parser.checkpoint is not None or cli_arg_parser.resume is not None:
+            exit_code = run_checkpointed(cli_arg_parser, interpreter, program, source)
+        else:
+            exit_code = run_program(interpreter, program)
+        run_duration = time.perf_counter() - run_start
+
+        if debugger_commands is not None:
+            debugger_commands.close()
+
+        if history is not None:
+            from interpreter.postmortem import has_failed, write_dump
+
+            if has_failed(interpreter, exit_code):
+                try:
+                    write_dump(history, interpreter, program, exit_code, cli_arg_parser.crash_dump)
+                except OSError:
+                    print("Crash dump: file can't be written", file=sys.stderr)
 
-    # Load program
-    # For unexpected errors (primarily for debugging):
-    # noinspection PyBroadException
+        if profiler is not None:
+            from interpreter.profiling import write_profile
+
+            try:
+                write_profile(profiler, program, run_duration, cli_arg_parser.profile)
+            except OSError:
+                print("Profile: file can't be written", file=sys.stderr)
+        if call_graph_profiler is not None:
+            from interpreter.callgraph import write_call_graph
+
+            call_graph_profiler.finish()
+            try:
+                write_call_graph(call_graph_profiler, cli_arg_parser.call_graph, cli_arg_parser.call_graph_weight)
+            except OSError:
+                print("Call graph: file can't be written", file=sys.stderr)
+        if tracer is not None:
+            from interpreter.tracing import write_trace
+
+            tracer.finish()
+            try:
+                write_trace(tracer, program, cli_arg_parser.trace)
+            except OSError:
+                print("Trace: file can't be written", file=sys.stderr)
+
+    if cli_arg_parser.record is not None:
+        from interpreter.replay import Recording
+
+        # noinspection PyUnresolvedReferences
+        recording = Recording(Recording.hash_program(source), input_reader.reads, stdout_stream.copy, exit_code,
+                              sys.stdout.encoding, sys.stdout.errors or "strict")
+        try:
+            recording.save(cli_arg_parser.record)
+        except OSError:
+            return ExitCode.OUTPUT_FILE_ERROR
+
+    if cli_arg_parser.stats is not None:
+        write_statistics(cli_arg_parser.stats, cache_status, exit_code, time.perf_counter() - start,
+                         memoizer.statistics if memoizer is not None else None)
+
+    return exit_code
+
+
+def read_source(source_file: Optional[str]) -> bytes:
+    """
+    Reads XML source code representation
+
+    :param source_file: Path to file with XML source code representation or None for stdin
+    :return: Content of the file
+    """
+    if source_file is None:
+        return sys.stdin.buffer.read()
+
+    with open(source_file, "rb") as file:
+        return file.read()
+
+
+def run_checkpointed(cli_arg_parser: CliArgParser, interpreter: Interpreter, program: Program, source: bytes) -> int:
+    """
+    Interprets the program with checkpoints and/or from saved checkpoint
+
+    :param cli_arg_parser: Parsed CLI input arguments
+    :param interpreter: Interpreter to use (it hasn't run yet)
+    :param program: Loaded program
+    :param source: XML source code representation
+    :return: Exit code of the interpretation
+    """
+    import os
+    import signal
+    from interpreter.checkpoint import CheckpointWriter, load_checkpoint, rewind_output, run_with_checkpoints
+    from interpreter.error import InvalidCheckpointException, InterpretationInterruptedException
+    from interpreter.replay import Recording
+
+    program_hash = Recording.hash_program(source)
+    if cli_arg_parser.resume is not None:
+        try:
+            checkpoint = load_checkpoint(cli_arg_parser.resume, program_hash)
+        except InvalidCheckpointException as e:
+            print(f"Resume: {e}", file=sys.stderr)
+
+            return ExitCode.INPUT_FILE_ERROR
+
+        checkpoint.restore(interpreter)
+        stdout_position, stderr_position = checkpoint.output_positions
+        rewind_output(sys.stdout.buffer, stdout_position)
+        rewind_output(sys.stderr.buffer, stderr_position)
+
+    if cli_arg_parser.checkpoint is None:
+        return run_program(interpreter, program)
+
+    writer = CheckpointWriter(cli_arg_parser.checkpoint, program_hash)
     try:
-        program = loader.load_program()
-    except (BadInstructionOrderException, BadXmlStructureException, InvalidInstructionOpCode):
-        return ExitCode.BAD_XML_STRUCTURE
-    except XmlParsingErrorException:
-        return ExitCode.NOT_WELL_FORMED_XML
-    except InvalidInstructionArgumentValueException:
-        return ExitCode.BAD_OPERAND_VALUE
-    except DuplicateLabelException:
-        return ExitCode.SEMANTIC_ERROR
-    except Exception:
-        traceback.print_exc()
-
-        # For unexpected errors (primarily for debugging)
+        return run_with_checkpoints(interpreter, program, writer, cli_arg_parser.checkpoint_every, sys.stdout.buffer,
+                                    sys.stderr.buffer)
+    except InterpretationInterruptedException:
+        # The state has been saved, the process ends like it would without the checkpoint
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
+
         return ExitCode.INTERNAL_ERROR
+    except OSError:
+        print("Checkpoint: file can't be written", file=sys.stderr)
+
+        return ExitCode.OUTPUT_FILE_ERROR
+
+
+def uses_locale_encoding(inputs_from_stdin: bool) -> bool:
+    """
+    Checks if standard streams encode and decode data like the in-memory interpretation (like files do)
+
+    :param inputs_from_stdin: Are inputs of the program read from stdin?
+    :return: Would the outputs written through the streams be the same as the outputs of in-memory interpretation?
+    """
+    import codecs
+    import locale
+
+    encoding = codecs.lookup(locale.getpreferredencoding(False)).name
+    streams = [(sys.stdout, "strict"), (sys.stderr, "backslashreplace")]
+    if inputs_from_stdin:
+        streams.append((sys.stdin, "strict"))
+
+    for stream, errors in streams:
+        if stream is None or codecs.lookup(stream.encoding).name != encoding:
+            return False
+        # UTF encodings can encode every text without surrogates (they could come only from stdin decoded with
+        # surrogateescape, which is checked), so error handlers of outputs don't matter for them
+        if stream.errors != errors and (stream is sys.stdin or not encoding.startswith("utf")):
+            return False
+
+    return True
+
+
+def run_cached_program(cli_arg_parser: CliArgParser, start: float) -> int:
+    """
+    Interprets the program or writes its cached result (the program isn't even loaded then)
+
+    :param cli_arg_parser: Parsed CLI input arguments
+    :param start: Time of the start of the run (from time.perf_counter())
+    :return: Exit code of the interpretation
+    """
+    import locale
+    from interpreter.cache import ResultCache, run_cached
+
+    source = read_source(cli_arg_parser.source)
+    if cli_arg_parser.input is not None:
+        with open(cli_arg_parser.input, "rb") as file:
+            input_data = file.read()
+    else:
+        input_data = sys.stdin.buffer.read()
 
-    # Interpretation
-    # For unexpected errors (primarily for debugging):
-    # noinspection PyBroadException
     try:
-        interpreter.run(program)
-    except InvalidDataTypeException:
-        return ExitCode.BAD_OPERAND_TYPES
-    except (MissingInstructionArgException, TooFewInstructionArgsException, InvalidInstructionArgumentValueException):
-        return ExitCode.BAD_XML_STRUCTURE
-    except NonExistingVarException:
-        return ExitCode.NON_EXISTING_VARIABLE
-    except GetValueFromNotInitVarException:
-        return ExitCode.MISSING_VALUE
-    except (UsingUndefinedMemoryFrameException, EmptyLocalMemoryException):
-        return ExitCode.NON_EXISTING_FRAME
-    except (ZeroDivisionException, ExitValueOutOfRangeException):
-        return ExitCode.BAD_OPERAND_VALUE
-    except UsingUndefinedLabelException:
-        return ExitCode.SEMANTIC_ERROR
-    except PopEmptyStackException:
-        return ExitCode.MISSING_VALUE
-    except (InvalidAsciiPositionException, IndexingOutsideStringException):
-        return ExitCode.BAD_STRING_USAGE
-    except VariableRedefinitionException:
-        return ExitCode.SEMANTIC_ERROR
-    except Exception:
-        traceback.print_exc()
+        cache = ResultCache(cli_arg_parser.cache, cli_arg_parser.cache_size)
+    except OSError:
+        print("Cache: directory can't be created", file=sys.stderr)
 
-        return ExitCode.INTERNAL_ERROR
+        return ExitCode.OUTPUT_FILE_ERROR
+
+    result, hit = run_cached(cache, source, input_data, locale.getpreferredencoding(False))
+
+    for stream, data in ((sys.stdout, result.stdout), (sys.stderr, result.stderr)):
+        stream.flush()
+        stream.buffer.write(data)
+        stream.buffer.flush()
+
+    if cli_arg_parser.stats is not None:
+        write_statistics(cli_arg_parser.stats, "hit" if hit else "miss", result.exit_code,
+                         time.perf_counter() - start)
+
+    return result.exit_code
+
+
+def write_statistics(statistics_file: str, cache_status: str, exit_code: int, duration: float,
+                     memoization: Optional[Dict[str, Dict[str, int]]] = None) -> None:
+    """
+    Appends statistics of the run to the file (one JSON object per line)
+
+    :param statistics_file: Path to the file with statistics
+    :param cache_status: Usage of the cache (hit, miss, bypass or disabled)
+    :param exit_code: Exit code of the interpretation
+    :param duration: Duration of the run in seconds
+    :param memoization: Statistics of memoized subroutines (see Memoizer.statistics) or None
+    """
+    import json
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cache": cache_status,
+        "exit_code": int(exit_code),
+        "time": duration,
+    }
+    if memoization is not None:
+        record["memoization"] = memoization
+    try:
+        with open(statistics_file, "a") as file:
+            file.write(json.dumps(record) + "\n")
+    except OSError:
+        print("Statistics: file can't be written", file=sys.stderr)
+
+
+def replay(recording_file: str, loader: Loader, source: bytes) -> int:
+    """
+    Replays recorded interpretation (inputs are taken from the recording, output is compared with the recorded one)
+
+    :param recording_file: Path to file with the recording
+    :param loader: Loader of the program
+    :param source: XML source code representation
+    :return: Recorded exit code if the replay matches the recording, error exit code otherwise
+    """
+    import codecs
+    import time
+    from io import BytesIO
+    from interpreter.replay import Recording, ReplayInputReader
+
+    try:
+        recording = Recording.load(recording_file)
+    except InvalidRecordingException:
+        print("Replay: file doesn't contain valid recording", file=sys.stderr)
+
+        return ExitCode.INPUT_FILE_ERROR
+
+    if recording.program_hash != Recording.hash_program(source):
+        print("Replay: the recording has been made with a different program", file=sys.stderr)
+
+        return ExitCode.INPUT_FILE_ERROR
+
+    # Output is encoded like by the recording run (see OutputSink.for_text_stream()), so it must use the same locale
+    encoding, errors = codecs.lookup(sys.stdout.encoding).name, sys.stdout.errors or "strict"
+    if (encoding, errors) != (recording.encoding, recording.errors):
+        print(f"Replay: the recording has been made with output encoding {recording.encoding} ({recording.errors}),"
+              f" but the current one is {encoding} ({errors})", file=sys.stderr)
+
+        return ExitCode.INPUT_FILE_ERROR
+
+    # No I/O during interpretation (output is only compared with the recording)
+    output = BytesIO()
+    input_reader = ReplayInputReader(recording.reads)
+    interpreter = Interpreter(input_reader, OutputSink(output, encoding, errors),
+                              OutputSink(BytesIO(), encoding, "backslashreplace"))
+
+    start = time.perf_counter()
+    program, exit_code = load_program(loader)
+    if program is not None:
+        exit_code = run_program(interpreter, program)
+    duration = time.perf_counter() - start
+
+    if input_reader.diverged:
+        print("Replay: mismatch, the program read different inputs", file=sys.stderr)
+    elif output.getvalue() != recording.output:
+        print(f"Replay: mismatch, the output differs from byte {first_difference(output.getvalue(), recording.output)}",
+              file=sys.stderr)
+    elif exit_code != recording.exit_code:
+        print(f"Replay: mismatch, exit code {exit_code} instead of {recording.exit_code}", file=sys.stderr)
+    else:
+        print(f"Replay: OK ({duration:.6f} s)", file=sys.stderr)
+
+        return exit_code
+
+    return ExitCode.INTERNAL_ERROR
+
+
+def batch(cli_arg_parser: CliArgParser, loader: Loader, metrics: Optional['Metrics'] = None) -> int:
+    """
+    Interprets the program with every file with inputs from the batch directory
+
+    :param cli_arg_parser: Parsed CLI input arguments
+    :param loader: Loader of the program
+    :param metrics: Metrics updated after every run or None
+    :return: Exit code of the batch
+    """
+    from io import StringIO
+    from interpreter.batch import run_batch, list_input_files
+
+    # The program is loaded only once, worker processes share it
+    error_stream = StringIO()
+    start = time.perf_counter()
+    program, exit_code = load_program(loader, error_stream)
+    if metrics is not None:
+        metrics.program_loaded(time.perf_counter() - start)
+
+    return run_batch(program, exit_code, error_stream.getvalue().encode(), list_input_files(cli_arg_parser.batch),
+                     cli_arg_parser.results, cli_arg_parser.manifest, cli_arg_parser.workers, cli_arg_parser.timeout,
+                     cli_arg_parser.start_method, cli_arg_parser.lockstep, metrics)
+
+
+def first_difference(first: bytes, second: bytes) -> int:
+    """
+    Finds position of the first different byte
+
+    :param first: First sequence
+    :param second: Second sequence
+    :return: Position of the first difference (length of the shorter sequence if one is a prefix of the other)
+    """
+    for position, (first_byte, second_byte) in enumerate(zip(first, second)):
+        if first_byte != second_byte:
+            return position
 
-    return ExitCode.SUCCESS
+    return min(len(first), len(second))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,228 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Library interface for embedding the interpreter (everything is done in memory, without temporary files and processes)
+
+Example::
+
+    from interpreter.api import interpret, ErrorCategory
+
+    result = interpret(xml_source, b"5\\n")
+    if result.category is ErrorCategory.NONE:
+        print(result.stdout.decode())
+"""
+
+import locale
+import time
+from enum import Enum
+from io import BytesIO, StringIO
+from typing import Iterable, Optional, Tuple, Union
+from xml.etree.ElementTree import ElementTree
+
+from interpreter.code import Program
+from interpreter.error import ExitCode, InstructionLimitExceededException, InterpretationTimeoutException, \
+    InvalidProgramException
+from interpreter.interpretation import Interpreter, Loader
+from interpreter.runner import RunResult, load_program, run_program
+from interpreter.streams import InputReader, IterableInputReader, OutputSink, TextInputReader
+
+# XML source code representation of the program
+ProgramSource = Union[bytes, str]
+# Inputs of the program: content of the file with inputs (bytes or text) or lines
+InputData = Union[bytes, str, Iterable[Union[str, bytes]], None]
+
+
+class ErrorCategory(Enum):
+    """Category of the interpretation result"""
+
+    NONE = "none"
+    """Program has ended successfully (end of the code or EXIT with 0)"""
+    EXIT = "exit"
+    """Program has been exited by EXIT instruction with non-zero exit code"""
+    XML = "xml"
+    """Program couldn't been loaded (not well-formed XML or bad XML structure)"""
+    SEMANTIC = "semantic"
+    """Semantic error (undefined label, variable redefinition, etc.)"""
+    RUNTIME = "runtime"
+    """Runtime error of the program (bad operand types or values, missing values, etc.)"""
+    INSTRUCTION_LIMIT = "instruction_limit"
+    """Interpretation has been stopped because of the instruction limit"""
+    TIMEOUT = "timeout"
+    """Interpretation has been stopped because of the time limit"""
+    INTERNAL = "internal"
+    """Internal error of the interpreter"""
+
+    @classmethod
+    def from_exit_code(cls, exit_code: int) -> 'ErrorCategory':
+        """
+        Finds category of exit code of interpret.py
+
+        Values of EXIT instruction can't be distinguished from error exit codes by the code itself, so they have
+        to be recognized by the caller.
+
+        :param exit_code: Exit code
+        :return: Category of the exit code
+        """
+        if exit_code == ExitCode.SUCCESS:
+            return cls.NONE
+        elif exit_code in (ExitCode.NOT_WELL_FORMED_XML, ExitCode.BAD_XML_STRUCTURE):
+            return cls.XML
+        elif exit_code == ExitCode.SEMANTIC_ERROR:
+            return cls.SEMANTIC
+        elif ExitCode.BAD_OPERAND_TYPES <= exit_code <= ExitCode.BAD_STRING_USAGE:
+            return cls.RUNTIME
+
+        return cls.INTERNAL
+
+
+class InterpretationResult(RunResult):
+    """Result of interpretation done by the library interface"""
+
+    def __init__(self, exit_code: int, stdout: bytes, stderr: bytes, category: ErrorCategory,
+                 executed_instructions: int = 0, wall_time: float = 0.0):
+        """
+        Class constructor
+
+        :param exit_code: Exit code of the interpretation (the same as the exit code of interpret.py)
+        :param stdout: Standard output of the program
+        :param stderr: Standard error output of the program (and error report for internal errors)
+        :param category: Category of the result
+        :param executed_instructions: Number of executed instructions
+        :param wall_time: Duration of loading and interpretation in seconds
+        """
+        super().__init__(exit_code, stdout, stderr, executed_instructions,
+                         category is ErrorCategory.INSTRUCTION_LIMIT)
+
+        self.__category = category
+        self.__wall_time = wall_time
+
+    @property
+    def category(self) -> ErrorCategory:
+        """
+        Getter for category of the result
+
+        :return: Category of the result
+        """
+        return self.__category
+
+    @property
+    def wall_time(self) -> float:
+        """
+        Getter for wall time
+
+        :return: Duration of loading and interpretation in seconds
+        """
+        return self.__wall_time
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        Getter for success of the interpretation
+
+        :return: Has the program ended successfully?
+        """
+        return self.__category is ErrorCategory.NONE
+
+
+def load(source: ProgramSource) -> Program:
+    """
+    Loads the program from its XML source code representation
+
+    Loaded program isn't modified by interpretation, so it can be reused by more (also concurrent) interpretations.
+
+    :param source: XML source code representation (bytes are decoded by the XML declaration)
+    :return: Loaded program
+    :raise InvalidProgramException: Program couldn't been loaded
+    """
+    program, exit_code, _ = load_source(source)
+    if program is None:
+        raise InvalidProgramException(f"Program couldn't been loaded (exit code {int(exit_code)})")
+
+    return program
+
+
+def interpret(program: Union[Program, ProgramSource], input_data: InputData = None,
+              instruction_limit: Optional[int] = None, time_limit: Optional[float] = None) -> InterpretationResult:
+    """
+    Interprets the program
+
+    Outputs are encoded like standard outputs of interpret.py redirected to files (locale encoding), inputs given as
+    bytes are decoded like a file entered by --input.
+
+    :param program: Loaded program or its XML source code representation
+    :param input_data: Content of the file with inputs (bytes or text), lines of inputs (iterable of strings or bytes,
+        they are read on demand) or None for no inputs
+    :param instruction_limit: Maximum number of executed instructions or None for no limit
+    :param time_limit: Time limit of the interpretation in seconds or None for no limit
+    :return: Result of the interpretation (errors of the program are reported by the result, not raised)
+    """
+    start = time.perf_counter()
+    encoding = locale.getpreferredencoding(False)
+
+    if not isinstance(program, Program):
+        program, exit_code, error_report = load_source(program)
+        if program is None:
+            # Invalid argument values are detected while loading too (their exit code is the runtime one)
+            category = ErrorCategory.from_exit_code(exit_code)
+            if category is ErrorCategory.RUNTIME:
+                category = ErrorCategory.XML
+
+            return InterpretationResult(exit_code, b"", error_report, category, wall_time=time.perf_counter() - start)
+
+    stdout, stderr, error_stream = BytesIO(), BytesIO(), StringIO()
+    input_reader = create_input_reader(input_data, encoding)
+    interpreter = Interpreter(input_reader, OutputSink(stdout, encoding),
+                              OutputSink(stderr, encoding, "backslashreplace"), instruction_limit)
+
+    try:
+        exit_code = run_program(interpreter, program, error_stream, time_limit)
+        if exit_code != ExitCode.SUCCESS and exit_code == interpreter.exit_code:
+            category = ErrorCategory.EXIT
+        else:
+            category = ErrorCategory.from_exit_code(exit_code)
+    except InstructionLimitExceededException:
+        exit_code, category = ExitCode.INTERNAL_ERROR, ErrorCategory.INSTRUCTION_LIMIT
+    except InterpretationTimeoutException:
+        exit_code, category = ExitCode.INTERNAL_ERROR, ErrorCategory.TIMEOUT
+    finally:
+        input_reader.close()
+
+    return InterpretationResult(exit_code, stdout.getvalue(),
+                                stderr.getvalue() + error_stream.getvalue().encode(encoding, "backslashreplace"),
+                                category, interpreter.executed_instructions, time.perf_counter() - start)
+
+
+def load_source(source: ProgramSource) -> Tuple[Optional[Program], int, bytes]:
+    """
+    Loads the program from XML source code representation
+
+    :param source: XML source code representation (text is parsed directly, bytes are decoded by XML declaration)
+    :return: Loaded program (None if it couldn't been loaded), exit code and error report (for internal errors)
+    """
+    error_stream = StringIO()
+    source_file = StringIO(source) if isinstance(source, str) else BytesIO(source)
+    program, exit_code = load_program(Loader(ElementTree(), source_file), error_stream)
+
+    return program, exit_code, error_stream.getvalue().encode(locale.getpreferredencoding(False), "backslashreplace")
+
+
+def create_input_reader(input_data: InputData, encoding: str) -> InputReader:
+    """
+    Creates reader of the inputs
+
+    :param input_data: Inputs in any supported form (see interpret())
+    :param encoding: Encoding of inputs given as bytes
+    :return: Reader of the inputs
+    """
+    if input_data is None:
+        return InputReader.for_bytes(b"")
+    elif isinstance(input_data, (bytes, bytearray)):
+        return InputReader.for_bytes(bytes(input_data))
+    elif isinstance(input_data, str):
+        # Universal newlines like in files with inputs
+        return TextInputReader(StringIO(input_data, None))
+
+    return IterableInputReader(input_data, encoding)
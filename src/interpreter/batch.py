@@ -0,0 +1,334 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import itertools
+import json
+import locale
+import multiprocessing
+import os
+import signal
+import time
+from typing import List, Optional, Tuple
+
+from interpreter.code import Program
+from interpreter.error import ExitCode, InterpretationTimeoutException
+from interpreter.image import SharedProgramImage
+from interpreter.metrics import Metrics
+from interpreter.runner import RunResult, run_in_memory
+
+# Extension of files with inputs (other files in the batch directory are ignored)
+INPUT_FILE_EXTENSION = ".in"
+
+# Result of one run: path to the file with inputs, result of the interpretation (None for timeout) and duration
+BatchResult = Tuple[str, Optional[RunResult], float]
+
+# Program and time limit shared by worker processes (they are inherited by fork, so the program isn't copied until
+# some worker modifies its memory pages; other start methods execute the program from image in shared memory)
+shared_program: Optional[Program] = None
+shared_timeout: Optional[float] = None
+shared_image: Optional[SharedProgramImage] = None
+
+
+def run_batch(program: Optional[Program], load_exit_code: int, load_error_report: bytes, input_files: List[str],
+              results_dir: Optional[str], manifest_file: Optional[str], workers: int, timeout: Optional[float],
+              start_method: str = "fork", lockstep: bool = False, metrics: Optional[Metrics] = None) -> int:
+    """
+    Interprets one program with many files with inputs
+
+    :param program: Loaded program or None if it couldn't been loaded
+    :param load_exit_code: Exit code of loading (used as the result of every run if the program couldn't been loaded)
+    :param load_error_report: Report of internal error that occurred while loading
+    :param input_files: Paths to files with inputs
+    :param results_dir: Directory where to write results (<name>.out, <name>.err, <name>.rc) or None
+    :param manifest_file: File where to write results as JSON lines or None
+    :param workers: Number of worker processes
+    :param timeout: Time limit of one run in seconds or None for no limit
+    :param start_method: Start method of worker processes (fork, spawn or forkserver) or thread for worker threads
+    :param lockstep: Should inputs be interpreted in lockstep where possible? (see interpreter.lockstep)
+    :param metrics: Metrics updated after every run or None
+    :return: Exit code of the batch (results of the runs are written to results)
+    """
+    global shared_program, shared_timeout
+
+    try:
+        if results_dir is not None:
+            os.makedirs(results_dir, exist_ok=True)
+        manifest = open(manifest_file, "w") if manifest_file is not None else None
+    except OSError:
+        return ExitCode.OUTPUT_FILE_ERROR
+
+    if metrics is not None:
+        # All inputs are dispatched at once
+        metrics.run_started(len(input_files))
+
+    pool = None
+    executor = None
+    image = None
+    lockstep_results: List[BatchResult] = []
+    if lockstep and program is not None:
+        # Inputs unsupported by lockstep execution are interpreted in the ordinary way
+        lockstep_results, input_files = run_lockstep_batch(program, input_files, timeout)
+
+    if program is None:
+        results = ((input_file, RunResult(load_exit_code, b"", load_error_report), 0.0) for input_file in input_files)
+    elif workers == 1 or len(input_files) < 2:
+        shared_program, shared_timeout = program, timeout
+        init_worker()
+
+        results = map(run_input, input_files)
+    elif start_method == "thread":
+        # Interpreters in threads share the loaded program directly, time limit is checked by the interpreter itself
+        from concurrent.futures import ThreadPoolExecutor
+        from functools import partial
+
+        executor = ThreadPoolExecutor(workers)
+        results = executor.map(partial(run_input_in_thread, program, timeout), input_files)
+    elif start_method == "fork":
+        shared_program, shared_timeout = program, timeout
+
+        pool = multiprocessing.get_context("fork").Pool(workers, init_worker)
+        results = pool.imap(run_input, input_files, max(1, len(input_files) // (workers * 4)))
+    else:
+        # New processes don't inherit the program, they attach its image instead of receiving and rebuilding it
+        image = SharedProgramImage(program=program)
+
+        pool = multiprocessing.get_context(start_method).Pool(workers, init_image_worker, (image.name, timeout))
+        results = pool.imap(run_input, input_files, max(1, len(input_files) // (workers * 4)))
+
+    try:
+        for input_file, result, duration in itertools.chain(lockstep_results, results):
+            if results_dir is not None:
+                write_result_files(results_dir, input_file, result)
+            if manifest is not None:
+                manifest.write(json.dumps(create_manifest_record(input_file, result, duration)) + "\n")
+            if metrics is not None:
+                metrics.run_finished(result, duration, input_file_size(input_file))
+    except OSError:
+        return ExitCode.OUTPUT_FILE_ERROR
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if executor is not None:
+            executor.shutdown()
+        if image is not None:
+            image.close()
+        if manifest is not None:
+            manifest.close()
+
+    return ExitCode.SUCCESS
+
+
+def run_lockstep_batch(program: Program, input_files: List[str],
+                       timeout: Optional[float]) -> Tuple[List[BatchResult], List[str]]:
+    """
+    Interprets the program with files with inputs in lockstep (in groups of lanes)
+
+    :param program: Loaded program
+    :param input_files: Paths to files with inputs
+    :param timeout: Time limit of one group in seconds (lanes of the group that haven't ended are interpreted
+        in the ordinary way then) or None for no limit (lanes running long after the rest of the group has ended are
+        interpreted in the ordinary way anyway, see interpreter.lockstep)
+    :return: Results of runs done in lockstep (duration is the duration of the whole group) and files with inputs
+        that have to be interpreted in the ordinary way
+    """
+    from interpreter.lockstep import DEFAULT_LANES, LockstepProgram, is_available
+
+    if not is_available():
+        return [], input_files
+
+    lockstep_program = LockstepProgram(program)
+    results: List[BatchResult] = []
+    remaining: List[str] = []
+    for group_start in range(0, len(input_files), DEFAULT_LANES):
+        group_files = []
+        group_inputs = []
+        for input_file in input_files[group_start:group_start + DEFAULT_LANES]:
+            input_data = read_input_file(input_file)
+            if input_data is None:
+                results.append((input_file, RunResult(ExitCode.INPUT_FILE_ERROR, b"", b""), 0.0))
+            else:
+                group_files.append(input_file)
+                group_inputs.append(input_data)
+
+        start = time.perf_counter()
+        group_results = lockstep_program.run(group_inputs, start + timeout if timeout is not None else None)
+        duration = time.perf_counter() - start
+        for input_file, result in zip(group_files, group_results):
+            if result is not None:
+                results.append((input_file, result, duration))
+            else:
+                remaining.append(input_file)
+
+    return results, remaining
+
+
+def init_worker() -> None:
+    """Prepares process for running interpretations (time limit is implemented by SIGALRM)"""
+    signal.signal(signal.SIGALRM, raise_timeout)
+
+    # Parent handles interruption (workers are terminated by it)
+    if multiprocessing.parent_process() is not None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def init_image_worker(image_name: str, timeout: Optional[float]) -> None:
+    """
+    Prepares process started by spawn or forkserver for running interpretations
+
+    :param image_name: Name of shared memory with program image
+    :param timeout: Time limit of one run in seconds or None for no limit
+    """
+    global shared_program, shared_timeout, shared_image
+
+    shared_image = SharedProgramImage(image_name)
+    shared_program, shared_timeout = shared_image.program, timeout
+
+    init_worker()
+
+
+def raise_timeout(signal_number: int, frame) -> None:
+    """
+    Handler of SIGALRM
+
+    :param signal_number: Ignored parameter
+    :param frame: Ignored parameter
+    :raise InterpretationTimeoutException: Always
+    """
+    raise InterpretationTimeoutException("Time limit of interpretation exceeded")
+
+
+def run_input(input_file: str) -> BatchResult:
+    """
+    Interprets the shared program with one file with inputs (runs in worker process)
+
+    :param input_file: Path to the file with inputs
+    :return: Result of the run
+    """
+    input_data = read_input_file(input_file)
+    if input_data is None:
+        return input_file, RunResult(ExitCode.INPUT_FILE_ERROR, b"", b""), 0.0
+
+    start = time.perf_counter()
+    try:
+        if shared_timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, shared_timeout)
+
+        result: Optional[RunResult] = run_in_memory(shared_program, input_data)
+    except InterpretationTimeoutException:
+        result = None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return input_file, result, time.perf_counter() - start
+
+
+def run_input_in_thread(program: Program, timeout: Optional[float], input_file: str) -> BatchResult:
+    """
+    Interprets the program with one file with inputs (runs in worker thread, signals can't be used there)
+
+    :param program: Loaded program
+    :param timeout: Time limit of the run in seconds or None for no limit
+    :param input_file: Path to the file with inputs
+    :return: Result of the run
+    """
+    from interpreter.threads import run_with_limits
+
+    input_data = read_input_file(input_file)
+    if input_data is None:
+        return input_file, RunResult(ExitCode.INPUT_FILE_ERROR, b"", b""), 0.0
+
+    start = time.perf_counter()
+    result = run_with_limits(program, input_data, time_limit=timeout)
+
+    return input_file, result, time.perf_counter() - start
+
+
+def read_input_file(input_file: str) -> Optional[bytes]:
+    """
+    Reads file with inputs
+
+    :param input_file: Path to the file with inputs
+    :return: Content of the file or None if it couldn't been read
+    """
+    try:
+        with open(input_file, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def input_file_size(input_file: str) -> int:
+    """
+    Finds size of file with inputs
+
+    :param input_file: Path to the file with inputs
+    :return: Size in bytes (0 if the file isn't accessible)
+    """
+    try:
+        return os.path.getsize(input_file)
+    except OSError:
+        return 0
+
+
+def write_result_files(results_dir: str, input_file: str, result: Optional[RunResult]) -> None:
+    """
+    Writes result of one run into files in the results directory
+
+    Files are named by the file with inputs <name>.in (see list_input_files()): <name>.out (standard output),
+    <name>.err (standard error output) and <name>.rc (exit code or "timeout").
+
+    :param results_dir: Directory with results
+    :param input_file: Path to the file with inputs
+    :param result: Result of the interpretation or None for timeout
+    """
+    base_path = os.path.join(results_dir, os.path.basename(input_file)[:-len(INPUT_FILE_EXTENSION)])
+
+    with open(base_path + ".out", "wb") as file:
+        file.write(result.stdout if result is not None else b"")
+    with open(base_path + ".err", "wb") as file:
+        file.write(result.stderr if result is not None else b"")
+    with open(base_path + ".rc", "w") as file:
+        file.write(str(int(result.exit_code)) if result is not None else "timeout")
+
+
+def create_manifest_record(input_file: str, result: Optional[RunResult], duration: float) -> dict:
+    """
+    Creates record about one run for the manifest
+
+    :param input_file: Path to the file with inputs
+    :param result: Result of the interpretation or None for timeout
+    :param duration: Duration of the run in seconds
+    :return: Record with keys: input, exit_code (None for timeout), timeout, stdout, stderr, instructions, time
+    """
+    if result is None:
+        return {"input": input_file, "exit_code": None, "timeout": True, "stdout": "", "stderr": "",
+                "instructions": None, "time": duration}
+
+    # Outputs are decoded losslessly (undecodable bytes are escaped as surrogates)
+    encoding = locale.getpreferredencoding(False)
+
+    return {
+        "input": input_file,
+        "exit_code": int(result.exit_code),
+        "timeout": False,
+        "stdout": result.stdout.decode(encoding, "surrogateescape"),
+        "stderr": result.stderr.decode(encoding, "surrogateescape"),
+        "instructions": result.executed_instructions,
+        "time": duration
+    }
+
+
+def list_input_files(input_dir: str) -> List[str]:
+    """
+    Lists files with inputs
+
+    :param input_dir: Directory with files with inputs
+    :return: Paths to all regular files with .in extension in the directory (sorted by name)
+    """
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.endswith(INPUT_FILE_EXTENSION) and os.path.isfile(os.path.join(input_dir, name))
+    )
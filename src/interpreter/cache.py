@@ -0,0 +1,311 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from interpreter.error import ExitCode
+from interpreter.runner import RunResult, load_program_from_bytes, run_in_memory
+
+# Result file format
+# ==================
+# All numbers are big endian.
+#
+#   8 bytes         magic (format identification and version)
+#   4 bytes         exit code (signed)
+#   2 × 8 bytes     length of standard output, length of standard error output
+#   data            standard output followed by standard error output
+
+MAGIC = b"IPPRES\x01\x00"
+"""Header of result files (format identification and version)"""
+
+HEADER = struct.Struct(">8siQQ")
+"""Header of result files: magic, exit code, length of stdout, length of stderr"""
+
+RESULT_SUFFIX = ".res"
+"""Extension of result files"""
+
+
+def result_key(source: bytes, input_data: bytes, encoding: str) -> str:
+    """
+    Computes key identifying result of the run
+
+    Interpretation is deterministic, so the result depends only on the program, its inputs and the encoding
+    of outputs.
+
+    :param source: XML source code representation of the program
+    :param input_data: Content of the file with inputs
+    :param encoding: Encoding of outputs
+    :return: Key (hexadecimal SHA-256 hash)
+    """
+    digest = hashlib.sha256()
+    for part in (source, input_data, encoding.encode()):
+        # Lengths separate the parts, so different splits of the same bytes have different keys
+        digest.update(struct.pack(">Q", len(part)))
+        digest.update(part)
+
+    return digest.hexdigest()
+
+
+def is_cacheable(result: RunResult) -> bool:
+    """
+    Checks if the result can be cached
+
+    :param result: Result of the run
+    :return: Is the result fully determined by the program and inputs? (internal errors and stopped runs aren't)
+    """
+    return result.exit_code != ExitCode.INTERNAL_ERROR and not result.limit_exceeded
+
+
+class ResultCache:
+    """
+    Cache of results of runs stored in a directory (shared by processes) with an in-process front cache
+
+    Files of the least recently used results are removed when the directory is larger than its limit. Usage of results
+    is tracked by modification times of their files.
+    """
+
+    DEFAULT_FRONT_SIZE = 32 * 1024 * 1024
+    """Default maximum size of results kept in memory in bytes"""
+
+    EVICTION_TARGET = 0.9
+    """Size of the directory after eviction (as part of the limit), so eviction isn't needed after every write"""
+
+    def __init__(self, directory: str, max_size: int, front_size: int = DEFAULT_FRONT_SIZE):
+        """
+        Class constructor
+
+        :param directory: Directory with results (it is created if it doesn't exist)
+        :param max_size: Maximum size of results in the directory in bytes
+        :param front_size: Maximum size of results kept in memory in bytes
+        :raise OSError: Directory can't be created
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self.__directory = directory
+        self.__max_size = max_size
+        self.__front_size = front_size
+
+        self.__front: 'OrderedDict[str, RunResult]' = OrderedDict()
+        self.__front_used = 0
+        self.__directory_size: Optional[int] = None
+        self.__lock = threading.Lock()
+
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def hits(self) -> int:
+        """
+        Getter for number of hits
+
+        :return: Number of results found in the cache
+        """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Getter for number of misses
+
+        :return: Number of results that haven't been found in the cache
+        """
+        return self.__misses
+
+    def get(self, key: str) -> Optional[RunResult]:
+        """
+        Finds result in the cache (it becomes the most recently used one)
+
+        :param key: Key of the result (see result_key())
+        :return: Cached result or None if it isn't cached
+        """
+        with self.__lock:
+            result = self.__front.get(key)
+            if result is not None:
+                self.__front.move_to_end(key)
+                self.__hits += 1
+
+                return result
+
+        path = self.__path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+        except OSError:
+            data = None
+
+        result = self.__decode(data) if data is not None else None
+        with self.__lock:
+            if result is None:
+                self.__misses += 1
+
+                return None
+
+            self.__hits += 1
+            self.__remember(key, result)
+
+        return result
+
+    def put(self, key: str, result: RunResult) -> None:
+        """
+        Stores result into the cache
+
+        :param key: Key of the result (see result_key())
+        :param result: Result of the run
+        :raise OSError: Result can't be written
+        """
+        data = HEADER.pack(MAGIC, int(result.exit_code), len(result.stdout), len(result.stderr)) \
+            + result.stdout + result.stderr
+        if len(data) > self.__max_size:
+            return
+
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Readers mustn't see partially written files (other processes can use the same directory)
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, path)
+        except OSError:
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
+
+            raise
+
+        with self.__lock:
+            self.__remember(key, result)
+
+            if self.__directory_size is None:
+                self.__directory_size = sum(size for _, _, size in self.__list_files())
+            else:
+                self.__directory_size += len(data)
+
+            if self.__directory_size > self.__max_size:
+                self.__evict()
+
+    def __path(self, key: str) -> str:
+        """
+        Creates path to file with result
+
+        :param key: Key of the result
+        :return: Path to the file (results are split into subdirectories by the first byte of the key)
+        """
+        return os.path.join(self.__directory, key[:2], key + RESULT_SUFFIX)
+
+    def __remember(self, key: str, result: RunResult) -> None:
+        """
+        Stores result into the front cache (the lock must be held)
+
+        :param key: Key of the result
+        :param result: Result of the run
+        """
+        size = len(result.stdout) + len(result.stderr)
+        if size > self.__front_size or key in self.__front:
+            return
+
+        self.__front[key] = result
+        self.__front_used += size
+        while self.__front_used > self.__front_size:
+            _, dropped = self.__front.popitem(last=False)
+            self.__front_used -= len(dropped.stdout) + len(dropped.stderr)
+
+    def __evict(self) -> None:
+        """Removes the least recently used results from the directory (the lock must be held)"""
+        files = sorted(self.__list_files())
+        size = sum(file_size for _, _, file_size in files)
+        target = self.__max_size * self.EVICTION_TARGET
+        for _, path, file_size in files:
+            if size <= target:
+                break
+
+            try:
+                os.unlink(path)
+            except OSError:
+                # Removed by another process
+                pass
+            size -= file_size
+
+        self.__directory_size = size
+
+    def __list_files(self) -> List[Tuple[float, str, int]]:
+        """
+        Lists files with results
+
+        :return: Time of the last usage, path and size of every file
+        """
+        files = []
+        for subdirectory in os.scandir(self.__directory):
+            if not subdirectory.is_dir():
+                continue
+
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.endswith(RESULT_SUFFIX):
+                    try:
+                        status = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((status.st_mtime, entry.path, status.st_size))
+
+        return files
+
+    @staticmethod
+    def __decode(data: bytes) -> Optional[RunResult]:
+        """
+        Decodes content of result file
+
+        :param data: Content of the file
+        :return: Decoded result or None for invalid file
+        """
+        if len(data) < HEADER.size:
+            return None
+
+        magic, exit_code, stdout_length, stderr_length = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + stdout_length + stderr_length:
+            return None
+
+        stdout_end = HEADER.size + stdout_length
+
+        return RunResult(exit_code, data[HEADER.size:stdout_end], data[stdout_end:])
+
+
+def run_cached(cache: ResultCache, source: bytes, input_data: bytes, encoding: str) -> Tuple[RunResult, bool]:
+    """
+    Interprets the program or takes its result from the cache
+
+    :param cache: Cache of results
+    :param source: XML source code representation of the program
+    :param input_data: Content of the file with inputs
+    :param encoding: Encoding of outputs (must be the encoding used by run_in_memory())
+    :return: Result of the run and flag if it has been taken from the cache
+    """
+    key = result_key(source, input_data, encoding)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+
+    program, exit_code, error_report = load_program_from_bytes(source)
+    if program is None:
+        result = RunResult(exit_code, b"", error_report)
+    else:
+        result = run_in_memory(program, input_data)
+
+    if is_cacheable(result):
+        try:
+            cache.put(key, result)
+        except OSError:
+            # The cache is only an optimization
+            pass
+
+    return result, False
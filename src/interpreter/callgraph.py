@@ -0,0 +1,222 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Call-graph profiling of subroutines (targets of CALL instructions)
+
+Executed instructions and time are attributed to the stack of called labels (a shadow of the call stack). Every
+distinct stack is a node of the call tree. Time is measured only when the stack changes (calls and returns reported
+by execution hooks), so the overhead of ordinary instructions is a single increment.
+
+The call tree is written in the collapsed-stack format ("main;foo;bar 42" per line) read by flame-graph tools
+(flamegraph.pl, speedscope, inferno, ...).
+"""
+
+import json
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from interpreter.code import Instruction
+from interpreter.hooks import ExecutionHook
+from interpreter.profiling import format_table
+
+if TYPE_CHECKING:
+    from interpreter.interpretation import Interpreter
+
+ROOT_LABEL = "(main)"
+"""Name of the main body of the program in stacks (labels can't contain parentheses)"""
+
+WEIGHTS = ("instructions", "time")
+"""Available weights of collapsed stacks (time is in microseconds)"""
+
+SUMMARY_SUFFIX = ".txt"
+"""Suffix added to the path of collapsed stacks for the text summary of labels"""
+
+JSON_SUFFIX = ".json"
+"""Suffix added to the path of collapsed stacks for the machine-readable summary of labels"""
+
+
+class CallGraphProfiler(ExecutionHook):
+    """Profiler attributing executed instructions and time to stacks of called subroutines"""
+
+    def __init__(self):
+        """Class constructor"""
+        # Call tree: node 0 is the main body, children are indexed by labels
+        self.__labels: List[str] = [ROOT_LABEL]
+        self.__parents: List[int] = [-1]
+        self.__children: List[Dict[str, int]] = [{}]
+        self.__counts: List[int] = [0]
+        self.__times: List[float] = [0.0]
+
+        # Shadow of the call stack (nodes of the call tree)
+        self.__stack: List[int] = [0]
+
+        self.__calls: Dict[str, int] = {ROOT_LABEL: 1}
+        self.__depths: Dict[str, int] = {ROOT_LABEL: 1}
+        self.__max_depths: Dict[str, int] = {ROOT_LABEL: 1}
+
+        self.__last_switch = time.perf_counter()
+
+    def before_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Attributes execution of the instruction to the current stack
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        self.__counts[self.__stack[-1]] += 1
+
+    def on_call(self, interpreter: 'Interpreter', position: int, label: str) -> None:
+        """
+        Enters node of the called subroutine
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the CALL instruction
+        :param label: Label of the subroutine
+        """
+        self.__switch(label)
+
+    def on_return(self, interpreter: 'Interpreter', position: int) -> None:
+        """
+        Leaves node of the current subroutine
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the RETURN instruction
+        """
+        # Calls made before resuming from a checkpoint aren't in the shadow
+        if len(self.__stack) > 1:
+            self.__switch(None)
+
+    def finish(self) -> None:
+        """Attributes time since the last change of the stack (must be called at the end of the run)"""
+        now = time.perf_counter()
+        self.__times[self.__stack[-1]] += now - self.__last_switch
+        self.__last_switch = now
+
+    def collapsed_stacks(self, weight: str = WEIGHTS[0]) -> List[str]:
+        """
+        Creates collapsed stacks (one line per node of the call tree with non-zero weight)
+
+        :param weight: Weight of stacks (one of WEIGHTS)
+        :return: Lines in the form "label;label;... weight"
+        """
+        paths = [ROOT_LABEL]
+        lines = []
+        for node in range(len(self.__labels)):
+            if node > 0:
+                # Parents are always created before their children
+                paths.append(paths[self.__parents[node]] + ";" + self.__labels[node])
+
+            if weight == "time":
+                value = round(self.__times[node] * 1_000_000)
+            else:
+                value = self.__counts[node]
+            if value > 0:
+                lines.append(f"{paths[node]} {value}")
+
+        return lines
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarizes statistics of labels
+
+        Inclusive values contain executions in called subroutines. Recursive calls are included only once.
+
+        :return: Statistics of labels (calls, maximum recursion depth, exclusive and inclusive instruction counts
+            and times) sorted by inclusive time
+        """
+        statistics = {
+            label: {"calls": calls, "max_depth": self.__max_depths[label], "instructions": 0, "time": 0.0,
+                    "inclusive_instructions": 0, "inclusive_time": 0.0}
+            for label, calls in self.__calls.items()
+        }
+
+        # Labels on the path from the root to the node (every label once)
+        paths: List[Tuple[str, ...]] = []
+        for node, label in enumerate(self.__labels):
+            parent_path = paths[self.__parents[node]] if node > 0 else ()
+            path = parent_path if label in parent_path else parent_path + (label,)
+            paths.append(path)
+
+            statistics[label]["instructions"] += self.__counts[node]
+            statistics[label]["time"] += self.__times[node]
+            for path_label in path:
+                statistics[path_label]["inclusive_instructions"] += self.__counts[node]
+                statistics[path_label]["inclusive_time"] += self.__times[node]
+
+        return dict(sorted(statistics.items(),
+                           key=lambda item: (-item[1]["inclusive_time"], -item[1]["inclusive_instructions"], item[0])))
+
+    def __switch(self, label: Optional[str]) -> None:
+        """
+        Changes the current stack (time until now belongs to the previous one)
+
+        :param label: Called label or None for return from the current subroutine
+        """
+        now = time.perf_counter()
+        current = self.__stack[-1]
+        self.__times[current] += now - self.__last_switch
+        self.__last_switch = now
+
+        if label is None:
+            returned = self.__labels[current]
+            self.__depths[returned] -= 1
+            self.__stack.pop()
+
+            return
+
+        node = self.__children[current].get(label)
+        if node is None:
+            node = len(self.__labels)
+            self.__children[current][label] = node
+            self.__labels.append(label)
+            self.__parents.append(current)
+            self.__children.append({})
+            self.__counts.append(0)
+            self.__times.append(0.0)
+        self.__stack.append(node)
+
+        self.__calls[label] = self.__calls.get(label, 0) + 1
+        depth = self.__depths[label] = self.__depths.get(label, 0) + 1
+        if depth > self.__max_depths.get(label, 0):
+            self.__max_depths[label] = depth
+
+
+def format_summary(summary: Dict[str, Dict[str, float]]) -> str:
+    """
+    Formats summary of labels as a text report
+
+    :param summary: Statistics of labels (see CallGraphProfiler.summary())
+    :return: Text report with a table of labels sorted by inclusive time
+    """
+    rows = [
+        (label, str(item["calls"]), str(item["max_depth"]), str(item["instructions"]),
+         str(item["inclusive_instructions"]), f"{item['time'] * 1000:.3f}", f"{item['inclusive_time'] * 1000:.3f}")
+        for label, item in summary.items()
+    ]
+    header = ("Label", "Calls", "Max depth", "Self instr.", "Total instr.", "Self ms", "Total ms")
+
+    return "\n".join(format_table(header, rows)) + "\n"
+
+
+def write_call_graph(profiler: CallGraphProfiler, path: str, weight: str = WEIGHTS[0]) -> None:
+    """
+    Writes collapsed stacks and summary of labels (to path with SUMMARY_SUFFIX and JSON_SUFFIX)
+
+    :param profiler: Profiler used by the run (it has been finished)
+    :param path: Path to the file for collapsed stacks
+    :param weight: Weight of stacks (one of WEIGHTS)
+    :raise OSError: Files can't be written
+    """
+    summary = profiler.summary()
+
+    with open(path, "w") as file:
+        file.writelines(line + "\n" for line in profiler.collapsed_stacks(weight))
+    with open(path + SUMMARY_SUFFIX, "w") as file:
+        file.write(format_summary(summary))
+    with open(path + JSON_SUFFIX, "w") as file:
+        json.dump(summary, file, indent=2)
+        file.write("\n")
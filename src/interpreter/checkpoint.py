@@ -0,0 +1,488 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Checkpoints of running interpretation (saving and restoring of its state)
+
+Checkpoint file format
+======================
+All numbers are big endian.
+
+    8 bytes         magic (format identification and version)
+    32 bytes        SHA-256 hash of XML source code representation of the program
+    records         state of the interpretation at times of checkpoints
+
+Every record is stored as:
+
+    4 bytes         length of the payload
+    4 bytes         CRC-32 of the payload
+    payload         dictionary serialized by marshal module (see CheckpointWriter.__capture())
+
+The first record contains the full state, the next ones only changes since the previous record (memory frames are
+compared by identities of stored values, stacks by their common bottom parts). The file is rewritten with a new full
+record when the changes get too large. Records are only appended, so a record damaged by a crash (the last one) is
+ignored and the state is restored from the previous ones.
+"""
+
+import marshal
+import os
+import signal
+import stat
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from interpreter.code import Program
+from interpreter.error import InvalidCheckpointException, InterpretationInterruptedException
+from interpreter.interpretation import Interpreter
+from interpreter.memory import DataType, MemoryFrame, Value, Variable
+from interpreter.runner import run_program
+
+MAGIC = b"IPPCKPT\x02"
+"""Header of checkpoint files (format identification and version)"""
+
+RECORD_HEADER = struct.Struct(">II")
+"""Header of records: length and CRC-32 of the payload"""
+
+DATA_TYPES = [DataType.INT, DataType.BOOL, DataType.STRING, DataType.NIL]
+"""Data types by their codes in checkpoints"""
+
+DATA_TYPE_CODES = {data_type: code for code, data_type in enumerate(DATA_TYPES)}
+"""Codes of data types in checkpoints"""
+
+SIGNAL_CHECK_QUOTA = 10000
+"""Number of instructions executed between checks for termination signal"""
+
+# Value in a checkpoint: code of the data type and content, None for uninitialized variable
+EncodedValue = Optional[Tuple[int, Union[int, bool, str, None]]]
+
+# Position in an output file with identity of the file (device and inode), None for outputs that aren't files
+OutputPosition = Optional[Tuple[int, int, int]]
+
+
+class Checkpoint:
+    """State of interpretation loaded from checkpoint file"""
+
+    def __init__(self, record: dict, frames: Dict[int, Dict[str, EncodedValue]], data_stack: List[EncodedValue],
+                 call_stack: List[int]):
+        """
+        Class constructor
+
+        :param record: The last valid record (scalar parts of the state and identifiers of frames are taken from it)
+        :param frames: Content of memory frames by their identifiers
+        :param data_stack: Values of the data stack (from the bottom-most to the top one)
+        :param call_stack: Positions of the call stack (from the bottom-most to the top one)
+        """
+        self.__record = record
+        self.__frames = frames
+        self.__data_stack = data_stack
+        self.__call_stack = call_stack
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of instructions executed before the checkpoint
+        """
+        return self.__record["executed"]
+
+    @property
+    def output_positions(self) -> Tuple[OutputPosition, OutputPosition]:
+        """
+        Getter for positions in output files
+
+        :return: Positions in the standard output and the standard error output after flushing with identities
+            of the files (None for outputs that aren't files)
+        """
+        return self.__record["stdout"], self.__record["stderr"]
+
+    def restore(self, interpreter: Interpreter) -> None:
+        """
+        Restores the state into a new interpreter (it must read the same inputs as the interpreter that has been
+        saved)
+
+        :param interpreter: Interpreter that hasn't run yet
+        """
+        frames = {identifier: decode_frame(content) for identifier, content in self.__frames.items()}
+        temporary_frame = self.__record["temporary"]
+        interpreter.memory.restore_frames(frames[self.__record["global"]],
+                                          [frames[identifier] for identifier in self.__record["local"]],
+                                          frames[temporary_frame] if temporary_frame is not None else None)
+
+        interpreter.data_stack.replace(0, tuple(decode_value(value) for value in self.__data_stack))
+        for position in self.__call_stack:
+            interpreter.call_stack.push(position)
+
+        interpreter.restore(self.__record["pc"], self.__record["executed"], self.__record["read_lines"])
+
+
+class CheckpointWriter:
+    """Writer of checkpoints of one interpretation into a file (incremental where possible)"""
+
+    COMPACTION_RATIO = 2
+    """The file is rewritten when it is larger than this ratio times the size of its full record"""
+
+    def __init__(self, checkpoint_file: str, program_hash: bytes):
+        """
+        Class constructor
+
+        :param checkpoint_file: Path to the checkpoint file (it is replaced by the first checkpoint)
+        :param program_hash: Hash of the program (see Recording.hash_program())
+        """
+        self.__path = checkpoint_file
+        self.__program_hash = program_hash
+
+        self.__file: Optional[BinaryIO] = None
+        self.__full_size = 0
+        self.__file_size = 0
+
+        # State written so far: frames by their identities (with own identifiers and stored values), stacks
+        self.__frames: Dict[int, Tuple[int, MemoryFrame, Dict[str, Optional[Value]]]] = {}
+        self.__next_frame_identifier = 0
+        self.__data_stack: List[Value] = []
+        self.__call_stack: List[int] = []
+
+    def write(self, interpreter: Interpreter, stdout: Optional[BinaryIO] = None,
+              stderr: Optional[BinaryIO] = None) -> None:
+        """
+        Writes a checkpoint (the interpreter must be between instructions and its outputs must be flushed)
+
+        :param interpreter: Saved interpreter
+        :param stdout: Binary stream with the standard output of the program (its position is saved) or None
+        :param stderr: Binary stream with the standard error output of the program (its position is saved) or None
+        :raise OSError: Checkpoint can't be written
+        """
+        full = self.__file is None or self.__file_size > self.COMPACTION_RATIO * self.__full_size
+        if full:
+            self.__frames = {}
+            self.__data_stack = []
+            self.__call_stack = []
+
+        record = self.__capture(interpreter, stdout, stderr)
+        payload = marshal.dumps(record)
+        data = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        if full:
+            self.close()
+
+            # The previous checkpoint stays valid until the new one is completely written
+            temporary_path = self.__path + ".tmp"
+            with open(temporary_path, "wb") as file:
+                file.write(MAGIC + self.__program_hash + data)
+            os.replace(temporary_path, self.__path)
+
+            self.__file = open(self.__path, "ab")
+            self.__full_size = len(data)
+            self.__file_size = len(data)
+        else:
+            self.__file.write(data)
+            self.__file.flush()
+            self.__file_size += len(data)
+
+    def close(self) -> None:
+        """Closes the checkpoint file"""
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def __capture(self, interpreter: Interpreter, stdout: Optional[BinaryIO], stderr: Optional[BinaryIO]) -> dict:
+        """
+        Captures state of the interpreter (changes since the previous capture)
+
+        :param interpreter: Saved interpreter
+        :param stdout: Binary stream with the standard output or None
+        :param stderr: Binary stream with the standard error output or None
+        :return: Record of the checkpoint
+        """
+        memory = interpreter.memory
+        frames = {}
+        tracked_frames = {}
+
+        def frame_identifier(memory_frame: MemoryFrame) -> int:
+            """
+            Finds identifier of the frame and captures its changes
+
+            :param memory_frame: Memory frame
+            :return: Identifier of the frame in checkpoints
+            """
+            tracked = tracked_frames.get(id(memory_frame)) or self.__frames.get(id(memory_frame))
+            if tracked is None or tracked[1] is not memory_frame:
+                tracked = (self.__next_frame_identifier, memory_frame, {})
+                self.__next_frame_identifier += 1
+            identifier, _, stored_values = tracked
+
+            if id(memory_frame) not in tracked_frames:
+                values = {}
+                changes = {}
+                for name, variable in memory_frame.variables.items():
+                    value = variable.value if variable.initialized else None
+                    values[name] = value
+                    if name not in stored_values or stored_values[name] is not value:
+                        changes[name] = encode_value(value)
+
+                if changes or not stored_values:
+                    frames[identifier] = changes
+                tracked_frames[id(memory_frame)] = (identifier, memory_frame, values)
+
+            return identifier
+
+        temporary_frame = memory.temporary_frame
+        record = {
+            "pc": interpreter.program_counter,
+            "executed": interpreter.executed_instructions,
+            "read_lines": interpreter.read_lines,
+            "stdout": stream_position(stdout),
+            "stderr": stream_position(stderr),
+            "global": frame_identifier(memory.global_frame),
+            "local": [frame_identifier(memory_frame) for memory_frame in memory.local_frames],
+            "temporary": frame_identifier(temporary_frame) if temporary_frame is not None else None,
+            "frames": frames,
+        }
+
+        # Frames that aren't used anymore are forgotten (they aren't referenced by the record)
+        self.__frames = tracked_frames
+
+        data_stack = interpreter.data_stack.values
+        kept = common_prefix_length(self.__data_stack, data_stack)
+        record["data_stack"] = (kept, [encode_value(value) for value in data_stack[kept:]])
+        self.__data_stack = list(data_stack)
+
+        call_stack = interpreter.call_stack.positions
+        kept = common_prefix_length(self.__call_stack, call_stack)
+        record["call_stack"] = (kept, list(call_stack[kept:]))
+        self.__call_stack = list(call_stack)
+
+        return record
+
+
+def load_checkpoint(checkpoint_file: str, program_hash: bytes) -> Checkpoint:
+    """
+    Loads the last valid checkpoint from file
+
+    :param checkpoint_file: Path to the checkpoint file
+    :param program_hash: Hash of the program (see Recording.hash_program())
+    :return: Loaded checkpoint
+    :raise InvalidCheckpointException: Invalid file or checkpoint of a different program
+    """
+    try:
+        with open(checkpoint_file, "rb") as file:
+            data = file.read()
+    except OSError:
+        raise InvalidCheckpointException("file can't be read")
+
+    header_size = len(MAGIC) + len(program_hash)
+    if len(data) < header_size or data[:len(MAGIC)] != MAGIC:
+        raise InvalidCheckpointException("file doesn't contain valid checkpoint")
+    if data[len(MAGIC):header_size] != program_hash:
+        raise InvalidCheckpointException("the checkpoint has been made with a different program")
+
+    record = None
+    frames: Dict[int, Dict[str, EncodedValue]] = {}
+    data_stack: List[EncodedValue] = []
+    call_stack: List[int] = []
+
+    position = header_size
+    while position + RECORD_HEADER.size <= len(data):
+        length, checksum = RECORD_HEADER.unpack_from(data, position)
+        payload = data[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            # Incomplete record (the interpretation has been killed while writing it)
+            break
+        position += RECORD_HEADER.size + length
+
+        try:
+            record = marshal.loads(payload)
+            for identifier, changes in record["frames"].items():
+                frames.setdefault(identifier, {}).update(changes)
+
+            used_frames = set(record["local"]) | {record["global"], record["temporary"]}
+            frames = {identifier: content for identifier, content in frames.items() if identifier in used_frames}
+
+            kept, values = record["data_stack"]
+            data_stack[kept:] = values
+            kept, positions = record["call_stack"]
+            call_stack[kept:] = positions
+        except (ValueError, EOFError, TypeError, KeyError):
+            raise InvalidCheckpointException("file doesn't contain valid checkpoint")
+
+    if record is None:
+        raise InvalidCheckpointException("file doesn't contain any complete checkpoint")
+
+    return Checkpoint(record, frames, data_stack, call_stack)
+
+
+def run_with_checkpoints(interpreter: Interpreter, program: Program, writer: CheckpointWriter,
+                         every: Optional[int] = None, stdout: Optional[BinaryIO] = None,
+                         stderr: Optional[BinaryIO] = None) -> int:
+    """
+    Interprets the program with checkpoints written periodically and on SIGTERM
+
+    After SIGTERM, the interpretation is stopped at the end of the current slice of instructions and its state
+    is written.
+
+    :param interpreter: Interpreter to use
+    :param program: Loaded program
+    :param writer: Writer of checkpoints
+    :param every: Number of instructions between periodic checkpoints or None for checkpoints only on SIGTERM
+    :param stdout: Binary stream with the standard output of the program (its position is saved) or None
+    :param stderr: Binary stream with the standard error output of the program (its position is saved) or None
+    :return: Exit code
+    :raise InterpretationInterruptedException: Interpretation stopped by SIGTERM (the checkpoint has been written)
+    :raise OSError: Checkpoint can't be written
+    """
+    terminated = threading.Event()
+    errors: List[OSError] = []
+    last_checkpoint = interpreter.executed_instructions
+
+    def after_slice() -> None:
+        """Writes checkpoint if it is time for it"""
+        nonlocal last_checkpoint
+
+        if not terminated.is_set() and (every is None or interpreter.executed_instructions - last_checkpoint < every):
+            return
+
+        try:
+            writer.write(interpreter, stdout, stderr)
+        except OSError as e:
+            errors.append(e)
+            raise InterpretationInterruptedException("Checkpoint can't be written")
+        last_checkpoint = interpreter.executed_instructions
+
+        if terminated.is_set():
+            raise InterpretationInterruptedException("Interpretation has been terminated by SIGTERM")
+
+    quota = SIGNAL_CHECK_QUOTA if every is None else max(1, min(every, SIGNAL_CHECK_QUOTA))
+    # Signals can be handled only in the main thread
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGTERM, lambda signal_number, frame: terminated.set())
+
+    try:
+        return run_program(interpreter, program, after_slice=after_slice, quota=quota)
+    except InterpretationInterruptedException:
+        if errors:
+            raise errors[0]
+
+        raise
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+        writer.close()
+
+
+def rewind_output(stream: BinaryIO, position: OutputPosition) -> None:
+    """
+    Removes output written after the checkpoint from output file (continuing interpretation writes it again)
+
+    Only the regular file the checkpoint has been made with is changed (e.g. opened again for appending by ">>"),
+    other files the output is redirected to are left untouched.
+
+    :param stream: Binary stream with the output
+    :param position: Position saved in the checkpoint or None
+    """
+    if position is None:
+        return
+
+    offset, device, inode = position
+    try:
+        descriptor = stream.fileno()
+        status = os.fstat(descriptor)
+        if not stat.S_ISREG(status.st_mode) or (status.st_dev, status.st_ino) != (device, inode) \
+                or status.st_size < offset:
+            return
+
+        stream.flush()
+        os.ftruncate(descriptor, offset)
+        stream.seek(offset)
+    except (OSError, ValueError):
+        # Not a real file
+        pass
+
+
+def stream_position(stream: Optional[BinaryIO]) -> OutputPosition:
+    """
+    Finds current position in output file
+
+    :param stream: Binary stream or None
+    :return: Position in the file with its device and inode or None if it isn't a regular file (pipe, terminal, etc.)
+    """
+    if stream is None:
+        return None
+
+    try:
+        status = os.fstat(stream.fileno())
+        if not stat.S_ISREG(status.st_mode):
+            return None
+
+        return stream.tell(), status.st_dev, status.st_ino
+    except (OSError, ValueError):
+        return None
+
+
+def common_prefix_length(first: list, second: list) -> int:
+    """
+    Finds length of common prefix of two lists (items are compared like by list comparison, so values of the data
+    stack are compared by identity)
+
+    :param first: First list
+    :param second: Second list
+    :return: Number of the same items at the start of the lists
+    """
+    length = min(len(first), len(second))
+    if first[:length] == second[:length]:
+        return length
+
+    # Binary search (slices are compared in C, it is faster than comparing items one by one)
+    low, high = 0, length - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def encode_value(value: Optional[Value]) -> EncodedValue:
+    """
+    Encodes value for checkpoint
+
+    :param value: Value or None (uninitialized variable)
+    :return: Encoded value
+    """
+    if value is None:
+        return None
+
+    return DATA_TYPE_CODES[value.val_type], value.content
+
+
+def decode_value(encoded: EncodedValue) -> Optional[Value]:
+    """
+    Decodes value from checkpoint
+
+    :param encoded: Encoded value
+    :return: Value or None (uninitialized variable)
+    """
+    if encoded is None:
+        return None
+
+    return Value(DATA_TYPES[encoded[0]], encoded[1])
+
+
+def decode_frame(content: Dict[str, EncodedValue]) -> MemoryFrame:
+    """
+    Creates memory frame from checkpoint
+
+    :param content: Encoded values of variables by their names (in the order of definition)
+    :return: Created memory frame
+    """
+    memory_frame = MemoryFrame()
+    for name, encoded in content.items():
+        memory_frame.add_variable(Variable(name, decode_value(encoded)))
+
+    return memory_frame
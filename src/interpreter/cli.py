@@ -3,12 +3,12 @@
 # Author: Michal Šmahel (xsmahe01)
 # Date: 2022
 
+import os
 import sys
-import textwrap
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
-from os import access, R_OK
-from os.path import realpath, isfile
-from typing import Optional
+from os import access, R_OK, X_OK
+from os.path import realpath, isfile, isdir
+from typing import List, Optional
 
 from interpreter.error import ExitCode, InvalidInputArgException, TooManyInputArgsException, \
     MissingRequiredInputArgException, InvalidFileArgException
@@ -29,17 +29,14 @@ class CliArgParser(ArgumentParser):
         # Initialize and configure wrapped class
         super().__init__(
             formatter_class=CzechHelpFormatter,
-            description=textwrap.dedent("""\
-                interpret.py je skript slouzici pro interpretaci XML reprezentace
-                kodu vytvorene skriptem parse.php ze zdrojoveho kodu v jazyce
-                IPPcode22. Jedna se o soucast 2. casti projektu do predmetu IPP
-                na FIT VUT.
-            """),
-            epilog=textwrap.dedent("""\
-                Vzdy musi byt zadan alespon jeden z argumentu --source a --input.
-                Pokud neni nektery z nich zadan, je pro dany pripad pouzit
-                standardni vstup.
-            """),
+            # Texts are already dedented (textwrap would slow down the start)
+            description="interpret.py je skript slouzici pro interpretaci XML reprezentace\n"
+                        "kodu vytvorene skriptem parse.php ze zdrojoveho kodu v jazyce\n"
+                        "IPPcode22. Jedna se o soucast 2. casti projektu do predmetu IPP\n"
+                        "na FIT VUT.\n",
+            epilog="Vzdy musi byt zadan alespon jeden z argumentu --source a --input.\n"
+                   "Pokud neni nektery z nich zadan, je pro dany pripad pouzit\n"
+                   "standardni vstup.\n",
             add_help=False)
 
         self.__setup_input_arguments()
@@ -66,6 +63,141 @@ class CliArgParser(ArgumentParser):
                                    help="XML reprezentace zdrojoveho kodu bude nactena ze zadaneho souboru file.")
         optional_args.add_argument("--input", metavar="file", type=str, default=None,
                                    help="Vstupy pro interpretaci budou brany ze zadaneho souboru file.")
+        optional_args.add_argument("--jobs", metavar="n", type=int, default=1,
+                                   help="""Velke soubory zadane pomoci --source budou nacitany paralelne az n procesy.
+                                    Vychozi hodnota je 1 (nacitani jednim procesem).""")
+        optional_args.add_argument("--output-buffer", metavar="size", type=int, default=None,
+                                   help="""Vystupy interpretovaneho programu budou vypisovany po dosazeni size bajtu
+                                    v bufferu (0 znamena vypis po kazdem zapisu). Vzdy jsou vypsany take pri
+                                    ukonceni interpretace.""")
+        optional_args.add_argument("--line-buffered", action="store_true", default=False,
+                                   help="""Vystupy interpretovaneho programu budou vypisovany po kazdem radku (vychozi
+                                    chovani pro vystup na terminal).""")
+        optional_args.add_argument("--record", metavar="file", type=str, default=None,
+                                   help="""Vstupy nactene instrukcemi READ, vystup a navratovy kod interpretace budou
+                                    ulozeny do souboru file.""")
+        optional_args.add_argument("--replay", metavar="file", type=str, default=None,
+                                   help="""Interpretace bude prehrana ze zaznamu v souboru file (vytvoreneho pomoci
+                                    --record). Vstupy jsou brany ze zaznamu a vystup je porovnan se zaznamenanym.
+                                    Parametr --input neni v tomto pripade potreba.""")
+        optional_args.add_argument("--server", metavar="socket", type=str, default=None,
+                                   help="""Spusti interpret jako server naslouchajici na Unix socketu socket. Programy
+                                    a vstupy jsou prijimany pres socket (viz interpreter/server.py), parametry
+                                    --source a --input nejsou v tomto pripade potreba. Server bezi do preruseni
+                                    (SIGINT nebo SIGTERM).""")
+        optional_args.add_argument("--server-cache", metavar="size", type=int, default=256,
+                                   help="""Maximalni velikost nactenych programu uchovavanych serverem v MiB. Vychozi
+                                    hodnota je 256.""")
+        optional_args.add_argument("--metrics", metavar="target", type=str, default=None,
+                                   help="""Souhrnne metriky behu serveru nebo davky (pocty behu podle navratoveho kodu,
+                                    provedene instrukce, doby nacitani a interpretace, prectene a zapsane bajty,
+                                    maximalni hloubky zasobniku) budou zapisovany ve formatu Prometheus do souboru
+                                    target (nejvyse jednou za sekundu a na konci), nebo pri tvaru unix:path
+                                    poskytovany na Unix socketu path. Lze pouzit pouze s --server nebo --batch.""")
+        optional_args.add_argument("--batch", metavar="dir", type=str, default=None,
+                                   help="""Program bude nacten jednou a interpretovan se vstupy z kazdeho souboru
+                                    name.in v adresari dir (paralelne vice procesy, ostatni soubory jsou
+                                    ignorovany). Vysledky jsou zapsany pomoci --results a/nebo --manifest. Nelze
+                                    kombinovat s --input.""")
+        optional_args.add_argument("--results", metavar="dir", type=str, default=None,
+                                   help="""Vysledky davky budou zapsany do adresare dir: pro vstupni soubor name.in
+                                    soubory name.out (standardni vystup), name.err (standardni chybovy vystup)
+                                    a name.rc (navratovy kod nebo timeout).""")
+        optional_args.add_argument("--manifest", metavar="file", type=str, default=None,
+                                   help="""Vysledky davky budou zapsany do souboru file ve formatu JSON Lines (jeden
+                                    objekt na radek pro kazdy vstupni soubor).""")
+        optional_args.add_argument("--workers", metavar="n", type=int, default=None,
+                                   help="""Pocet procesu interpretujicich davku. Vychozi hodnota je pocet
+                                    procesoru.""")
+        optional_args.add_argument("--start-method", choices=["fork", "spawn", "forkserver", "thread"],
+                                   default="fork",
+                                   help="""Zpusob spousteni procesu interpretujicich davku. Pri fork (vychozi) procesy
+                                    sdileji nacteny program, pri spawn a forkserver je program umisten do sdilene
+                                    pameti v binarni podobe a procesy jej interpretuji primo z ni. Pri thread
+                                    davku interpretuji vlakna jednoho procesu.""")
+        optional_args.add_argument("--timeout", metavar="seconds", type=float, default=None,
+                                   help="""Maximalni doba jedne interpretace v davce v sekundach. Vychozi je bez
+                                    omezeni.""")
+        optional_args.add_argument("--lockstep", action="store_true", default=False,
+                                   help="""Davka bude interpretovana v rezimu lockstep: instance programu pro mnoho
+                                    vstupu bezi soucasne nad poli NumPy (volitelna zavislost, bez ni je cela davka
+                                    interpretovana beznym zpusobem). Vstupy, ktere tento rezim nepodporuje (retezce,
+                                    volani funkci, chyby, ...), jsou interpretovany beznym zpusobem se stejnym
+                                    vysledkem.""")
+        optional_args.add_argument("--memoize", action="store_true", default=False,
+                                   help="""Vysledky volani cistych funkci (bez vstupu, vystupu a pristupu do globalniho
+                                    ramce) budou zapamatovany podle obsahu docasneho ramce a hodnot na datovem
+                                    zasobniku. Opakovana volani se stejnymi argumenty nejsou znovu interpretovana.
+                                    Statistiky jsou zapsany pomoci --stats.""")
+        optional_args.add_argument("--memoize-size", metavar="n", type=int, default=65536,
+                                   help="""Maximalni pocet zapamatovanych vysledku volani (pri prekroceni jsou
+                                    odstraneny nejdele nepouzite). Vychozi hodnota je 65536.""")
+        optional_args.add_argument("--checkpoint", metavar="file", type=str, default=None,
+                                   help="""Stav interpretace (pozice v programu, pamet, zasobniky, pozice ve vstupu
+                                    a ve vystupech) bude ukladan do souboru file: periodicky (viz
+                                    --checkpoint-every) a pri ukonceni signalem SIGTERM. Dalsi ulozeni zapisuji jen
+                                    zmeny od predchoziho.""")
+        optional_args.add_argument("--checkpoint-every", metavar="n", type=int, default=None,
+                                   help="""Stav interpretace bude do --checkpoint ukladan kazdych n instrukci. Vychozi
+                                    je ukladani jen pri SIGTERM.""")
+        optional_args.add_argument("--resume", metavar="file", type=str, default=None,
+                                   help="""Interpretace bude obnovena ze stavu ulozeneho v souboru file (vytvoreneho
+                                    pomoci --checkpoint se stejnym programem). Vstupy musi byt stejne, uz nactene
+                                    radky jsou preskoceny. Pokud je vystup presmerovan do souboru s puvodnim
+                                    vystupem (>>), je zkracen na delku v okamziku ulozeni stavu.""")
+        optional_args.add_argument("--cache", metavar="dir", type=str, default=None,
+                                   help="""Vysledky interpretaci (vystupy a navratovy kod) budou ukladany do adresare
+                                    dir pod otiskem programu a vstupu. Pri opakovane interpretaci stejneho programu
+                                    se stejnymi vstupy je vysledek vzat z adresare bez nacitani a interpretace
+                                    programu. Nelze kombinovat s --record, --replay a --batch.""")
+        optional_args.add_argument("--cache-size", metavar="size", type=int, default=256,
+                                   help="""Maximalni velikost adresare --cache v MiB. Pri jejim prekroceni jsou
+                                    odstraneny nejdele nepouzite vysledky. Vychozi hodnota je 256.""")
+        optional_args.add_argument("--profile", metavar="file", type=str, default=None,
+                                   help="""Profil interpretace (pocty provedeni a doba instrukci podle poradi
+                                    a podle operacniho kodu) bude zapsan jako textova zprava do souboru file a ve
+                                    formatu JSON do souboru file.json. Nelze kombinovat s --replay, --batch
+                                    a --cache.""")
+        optional_args.add_argument("--profile-interval", metavar="n", type=int, default=10,
+                                   help="""Doba je merena u kazde n-te provedene instrukce (v prumeru, s nahodnymi
+                                    rozestupy) a prepoctena na vsechna provedeni. Hodnota 1 meri vsechny instrukce
+                                    za cenu vetsi rezie. Vychozi hodnota je 10.""")
+        optional_args.add_argument("--call-graph", metavar="file", type=str, default=None,
+                                   help="""Profil volani podprogramu: pocty instrukci (nebo doba, viz
+                                    --call-graph-weight) pro kazdy zasobnik volanych navesti budou zapsany do souboru
+                                    file ve formatu collapsed stacks (pro nastroje flame graph). Souhrn navesti (pocty
+                                    volani, maximalni hloubka rekurze, vlastni a celkove pocty instrukci a doba) bude
+                                    zapsan do file.txt a file.json. Nelze kombinovat s --replay, --batch a --cache.""")
+        optional_args.add_argument("--call-graph-weight", choices=["instructions", "time"], default="instructions",
+                                   help="""Vaha zasobniku v --call-graph: pocet provedenych instrukci (vychozi) nebo
+                                    doba v mikrosekundach.""")
+        optional_args.add_argument("--trace", metavar="file", type=str, default=None,
+                                   help="""Prubeh interpretace bude zapsan do souboru file ve formatu Chrome trace
+                                    events (zobrazitelny v Perfetto): useky volani podprogramu (CALL az RETURN),
+                                    instrukci READ a WRITE a zapisu vystupu, okamziky operaci s ramci. Udalosti jsou
+                                    drzeny v pameti a zapsany az na konci. Nelze kombinovat s --replay, --batch
+                                    a --cache.""")
+        optional_args.add_argument("--crash-dump", metavar="file", type=str, default=None,
+                                   help="""Interpret si pamatuje naposledy provedene instrukce (viz
+                                    --crash-dump-size). Pokud interpretace skonci chybou, jsou zapsany spolu se stavem
+                                    ramcu a zasobniku do souboru file. Obsah vypise python3 -m interpreter.postmortem
+                                    file. Nelze kombinovat s --replay, --batch a --cache.""")
+        optional_args.add_argument("--crash-dump-size", metavar="n", type=int, default=65536,
+                                   help="""Pocet pamatovanych provedenych instrukci pro --crash-dump (zaokrouhleno
+                                    nahoru na mocninu dvou). Vychozi hodnota je 65536.""")
+        optional_args.add_argument("--debug", action="store_true", default=False,
+                                   help="""Interaktivni ladeni: program se zastavi po instrukci BREAK a pred
+                                    instrukcemi s breakpointem (viz --break). Prikazy ladiciho programu (napoveda
+                                    prikazem h) jsou cteny z terminalu, zpravy jsou vypisovany na standardni chybovy
+                                    vystup. Nelze kombinovat s --replay, --batch a --cache.""")
+        optional_args.add_argument("--break", metavar="order", type=int, action="append", default=[],
+                                   dest="breakpoints",
+                                   help="""Breakpoint pred instrukci s poradim order pro --debug (lze zadat
+                                    vicekrat).""")
+        optional_args.add_argument("--stats", metavar="file", type=str, default=None,
+                                   help="""Statistiky interpretace (navratovy kod, doba behu, zda byl vysledek vzat
+                                    z --cache a statistiky --memoize) budou pripojeny do souboru file ve formatu
+                                    JSON Lines.""")
 
     def __parse_input_arguments(self) -> None:
         """Parses CLI input arguments"""
@@ -76,6 +208,38 @@ class CliArgParser(ArgumentParser):
             self.__parsed_args.source = realpath(self.__parsed_args.source)
         if self.__parsed_args.input:
             self.__parsed_args.input = realpath(self.__parsed_args.input)
+        if self.__parsed_args.record:
+            self.__parsed_args.record = realpath(self.__parsed_args.record)
+        if self.__parsed_args.replay:
+            self.__parsed_args.replay = realpath(self.__parsed_args.replay)
+        if self.__parsed_args.server:
+            self.__parsed_args.server = realpath(self.__parsed_args.server)
+        if self.__parsed_args.batch:
+            self.__parsed_args.batch = realpath(self.__parsed_args.batch)
+        if self.__parsed_args.results:
+            self.__parsed_args.results = realpath(self.__parsed_args.results)
+        if self.__parsed_args.manifest:
+            self.__parsed_args.manifest = realpath(self.__parsed_args.manifest)
+        if self.__parsed_args.metrics:
+            # Socket target keeps its prefix
+            prefix = "unix:" if self.__parsed_args.metrics.startswith("unix:") else ""
+            self.__parsed_args.metrics = prefix + realpath(self.__parsed_args.metrics[len(prefix):])
+        if self.__parsed_args.checkpoint:
+            self.__parsed_args.checkpoint = realpath(self.__parsed_args.checkpoint)
+        if self.__parsed_args.resume:
+            self.__parsed_args.resume = realpath(self.__parsed_args.resume)
+        if self.__parsed_args.cache:
+            self.__parsed_args.cache = realpath(self.__parsed_args.cache)
+        if self.__parsed_args.stats:
+            self.__parsed_args.stats = realpath(self.__parsed_args.stats)
+        if self.__parsed_args.profile:
+            self.__parsed_args.profile = realpath(self.__parsed_args.profile)
+        if self.__parsed_args.call_graph:
+            self.__parsed_args.call_graph = realpath(self.__parsed_args.call_graph)
+        if self.__parsed_args.trace:
+            self.__parsed_args.trace = realpath(self.__parsed_args.trace)
+        if self.__parsed_args.crash_dump:
+            self.__parsed_args.crash_dump = realpath(self.__parsed_args.crash_dump)
 
     def __check_input_arguments(self) -> None:
         """
@@ -83,16 +247,85 @@ class CliArgParser(ArgumentParser):
 
         :raise TooManyInputArgumentsException: --help switch must be entered alone
         :raise MissingRequiredInputArgException: At least one of the --source and --input must be set
-        :raise InvalidFileArgException: File in --source or --input isn't valid
+        :raise InvalidInputArgumentException: Invalid value of input argument
+        :raise InvalidFileArgException: File in --source, --input, --replay, --resume or --batch isn't valid
         """
         # --help must be alone
         if self.__parsed_args.help and len(sys.argv) > 1:
             raise TooManyInputArgsException("If --help switch is active, no other argument is allowed")
 
-        # One of --source and --input must be entered
-        if self.__parsed_args.source is None and self.__parsed_args.input is None:
+        # One of --source and --input must be entered (inputs are taken from the recording when replaying, from
+        # the directory in batch mode, server receives everything through its socket)
+        if self.__parsed_args.source is None and self.__parsed_args.input is None \
+                and self.__parsed_args.replay is None and self.__parsed_args.batch is None \
+                and self.__parsed_args.server is None:
             raise MissingRequiredInputArgException("At least one of --source and --input must be entered")
 
+        if self.__parsed_args.jobs < 1:
+            raise InvalidInputArgException("--jobs must be positive number")
+        if self.__parsed_args.output_buffer is not None and self.__parsed_args.output_buffer < 0:
+            raise InvalidInputArgException("--output-buffer mustn't be negative number")
+        if self.__parsed_args.record is not None and self.__parsed_args.replay is not None:
+            raise InvalidInputArgException("--record and --replay can't be combined")
+        if self.__parsed_args.server_cache < 0:
+            raise InvalidInputArgException("--server-cache mustn't be negative number")
+        if self.__parsed_args.metrics is not None and self.__parsed_args.server is None \
+                and self.__parsed_args.batch is None:
+            raise InvalidInputArgException("--metrics can be used only with --server or --batch")
+        if self.__parsed_args.batch is not None:
+            if self.__parsed_args.input is not None:
+                raise InvalidInputArgException("--batch and --input can't be combined")
+            if self.__parsed_args.results is None and self.__parsed_args.manifest is None:
+                raise MissingRequiredInputArgException("--batch requires --results or --manifest")
+        if self.__parsed_args.workers is not None and self.__parsed_args.workers < 1:
+            raise InvalidInputArgException("--workers must be positive number")
+        if self.__parsed_args.timeout is not None and self.__parsed_args.timeout <= 0:
+            raise InvalidInputArgException("--timeout must be positive number")
+        if self.__parsed_args.cache is not None and (self.__parsed_args.record is not None
+                                                     or self.__parsed_args.replay is not None
+                                                     or self.__parsed_args.batch is not None):
+            raise InvalidInputArgException("--cache can't be combined with --record, --replay and --batch")
+        if self.__parsed_args.checkpoint is not None or self.__parsed_args.resume is not None:
+            if self.__parsed_args.record is not None or self.__parsed_args.replay is not None \
+                    or self.__parsed_args.batch is not None or self.__parsed_args.cache is not None:
+                raise InvalidInputArgException("--checkpoint and --resume can't be combined with --record, --replay, "
+                                               "--batch and --cache")
+        if self.__parsed_args.checkpoint_every is not None:
+            if self.__parsed_args.checkpoint is None:
+                raise MissingRequiredInputArgException("--checkpoint-every requires --checkpoint")
+            if self.__parsed_args.checkpoint_every < 1:
+                raise InvalidInputArgException("--checkpoint-every must be positive number")
+        if self.__parsed_args.profile is not None and (self.__parsed_args.replay is not None
+                                                       or self.__parsed_args.batch is not None
+                                                       or self.__parsed_args.cache is not None):
+            raise InvalidInputArgException("--profile can't be combined with --replay, --batch and --cache")
+        if self.__parsed_args.profile_interval < 1:
+            raise InvalidInputArgException("--profile-interval must be positive number")
+        if self.__parsed_args.call_graph is not None and (self.__parsed_args.replay is not None
+                                                          or self.__parsed_args.batch is not None
+                                                          or self.__parsed_args.cache is not None):
+            raise InvalidInputArgException("--call-graph can't be combined with --replay, --batch and --cache")
+        if self.__parsed_args.trace is not None and (self.__parsed_args.replay is not None
+                                                     or self.__parsed_args.batch is not None
+                                                     or self.__parsed_args.cache is not None):
+            raise InvalidInputArgException("--trace can't be combined with --replay, --batch and --cache")
+        if self.__parsed_args.crash_dump is not None and (self.__parsed_args.replay is not None
+                                                          or self.__parsed_args.batch is not None
+                                                          or self.__parsed_args.cache is not None):
+            raise InvalidInputArgException("--crash-dump can't be combined with --replay, --batch and --cache")
+        if self.__parsed_args.crash_dump_size < 1:
+            raise InvalidInputArgException("--crash-dump-size must be positive number")
+        if self.__parsed_args.debug and (self.__parsed_args.replay is not None
+                                         or self.__parsed_args.batch is not None
+                                         or self.__parsed_args.cache is not None):
+            raise InvalidInputArgException("--debug can't be combined with --replay, --batch and --cache")
+        if self.__parsed_args.breakpoints and not self.__parsed_args.debug:
+            raise MissingRequiredInputArgException("--break requires --debug")
+        if self.__parsed_args.memoize_size < 0:
+            raise InvalidInputArgException("--memoize-size mustn't be negative number")
+        if self.__parsed_args.cache_size < 0:
+            raise InvalidInputArgException("--cache-size mustn't be negative number")
+
         # Check files
         source_file = self.__parsed_args.source
         if source_file and (not isfile(source_file) or not access(source_file, R_OK)):
@@ -100,6 +333,15 @@ class CliArgParser(ArgumentParser):
         input_file = self.__parsed_args.input
         if input_file and (not isfile(input_file) or not access(input_file, R_OK)):
             raise InvalidFileArgException("--input must specify valid file with read access")
+        replay_file = self.__parsed_args.replay
+        if replay_file and (not isfile(replay_file) or not access(replay_file, R_OK)):
+            raise InvalidFileArgException("--replay must specify valid file with read access")
+        resume_file = self.__parsed_args.resume
+        if resume_file and (not isfile(resume_file) or not access(resume_file, R_OK)):
+            raise InvalidFileArgException("--resume must specify valid file with read access")
+        batch_dir = self.__parsed_args.batch
+        if batch_dir and (not isdir(batch_dir) or not access(batch_dir, R_OK | X_OK)):
+            raise InvalidFileArgException("--batch must specify valid directory with read access")
 
     def error(self, message: str) -> None:
         """
@@ -129,6 +371,297 @@ class CliArgParser(ArgumentParser):
         """
         return self.__parsed_args.input
 
+    @property
+    def jobs(self) -> int:
+        """
+        Getter for number of processes for loading the program
+
+        :return: Maximum number of processes used for loading XML source code representation
+        """
+        return self.__parsed_args.jobs
+
+    @property
+    def output_buffer(self) -> Optional[int]:
+        """
+        Getter for size of output buffers
+
+        :return: Number of buffered bytes that causes flushing of program's outputs or None for default size
+        """
+        return self.__parsed_args.output_buffer
+
+    @property
+    def line_buffered(self) -> Optional[bool]:
+        """
+        Getter for line buffering of outputs
+
+        :return: True if outputs should be flushed after every line, None for automatic detection (terminals only)
+        """
+        return True if self.__parsed_args.line_buffered else None
+
+    @property
+    def record(self) -> Optional[str]:
+        """
+        Getter for file for recording of interpretation
+
+        :return: Absolute path to the file where to save the recording or None (no recording)
+        """
+        return self.__parsed_args.record
+
+    @property
+    def replay(self) -> Optional[str]:
+        """
+        Getter for file with recording to replay
+
+        :return: Absolute path to the file with the recording or None (ordinary interpretation)
+        """
+        return self.__parsed_args.replay
+
+    @property
+    def server(self) -> Optional[str]:
+        """
+        Getter for server's socket
+
+        :return: Absolute path to Unix socket where the server should listen or None (ordinary interpretation)
+        """
+        return self.__parsed_args.server
+
+    @property
+    def server_cache(self) -> int:
+        """
+        Getter for size of server's program cache
+
+        :return: Maximum size of cached programs in bytes
+        """
+        return self.__parsed_args.server_cache * 1024 * 1024
+
+    @property
+    def metrics(self) -> Optional[str]:
+        """
+        Getter for target of metrics
+
+        :return: Path to the metrics file, unix:path for the Unix socket or None (no metrics)
+        """
+        return self.__parsed_args.metrics
+
+    @property
+    def batch(self) -> Optional[str]:
+        """
+        Getter for directory with inputs for batch mode
+
+        :return: Absolute path to the directory with files with inputs or None (ordinary interpretation)
+        """
+        return self.__parsed_args.batch
+
+    @property
+    def results(self) -> Optional[str]:
+        """
+        Getter for directory with results of batch mode
+
+        :return: Absolute path to the directory where to write results or None
+        """
+        return self.__parsed_args.results
+
+    @property
+    def manifest(self) -> Optional[str]:
+        """
+        Getter for manifest of batch mode
+
+        :return: Absolute path to the file where to write results as JSON lines or None
+        """
+        return self.__parsed_args.manifest
+
+    @property
+    def workers(self) -> int:
+        """
+        Getter for number of worker processes of batch mode
+
+        :return: Number of processes interpreting the batch
+        """
+        if self.__parsed_args.workers is None:
+            return os.cpu_count() or 1
+
+        return self.__parsed_args.workers
+
+    @property
+    def start_method(self) -> str:
+        """
+        Getter for start method of workers of batch mode
+
+        :return: Start method (fork, spawn, forkserver or thread)
+        """
+        return self.__parsed_args.start_method
+
+    @property
+    def lockstep(self) -> bool:
+        """
+        Getter for lockstep execution of batch mode
+
+        :return: Should the batch be interpreted in lockstep where possible?
+        """
+        return self.__parsed_args.lockstep
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """
+        Getter for time limit of one interpretation in batch mode
+
+        :return: Time limit in seconds or None for no limit
+        """
+        return self.__parsed_args.timeout
+
+    @property
+    def memoize(self) -> bool:
+        """
+        Getter for memoization of pure subroutines
+
+        :return: Should results of calls of pure subroutines be memoized?
+        """
+        return self.__parsed_args.memoize
+
+    @property
+    def memoize_size(self) -> int:
+        """
+        Getter for size of the store of memoized results
+
+        :return: Maximum number of memoized results of calls
+        """
+        return self.__parsed_args.memoize_size
+
+    @property
+    def checkpoint(self) -> Optional[str]:
+        """
+        Getter for file with checkpoints
+
+        :return: Absolute path to the file where to save state of the interpretation or None (no checkpoints)
+        """
+        return self.__parsed_args.checkpoint
+
+    @property
+    def checkpoint_every(self) -> Optional[int]:
+        """
+        Getter for period of checkpoints
+
+        :return: Number of instructions between checkpoints or None for checkpoints only on SIGTERM
+        """
+        return self.__parsed_args.checkpoint_every
+
+    @property
+    def resume(self) -> Optional[str]:
+        """
+        Getter for file with checkpoint to resume from
+
+        :return: Absolute path to the file with saved state of the interpretation or None (start from the beginning)
+        """
+        return self.__parsed_args.resume
+
+    @property
+    def cache(self) -> Optional[str]:
+        """
+        Getter for directory with cached results
+
+        :return: Absolute path to the directory with cached results or None (no caching)
+        """
+        return self.__parsed_args.cache
+
+    @property
+    def cache_size(self) -> int:
+        """
+        Getter for size of the directory with cached results
+
+        :return: Maximum size of cached results in bytes
+        """
+        return self.__parsed_args.cache_size * 1024 * 1024
+
+    @property
+    def stats(self) -> Optional[str]:
+        """
+        Getter for file with statistics of interpretations
+
+        :return: Absolute path to the file where to append statistics or None
+        """
+        return self.__parsed_args.stats
+
+    @property
+    def profile(self) -> Optional[str]:
+        """
+        Getter for file with profile
+
+        :return: Absolute path to the file where to write the profile report or None (no profiling)
+        """
+        return self.__parsed_args.profile
+
+    @property
+    def profile_interval(self) -> int:
+        """
+        Getter for sample interval of the profiler
+
+        :return: Average number of executed instructions per timed one
+        """
+        return self.__parsed_args.profile_interval
+
+    @property
+    def call_graph(self) -> Optional[str]:
+        """
+        Getter for file with collapsed stacks of the call-graph profile
+
+        :return: Absolute path to the file where to write collapsed stacks or None (no call-graph profiling)
+        """
+        return self.__parsed_args.call_graph
+
+    @property
+    def call_graph_weight(self) -> str:
+        """
+        Getter for weight of collapsed stacks
+
+        :return: Weight of stacks (instructions or time)
+        """
+        return self.__parsed_args.call_graph_weight
+
+    @property
+    def trace(self) -> Optional[str]:
+        """
+        Getter for file with trace events
+
+        :return: Absolute path to the file where to write the trace or None (no tracing)
+        """
+        return self.__parsed_args.trace
+
+    @property
+    def crash_dump(self) -> Optional[str]:
+        """
+        Getter for file with dump of failed interpretation
+
+        :return: Absolute path to the file where to write the dump or None (no post-mortem diagnosis)
+        """
+        return self.__parsed_args.crash_dump
+
+    @property
+    def crash_dump_size(self) -> int:
+        """
+        Getter for size of the history of executed instructions
+
+        :return: Number of remembered executed instructions
+        """
+        return self.__parsed_args.crash_dump_size
+
+    @property
+    def debug(self) -> bool:
+        """
+        Getter for interactive debugging
+
+        :return: Is interactive debugger enabled?
+        """
+        return self.__parsed_args.debug
+
+    @property
+    def breakpoints(self) -> List[int]:
+        """
+        Getter for breakpoints of the debugger
+
+        :return: Orders of instructions with breakpoints
+        """
+        return self.__parsed_args.breakpoints
+
 
 class CzechHelpFormatter(RawDescriptionHelpFormatter):
     """
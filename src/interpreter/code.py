@@ -4,11 +4,14 @@
 # Date: 2022
 import re
 from enum import Enum
-from typing import Dict, Union
+from typing import Dict, List, Union
 
 from interpreter.error import UsingUndefinedLabelException, MissingInstructionArgException, \
     InvalidInstructionArgumentValueException, DuplicateLabelException
 
+# Shared by all arguments (compiling it in every instance makes arguments expensive to create and transfer)
+STRING_ESCAPE_REGEX = re.compile("\\\\(\\d{3})")
+
 
 class Program:
     """Entity representation of interpreted program"""
@@ -30,7 +33,8 @@ class Program:
 
         :param unsorted_instructions: Instructions stored like: "order: Instruction" in dictionary
         """
-        self.__instructions = [unsorted_instructions[order] for order in sorted(unsorted_instructions.keys())]
+        self.__orders = sorted(unsorted_instructions.keys())
+        self.__instructions = [unsorted_instructions[order] for order in self.__orders]
 
     def __create_label_dict(self):
         """
@@ -57,6 +61,15 @@ class Program:
             if instruction.op_code == OpCode.LABEL
         }
 
+    @property
+    def instructions(self) -> List['Instruction']:
+        """
+        Getter for instructions
+
+        :return: Instructions sorted by their order
+        """
+        return self.__instructions
+
     def get_instruction_at(self, position) -> 'Instruction':
         """
         Returns instruction at wanted position
@@ -70,6 +83,15 @@ class Program:
         else:
             raise EndOfProgram("No instruction at given position. Program has already ended")
 
+    def get_order_at(self, position: int) -> int:
+        """
+        Returns order of instruction at wanted position
+
+        :param position: Position of the instruction (something like program counter value)
+        :return: Order of the instruction from the XML source code representation
+        """
+        return self.__orders[position]
+
     def get_jump_target(self, label: str) -> int:
         """
         Finds the target position of jump instruction (position of label the jump is onto)
@@ -145,8 +167,6 @@ class Argument:
         self.__arg_type = arg_type
         self.__value = value
 
-        self.__string_regex = re.compile("\\\\(\\d{3})")
-
     @property
     def arg_type(self) -> 'ArgType':
         """
@@ -156,6 +176,15 @@ class Argument:
         """
         return self.__arg_type
 
+    @property
+    def raw_value(self) -> str:
+        """
+        Getter for raw argument value
+
+        :return: Argument value in string form (as it has been loaded)
+        """
+        return self.__value
+
     @property
     def value(self) -> Union[int, str, bool, None]:
         """
@@ -176,7 +205,7 @@ class Argument:
         elif self.__arg_type == ArgType.STRING:
             # Convert \XXX escape sequences to characters
             # Inspired by: https://stackoverflow.com/a/18737964
-            return self.__string_regex.sub(lambda match: chr(int(match.group(1))), self.__value)
+            return STRING_ESCAPE_REGEX.sub(lambda match: chr(int(match.group(1))), self.__value)
         else:
             # In all other cases value is of string data type
             return self.__value
@@ -0,0 +1,211 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Interactive debugger (execution hook stopping the program at BREAK instructions and breakpoints)
+
+Commands are read from a separate stream (the terminal), so the program can still read its inputs from stdin.
+"""
+
+from typing import Iterable, List, Set, TextIO, TYPE_CHECKING
+
+from interpreter.code import Argument, ArgType, Instruction, Program, EndOfProgram
+from interpreter.hooks import ExecutionHook
+from interpreter.postmortem import dump_frame, dump_value, format_value
+
+if TYPE_CHECKING:
+    from interpreter.interpretation import Interpreter
+
+HELP = """Commands:
+  c, continue       continue to the next BREAK or breakpoint
+  s, step           execute one instruction
+  b, break order    set breakpoint before instruction with the order
+  d, delete order   delete breakpoint
+  p, print [var]    print variable (like GF@x) or all frames
+  stack             print data stack
+  bt, backtrace     print call stack
+  q, quit           stop debugging (the program continues without stops)
+  h, help           print this help"""
+
+
+class Debugger(ExecutionHook):
+    """Debugger stopping the program and executing commands of the user"""
+
+    def __init__(self, program: Program, commands: TextIO, output: TextIO, breakpoints: Iterable[int] = ()):
+        """
+        Class constructor
+
+        :param program: Debugged program
+        :param commands: Stream with commands of the user
+        :param output: Stream for messages of the debugger
+        :param breakpoints: Orders of instructions with breakpoints
+        """
+        self.__program = program
+        self.__commands = commands
+        self.__output = output
+
+        self.__positions_by_order = {
+            program.get_order_at(position): position for position in range(len(program.instructions))
+        }
+        self.__breakpoints: Set[int] = set()
+        for order in breakpoints:
+            self.__add_breakpoint(order)
+
+        self.__stepping = False
+        self.__detached = False
+
+    def before_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Stops before stepped instruction or instruction with breakpoint
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        if self.__detached:
+            return
+
+        if self.__stepping:
+            self.__stop(interpreter, position, "step")
+        elif position in self.__breakpoints:
+            self.__stop(interpreter, position, "breakpoint")
+
+    def on_break(self, interpreter: 'Interpreter', position: int) -> None:
+        """
+        Stops after BREAK instruction
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the BREAK instruction
+        """
+        if not self.__detached and not self.__stepping:
+            self.__stop(interpreter, position, "BREAK")
+
+    def __stop(self, interpreter: 'Interpreter', position: int, reason: str) -> None:
+        """
+        Executes commands of the user until the program is continued
+
+        :param interpreter: Stopped interpreter
+        :param position: Position of the instruction (the next executed one or BREAK)
+        :param reason: Reason of the stop
+        """
+        self.__stepping = False
+        self.__print(f"Stopped at {self.__describe(position)} ({reason}), "
+                     f"{interpreter.executed_instructions} instructions executed")
+
+        while True:
+            self.__output.write("(debug) ")
+            self.__output.flush()
+            line = self.__commands.readline()
+            if not line:
+                # No more commands
+                self.__detached = True
+
+                return
+
+            parts = line.split()
+            if not parts:
+                continue
+            command, arguments = parts[0], parts[1:]
+
+            if command in ("c", "continue"):
+                return
+            elif command in ("s", "step"):
+                self.__stepping = True
+
+                return
+            elif command in ("q", "quit"):
+                self.__detached = True
+
+                return
+            elif command in ("b", "break", "d", "delete") and len(arguments) == 1 and arguments[0].isdigit():
+                if command in ("b", "break"):
+                    self.__add_breakpoint(int(arguments[0]))
+                else:
+                    self.__breakpoints.discard(self.__positions_by_order.get(int(arguments[0]), -1))
+            elif command in ("p", "print"):
+                self.__print_variables(interpreter, arguments)
+            elif command == "stack":
+                values = interpreter.data_stack.values
+                self.__print_lines([format_value(dump_value(value)) for value in values] or ["(empty)"])
+            elif command in ("bt", "backtrace"):
+                lines = [f"{self.__describe(position)} (current)"]
+                lines += [f"{self.__describe(return_position - 1)}"
+                          for return_position in reversed(interpreter.call_stack.positions)]
+                self.__print_lines(lines)
+            else:
+                self.__print(HELP)
+
+    def __print_variables(self, interpreter: 'Interpreter', names: List[str]) -> None:
+        """
+        Prints variables or all frames
+
+        :param interpreter: Stopped interpreter
+        :param names: Full names of variables (like GF@x) or empty list for all frames
+        """
+        if names:
+            for name in names:
+                try:
+                    value = format_value(dump_value(interpreter.get_symbol_value(Argument(ArgType.VAR, name))))
+                except Exception as e:
+                    # Any error of evaluation (non-existing frame or variable, uninitialized variable, ...)
+                    value = f"({e})"
+                self.__print(f"{name} = {value}")
+
+            return
+
+        memory = interpreter.memory
+        frames = [("GF", memory.global_frame)]
+        frames += [(f"LF #{number}", memory_frame) for number, memory_frame in enumerate(memory.local_frames)]
+        if memory.temporary_frame is not None:
+            frames.append(("TF", memory.temporary_frame))
+        for frame_name, memory_frame in frames:
+            self.__print(f"{frame_name}:")
+            self.__print_lines([f"{name} = {format_value(value)}" for name, value in dump_frame(memory_frame).items()]
+                               or ["(empty)"])
+
+    def __add_breakpoint(self, order: int) -> None:
+        """
+        Sets breakpoint
+
+        :param order: Order of the instruction
+        """
+        position = self.__positions_by_order.get(order)
+        if position is None:
+            self.__print(f"No instruction with order {order}")
+        else:
+            self.__breakpoints.add(position)
+
+    def __describe(self, position: int) -> str:
+        """
+        Describes instruction by its order and operation code
+
+        :param position: Position of the instruction
+        :return: Description
+        """
+        try:
+            op_code = self.__program.get_instruction_at(position).op_code.value
+        except EndOfProgram:
+            return "end of program"
+
+        return f"order {self.__program.get_order_at(position)} {op_code}"
+
+    def __print_lines(self, lines: List[str], indentation: str = "  ") -> None:
+        """
+        Prints indented lines
+
+        :param lines: Lines to print
+        :param indentation: Prefix of every line
+        """
+        for line in lines:
+            self.__print(indentation + line)
+
+    def __print(self, message: str) -> None:
+        """
+        Prints message of the debugger
+
+        :param message: Message
+        """
+        self.__output.write(message + "\n")
+        self.__output.flush()
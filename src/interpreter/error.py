@@ -157,3 +157,43 @@ class InvalidInstructionArgumentValueException(Exception):
 class DuplicateLabelException(Exception):
     """Exception for duplicate labels"""
     pass
+
+
+class InvalidRecordingException(Exception):
+    """Exception for invalid file with recording of interpretation (bad format, different program, etc.)"""
+    pass
+
+
+class InstructionLimitExceededException(Exception):
+    """Exception for exceeding the maximum number of executed instructions"""
+    pass
+
+
+class InterpretationTimeoutException(Exception):
+    """Exception for exceeding the time limit of interpretation"""
+    pass
+
+
+class InputNotReadyException(Exception):
+    """Exception for reading input that hasn't been received yet (asynchronous interpretation waits for it)"""
+    pass
+
+
+class InvalidServerMessageException(Exception):
+    """Exception for invalid (incomplete, malformed, etc.) message of interpreter server's protocol"""
+    pass
+
+
+class InvalidProgramException(Exception):
+    """Exception for program that couldn't be loaded (not well-formed XML, bad structure, etc.)"""
+    pass
+
+
+class InvalidCheckpointException(Exception):
+    """Exception for invalid file with checkpoint of interpretation (bad format, different program, etc.)"""
+    pass
+
+
+class InterpretationInterruptedException(Exception):
+    """Exception for interpretation stopped by a signal (after its state has been saved)"""
+    pass
@@ -0,0 +1,250 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Hooks into execution of programs (profilers, tracers, debuggers, coverage, ...)
+
+A hook is a subclass of ExecutionHook overriding the methods of events it is interested in. Hooks are registered
+by Interpreter.add_hook(). The interpreter uses its plain run loop when there are no hooks, so ordinary runs don't
+pay anything for them. Otherwise every instruction is executed through a dispatcher calling only the overridden
+methods.
+
+Events are derived from executed instructions (after their successful execution), so they don't need any support
+in the implementation of instructions:
+
+* calls and returns are detected by changes of the call stack (calls answered by memoization don't enter
+  the subroutine, so they don't produce any event),
+* variable writes are reported for destinations of instructions writing into variables,
+* inputs and outputs are reported with values read by READ and written by WRITE and DPRINT.
+"""
+
+from typing import Callable, List, TYPE_CHECKING
+
+from interpreter.code import Instruction, OpCode
+from interpreter.memory import Value
+
+if TYPE_CHECKING:
+    from interpreter.interpretation import Interpreter
+
+VARIABLE_WRITING_OP_CODES = {
+    OpCode.MOVE, OpCode.POPS, OpCode.ADD, OpCode.SUB, OpCode.MUL, OpCode.IDIV, OpCode.LT, OpCode.GT, OpCode.EQ,
+    OpCode.AND, OpCode.OR, OpCode.NOT, OpCode.INT2CHAR, OpCode.STRI2INT, OpCode.READ, OpCode.CONCAT, OpCode.STRLEN,
+    OpCode.GETCHAR, OpCode.SETCHAR, OpCode.TYPE,
+}
+"""Instructions writing into the variable given by their first argument"""
+
+OUTPUT_STREAMS = {OpCode.WRITE: "stdout", OpCode.DPRINT: "stderr"}
+"""Instructions writing to outputs and names of their streams"""
+
+FRAME_OP_CODES = {OpCode.CREATEFRAME, OpCode.PUSHFRAME, OpCode.POPFRAME}
+"""Instructions working with memory frames"""
+
+
+class ExecutionHook:
+    """
+    Base class of execution hooks (methods do nothing, subclasses override the needed ones)
+
+    Every method gets the interpreter (its public state can be inspected) and the position of the instruction
+    in the program (see Program.get_order_at() for its order).
+    """
+
+    def before_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Called before execution of every instruction
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        pass
+
+    def after_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Called after execution of every instruction (also when the instruction ends the program or fails)
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        pass
+
+    def on_call(self, interpreter: 'Interpreter', position: int, label: str) -> None:
+        """
+        Called when a subroutine has been entered by CALL
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the CALL instruction
+        :param label: Label of the subroutine
+        """
+        pass
+
+    def on_return(self, interpreter: 'Interpreter', position: int) -> None:
+        """
+        Called when a subroutine has been left by RETURN
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the RETURN instruction
+        """
+        pass
+
+    def on_frame(self, interpreter: 'Interpreter', position: int, op_code: OpCode) -> None:
+        """
+        Called when a memory frame has been created, pushed or popped
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param op_code: Operation code of the instruction (CREATEFRAME, PUSHFRAME or POPFRAME)
+        """
+        pass
+
+    def on_variable_write(self, interpreter: 'Interpreter', position: int, name: str, value: Value) -> None:
+        """
+        Called when a value has been written into a variable
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param name: Full name of the variable (with its frame, like GF@x)
+        :param value: Written value
+        """
+        pass
+
+    def on_input(self, interpreter: 'Interpreter', position: int, value: Value) -> None:
+        """
+        Called when a value has been read by READ
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param value: Read value (nil for missing or invalid input)
+        """
+        pass
+
+    def on_output(self, interpreter: 'Interpreter', position: int, stream: str, value: Value) -> None:
+        """
+        Called when a value has been written by WRITE or DPRINT
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param stream: Name of the output stream (stdout or stderr)
+        :param value: Written value
+        """
+        pass
+
+    def on_break(self, interpreter: 'Interpreter', position: int) -> None:
+        """
+        Called when BREAK instruction has been executed
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        """
+        pass
+
+
+def overridden(hooks: List[ExecutionHook], method_name: str) -> list:
+    """
+    Selects methods of hooks overriding the given method of ExecutionHook
+
+    :param hooks: Registered hooks
+    :param method_name: Name of the method
+    :return: Bound methods of hooks overriding it
+    """
+    base_method = getattr(ExecutionHook, method_name)
+
+    return [getattr(hook, method_name) for hook in hooks if getattr(type(hook), method_name) is not base_method]
+
+
+def instrument(execute: Callable[[Instruction], None], interpreter: 'Interpreter',
+               hooks: List[ExecutionHook]) -> Callable[[Instruction], None]:
+    """
+    Wraps function executing instructions, so events are dispatched to hooks
+
+    :param execute: Function executing an instruction
+    :param interpreter: Interpreter executing the instructions
+    :param hooks: Registered hooks (in the order of calling)
+    :return: Function executing an instruction and calling hooks
+    """
+    before = overridden(hooks, "before_instruction")
+    after = overridden(hooks, "after_instruction")
+    calls = overridden(hooks, "on_call")
+    returns = overridden(hooks, "on_return")
+    frames = overridden(hooks, "on_frame")
+    variable_writes = overridden(hooks, "on_variable_write")
+    inputs = overridden(hooks, "on_input")
+    outputs = overridden(hooks, "on_output")
+    breaks = overridden(hooks, "on_break")
+
+    # Instructions whose events some hook needs
+    watched = set()
+    if calls or returns:
+        watched |= {OpCode.CALL, OpCode.RETURN}
+    if frames:
+        watched |= FRAME_OP_CODES
+    if variable_writes:
+        watched |= VARIABLE_WRITING_OP_CODES
+    if inputs:
+        watched.add(OpCode.READ)
+    if outputs:
+        watched |= set(OUTPUT_STREAMS)
+    if breaks:
+        watched.add(OpCode.BREAK)
+
+    def dispatch(position: int, instruction: Instruction, call_depth: int) -> None:
+        """Dispatches events of successfully executed instruction"""
+        op_code = instruction.op_code
+        if op_code is OpCode.CALL or op_code is OpCode.RETURN:
+            new_call_depth = interpreter.call_stack.size
+            if new_call_depth > call_depth:
+                for hook in calls:
+                    hook(interpreter, position, instruction.args[0].value)
+            elif new_call_depth < call_depth:
+                for hook in returns:
+                    hook(interpreter, position)
+        elif op_code in FRAME_OP_CODES:
+            for hook in frames:
+                hook(interpreter, position, op_code)
+        elif op_code in OUTPUT_STREAMS:
+            if outputs:
+                value = interpreter.get_symbol_value(instruction.args[0])
+                for hook in outputs:
+                    hook(interpreter, position, OUTPUT_STREAMS[op_code], value)
+        elif op_code is OpCode.BREAK:
+            for hook in breaks:
+                hook(interpreter, position)
+
+        if op_code in VARIABLE_WRITING_OP_CODES:
+            name = instruction.args[0].value
+            value = interpreter.memory.get_variable(name).value
+            for hook in variable_writes:
+                hook(interpreter, position, name, value)
+            if op_code is OpCode.READ:
+                for hook in inputs:
+                    hook(interpreter, position, value)
+
+    if len(before) == 1 and not after and not watched:
+        # The most common case (counters, histories) without loops and exception handling
+        before_hook = before[0]
+
+        def execute_hooked(instruction: Instruction) -> None:
+            before_hook(interpreter, interpreter.program_counter, instruction)
+            execute(instruction)
+
+        return execute_hooked
+
+    def execute_hooked(instruction: Instruction) -> None:
+        position = interpreter.program_counter
+        for hook in before:
+            hook(interpreter, position, instruction)
+
+        is_watched = instruction.op_code in watched
+        call_depth = interpreter.call_stack.size if is_watched else 0
+        try:
+            execute(instruction)
+        finally:
+            for hook in after:
+                hook(interpreter, position, instruction)
+
+        if is_watched:
+            dispatch(position, instruction, call_depth)
+
+    return execute_hooked
@@ -0,0 +1,269 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import struct
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Union
+
+from interpreter.code import Program, Instruction, Argument, OpCode, ArgType, EndOfProgram
+from interpreter.error import UsingUndefinedLabelException
+
+# Image format
+# ============
+# All numbers are unsigned and big endian, all positions are offsets from the start of the image (the image doesn't
+# contain any pointers, so it can be mapped anywhere).
+#
+#   8 bytes                     magic (format identification and version)
+#   3 × 4 bytes                 number of instructions, number of labels, size of the image
+#   instructions × 4 bytes      positions of instruction records
+#   labels × 12 bytes           label records sorted by name: name position, name length, jump target
+#   instruction records         operation code (1 byte), number of arguments (1 byte) and for every argument:
+#                               number (1 byte), type (1 byte), value position (4 bytes), value length (4 bytes)
+#   strings                     raw values of arguments and label names (UTF-8)
+
+MAGIC = b"IPPIMG\x01\x00"
+"""Header of the image (format identification and version)"""
+
+HEADER = struct.Struct(">8sIII")
+"""Header: magic, number of instructions, number of labels, size of the image"""
+INDEX_ENTRY = struct.Struct(">I")
+"""Entry of instruction index: position of instruction record"""
+LABEL_ENTRY = struct.Struct(">III")
+"""Label record: name position, name length, jump target"""
+INSTRUCTION_HEAD = struct.Struct(">BB")
+"""Start of instruction record: operation code, number of arguments"""
+ARGUMENT_ENTRY = struct.Struct(">BBII")
+"""Argument in instruction record: number, type, value position, value length"""
+
+# Enum members are stored as their indexes
+OP_CODES: List[OpCode] = list(OpCode)
+ARG_TYPES: List[ArgType] = list(ArgType)
+OP_CODE_INDEXES: Dict[OpCode, int] = {op_code: index for index, op_code in enumerate(OP_CODES)}
+ARG_TYPE_INDEXES: Dict[ArgType, int] = {arg_type: index for index, arg_type in enumerate(ARG_TYPES)}
+
+
+def build_image(program: Program) -> bytes:
+    """
+    Builds binary image of the loaded program
+
+    :param program: Loaded program
+    :return: Image of the program
+    """
+    instructions = program.instructions
+    labels = sorted(
+        (instruction.args[0].value.encode("utf-8"), position)
+        for position, instruction in enumerate(instructions) if instruction.op_code == OpCode.LABEL
+    )
+
+    records_start = HEADER.size + len(instructions) * INDEX_ENTRY.size + len(labels) * LABEL_ENTRY.size
+    records_size = sum(
+        INSTRUCTION_HEAD.size + len(instruction.args) * ARGUMENT_ENTRY.size for instruction in instructions
+    )
+
+    # Strings are placed behind all records, so their positions are known while records are written
+    index = bytearray()
+    records = bytearray()
+    strings = bytearray()
+    strings_start = records_start + records_size
+    for instruction in instructions:
+        index += INDEX_ENTRY.pack(records_start + len(records))
+        records += INSTRUCTION_HEAD.pack(OP_CODE_INDEXES[instruction.op_code], len(instruction.args))
+        for arg_num, argument in instruction.args.items():
+            value = argument.raw_value.encode("utf-8")
+            records += ARGUMENT_ENTRY.pack(arg_num, ARG_TYPE_INDEXES[argument.arg_type], strings_start + len(strings),
+                                           len(value))
+            strings += value
+
+    label_table = bytearray()
+    for name, position in labels:
+        label_table += LABEL_ENTRY.pack(strings_start + len(strings), len(name), position)
+        strings += name
+
+    size = strings_start + len(strings)
+
+    return HEADER.pack(MAGIC, len(instructions), len(labels), size) + index + label_table + records + strings
+
+
+class ImageProgram(Program):
+    """
+    Program executed directly from its binary image (see build_image())
+
+    Instructions are decoded when they are needed. Only a limited number of decoded instructions is kept, so memory
+    of the process doesn't grow with the size of the program (the image itself can be shared by more processes).
+    """
+
+    DEFAULT_CACHE_SIZE = 4096
+    """Default maximum number of kept decoded instructions"""
+
+    # noinspection PyMissingConstructor
+    def __init__(self, image: Union[bytes, memoryview], cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Class constructor
+
+        :param image: Image of the program (bytes or buffer of shared memory)
+        :param cache_size: Maximum number of kept decoded instructions
+        :raise ValueError: Buffer doesn't contain valid image
+        """
+        magic, instruction_count, label_count, size = HEADER.unpack_from(image)
+        if magic != MAGIC or size > len(image):
+            raise ValueError("Buffer doesn't contain valid program image")
+
+        # Shared memory could be larger than the image (it is rounded up to whole pages)
+        self.__image = memoryview(image)[:size]
+        self.__instruction_count = instruction_count
+        self.__label_count = label_count
+        self.__labels_start = HEADER.size + instruction_count * INDEX_ENTRY.size
+
+        self.__cache_size = cache_size
+        self.__cache: Dict[int, Instruction] = {}
+
+    @property
+    def instructions(self) -> List[Instruction]:
+        """
+        Getter for instructions (all of them are decoded)
+
+        :return: Instructions sorted by their order
+        """
+        return [self.__decode_instruction(position) for position in range(self.__instruction_count)]
+
+    def get_instruction_at(self, position) -> Instruction:
+        """
+        Returns instruction at wanted position
+
+        :param position: Wanted position (something like program counter value)
+        :return: Instruction at wanted position
+        :raise EndOfProgram: There is no instruction at wanted position, programs has already ended
+        """
+        instruction = self.__cache.get(position)
+        if instruction is not None:
+            return instruction
+
+        if position >= self.__instruction_count:
+            raise EndOfProgram("No instruction at given position. Program has already ended")
+
+        # Simple bounded cache: hot loops stay decoded, memory usage is limited
+        if len(self.__cache) >= self.__cache_size:
+            self.__cache.clear()
+
+        instruction = self.__cache[position] = self.__decode_instruction(position)
+
+        return instruction
+
+    def get_order_at(self, position: int) -> int:
+        """
+        Returns order of instruction at wanted position
+
+        Images don't contain the original orders, instructions are numbered from 1 by their positions.
+
+        :param position: Position of the instruction (something like program counter value)
+        :return: Order of the instruction
+        """
+        return position + 1
+
+    def get_jump_target(self, label: str) -> int:
+        """
+        Finds the target position of jump instruction (binary search in the label table of the image)
+
+        :param label: Name of label where to jump to
+        :return: Position of the label in the code (position of instruction in instruction list)
+        :raise UsingUndefinedLabelException: Label is undefined in the program
+        """
+        name = label.encode("utf-8")
+        low, high = 0, self.__label_count
+        while low < high:
+            middle = (low + high) // 2
+            name_position, name_length, target = LABEL_ENTRY.unpack_from(
+                self.__image, self.__labels_start + middle * LABEL_ENTRY.size)
+            middle_name = self.__image[name_position:name_position + name_length].tobytes()
+
+            if middle_name == name:
+                return target
+            if middle_name < name:
+                low = middle + 1
+            else:
+                high = middle
+
+        raise UsingUndefinedLabelException("Label isn't available")
+
+    def release(self) -> None:
+        """Releases the buffer with the image (needed before closing shared memory)"""
+        self.__cache.clear()
+        self.__image.release()
+
+    def __decode_instruction(self, position: int) -> Instruction:
+        """
+        Decodes instruction from the image
+
+        :param position: Position of the instruction in the program
+        :return: Decoded instruction
+        """
+        image = self.__image
+        record = INDEX_ENTRY.unpack_from(image, HEADER.size + position * INDEX_ENTRY.size)[0]
+        op_code, arg_count = INSTRUCTION_HEAD.unpack_from(image, record)
+
+        args: Dict[int, Argument] = {}
+        for arg_index in range(arg_count):
+            arg_num, arg_type, value_position, value_length = ARGUMENT_ENTRY.unpack_from(
+                image, record + INSTRUCTION_HEAD.size + arg_index * ARGUMENT_ENTRY.size)
+            args[arg_num] = Argument(ARG_TYPES[arg_type], str(image[value_position:value_position + value_length],
+                                                              "utf-8"))
+
+        return Instruction(OP_CODES[op_code], args)
+
+
+class SharedProgramImage:
+    """Image of the program placed in shared memory (created by parent process, attached by workers)"""
+
+    def __init__(self, name: Optional[str] = None, program: Optional[Program] = None):
+        """
+        Class constructor
+
+        Exactly one of the parameters must be set: program for creating new shared memory (in parent process)
+        or name for attaching the existing one (in worker process).
+
+        :param name: Name of existing shared memory with the image
+        :param program: Program to place into new shared memory
+        """
+        if program is not None:
+            image = build_image(program)
+            self.__shared_memory = shared_memory.SharedMemory(create=True, size=len(image))
+            self.__shared_memory.buf[:len(image)] = image
+            self.__owner = True
+        else:
+            self.__shared_memory = shared_memory.SharedMemory(name=name)
+            self.__owner = False
+
+        self.__program: Optional[ImageProgram] = None
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for name of the shared memory
+
+        :return: Name used for attaching the image in other processes
+        """
+        return self.__shared_memory.name
+
+    @property
+    def program(self) -> ImageProgram:
+        """
+        Getter for program executed from the shared image
+
+        :return: Program backed by the shared memory
+        """
+        if self.__program is None:
+            self.__program = ImageProgram(self.__shared_memory.buf)
+
+        return self.__program
+
+    def close(self) -> None:
+        """Detaches the shared memory (and removes it if it has been created by this object)"""
+        if self.__program is not None:
+            self.__program.release()
+            self.__program = None
+
+        self.__shared_memory.close()
+        if self.__owner:
+            self.__shared_memory.unlink()
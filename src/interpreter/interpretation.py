@@ -6,39 +6,194 @@
 import re
 import sys
 from sys import stdin
-from typing import Optional, Dict, NoReturn, List, Tuple, Union
-from xml.etree.ElementTree import ElementTree, ParseError
+from typing import Optional, Dict, NoReturn, List, Tuple, Union, BinaryIO, Callable, TYPE_CHECKING
+from xml.etree.ElementTree import ElementTree, Element, ParseError
 
 from interpreter.error import BadInstructionOrderException, BadXmlStructureException, XmlParsingErrorException, \
     MissingInstructionArgException, InvalidDataTypeException, TooFewInstructionArgsException, ZeroDivisionException, \
     ExitValueOutOfRangeException, InvalidAsciiPositionException, IndexingOutsideStringException, \
-    InvalidInstructionOpCode, GetValueFromNotInitVarException
+    InvalidInstructionOpCode, GetValueFromNotInitVarException, InstructionLimitExceededException, \
+    InputNotReadyException, ExitCode
 from interpreter.code import Program, Instruction, OpCode, Argument, ArgType, EndOfProgram
 from interpreter.memory import ProcessMemory, CallStack, DataStack, DataType, Value
+from interpreter.streams import OutputSink, InputReader
+
+# Hooks and memoization are used only by some modes, so they are imported where they are used (they don't slow down
+# the start of ordinary short runs)
+if TYPE_CHECKING:
+    from interpreter.hooks import ExecutionHook
+    from interpreter.memoization import Memoizer, PendingCall
+
+# Extracts argument's number from the name of its XML element
+ARG_TAG_REGEX = re.compile("^arg(\\d+)$")
 
 
 class Interpreter:
     """Controller of the interpretation process"""
 
-    def __init__(self, input_file: Optional[str]):
+    DEFAULT_QUOTA = 1000
+    """Default number of instructions executed by asynchronous interpretation before yielding to the event loop"""
+
+    def __init__(self, input_reader: InputReader, stdout: Optional[OutputSink] = None,
+                 stderr: Optional[OutputSink] = None, instruction_limit: Optional[int] = None,
+                 memoizer: Optional['Memoizer'] = None, hooks: Optional[List['ExecutionHook']] = None):
         """
         Class constructor
 
-        :param input_file: Path to file with inputs for interpretation or None for stdin
+        :param input_reader: Source of inputs for interpretation
+        :param stdout: Sink for the standard output of the program or None for sys.stdout
+        :param stderr: Sink for the standard error output of the program or None for sys.stderr
+        :param instruction_limit: Maximum number of executed instructions or None for no limit
+        :param memoizer: Store of results of pure subroutines (created for the interpreted program) or None for no
+            memoization
+        :param hooks: Execution hooks (profilers, tracers, debuggers, ...) or None (see also add_hook())
         """
         self.__program: Optional[Program] = None
-        self.__input_file = input_file
+        self.__input = input_reader
+        self.__stdout = stdout if stdout is not None else OutputSink.for_text_stream(sys.stdout)
+        self.__stderr = stderr if stderr is not None else OutputSink.for_text_stream(sys.stderr)
+
+        self.__instruction_limit = instruction_limit
+        self.__executed_instructions = 0
+        self.__exit_code = ExitCode.SUCCESS
+        self.__read_lines = 0
 
         self.__program_counter = 0
         self.__memory = ProcessMemory()
         self.__call_stack = CallStack()
         self.__data_stack = DataStack()
 
-    def run(self, program: Program) -> None:
+        self.__memoizer = memoizer
+        self.__pending_calls: List['PendingCall'] = []
+
+        self.__hooks: List['ExecutionHook'] = list(hooks) if hooks is not None else []
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of instructions executed so far
+        """
+        return self.__executed_instructions
+
+    @property
+    def exit_code(self) -> int:
+        """
+        Getter for exit code of the program
+
+        :return: Value of executed EXIT instruction or 0 (success)
+        """
+        return self.__exit_code
+
+    @property
+    def program_counter(self) -> int:
+        """
+        Getter for program counter
+
+        :return: Position of the next executed instruction
+        """
+        return self.__program_counter
+
+    @property
+    def read_lines(self) -> int:
+        """
+        Getter for number of read lines
+
+        :return: Number of input lines read by READ instructions so far
+        """
+        return self.__read_lines
+
+    @property
+    def memory(self) -> ProcessMemory:
+        """
+        Getter for memory of the program
+
+        :return: Memory frames of the program
+        """
+        return self.__memory
+
+    @property
+    def data_stack(self) -> DataStack:
+        """
+        Getter for data stack
+
+        :return: Data stack of the program
+        """
+        return self.__data_stack
+
+    @property
+    def call_stack(self) -> CallStack:
+        """
+        Getter for call stack
+
+        :return: Call stack of the program
+        """
+        return self.__call_stack
+
+    @property
+    def hooks(self) -> List['ExecutionHook']:
+        """
+        Getter for execution hooks
+
+        :return: Registered hooks in the order of calling
+        """
+        return self.__hooks
+
+    def add_hook(self, hook: 'ExecutionHook') -> None:
+        """
+        Registers execution hook (it is used from the next run or slice)
+
+        :param hook: Hook to register
+        """
+        self.__hooks.append(hook)
+
+    def get_symbol_value(self, argument: Argument) -> Value:
+        """
+        Evaluates symbol (constant or variable) for inspection of the state
+
+        :param argument: Symbol (argument of an instruction)
+        :return: Value of the symbol
+        :raise NonExistingVarException: Variable doesn't exist
+        :raise UsingUndefinedMemoryFrameException: Using undefined memory frame
+        :raise EmptyLocalMemoryException: Empty local memory stack
+        :raise GetValueFromNotInitVarException: Not initialized variable
+        """
+        data_type, content = self.__get_value_from_arg(argument)
+
+        return Value(data_type, content)
+
+    def restore(self, program_counter: int, executed_instructions: int, read_lines: int) -> None:
+        """
+        Restores position of saved interpretation (memory and stacks are restored through their getters)
+
+        Already read input lines are skipped, so the reader must provide the same inputs as in the saved interpretation.
+
+        :param program_counter: Position of the next executed instruction
+        :param executed_instructions: Number of instructions executed so far
+        :param read_lines: Number of input lines read so far
+        """
+        self.__program_counter = program_counter
+        self.__executed_instructions = executed_instructions
+
+        seek_line = getattr(self.__input, "seek_line", None)
+        if seek_line is not None:
+            seek_line(read_lines)
+        else:
+            for _ in range(read_lines):
+                if self.__input.read_line() is None:
+                    break
+        self.__read_lines = read_lines
+
+    def run(self, program: Program) -> int:
         """
         Runs interpretation
 
+        All state of the interpretation is stored in the instance and all I/O goes through its streams, so more
+        interpreters can run concurrently in threads.
+
         :param program: Object representation of the program for interpretation
+        :return: Exit code of the program (value of EXIT instruction or 0)
         :raise InvalidDataTypeException: Invalid data type
         :raise MissingInstructionArgException: Missing argument
         :raise NonExistingVarException: Variable doesn't exist
@@ -54,36 +209,110 @@ class Interpreter:
         :raise IndexingOutsideStringException: Indexing outside string
         :raise VariableRedefinitionException: Already defined variable
         :raise InvalidInstructionArgumentValueException: Invalid instruction argument value
+        :raise InstructionLimitExceededException: Too many executed instructions
         """
         self.__program = program
-
-        # Hack allowing always use import()
-        # Source: https://stackoverflow.com/a/69154316
-        if self.__input_file is not None:
-            # Backup stdin
-            sys_stdin_backup = sys.stdin
-
-            # Change Pythons handle to standard input file
-            sys.stdin = open(self.__input_file)
+        execute = self.__executor()
 
         # Interpretation process
         try:
             while True:
                 instruction = self.__program.get_instruction_at(self.__program_counter)
 
-                self.__execute(instruction)
+                self.__executed_instructions += 1
+                if self.__instruction_limit is not None and self.__executed_instructions > self.__instruction_limit:
+                    raise InstructionLimitExceededException("Maximum number of executed instructions exceeded")
+
+                execute(instruction)
         except EndOfProgram:
-            # End of program --> end with interpretation
+            # End of program (or EXIT instruction) --> end with interpretation
             pass
+        finally:
+            # Buffered outputs must be written even if the program is ended by an error
+            self.__stdout.flush()
+            self.__stderr.flush()
+
+        return self.__exit_code
+
+    def run_slice(self, program: Program, quota: int) -> bool:
+        """
+        Runs a part of interpretation (for interleaving of more interpretations)
+
+        The program is continued from the state left by the previous slice. Buffered outputs are flushed at the end
+        of every slice.
+
+        :param program: Object representation of the program for interpretation (the same for all slices)
+        :param quota: Maximum number of instructions to execute
+        :return: Has the program ended?
+        :raise InputNotReadyException: Input for READ instruction isn't available yet (the instruction is executed
+            again by the next slice)
+        :raise InstructionLimitExceededException: Too many executed instructions
+        """
+        self.__program = program
+        execute = self.__executor()
+
+        try:
+            for _ in range(quota):
+                instruction = self.__program.get_instruction_at(self.__program_counter)
 
-        # Revert changes by hack
-        if self.__input_file is not None:
-            # Close handle of the own "stdin" file
-            sys.stdin.close()
+                self.__executed_instructions += 1
+                if self.__instruction_limit is not None and self.__executed_instructions > self.__instruction_limit:
+                    raise InstructionLimitExceededException("Maximum number of executed instructions exceeded")
 
-            # Revert stdin (it is changed only if input file isn't None, which means stdin)
-            # noinspection PyUnboundLocalVariable
-            sys.stdin = sys_stdin_backup
+                # Waiting READ mustn't be started, its hooks would be called again when it is retried
+                if instruction.op_code is OpCode.READ and not self.__input.is_input_ready():
+                    raise InputNotReadyException("Input line hasn't been received yet")
+
+                execute(instruction)
+        except EndOfProgram:
+            return True
+        except InputNotReadyException:
+            # The READ instruction hasn't been executed
+            self.__executed_instructions -= 1
+
+            raise
+        finally:
+            self.__stdout.flush()
+            self.__stderr.flush()
+
+        return False
+
+    async def run_async(self, program: Program, quota: int = DEFAULT_QUOTA) -> int:
+        """
+        Runs interpretation cooperatively in asyncio event loop
+
+        Control is given back to the event loop after every quota of instructions and when READ instruction waits
+        for input (input reader must support waiting, see InputReader.wait_for_input()).
+
+        :param program: Object representation of the program for interpretation
+        :param quota: Number of instructions executed before yielding to the event loop
+        :return: Exit code of the program (value of EXIT instruction or 0)
+        :raise InstructionLimitExceededException: Too many executed instructions
+        :raise (the same exceptions as run())
+        """
+        import asyncio
+
+        while True:
+            try:
+                if self.run_slice(program, quota):
+                    return self.__exit_code
+            except InputNotReadyException:
+                await self.__input.wait_for_input()
+            else:
+                await asyncio.sleep(0)
+
+    def __executor(self) -> Callable[[Instruction], None]:
+        """
+        Prepares function for execution of instructions
+
+        :return: Function executing an instruction (the plain one if there are no hooks)
+        """
+        if not self.__hooks:
+            return self.__execute
+
+        from interpreter.hooks import instrument
+
+        return instrument(self.__execute, self, self.__hooks)
 
     def __execute(self, instruction: Instruction) -> None:
         """
@@ -425,6 +654,9 @@ class Interpreter:
         """
         self.__check_data_types([ArgType.LABEL], args)
 
+        if self.__memoizer is not None and self.__call_memoized(args[0].value):
+            return
+
         # Add current position + 1 to call stack
         self.__call_stack.push(self.__program_counter + 1)
 
@@ -452,9 +684,61 @@ class Interpreter:
         # Get position from call stack
         new_position = self.__call_stack.pop()
 
+        if self.__pending_calls and self.__pending_calls[-1].call_depth == self.__call_stack.size:
+            self.__memoize_call(self.__pending_calls.pop())
+
         # Jump to recovered position
         self.__program_counter = new_position
 
+    def __call_memoized(self, label: str) -> bool:
+        """
+        Finishes call of pure subroutine by its memoized result (or prepares memoization of the result)
+
+        :param label: Label of the called subroutine
+        :return: Has the call been finished?
+        """
+        effect = self.__memoizer.get_effect(label)
+        if effect is None or self.__data_stack.size < effect.consumed:
+            return False
+
+        arguments = tuple((value.val_type, value.content) for value in self.__data_stack.peek(effect.consumed))
+        key = (label, self.__memory.snapshot_temporary_frame() if effect.uses_frame else None, arguments)
+
+        result = self.__memoizer.lookup(key)
+        if result is not None and (self.__instruction_limit is None or self.__executed_instructions
+                                   + result.executed_instructions <= self.__instruction_limit):
+            # Instructions are counted like if they were executed (the limit is exceeded by real execution)
+            self.__data_stack.replace(effect.consumed, result.values)
+            self.__memory.restore_temporary_frame(result.temporary_frame)
+            self.__executed_instructions += result.executed_instructions
+            self.__program_counter += 1
+
+            return True
+
+        from interpreter.memoization import PendingCall
+
+        self.__pending_calls.append(PendingCall(key, effect, self.__call_stack.size, self.__data_stack.size,
+                                                self.__executed_instructions))
+
+        return False
+
+    def __memoize_call(self, call: 'PendingCall') -> None:
+        """
+        Stores result of finished call of pure subroutine
+
+        :param call: The finished call
+        """
+        if self.__data_stack.size != call.stack_size + call.effect.net:
+            # Can't happen for correctly analyzed subroutines, but a wrong result mustn't be stored
+            return
+
+        from interpreter.memoization import MemoizedResult
+
+        result = MemoizedResult(self.__memory.snapshot_temporary_frame(),
+                                tuple(self.__data_stack.peek(call.effect.produced)),
+                                self.__executed_instructions - call.executed_instructions)
+        self.__memoizer.store(call.key, result)
+
     def __pushs(self, args: Dict[int, Argument]) -> None:
         """
         Pushes a value to the data stack
@@ -809,8 +1093,14 @@ class Interpreter:
         _, type_for_loading = self.__get_value_from_arg(args[1])
         variable = self.__memory.get_variable(args[0].value)
 
-        try:
-            loaded_value = input()
+        loaded_value = self.__input.read_line()
+
+        if loaded_value is None:
+            # End of input
+            data_type = DataType.NIL
+            raw_value = None
+        else:
+            self.__read_lines += 1
 
             if type_for_loading == "int":
                 raw_value = int(loaded_value)
@@ -820,9 +1110,6 @@ class Interpreter:
                 raw_value = loaded_value
 
             data_type = DataType(type_for_loading)
-        except EOFError:
-            data_type = DataType.NIL
-            raw_value = None
 
         var_value = Value(data_type, raw_value)
         variable.value = var_value
@@ -846,11 +1133,12 @@ class Interpreter:
         data_type, value = self.__get_value_from_arg(args[0])
 
         if data_type == DataType.BOOL:
-            print("true" if value else "false", end="")
+            self.__stdout.write("true" if value else "false")
         elif data_type == DataType.NIL:
-            print("", end="")
+            # Nil is written as an empty string
+            pass
         else:
-            print(value, end="")
+            self.__stdout.write(str(value))
 
     def __concat(self, args: Dict[int, Argument]) -> None:
         """
@@ -1078,7 +1366,7 @@ class Interpreter:
 
     def __exit(self, args: Dict[int, Argument]) -> NoReturn:
         """
-        Stops interpretation with an exit code
+        Stops interpretation with an exit code (available by exit_code property after the end of interpretation)
 
         :param args: Instruction arguments
         :raise InvalidDataTypeException: Invalid data type
@@ -1090,6 +1378,7 @@ class Interpreter:
         :raise TooFewInstructionArgsException: Too many arguments
         :raise InvalidInstructionArgumentValueException: Invalid instruction argument value
         :raise ExitValueOutOfRangeException: Exit code out of range
+        :raise EndOfProgram: Always (interpretation ends)
         """
         self.__check_data_types([ArgType.INT], args)
 
@@ -1098,7 +1387,9 @@ class Interpreter:
         if value < 0 or value > 49:
             raise ExitValueOutOfRangeException(f"Exit value {value} is out of range <0, 49>")
 
-        exit(value)
+        self.__exit_code = value
+
+        raise EndOfProgram("Program has been exited by EXIT instruction")
 
     def __dprint(self, args: Dict[int, Argument]) -> None:
         """
@@ -1125,13 +1416,14 @@ class Interpreter:
             value = "true" if value else "false"
 
         if args[0].arg_type == ArgType.VAR:
-            print(f"DPRINT: {args[0].value} = {data_type.value}@{value}", file=sys.stderr)
+            self.__stderr.write(f"DPRINT: {args[0].value} = {data_type.value}@{value}\n")
         else:
-            print(f"DPRINT: {data_type.value}@{value}", file=sys.stderr)
+            self.__stderr.write(f"DPRINT: {data_type.value}@{value}\n")
 
     def __break(self, args: Dict[int, Argument]) -> None:
         """
-        Writes information about interpretation to the standard error output
+        Checks arguments of BREAK instruction (it has an effect only through registered hooks, e.g. the debugger
+        of --debug stops on it by ExecutionHook.on_break())
 
         :param args: Instruction arguments
         :raise InvalidDataTypeException: Invalid data type
@@ -1145,18 +1437,19 @@ class Interpreter:
         """
         self.__check_data_types([], args)
 
-        # TODO: implement this optional instruction
+        # Hooks are called by the executor after the instruction (see interpreter.hooks.instrument())
 
 
 class Loader:
     """Instruction loader and input verifier"""
 
-    def __init__(self, xml_parser: ElementTree, sources_file: Optional[str]):
+    def __init__(self, xml_parser: ElementTree, sources_file: Union[str, BinaryIO, None]):
         """
         Class constructor
 
         :param xml_parser: XML parser (dependency)
-        :param sources_file: Path to file where to read XML source code representation from or None for stdin
+        :param sources_file: Path to file (or opened binary file) where to read XML source code representation from
+            or None for stdin
         """
         self.__xml_parser = xml_parser
 
@@ -1185,68 +1478,102 @@ class Loader:
         except ParseError:
             raise XmlParsingErrorException("XML isn't well-formed and couldn't been parsed")
 
-        # Checks for root element (program)
-        if parsed_xml.tag != 'program':
-            raise BadXmlStructureException("Root element must be called program")
-        if 'language' not in parsed_xml.attrib or parsed_xml.attrib['language'] != "IPPcode22":
-            raise BadXmlStructureException("Program element must have required attribute language with value IPPcode22")
-
-        # Prepare regular expression for extracting arguments' numbers
-        extract_arg_pos_regex = re.compile("^arg(\\d+)$")
+        self.check_program_element(parsed_xml)
 
         instructions: Dict[int, Instruction] = {}
         for xml_instruction in parsed_xml:
-            if xml_instruction.tag != "instruction":
-                raise BadXmlStructureException("There could be only instruction elements in the program element")
-
-            # Instruction order
-            if 'order' not in xml_instruction.attrib:
-                raise BadXmlStructureException("Instruction element must have required attribute order")
-            try:
-                order = int(xml_instruction.attrib['order'])
-            except ValueError:
-                raise BadInstructionOrderException("Instruction order must be valid integer value")
-
-            if order < 0:
-                raise BadInstructionOrderException("Instruction order must be positive number or zero")
+            order = self.load_instruction_order(xml_instruction)
 
             if order in instructions:
                 # There mustn't be two instructions with the same order
                 raise BadInstructionOrderException("Duplicate instruction order")
 
-            # Instruction operation code
-            if 'opcode' not in xml_instruction.attrib:
-                raise BadXmlStructureException("Instruction element must have required attribute opcode")
-            try:
-                op_code = OpCode(xml_instruction.attrib['opcode'].upper())
-            except ValueError:
-                raise InvalidInstructionOpCode("Invalid instruction operation code")
+            instructions[order] = self.load_instruction(xml_instruction)
+
+        return Program(instructions)
+
+    @staticmethod
+    def check_program_element(xml_program: Element) -> None:
+        """
+        Checks the root element (program) of XML representation
+
+        :param xml_program: Root XML element
+        :raise BadXmlStructureException: Bad root element or its attributes
+        """
+        if xml_program.tag != 'program':
+            raise BadXmlStructureException("Root element must be called program")
+        if 'language' not in xml_program.attrib or xml_program.attrib['language'] != "IPPcode22":
+            raise BadXmlStructureException("Program element must have required attribute language with value IPPcode22")
+
+    @staticmethod
+    def load_instruction_order(xml_instruction: Element) -> int:
+        """
+        Loads order of the instruction from its XML representation
 
-            # Instruction arguments
-            args: Dict[int, Argument] = {}
-            for xml_attribute in xml_instruction:
-                # Argument number
-                arg_num_match = extract_arg_pos_regex.search(xml_attribute.tag)
-                if arg_num_match is None:
-                    raise BadXmlStructureException("There could be only argX elements in the instruction element")
-                arg_num = int(arg_num_match.group(1)) - 1  # -1 => convert to numbering system that starts with 0
+        Uniqueness of the order isn't checked here, it depends on the other instructions of the program.
 
-                if arg_num in args:
-                    # Argument number must be unique within one instruction
-                    raise BadXmlStructureException("Duplicate argument number")
+        :param xml_instruction: XML element of the instruction
+        :return: Order of the instruction
+        :raise BadInstructionOrderException: Negative or invalid instruction order
+        :raise BadXmlStructureException: Bad instruction location or missing order attribute
+        """
+        if xml_instruction.tag != "instruction":
+            raise BadXmlStructureException("There could be only instruction elements in the program element")
 
-                # Argument type
-                if 'type' not in xml_attribute.attrib:
-                    raise BadXmlStructureException("Attribute element must have required attribute type")
-                arg_type_raw = xml_attribute.attrib['type']
-                arg_type = ArgType(arg_type_raw.lower())
+        # Instruction order
+        if 'order' not in xml_instruction.attrib:
+            raise BadXmlStructureException("Instruction element must have required attribute order")
+        try:
+            order = int(xml_instruction.attrib['order'])
+        except ValueError:
+            raise BadInstructionOrderException("Instruction order must be valid integer value")
 
-                # Argument value
-                if xml_attribute.text is None:
-                    raise BadXmlStructureException("Attribute element must contain a value")
+        if order < 0:
+            raise BadInstructionOrderException("Instruction order must be positive number or zero")
 
-                args[arg_num] = Argument(arg_type, str(xml_attribute.text))
+        return order
 
-            instructions[order] = Instruction(op_code, args)
+    @staticmethod
+    def load_instruction(xml_instruction: Element) -> Instruction:
+        """
+        Loads the instruction (operation code and arguments) from its XML representation
 
-        return Program(instructions)
+        :param xml_instruction: XML element of the instruction (its order must have been checked yet)
+        :return: Loaded instruction
+        :raise BadXmlStructureException: Missing attributes or values, bad argument elements
+        :raise InvalidInstructionOpCode: Invalid instruction opcode
+        """
+        # Instruction operation code
+        if 'opcode' not in xml_instruction.attrib:
+            raise BadXmlStructureException("Instruction element must have required attribute opcode")
+        try:
+            op_code = OpCode(xml_instruction.attrib['opcode'].upper())
+        except ValueError:
+            raise InvalidInstructionOpCode("Invalid instruction operation code")
+
+        # Instruction arguments
+        args: Dict[int, Argument] = {}
+        for xml_attribute in xml_instruction:
+            # Argument number
+            arg_num_match = ARG_TAG_REGEX.search(xml_attribute.tag)
+            if arg_num_match is None:
+                raise BadXmlStructureException("There could be only argX elements in the instruction element")
+            arg_num = int(arg_num_match.group(1)) - 1  # -1 => convert to numbering system that starts with 0
+
+            if arg_num in args:
+                # Argument number must be unique within one instruction
+                raise BadXmlStructureException("Duplicate argument number")
+
+            # Argument type
+            if 'type' not in xml_attribute.attrib:
+                raise BadXmlStructureException("Attribute element must have required attribute type")
+            arg_type_raw = xml_attribute.attrib['type']
+            arg_type = ArgType(arg_type_raw.lower())
+
+            # Argument value
+            if xml_attribute.text is None:
+                raise BadXmlStructureException("Attribute element must contain a value")
+
+            args[arg_num] = Argument(arg_type, str(xml_attribute.text))
+
+        return Instruction(op_code, args)
@@ -0,0 +1,700 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Lockstep (SIMT) interpretation of one program with many inputs
+
+Instances of the program (lanes) run together: every variable is stored as NumPy arrays (data type and value of every
+lane) and every instruction is executed once for all active lanes by array operations. When lanes of a conditional
+jump don't agree, they are split by masks and they continue together again at the immediate post-dominator of the
+jump (reconvergence stack).
+
+Only integers fitting into int64, booleans and nil are stored in arrays, global frame is the only supported frame
+and READ can load only int and bool values. A lane that meets anything else (string value, function call, frame
+instruction, overflow, any error of the program, ...) leaves the lockstep execution and it has to be interpreted
+by the scalar interpreter from the beginning (its result is None), so results of all lanes are the same as results
+of the ordinary interpretation. A few lanes running for a long time while the rest of their group has ended or waits
+for them at a reconvergence point (e.g. infinite loops) leave lockstep execution too, so they can't hold back the other
+lanes and the following groups. Without NumPy every lane is interpreted by the scalar interpreter.
+"""
+
+import locale
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from interpreter.code import Program, Instruction, OpCode, Argument, ArgType
+from interpreter.runner import RunResult, run_in_memory
+from interpreter.streams import InputReader
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional dependency
+    np = None
+
+DEFAULT_LANES = 4096
+"""Default number of lanes executed together"""
+
+# Data types of values in lanes
+UNDEFINED = 0
+"""Variable isn't defined"""
+UNINITIALIZED = 1
+"""Variable is defined but it has no value"""
+INT = 2
+"""Integer (value is stored directly)"""
+BOOL = 3
+"""Boolean (value is stored as 0 or 1)"""
+NIL = 4
+"""Nil (value is 0)"""
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+MULTIPLICATION_LIMIT = 2.0 ** 62
+"""Products reaching this value (computed in floating point) could overflow, so such lanes leave lockstep execution"""
+
+DEADLINE_CHECK_PERIOD = 1024
+"""Number of executed instructions between checks of the time limit and of stragglers"""
+
+STRAGGLER_FRACTION = 0.25
+"""Executed lanes are stragglers when they are at most this fraction of the group (others have ended or wait)"""
+
+STRAGGLER_STEPS_FACTOR = 2
+"""Stragglers leave lockstep execution when the group has executed this multiple of instructions executed before
+they have been detected (unless they reconverge with other lanes or end before)"""
+
+# Name of the variable in global frame (the same pattern as used by memory of the scalar interpreter)
+GLOBAL_VAR_REGEX = re.compile("^(GF)@(.+)$")
+
+# Operand: (slot of variable or -1 for constant, data type of constant, value of constant)
+Operand = Tuple[int, int, object]
+
+
+def is_available() -> bool:
+    """
+    Checks availability of lockstep execution
+
+    :return: Is NumPy installed?
+    """
+    return np is not None
+
+
+class LockstepProgram:
+    """Program prepared for lockstep execution (it can be used for any number of groups of lanes)"""
+
+    def __init__(self, program: Program):
+        """
+        Class constructor
+
+        :param program: Loaded program
+        :raise RuntimeError: NumPy isn't available
+        """
+        if np is None:
+            raise RuntimeError("Lockstep execution requires NumPy")
+
+        self.__program = program
+        self.__slots: Dict[str, int] = {}
+
+        instructions = program.instructions
+        self.__operations = [self.__compile(instruction) for instruction in instructions]
+        self.__post_dominators = self.__find_post_dominators(instructions)
+
+    def run(self, inputs: List[bytes], deadline: Optional[float] = None) -> List[Optional[RunResult]]:
+        """
+        Runs lanes of the program in lockstep
+
+        :param inputs: Contents of files with inputs (one for every lane)
+        :param deadline: Time (time.perf_counter()) when unfinished lanes leave lockstep execution or None for no limit
+        :return: Results of lanes (None for lanes that have to be interpreted by the scalar interpreter)
+        """
+        return LockstepGroup(self.__operations, self.__post_dominators, len(self.__slots), inputs, deadline).run()
+
+    def __compile(self, instruction: Instruction) -> tuple:
+        """
+        Prepares instruction for lockstep execution
+
+        :param instruction: Instruction to prepare
+        :return: Operation code and prepared arguments (operation code is None for instructions unsupported
+            in lockstep)
+        """
+        op_code = instruction.op_code
+        args = instruction.args
+        try:
+            if op_code == OpCode.LABEL:
+                self.__check_arg_count(args, 1)
+                self.__check_label(args[0])
+
+                return op_code,
+            elif op_code == OpCode.JUMP:
+                self.__check_arg_count(args, 1)
+                self.__check_label(args[0])
+
+                return op_code, self.__program.get_jump_target(args[0].value)
+            elif op_code == OpCode.BREAK:
+                self.__check_arg_count(args, 0)
+
+                return op_code,
+            elif op_code == OpCode.DEFVAR:
+                self.__check_arg_count(args, 1)
+
+                return op_code, self.__compile_variable(args[0])
+            elif op_code == OpCode.MOVE:
+                self.__check_arg_count(args, 2)
+
+                return op_code, self.__compile_variable(args[0]), self.__compile_operand(args[1])
+            elif op_code in (OpCode.ADD, OpCode.SUB, OpCode.MUL, OpCode.IDIV, OpCode.LT, OpCode.GT, OpCode.EQ,
+                             OpCode.AND, OpCode.OR):
+                self.__check_arg_count(args, 3)
+
+                return (op_code, self.__compile_variable(args[0]), self.__compile_operand(args[1]),
+                        self.__compile_operand(args[2]))
+            elif op_code == OpCode.NOT:
+                self.__check_arg_count(args, 2)
+
+                return op_code, self.__compile_variable(args[0]), self.__compile_operand(args[1])
+            elif op_code in (OpCode.JUMPIFEQ, OpCode.JUMPIFNEQ):
+                self.__check_arg_count(args, 3)
+                self.__check_label(args[0])
+
+                return (op_code, self.__program.get_jump_target(args[0].value), self.__compile_operand(args[1]),
+                        self.__compile_operand(args[2]))
+            elif op_code == OpCode.READ:
+                self.__check_arg_count(args, 2)
+                if args[1].arg_type != ArgType.TYPE or args[1].value not in ("int", "bool"):
+                    return None,
+
+                return op_code, self.__compile_variable(args[0]), args[1].value
+            elif op_code == OpCode.WRITE:
+                self.__check_arg_count(args, 1)
+                if args[0].arg_type == ArgType.STRING:
+                    return op_code, None, args[0].value
+
+                return op_code, self.__compile_operand(args[0]), None
+            elif op_code == OpCode.EXIT:
+                self.__check_arg_count(args, 1)
+
+                return op_code, self.__compile_operand(args[0])
+        except Exception:
+            # Unsupported operand or invalid instruction (the scalar interpreter reports the error)
+            pass
+
+        return None,
+
+    @staticmethod
+    def __check_arg_count(args: Dict[int, Argument], count: int) -> None:
+        """
+        Checks arguments of the instruction
+
+        :param args: Arguments of the instruction
+        :param count: Wanted number of arguments
+        :raise ValueError: Bad arguments
+        """
+        if sorted(args.keys()) != list(range(count)):
+            raise ValueError("Bad instruction arguments")
+
+    @staticmethod
+    def __check_label(argument: Argument) -> None:
+        """
+        Checks label argument
+
+        :param argument: Argument of the instruction
+        :raise ValueError: Argument isn't label
+        """
+        if argument.arg_type != ArgType.LABEL:
+            raise ValueError("Label is needed")
+
+    def __compile_variable(self, argument: Argument) -> int:
+        """
+        Prepares variable argument
+
+        :param argument: Argument with variable
+        :return: Slot of the variable
+        :raise ValueError: Argument isn't variable in global frame
+        """
+        match = GLOBAL_VAR_REGEX.search(argument.value) if argument.arg_type == ArgType.VAR else None
+        if match is None:
+            raise ValueError("Only variables in global frame are supported")
+
+        return self.__slots.setdefault(match.group(2), len(self.__slots))
+
+    def __compile_operand(self, argument: Argument) -> Operand:
+        """
+        Prepares operand (variable or constant)
+
+        :param argument: Instruction argument
+        :return: Prepared operand
+        :raise ValueError: Unsupported operand (string constant, too big integer, ...)
+        """
+        if argument.arg_type == ArgType.VAR:
+            return self.__compile_variable(argument), UNINITIALIZED, 0
+        elif argument.arg_type == ArgType.INT:
+            value = argument.value
+            if not INT64_MIN <= value <= INT64_MAX:
+                raise ValueError("Integer doesn't fit into int64")
+
+            return -1, INT, np.int64(value)
+        elif argument.arg_type == ArgType.BOOL:
+            return -1, BOOL, np.int64(1 if argument.value else 0)
+        elif argument.arg_type == ArgType.NIL:
+            return -1, NIL, np.int64(0)
+
+        raise ValueError("Unsupported operand")
+
+    def __find_post_dominators(self, instructions: List[Instruction]) -> List[int]:
+        """
+        Finds immediate post-dominators of instructions (Cooper, Harvey and Kennedy algorithm on reversed control flow
+        graph)
+
+        :param instructions: Instructions of the program
+        :return: Immediate post-dominator of every instruction (position after the last instruction means the end
+            of the program, that is also used for instructions that never reach the end)
+        """
+        end = len(instructions)
+        successors: List[List[int]] = []
+        for position, operation in enumerate(self.__operations):
+            op_code = operation[0]
+            if op_code == OpCode.JUMP:
+                successors.append([operation[1]])
+            elif op_code in (OpCode.JUMPIFEQ, OpCode.JUMPIFNEQ):
+                successors.append([operation[1], position + 1])
+            elif op_code is None or op_code == OpCode.EXIT:
+                # Lanes don't continue after unsupported instructions
+                successors.append([end])
+            else:
+                successors.append([position + 1])
+
+        predecessors: List[List[int]] = [[] for _ in range(end + 1)]
+        for position, targets in enumerate(successors):
+            for target in targets:
+                predecessors[target].append(position)
+
+        # Post-order of the reversed graph from the end (iterative DFS)
+        order_number = [-1] * (end + 1)
+        post_order: List[int] = []
+        visited = [False] * (end + 1)
+        visited[end] = True
+        stack = [(end, iter(predecessors[end]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if not visited[child]:
+                    visited[child] = True
+                    stack.append((child, iter(predecessors[child])))
+                    break
+            else:
+                stack.pop()
+                order_number[node] = len(post_order)
+                post_order.append(node)
+
+        dominators = [-1] * (end + 1)
+        dominators[end] = end
+        changed = True
+        while changed:
+            changed = False
+            for node in reversed(post_order[:-1]):
+                new_dominator = -1
+                for successor in successors[node]:
+                    if dominators[successor] == -1:
+                        continue
+                    if new_dominator == -1:
+                        new_dominator = successor
+                        continue
+
+                    first, second = successor, new_dominator
+                    while first != second:
+                        while order_number[first] < order_number[second]:
+                            first = dominators[first]
+                        while order_number[second] < order_number[first]:
+                            second = dominators[second]
+                    new_dominator = first
+
+                if dominators[node] != new_dominator:
+                    dominators[node] = new_dominator
+                    changed = True
+
+        return [dominator if dominator != -1 else end for dominator in dominators[:end]]
+
+
+class LockstepGroup:
+    """Lanes executed together (state of one lockstep run)"""
+
+    def __init__(self, operations: List[tuple], post_dominators: List[int], slot_count: int, inputs: List[bytes],
+                 deadline: Optional[float]):
+        """
+        Class constructor
+
+        :param operations: Prepared instructions
+        :param post_dominators: Immediate post-dominators of instructions
+        :param slot_count: Number of variables
+        :param inputs: Contents of files with inputs (one for every lane)
+        :param deadline: Time (time.perf_counter()) when unfinished lanes leave lockstep execution or None for no limit
+        """
+        self.__operations = operations
+        self.__post_dominators = post_dominators
+        self.__deadline = deadline
+
+        lanes = len(inputs)
+        self.__readers = [InputReader.for_bytes(input_data) for input_data in inputs]
+        self.__outputs: List[List[str]] = [[] for _ in range(lanes)]
+
+        self.__types = np.full((slot_count, lanes), UNDEFINED, np.int8)
+        self.__values = np.zeros((slot_count, lanes), np.int64)
+
+        self.__alive = np.ones(lanes, bool)
+        self.__scalar = np.zeros(lanes, bool)
+        self.__exit_codes = np.zeros(lanes, np.int64)
+        self.__executed_instructions = np.zeros(lanes, np.int64)
+
+    def run(self) -> List[Optional[RunResult]]:
+        """
+        Runs all lanes until they end or leave lockstep execution
+
+        :return: Results of lanes (None for lanes that have to be interpreted by the scalar interpreter)
+        """
+        end = len(self.__operations)
+        # Reconvergence stack: [program counter, reconvergence point, mask of lanes]
+        stack = [[0, -1, self.__alive.copy()]]
+        steps = 0
+        # Entry of the reconvergence stack with stragglers and number of steps when they leave lockstep execution
+        stragglers: Optional[list] = None
+        straggler_limit = 0
+        straggler_count = len(self.__alive) * STRAGGLER_FRACTION
+        with np.errstate(all="ignore"):
+            while stack:
+                entry = stack[-1]
+                position, reconvergence, mask = entry
+                mask &= self.__alive
+                if position == reconvergence or not mask.any():
+                    stack.pop()
+                    continue
+                if position >= end:
+                    # End of the program
+                    self.__finish(mask, None)
+                    stack.pop()
+                    continue
+
+                steps += 1
+                if steps % DEADLINE_CHECK_PERIOD == 0:
+                    if self.__deadline is not None and time.perf_counter() > self.__deadline:
+                        self.__leave(self.__alive, True)
+                        break
+
+                    # Without time limit, lanes that don't end (infinite loops) would block the whole group
+                    if stragglers is None or not any(stack_entry is stragglers for stack_entry in stack):
+                        stragglers = entry if np.count_nonzero(mask) <= straggler_count else None
+                        straggler_limit = steps * STRAGGLER_STEPS_FACTOR
+                    elif steps >= straggler_limit:
+                        self.__leave(stragglers[2] & self.__alive, True)
+                        stragglers = None
+                        continue
+
+                self.__executed_instructions += mask
+                operation = self.__operations[position]
+                op_code = operation[0]
+                if op_code in (OpCode.JUMPIFEQ, OpCode.JUMPIFNEQ):
+                    mask, condition = self.__equal(mask, operation[2], operation[3])
+                    if op_code == OpCode.JUMPIFNEQ:
+                        condition = ~condition
+                    taken = mask & condition
+                    not_taken = mask & ~condition
+
+                    if not taken.any():
+                        entry[0] = position + 1
+                    elif not not_taken.any():
+                        entry[0] = operation[1]
+                    else:
+                        # Lanes diverge, they meet again at the immediate post-dominator
+                        entry[0] = self.__post_dominators[position]
+                        stack.append([position + 1, entry[0], not_taken])
+                        stack.append([operation[1], entry[0], taken])
+                elif op_code == OpCode.JUMP:
+                    entry[0] = operation[1]
+                else:
+                    self.__execute(operation, mask)
+                    entry[0] = position + 1
+
+        return self.__results()
+
+    def __execute(self, operation: tuple, mask) -> None:
+        """
+        Executes non-jump instruction for active lanes
+
+        :param operation: Prepared instruction
+        :param mask: Active lanes
+        """
+        op_code = operation[0]
+        types, values = self.__types, self.__values
+
+        if op_code in (OpCode.LABEL, OpCode.BREAK):
+            pass
+        elif op_code in (OpCode.ADD, OpCode.SUB, OpCode.MUL, OpCode.IDIV):
+            destination = operation[1]
+            first_type, first = self.__operand(operation[2])
+            second_type, second = self.__operand(operation[3])
+            invalid = (types[destination] == UNDEFINED) | (first_type != INT) | (second_type != INT)
+
+            if op_code == OpCode.ADD:
+                result = first + second
+                invalid = invalid | (((first ^ result) & (second ^ result)) < 0)
+            elif op_code == OpCode.SUB:
+                result = first - second
+                invalid = invalid | (((first ^ second) & (first ^ result)) < 0)
+            elif op_code == OpCode.MUL:
+                result = first * second
+                invalid = invalid | (np.abs(np.multiply(first, second, dtype=np.float64)) >= MULTIPLICATION_LIMIT)
+            else:
+                zero = second == 0
+                result = first // np.where(zero, 1, second)
+                invalid = invalid | zero | ((first == INT64_MIN) & (second == -1))
+
+            self.__store(mask, invalid, destination, INT, result)
+        elif op_code in (OpCode.LT, OpCode.GT):
+            destination = operation[1]
+            first_type, first = self.__operand(operation[2])
+            second_type, second = self.__operand(operation[3])
+            invalid = (types[destination] == UNDEFINED) | (first_type != second_type) \
+                | ((first_type != INT) & (first_type != BOOL))
+
+            self.__store(mask, invalid, destination, BOOL, first < second if op_code == OpCode.LT else first > second)
+        elif op_code == OpCode.EQ:
+            destination = operation[1]
+            mask = self.__leave(mask, types[destination] == UNDEFINED)
+            mask, result = self.__equal(mask, operation[2], operation[3])
+
+            self.__store(mask, False, destination, BOOL, result)
+        elif op_code in (OpCode.AND, OpCode.OR):
+            destination = operation[1]
+            first_type, first = self.__operand(operation[2])
+            second_type, second = self.__operand(operation[3])
+            invalid = (types[destination] == UNDEFINED) | (first_type != BOOL) | (second_type != BOOL)
+
+            self.__store(mask, invalid, destination, BOOL, first & second if op_code == OpCode.AND else first | second)
+        elif op_code == OpCode.NOT:
+            destination = operation[1]
+            value_type, value = self.__operand(operation[2])
+            invalid = (types[destination] == UNDEFINED) | (value_type != BOOL)
+
+            self.__store(mask, invalid, destination, BOOL, 1 - value)
+        elif op_code == OpCode.MOVE:
+            destination = operation[1]
+            value_type, value = self.__operand(operation[2])
+            invalid = (types[destination] == UNDEFINED) | (value_type < INT)
+
+            self.__store(mask, invalid, destination, value_type, value)
+        elif op_code == OpCode.DEFVAR:
+            destination = operation[1]
+            mask = self.__leave(mask, types[destination] != UNDEFINED)
+
+            np.copyto(types[destination], UNINITIALIZED, where=mask)
+        elif op_code == OpCode.READ:
+            self.__read(mask, operation[1], operation[2])
+        elif op_code == OpCode.WRITE:
+            self.__write(mask, operation[1], operation[2])
+        elif op_code == OpCode.EXIT:
+            value_type, value = self.__operand(operation[1])
+            mask = self.__leave(mask, (value_type != INT) | (value < 0) | (value > 49))
+
+            self.__finish(mask, value)
+        else:
+            # Unsupported instruction
+            self.__leave(mask, True)
+
+    def __operand(self, operand: Operand) -> tuple:
+        """
+        Gets data types and values of operand
+
+        :param operand: Prepared operand
+        :return: Data types and values (arrays for variables, scalars for constants)
+        """
+        slot, constant_type, constant = operand
+        if slot < 0:
+            return constant_type, constant
+
+        return self.__types[slot], self.__values[slot]
+
+    def __equal(self, mask, first_operand: Operand, second_operand: Operand) -> tuple:
+        """
+        Compares operands for equality (like EQ, JUMPIFEQ and JUMPIFNEQ)
+
+        :param mask: Active lanes (lanes with invalid operands leave lockstep execution)
+        :param first_operand: First operand
+        :param second_operand: Second operand
+        :return: Lanes that stay active and results of comparison
+        """
+        first_type, first = self.__operand(first_operand)
+        second_type, second = self.__operand(second_operand)
+
+        # The scalar interpreter requires the same types (even when one of them is nil)
+        invalid = (first_type != second_type) | (first_type < INT)
+        mask = self.__leave(mask, invalid)
+
+        return mask, np.broadcast_to(first == second, mask.shape)
+
+    def __store(self, mask, invalid, destination: int, value_type, value) -> None:
+        """
+        Stores results of lanes without errors
+
+        :param mask: Active lanes
+        :param invalid: Lanes with errors (they leave lockstep execution)
+        :param destination: Slot of the destination variable
+        :param value_type: Data types of results
+        :param value: Results
+        """
+        mask = self.__leave(mask, invalid)
+
+        np.copyto(self.__types[destination], value_type, where=mask, casting="unsafe")
+        np.copyto(self.__values[destination], value, where=mask, casting="unsafe")
+
+    def __read(self, mask, destination: int, type_name: str) -> None:
+        """
+        Reads values from inputs of lanes
+
+        :param mask: Active lanes
+        :param destination: Slot of the destination variable
+        :param type_name: Type of loaded value (int or bool)
+        """
+        mask = self.__leave(mask, self.__types[destination] == UNDEFINED)
+        invalid = np.zeros_like(mask)
+        types = np.full(mask.shape, NIL, np.int8)
+        values = np.zeros(mask.shape, np.int64)
+
+        for lane in np.flatnonzero(mask):
+            try:
+                line = self.__readers[lane].read_line()
+                if line is None:
+                    continue
+                if type_name == "int":
+                    value = int(line)
+                    if not INT64_MIN <= value <= INT64_MAX:
+                        invalid[lane] = True
+                        continue
+                else:
+                    value = 1 if line.lower() == "true" else 0
+            except Exception:
+                # Error of the program (the scalar interpreter reports it)
+                invalid[lane] = True
+                continue
+
+            types[lane] = INT if type_name == "int" else BOOL
+            values[lane] = value
+
+        self.__store(mask, invalid, destination, types, values)
+
+    def __write(self, mask, operand: Optional[Operand], text: Optional[str]) -> None:
+        """
+        Writes values to outputs of lanes
+
+        :param mask: Active lanes
+        :param operand: Written operand or None for string constant
+        :param text: String constant
+        """
+        outputs = self.__outputs
+        if operand is None:
+            for lane in np.flatnonzero(mask):
+                outputs[lane].append(text)
+
+            return
+
+        value_type, value = self.__operand(operand)
+        mask = self.__leave(mask, value_type < INT)
+        types = np.broadcast_to(value_type, mask.shape)
+        values = np.broadcast_to(value, mask.shape)
+        for lane in np.flatnonzero(mask):
+            if types[lane] == INT:
+                outputs[lane].append(str(int(values[lane])))
+            elif types[lane] == BOOL:
+                outputs[lane].append("true" if values[lane] else "false")
+
+    def __leave(self, mask, invalid):
+        """
+        Removes lanes from lockstep execution (they will be interpreted by the scalar interpreter)
+
+        :param mask: Active lanes
+        :param invalid: Lanes that can't continue (errors, unsupported values, ...)
+        :return: Active lanes that stay in lockstep execution
+        """
+        leaving = mask & invalid
+        if not leaving.any():
+            return mask
+
+        self.__scalar |= leaving
+        self.__alive &= ~leaving
+
+        return mask & ~leaving
+
+    def __finish(self, mask, exit_code) -> None:
+        """
+        Ends interpretation of lanes
+
+        :param mask: Lanes that end
+        :param exit_code: Exit codes (values of EXIT instruction) or None for end of the program
+        """
+        if exit_code is not None:
+            np.copyto(self.__exit_codes, exit_code, where=mask)
+        self.__alive &= ~mask
+
+    def __results(self) -> List[Optional[RunResult]]:
+        """
+        Creates results of lanes
+
+        :return: Results of lanes (None for lanes that have to be interpreted by the scalar interpreter)
+        """
+        encoding = locale.getpreferredencoding(False)
+        results: List[Optional[RunResult]] = []
+        for lane, output in enumerate(self.__outputs):
+            if self.__scalar[lane] or self.__alive[lane]:
+                results.append(None)
+                continue
+
+            try:
+                stdout = "".join(output).encode(encoding)
+            except UnicodeEncodeError:
+                # The scalar interpreter reports the error
+                results.append(None)
+                continue
+
+            results.append(RunResult(int(self.__exit_codes[lane]), stdout, b"",
+                                     int(self.__executed_instructions[lane])))
+
+        return results
+
+
+def run_lockstep(program: Program, inputs: List[bytes], lanes: int = DEFAULT_LANES,
+                 time_limit: Optional[float] = None) -> List[Optional[RunResult]]:
+    """
+    Interprets the program with every input in lockstep (in groups of lanes)
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param lanes: Maximum number of lanes executed together
+    :param time_limit: Time limit of one group in seconds (unfinished lanes leave lockstep execution) or None
+    :return: Results (None for inputs that have to be interpreted by the scalar interpreter, for all inputs without
+        NumPy)
+    """
+    if np is None:
+        return [None] * len(inputs)
+
+    lockstep_program = LockstepProgram(program)
+    results: List[Optional[RunResult]] = []
+    for start in range(0, len(inputs), lanes):
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        results.extend(lockstep_program.run(inputs[start:start + lanes], deadline))
+
+    return results
+
+
+def interpret_all(program: Program, inputs: List[bytes], lanes: int = DEFAULT_LANES) -> List[RunResult]:
+    """
+    Interprets the program with every input (in lockstep where possible, by the scalar interpreter otherwise)
+
+    :param program: Loaded program
+    :param inputs: Contents of files with inputs
+    :param lanes: Maximum number of lanes executed together
+    :return: Results of interpretations (the same as results of run_in_memory())
+    """
+    results = run_lockstep(program, inputs, lanes)
+
+    return [result if result is not None else run_in_memory(program, input_data)
+            for result, input_data in zip(results, inputs)]
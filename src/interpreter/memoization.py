@@ -0,0 +1,466 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Memoization of calls of pure subroutines
+
+A subroutine (target of CALL instruction) is pure if everything it can observe is given by the temporary frame and
+values on the data stack at the time of the call and everything it changes is the temporary frame and the top
+of the data stack. The analysis is done when the program is loaded:
+
+* no READ, WRITE, DPRINT, EXIT and BREAK instructions (and no calls of impure subroutines),
+* no access to the global frame (it is shared with the rest of the program),
+* no access to frames of the caller (LF before own PUSHFRAME, POPFRAME of frames it hasn't pushed),
+* the same depth of the data stack (relative to the call) whenever an instruction is reached, so the number
+  of consumed and produced values is known.
+
+Calls of pure subroutines are keyed by the label, the content of the temporary frame (only if the subroutine can
+access it) and the consumed values of the data stack. The result (the temporary frame and the top of the data stack
+after RETURN) is replayed when the same call is made again.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple, Union
+
+from interpreter.code import Program, Instruction, OpCode, ArgType
+from interpreter.error import UsingUndefinedLabelException
+from interpreter.memory import DataType, FrameSnapshot, Value
+
+# Identification of a call: label, content of the temporary frame (None if it isn't used) and consumed values
+# of the data stack
+CallKey = Tuple[str, Optional[FrameSnapshot], Tuple[Tuple[DataType, Union[int, bool, str, None]], ...]]
+
+IMPURE_OP_CODES = {OpCode.READ, OpCode.WRITE, OpCode.DPRINT, OpCode.EXIT, OpCode.BREAK}
+"""Instructions with effects outside of the memory of the program (or stopping it)"""
+
+MAX_CONSUMED_VALUES = 64
+"""Maximum number of values of the data stack consumed by a memoized subroutine (they are a part of the key)"""
+
+MAX_ANALYSIS_ROUNDS = 100
+"""Maximum number of rounds of the analysis (subroutines are re-analyzed when effects of their callees change)"""
+
+
+class SubroutineEffect:
+    """Effect of pure subroutine on the data stack and usage of the temporary frame"""
+
+    def __init__(self, consumed: int, net: int, uses_frame: bool):
+        """
+        Class constructor
+
+        :param consumed: Maximum number of values below the top of the stack (at the time of the call) that can be
+            popped by the subroutine
+        :param net: Difference of the size of the stack after RETURN and at the time of the call
+        :param uses_frame: Can the subroutine access the temporary frame of the caller (or return it back)?
+        """
+        self.__consumed = consumed
+        self.__net = net
+        self.__uses_frame = uses_frame
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SubroutineEffect) \
+            and (self.__consumed, self.__net, self.__uses_frame) == (other.consumed, other.net, other.uses_frame)
+
+    @property
+    def consumed(self) -> int:
+        """
+        Getter for number of consumed values
+
+        :return: Number of values from the top of the stack which can be read by the subroutine
+        """
+        return self.__consumed
+
+    @property
+    def net(self) -> int:
+        """
+        Getter for change of the size of the stack
+
+        :return: Difference of the size of the stack after RETURN and at the time of the call
+        """
+        return self.__net
+
+    @property
+    def produced(self) -> int:
+        """
+        Getter for number of produced values
+
+        :return: Number of values on the top of the stack after RETURN that can differ from values before the call
+        """
+        return self.__consumed + self.__net
+
+    @property
+    def uses_frame(self) -> bool:
+        """
+        Getter for usage of the temporary frame
+
+        :return: Can the subroutine access the temporary frame of the caller (or return it back)? If it can't, the frame
+            isn't a part of the key of the call
+        """
+        return self.__uses_frame
+
+
+class MemoizedResult:
+    """Result of a call of pure subroutine"""
+
+    def __init__(self, temporary_frame: Optional[FrameSnapshot], values: Tuple[Value, ...],
+                 executed_instructions: int):
+        """
+        Class constructor
+
+        :param temporary_frame: Content of the temporary frame after RETURN (None for undefined frame)
+        :param values: Produced values on the top of the data stack (from the bottom-most to the top one)
+        :param executed_instructions: Number of instructions executed by the call (RETURN included)
+        """
+        self.__temporary_frame = temporary_frame
+        self.__values = values
+        self.__executed_instructions = executed_instructions
+
+    @property
+    def temporary_frame(self) -> Optional[FrameSnapshot]:
+        """
+        Getter for content of the temporary frame
+
+        :return: Content of the temporary frame after RETURN (None for undefined frame)
+        """
+        return self.__temporary_frame
+
+    @property
+    def values(self) -> Tuple[Value, ...]:
+        """
+        Getter for produced values
+
+        :return: Values on the top of the data stack after RETURN (from the bottom-most to the top one)
+        """
+        return self.__values
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of instructions executed by the call (RETURN included)
+        """
+        return self.__executed_instructions
+
+
+class PendingCall:
+    """Call of pure subroutine whose result is going to be memoized after RETURN"""
+
+    def __init__(self, key: CallKey, effect: SubroutineEffect, call_depth: int, stack_size: int,
+                 executed_instructions: int):
+        """
+        Class constructor
+
+        :param key: Identification of the call
+        :param effect: Effect of the subroutine
+        :param call_depth: Size of the call stack before the call (RETURN of this call restores it)
+        :param stack_size: Size of the data stack at the time of the call
+        :param executed_instructions: Number of executed instructions at the time of the call (CALL included)
+        """
+        self.__key = key
+        self.__effect = effect
+        self.__call_depth = call_depth
+        self.__stack_size = stack_size
+        self.__executed_instructions = executed_instructions
+
+    @property
+    def key(self) -> CallKey:
+        """
+        Getter for identification of the call
+
+        :return: Key of the call
+        """
+        return self.__key
+
+    @property
+    def effect(self) -> SubroutineEffect:
+        """
+        Getter for effect of the subroutine
+
+        :return: Effect of the subroutine
+        """
+        return self.__effect
+
+    @property
+    def call_depth(self) -> int:
+        """
+        Getter for depth of the call
+
+        :return: Size of the call stack before the call
+        """
+        return self.__call_depth
+
+    @property
+    def stack_size(self) -> int:
+        """
+        Getter for size of the data stack
+
+        :return: Size of the data stack at the time of the call
+        """
+        return self.__stack_size
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of executed instructions at the time of the call
+        """
+        return self.__executed_instructions
+
+
+class Memoizer:
+    """
+    Store of results of calls of pure subroutines with LRU eviction
+
+    The store is used by one interpretation at a time (it isn't thread-safe), but it can be reused by more
+    interpretations of the same program.
+    """
+
+    DEFAULT_MAX_ENTRIES = 65536
+    """Default maximum number of stored results"""
+
+    def __init__(self, program: Program, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Class constructor
+
+        :param program: Program whose calls are memoized (it is analyzed here)
+        :param max_entries: Maximum number of stored results
+        """
+        self.__effects = analyze_subroutines(program)
+        self.__max_entries = max_entries
+        self.__results: 'OrderedDict[CallKey, MemoizedResult]' = OrderedDict()
+
+        self.__hits = {label: 0 for label in self.__effects}
+        self.__misses = {label: 0 for label in self.__effects}
+        self.__entries = {label: 0 for label in self.__effects}
+
+    @property
+    def statistics(self) -> Dict[str, Dict[str, int]]:
+        """
+        Getter for statistics of memoization
+
+        :return: Numbers of hits, misses and stored results (entries) for every pure subroutine (by its label)
+        """
+        return {
+            label: {"hits": self.__hits[label], "misses": self.__misses[label], "entries": self.__entries[label]}
+            for label in sorted(self.__effects)
+        }
+
+    def get_effect(self, label: str) -> Optional[SubroutineEffect]:
+        """
+        Finds effect of subroutine
+
+        :param label: Label of the subroutine
+        :return: Effect of the subroutine or None if it isn't pure (its calls mustn't be memoized)
+        """
+        return self.__effects.get(label)
+
+    def lookup(self, key: CallKey) -> Optional[MemoizedResult]:
+        """
+        Finds result of a call
+
+        :param key: Identification of the call
+        :return: Stored result or None if the call hasn't been memoized
+        """
+        result = self.__results.get(key)
+        if result is None:
+            self.__misses[key[0]] += 1
+
+            return None
+
+        self.__results.move_to_end(key)
+        self.__hits[key[0]] += 1
+
+        return result
+
+    def store(self, key: CallKey, result: MemoizedResult) -> None:
+        """
+        Stores result of a call (the least recently used results are dropped if there are too many of them)
+
+        :param key: Identification of the call
+        :param result: Result of the call
+        """
+        if self.__max_entries == 0:
+            return
+
+        if key not in self.__results:
+            self.__entries[key[0]] += 1
+        self.__results[key] = result
+
+        while len(self.__results) > self.__max_entries:
+            dropped_key, _ = self.__results.popitem(last=False)
+            self.__entries[dropped_key[0]] -= 1
+
+
+def analyze_subroutines(program: Program) -> Dict[str, SubroutineEffect]:
+    """
+    Finds pure subroutines of the program
+
+    Effects of callees are needed for analysis of their callers (and recursive subroutines need their own effects),
+    so subroutines are analyzed repeatedly until their effects don't change. Paths through calls of subroutines with
+    unknown effects are skipped until the effects are found.
+
+    :param program: Analyzed program
+    :return: Effects of pure subroutines (by their labels)
+    """
+    candidates = set()
+    for instruction in program.instructions:
+        if instruction.op_code == OpCode.CALL and get_jump_target(program, instruction) is not None:
+            candidates.add(instruction.args[0].value)
+
+    effects: Dict[str, SubroutineEffect] = {}
+    impure: Set[str] = set()
+    for _ in range(MAX_ANALYSIS_ROUNDS):
+        changed = False
+        for label in sorted(candidates - impure):
+            pure, effect = analyze_subroutine(program, label, candidates, impure, effects)
+            if effect is not None and label in effects and effect.net != effects[label].net:
+                # Returns with different sizes of the stack (caught only through recursive calls)
+                pure = False
+
+            if not pure or (effect is not None and effect.consumed > MAX_CONSUMED_VALUES):
+                impure.add(label)
+                effects.pop(label, None)
+                changed = True
+            elif effect is not None and effects.get(label) != effect:
+                effects[label] = effect
+                changed = True
+
+        if not changed:
+            return effects
+
+    # Effects haven't been settled (they can't be trusted)
+    return {}
+
+
+def analyze_subroutine(program: Program, label: str, candidates: Set[str], impure: Set[str],
+                       effects: Dict[str, SubroutineEffect]) -> Tuple[bool, Optional[SubroutineEffect]]:
+    """
+    Analyzes one subroutine
+
+    Every path from the label is followed until RETURN (or the end of the program, an error, etc.) with the depth
+    of the data stack relative to the call and flags of frames (pushed by the subroutine and the temporary one) which
+    can be the temporary frame of the caller.
+
+    :param program: Analyzed program
+    :param label: Label of the subroutine
+    :param candidates: Labels of all called subroutines
+    :param impure: Labels of subroutines known to be impure
+    :param effects: Effects of subroutines found so far
+    :return: Is the subroutine pure (as far as it is known now)? Effect of the subroutine (None if no RETURN has been
+        reached)
+    """
+    instructions = program.instructions
+    states: Dict[int, Tuple[int, Tuple[bool, ...]]] = {}
+    pending = [(program.get_jump_target(label), 0, (True,))]
+    consumed = 0
+    net = None
+    uses_frame = False
+
+    while pending:
+        position, depth, frames = pending.pop()
+        if position >= len(instructions):
+            # End of the program
+            continue
+
+        if position in states:
+            known_depth, known_frames = states[position]
+            if known_depth != depth or len(known_frames) != len(frames):
+                return False, None
+
+            # Flags are merged, the instruction is analyzed again only if they have changed
+            frames = tuple(known or new for known, new in zip(known_frames, frames))
+            if frames == known_frames:
+                continue
+        states[position] = (depth, frames)
+
+        instruction = instructions[position]
+        op_code = instruction.op_code
+        if op_code in IMPURE_OP_CODES:
+            return False, None
+
+        for argument in instruction.args.values():
+            if argument.arg_type == ArgType.VAR:
+                name = argument.raw_value
+                if name.startswith("GF@") or (name.startswith("LF@") and len(frames) == 1):
+                    return False, None
+
+                if (name.startswith("TF@") and frames[-1]) or (name.startswith("LF@") and frames[-2]):
+                    uses_frame = True
+
+        successors = [position + 1]
+        if op_code == OpCode.PUSHS:
+            depth += 1
+        elif op_code == OpCode.POPS:
+            depth -= 1
+            consumed = max(consumed, -depth)
+        elif op_code == OpCode.CREATEFRAME:
+            frames = frames[:-1] + (False,)
+        elif op_code == OpCode.PUSHFRAME:
+            # Pushing of undefined frame is an error, so the frame is used even if it isn't accessed later
+            uses_frame = uses_frame or frames[-1]
+            frames = frames + (False,)
+        elif op_code == OpCode.POPFRAME:
+            if len(frames) == 1:
+                return False, None
+
+            frames = frames[:-2] + (frames[-2],)
+        elif op_code == OpCode.RETURN:
+            if len(frames) != 1 or (net is not None and net != depth):
+                return False, None
+
+            # Temporary frame of the caller can be returned back to it
+            uses_frame = uses_frame or frames[-1]
+            net = depth
+            successors = []
+        elif op_code == OpCode.JUMP:
+            successors = [get_jump_target(program, instruction)]
+        elif op_code in (OpCode.JUMPIFEQ, OpCode.JUMPIFNEQ):
+            successors.append(get_jump_target(program, instruction))
+        elif op_code == OpCode.CALL:
+            target = get_jump_target(program, instruction)
+            if target is not None:
+                callee = instruction.args[0].value
+                if callee in impure or callee not in candidates:
+                    return False, None
+
+                effect = effects.get(callee)
+                if effect is None:
+                    # The call doesn't return (as far as it is known now)
+                    successors = []
+                else:
+                    consumed = max(consumed, effect.consumed - depth)
+                    depth += effect.net
+                    uses_frame = uses_frame or (frames[-1] and effect.uses_frame)
+                    frames = frames[:-1] + (frames[-1] and effect.uses_frame,)
+            else:
+                successors = []
+
+        for successor in successors:
+            if successor is not None:
+                pending.append((successor, depth, frames))
+
+    if net is None:
+        return True, None
+
+    return True, SubroutineEffect(consumed, net, uses_frame)
+
+
+def get_jump_target(program: Program, instruction: Instruction) -> Optional[int]:
+    """
+    Finds position where the instruction jumps to
+
+    :param program: Program with the instruction
+    :param instruction: Jump or call instruction
+    :return: Position of the target label or None if the instruction would end by an error
+    """
+    argument = instruction.args.get(0)
+    if argument is None or argument.arg_type != ArgType.LABEL:
+        return None
+
+    try:
+        return program.get_jump_target(argument.value)
+    except UsingUndefinedLabelException:
+        return None
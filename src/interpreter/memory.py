@@ -5,11 +5,14 @@
 
 import re
 from enum import Enum
-from typing import Union, Optional, Dict, List
+from typing import Union, Optional, Dict, List, Tuple
 
 from interpreter.error import PopEmptyStackException, EmptyLocalMemoryException, GetValueFromNotInitVarException, \
     NonExistingVarException, UsingUndefinedMemoryFrameException, VariableRedefinitionException
 
+# Content of memory frame: name, type and content of every variable (type is None for uninitialized variables)
+FrameSnapshot = Tuple[Tuple[str, Optional['DataType'], Union[int, bool, str, None]], ...]
+
 
 class ProcessMemory:
     """Abstraction of process random access memory (facade for 3 memory types)"""
@@ -113,6 +116,67 @@ class ProcessMemory:
         """Creates a new temporary memory frame (replaces old if needed)"""
         self.__temporary_memory_frame = MemoryFrame()
 
+    @property
+    def global_frame(self) -> 'MemoryFrame':
+        """
+        Getter for global memory frame
+
+        :return: The global memory frame
+        """
+        return self.__global_memory_frame
+
+    @property
+    def local_frames(self) -> List['MemoryFrame']:
+        """
+        Getter for local memory frames
+
+        :return: Frames of the local memory frame stack (from the bottom-most to the top one)
+        """
+        return self.__local_memory_stack.frames
+
+    @property
+    def temporary_frame(self) -> Optional['MemoryFrame']:
+        """
+        Getter for temporary memory frame
+
+        :return: The temporary memory frame or None if it is undefined
+        """
+        return self.__temporary_memory_frame
+
+    def restore_frames(self, global_frame: 'MemoryFrame', local_frames: List['MemoryFrame'],
+                       temporary_frame: Optional['MemoryFrame']) -> None:
+        """
+        Replaces all memory frames (for restoring of saved state)
+
+        :param global_frame: New global memory frame
+        :param local_frames: New frames of the local memory frame stack (from the bottom-most to the top one)
+        :param temporary_frame: New temporary memory frame or None for undefined frame
+        """
+        self.__global_memory_frame = global_frame
+        self.__local_memory_stack = LocalMemory()
+        for memory_frame in local_frames:
+            self.__local_memory_stack.push(memory_frame)
+        self.__temporary_memory_frame = temporary_frame
+
+    def snapshot_temporary_frame(self) -> Optional[FrameSnapshot]:
+        """
+        Captures content of the temporary memory frame
+
+        :return: Content of the frame or None if it is undefined
+        """
+        if self.__temporary_memory_frame is None:
+            return None
+
+        return self.__temporary_memory_frame.snapshot()
+
+    def restore_temporary_frame(self, snapshot: Optional[FrameSnapshot]) -> None:
+        """
+        Replaces the temporary memory frame by a new one with captured content
+
+        :param snapshot: Content of the frame (see snapshot_temporary_frame()) or None for undefined frame
+        """
+        self.__temporary_memory_frame = MemoryFrame.from_snapshot(snapshot) if snapshot is not None else None
+
 
 class LocalMemory:
     """Stack of memory frames"""
@@ -153,6 +217,15 @@ class LocalMemory:
 
         return self.__data[-1]
 
+    @property
+    def frames(self) -> List['MemoryFrame']:
+        """
+        Getter for stored memory frames
+
+        :return: Memory frames from the bottom-most to the top one (the list mustn't be modified)
+        """
+        return self.__data
+
 
 class MemoryFrame:
     """Single memory frame (place for storing variables) - wrapper to Python's dictionary"""
@@ -182,6 +255,44 @@ class MemoryFrame:
 
         return self.__data[name]
 
+    @property
+    def variables(self) -> Dict[str, 'Variable']:
+        """
+        Getter for stored variables
+
+        :return: Variables by their names in the order of definition (the dictionary mustn't be modified)
+        """
+        return self.__data
+
+    def snapshot(self) -> FrameSnapshot:
+        """
+        Captures content of the memory frame
+
+        :return: Name, type and content of every variable in the order of definition
+        """
+        snapshot = []
+        for variable in self.__data.values():
+            if variable.initialized:
+                snapshot.append((variable.name, variable.value.val_type, variable.value.content))
+            else:
+                snapshot.append((variable.name, None, None))
+
+        return tuple(snapshot)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: FrameSnapshot) -> 'MemoryFrame':
+        """
+        Creates memory frame with captured content
+
+        :param snapshot: Content of the frame (see snapshot())
+        :return: Created memory frame
+        """
+        memory_frame = cls()
+        for name, val_type, content in snapshot:
+            memory_frame.add_variable(Variable(name, Value(val_type, content) if val_type is not None else None))
+
+        return memory_frame
+
 
 class Variable:
     """Representation of variable stored in memory frame"""
@@ -206,6 +317,15 @@ class Variable:
         """
         return self.__name
 
+    @property
+    def initialized(self) -> bool:
+        """
+        Getter for initialization state
+
+        :return: Has the variable a value?
+        """
+        return self.__value is not None
+
     @property
     def value(self) -> 'Value':
         """
@@ -235,6 +355,7 @@ class DataStack:
     def __init__(self):
         """Class constructor"""
         self.__data = []
+        self.__peak_size = 0
 
     def push(self, value: 'Value') -> None:
         """
@@ -243,6 +364,8 @@ class DataStack:
         :param value: Value to push
         """
         self.__data.append(value)
+        if len(self.__data) > self.__peak_size:
+            self.__peak_size = len(self.__data)
 
     def pop(self) -> 'Value':
         """
@@ -256,6 +379,53 @@ class DataStack:
 
         return self.__data.pop()
 
+    @property
+    def size(self) -> int:
+        """
+        Getter for size of the data stack
+
+        :return: Number of values in the stack
+        """
+        return len(self.__data)
+
+    @property
+    def peak_size(self) -> int:
+        """
+        Getter for peak size of the data stack
+
+        :return: Maximum number of values that have been in the stack at once
+        """
+        return self.__peak_size
+
+    @property
+    def values(self) -> List['Value']:
+        """
+        Getter for stored values
+
+        :return: Values from the bottom-most to the top one (the list mustn't be modified)
+        """
+        return self.__data
+
+    def peek(self, count: int) -> List['Value']:
+        """
+        Returns values from the top of the stack (without removing them)
+
+        :param count: Number of values (it mustn't be greater than the size of the stack)
+        :return: Values from the bottom-most to the top one
+        """
+        return self.__data[len(self.__data) - count:]
+
+    def replace(self, count: int, values: Tuple['Value', ...]) -> None:
+        """
+        Replaces values on the top of the stack
+
+        :param count: Number of removed values (it mustn't be greater than the size of the stack)
+        :param values: New values from the bottom-most to the top one
+        """
+        self.__data[len(self.__data) - count:] = values
+        if len(self.__data) > self.__peak_size:
+            self.__peak_size = len(self.__data)
+
 
 class CallStack:
     """Emulation of the stack for function calls storing backed up addresses of places where the call was executed
@@ -264,6 +434,7 @@ class CallStack:
     def __init__(self):
         """Class constructor"""
         self.__data = []
+        self.__peak_size = 0
 
     def push(self, memory_position: int) -> None:
         """
@@ -272,6 +443,8 @@ class CallStack:
         :param memory_position: The memory position (in simulated program object) to push
         """
         self.__data.append(memory_position)
+        if len(self.__data) > self.__peak_size:
+            self.__peak_size = len(self.__data)
 
     def pop(self) -> int:
         """
@@ -285,6 +458,33 @@ class CallStack:
 
         return self.__data.pop()
 
+    @property
+    def size(self) -> int:
+        """
+        Getter for size of the call stack
+
+        :return: Number of stored positions (depth of nested calls)
+        """
+        return len(self.__data)
+
+    @property
+    def peak_size(self) -> int:
+        """
+        Getter for peak size of the call stack
+
+        :return: Maximum depth of nested calls
+        """
+        return self.__peak_size
+
+    @property
+    def positions(self) -> List[int]:
+        """
+        Getter for stored positions
+
+        :return: Positions from the bottom-most to the top one (the list mustn't be modified)
+        """
+        return self.__data
+
 
 class Value:
     """Entity representation of dynamic-typed value"""
@@ -0,0 +1,322 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Aggregate metrics of batch and server runs in Prometheus text format
+
+Metrics are updated once per run (the run loop itself only tracks peaks of its stacks), so they don't slow
+interpretation down. They are exposed either by a file rewritten at most once per FLUSH_INTERVAL and at the end
+(e.g. for textfile collector of node exporter) or by a Unix socket (target unix:path) answering every connection
+with the current values (plain text or HTTP response for HTTP requests, e.g. curl --unix-socket path http://x/).
+"""
+
+import os
+import socket
+import stat
+import threading
+import time
+from socketserver import ThreadingMixIn, UnixStreamServer, StreamRequestHandler
+from typing import Dict, List, Optional, Tuple
+
+from interpreter.runner import RunResult
+
+FLUSH_INTERVAL = 1.0
+"""Minimum time between rewrites of the metrics file in seconds"""
+
+SOCKET_PREFIX = "unix:"
+"""Prefix of metrics target that is a Unix socket"""
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+"""Upper bounds of buckets of durations in seconds"""
+
+DEPTH_BUCKETS = (0, 1, 4, 16, 64, 256, 1024, 4096, 16384, 65536)
+"""Upper bounds of buckets of stack depths"""
+
+TIMEOUT_LABEL = "timeout"
+"""Exit code label of runs stopped by time limit"""
+
+LIMIT_LABEL = "instruction_limit"
+"""Exit code label of runs stopped by instruction limit"""
+
+
+class Histogram:
+    """Histogram with fixed buckets"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        """
+        Class constructor
+
+        :param buckets: Upper bounds of buckets (sorted)
+        """
+        self.__buckets = buckets
+        self.__counts = [0] * len(buckets)
+        self.__sum = 0.0
+        self.__count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Adds observed value
+
+        :param value: The value
+        """
+        for index, bound in enumerate(self.__buckets):
+            if value <= bound:
+                self.__counts[index] += 1
+                break
+        self.__sum += value
+        self.__count += 1
+
+    def format(self, name: str) -> List[str]:
+        """
+        Formats samples of the histogram (buckets are cumulative)
+
+        :param name: Name of the metric
+        :return: Lines with samples
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.__buckets, self.__counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{format_number(bound)}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.__count}')
+        lines.append(f"{name}_sum {format_number(self.__sum)}")
+        lines.append(f"{name}_count {self.__count}")
+
+        return lines
+
+
+class Metrics:
+    """Metrics of runs (updated from more threads)"""
+
+    def __init__(self, target: str):
+        """
+        Class constructor
+
+        :param target: Path to the metrics file or unix:path for the Unix socket
+        """
+        self.__target = target
+        self.__lock = threading.Lock()
+        self.__flush_lock = threading.Lock()
+        self.__last_flush = 0.0
+        self.__server: Optional[MetricsServer] = None
+
+        self.__runs_started = 0
+        self.__runs_finished: Dict[str, int] = {}
+        self.__instructions = 0
+        self.__bytes_read = 0
+        self.__bytes_written = 0
+        self.__run_duration = Histogram(DURATION_BUCKETS)
+        self.__load_duration = Histogram(DURATION_BUCKETS)
+        self.__data_stack_depth = Histogram(DEPTH_BUCKETS)
+        self.__call_stack_depth = Histogram(DEPTH_BUCKETS)
+
+    def open(self) -> None:
+        """
+        Starts exposing of the metrics
+
+        :raise OSError: Metrics file can't be written or the socket can't be bound
+        """
+        if self.__target.startswith(SOCKET_PREFIX):
+            self.__server = MetricsServer(self.__target[len(SOCKET_PREFIX):], self)
+            threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        else:
+            self.__write_file()
+
+    def close(self) -> None:
+        """Writes the final values (to the file) or stops the socket"""
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+        elif not self.__target.startswith(SOCKET_PREFIX):
+            self.flush(force=True)
+
+    def run_started(self, count: int = 1) -> None:
+        """
+        Counts started runs
+
+        :param count: Number of started runs
+        """
+        with self.__lock:
+            self.__runs_started += count
+
+    def run_finished(self, result: Optional[RunResult], duration: float, input_size: int) -> None:
+        """
+        Records finished run
+
+        :param result: Result of the run or None if it has been stopped by time limit
+        :param duration: Duration of the run in seconds
+        :param input_size: Size of inputs of the run in bytes
+        """
+        if result is None:
+            label = TIMEOUT_LABEL
+        else:
+            label = LIMIT_LABEL if result.limit_exceeded else str(int(result.exit_code))
+        with self.__lock:
+            self.__runs_finished[label] = self.__runs_finished.get(label, 0) + 1
+            self.__run_duration.observe(duration)
+            self.__bytes_read += input_size
+            if result is not None:
+                self.__instructions += result.executed_instructions
+                self.__bytes_written += len(result.stdout) + len(result.stderr)
+                self.__data_stack_depth.observe(result.peak_data_stack)
+                self.__call_stack_depth.observe(result.peak_call_stack)
+
+        self.flush()
+
+    def program_loaded(self, duration: float) -> None:
+        """
+        Records loading of a program
+
+        :param duration: Duration of the loading in seconds
+        """
+        with self.__lock:
+            self.__load_duration.observe(duration)
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Rewrites the metrics file if the last rewrite is older than FLUSH_INTERVAL (the socket needs no flushing)
+
+        :param force: Should the file be rewritten now?
+        """
+        if self.__target.startswith(SOCKET_PREFIX):
+            return
+        if not force and time.monotonic() - self.__last_flush < FLUSH_INTERVAL:
+            return
+        # Runs finished in other threads don't wait for the rewrite in progress
+        if not self.__flush_lock.acquire(blocking=force):
+            return
+
+        try:
+            self.__write_file()
+        except OSError:
+            # Metrics mustn't break interpretation, the next flush can succeed
+            pass
+        finally:
+            self.__flush_lock.release()
+
+    def format(self) -> str:
+        """
+        Formats current values in Prometheus text format
+
+        :return: Exposition of the metrics
+        """
+        with self.__lock:
+            lines = describe("ipp_runs_started_total", "counter", "Runs started")
+            lines.append(f"ipp_runs_started_total {self.__runs_started}")
+            lines += describe("ipp_runs_finished_total", "counter", "Runs finished by exit code")
+            lines += [f'ipp_runs_finished_total{{exit_code="{label}"}} {count}'
+                      for label, count in sorted(self.__runs_finished.items())]
+            lines += describe("ipp_instructions_executed_total", "counter", "Instructions executed by finished runs")
+            lines.append(f"ipp_instructions_executed_total {self.__instructions}")
+            lines += describe("ipp_read_bytes_total", "counter", "Bytes of inputs given to finished runs")
+            lines.append(f"ipp_read_bytes_total {self.__bytes_read}")
+            lines += describe("ipp_written_bytes_total", "counter", "Bytes written to stdout and stderr by runs")
+            lines.append(f"ipp_written_bytes_total {self.__bytes_written}")
+            lines += describe("ipp_run_duration_seconds", "histogram", "Duration of runs")
+            lines += self.__run_duration.format("ipp_run_duration_seconds")
+            lines += describe("ipp_load_duration_seconds", "histogram", "Duration of loading of programs")
+            lines += self.__load_duration.format("ipp_load_duration_seconds")
+            lines += describe("ipp_data_stack_peak_depth", "histogram", "Peak depth of the data stack of runs")
+            lines += self.__data_stack_depth.format("ipp_data_stack_peak_depth")
+            lines += describe("ipp_call_stack_peak_depth", "histogram", "Peak depth of the call stack of runs")
+            lines += self.__call_stack_depth.format("ipp_call_stack_peak_depth")
+
+        return "\n".join(lines) + "\n"
+
+    def __write_file(self) -> None:
+        """
+        Rewrites the metrics file atomically (scrapers never see a partially written file)
+
+        :raise OSError: File can't be written
+        """
+        temporary_file = f"{self.__target}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as file:
+            file.write(self.format())
+        os.replace(temporary_file, self.__target)
+        self.__last_flush = time.monotonic()
+
+
+class MetricsServer(ThreadingMixIn, UnixStreamServer):
+    """Unix socket exposing current metrics to every connected client"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, metrics: Metrics):
+        """
+        Class constructor
+
+        :param socket_path: Path to the Unix socket (stale socket from previous run is removed)
+        :param metrics: Exposed metrics
+        """
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)
+
+        self.__socket_path = socket_path
+        self.__metrics = metrics
+
+        super().__init__(socket_path, MetricsRequestHandler)
+
+    @property
+    def metrics(self) -> Metrics:
+        """
+        Getter for exposed metrics
+
+        :return: Metrics
+        """
+        return self.__metrics
+
+    def server_close(self) -> None:
+        """Closes the server and removes its socket"""
+        super().server_close()
+
+        if os.path.exists(self.__socket_path):
+            os.unlink(self.__socket_path)
+
+
+class MetricsRequestHandler(StreamRequestHandler):
+    """Handler of one scrape (HTTP request or plain connection)"""
+
+    def handle(self) -> None:
+        """Sends current metrics (after the header of HTTP request if the client sent any)"""
+        # Plain clients (e.g. socat) may send nothing, so waiting for the request is limited
+        self.connection.settimeout(0.5)
+        is_http = False
+        try:
+            line = self.rfile.readline()
+            is_http = line.startswith(b"GET ")
+            while line.strip():
+                line = self.rfile.readline()
+        except socket.timeout:
+            pass
+
+        # noinspection PyUnresolvedReferences
+        body = self.server.metrics.format().encode()
+        if is_http:
+            self.wfile.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             + f"Content-Length: {len(body)}\r\n\r\n".encode())
+        self.wfile.write(body)
+
+
+def describe(name: str, metric_type: str, description: str) -> List[str]:
+    """
+    Creates header of a metric
+
+    :param name: Name of the metric
+    :param metric_type: Type of the metric (counter, histogram, ...)
+    :param description: Help text
+    :return: Lines of the header
+    """
+    return [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+
+
+def format_number(value: float) -> str:
+    """
+    Formats number for Prometheus text format (integers without decimal point)
+
+    :param value: The number
+    :return: Formatted number
+    """
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
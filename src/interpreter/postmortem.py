@@ -0,0 +1,313 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Post-mortem diagnosis of failed interpretations
+
+The interpreter keeps positions of recently executed instructions in a ring buffer (an array, one store per
+instruction). When the program fails with a runtime error, the buffer is written into a dump file together with
+the state of memory frames and stacks. Operation codes and orders of the instructions are stored in a table
+of the dump, so the dump can be viewed without the program:
+
+    python3 -m interpreter.postmortem dump [--last n]
+
+Dump file format
+================
+
+    8 bytes         magic (format identification and version)
+    payload         dictionary serialized by marshal module (see build_dump())
+"""
+
+import marshal
+from argparse import ArgumentParser
+from array import array
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from interpreter.code import Instruction, Program, EndOfProgram
+from interpreter.error import ExitCode
+from interpreter.hooks import ExecutionHook
+from interpreter.memory import MemoryFrame, Value
+
+if TYPE_CHECKING:
+    from interpreter.interpretation import Interpreter
+
+MAGIC = b"IPPDUMP\x01"
+"""Header of dump files (format identification and version)"""
+
+ERROR_EXIT_CODES = {
+    ExitCode.BAD_XML_STRUCTURE, ExitCode.SEMANTIC_ERROR, ExitCode.BAD_OPERAND_TYPES, ExitCode.NON_EXISTING_VARIABLE,
+    ExitCode.NON_EXISTING_FRAME, ExitCode.MISSING_VALUE, ExitCode.BAD_OPERAND_VALUE, ExitCode.BAD_STRING_USAGE,
+    ExitCode.INTERNAL_ERROR,
+}
+"""Exit codes of interpretation ended by an error (BAD_XML_STRUCTURE can be produced by EXIT too, see has_failed())"""
+
+# Value in a dump: data type name and content, None for uninitialized variable
+DumpedValue = Optional[Tuple[str, Union[int, bool, str, None]]]
+
+
+class InstructionHistory(ExecutionHook):
+    """Ring buffer of positions of recently executed instructions"""
+
+    DEFAULT_SIZE = 65536
+    """Default number of remembered instructions"""
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        """
+        Class constructor
+
+        :param size: Number of remembered instructions (rounded up to a power of two)
+        """
+        capacity = 1
+        while capacity < size:
+            capacity *= 2
+
+        self.__positions = array("l", bytes(capacity * array("l").itemsize))
+        self.__mask = capacity - 1
+        self.__count = 0
+
+    def before_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Remembers position of the instruction
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        self.__positions[self.__count & self.__mask] = position
+        self.__count += 1
+
+    def positions(self) -> List[int]:
+        """
+        Returns positions of remembered instructions
+
+        :return: Positions of the instructions from the oldest to the latest executed one
+        """
+        count = self.__count
+        size = len(self.__positions)
+        if count <= size:
+            return self.__positions[:count].tolist()
+
+        start = count % size
+
+        return (self.__positions[start:] + self.__positions[:start]).tolist()
+
+
+def has_failed(interpreter: 'Interpreter', exit_code: int) -> bool:
+    """
+    Checks if interpretation has ended by an error
+
+    :param interpreter: Interpreter after the interpretation
+    :param exit_code: Exit code of the interpretation
+    :return: Has it ended by an error? (not by EXIT instruction with the same code)
+    """
+    return exit_code in ERROR_EXIT_CODES and exit_code != interpreter.exit_code
+
+
+def build_dump(history: InstructionHistory, interpreter: 'Interpreter', program: Program, exit_code: int) -> dict:
+    """
+    Builds dump of failed interpretation
+
+    :param history: History of executed instructions of the run
+    :param interpreter: Interpreter after the failure
+    :param program: Interpreted program
+    :param exit_code: Exit code of the interpretation
+    :return: Dump (only built-in types, it can be serialized by marshal)
+    """
+    positions = history.positions()
+
+    # Table of used instructions: position -> (order, operation code)
+    instructions = {}
+    for position in set(positions) | {interpreter.program_counter}:
+        try:
+            op_code = program.get_instruction_at(position).op_code.value
+        except EndOfProgram:
+            continue
+        instructions[position] = (program.get_order_at(position), op_code)
+
+    memory = interpreter.memory
+    temporary_frame = memory.temporary_frame
+
+    return {
+        "exit_code": int(exit_code),
+        "executed": interpreter.executed_instructions,
+        "pc": interpreter.program_counter,
+        "history": positions,
+        "instructions": instructions,
+        "global": dump_frame(memory.global_frame),
+        "local": [dump_frame(memory_frame) for memory_frame in memory.local_frames],
+        "temporary": dump_frame(temporary_frame) if temporary_frame is not None else None,
+        "data_stack": [dump_value(value) for value in interpreter.data_stack.values],
+        "call_stack": list(interpreter.call_stack.positions),
+    }
+
+
+def write_dump(history: InstructionHistory, interpreter: 'Interpreter', program: Program, exit_code: int,
+               path: str) -> None:
+    """
+    Writes dump of failed interpretation
+
+    :param history: History of executed instructions of the run
+    :param interpreter: Interpreter after the failure
+    :param program: Interpreted program
+    :param exit_code: Exit code of the interpretation
+    :param path: Path to the dump file
+    :raise OSError: File can't be written
+    """
+    data = MAGIC + marshal.dumps(build_dump(history, interpreter, program, exit_code))
+
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def load_dump(path: str) -> dict:
+    """
+    Loads dump of failed interpretation
+
+    :param path: Path to the dump file
+    :return: Dump (see build_dump())
+    :raise OSError: File can't be read
+    :raise ValueError: File doesn't contain valid dump
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if not data.startswith(MAGIC):
+        raise ValueError("File doesn't contain a dump")
+    try:
+        dump = marshal.loads(data[len(MAGIC):])
+    except (EOFError, TypeError) as e:
+        raise ValueError("Dump is damaged") from e
+    if not isinstance(dump, dict):
+        raise ValueError("Dump is damaged")
+
+    return dump
+
+
+def dump_value(value: Optional[Value]) -> DumpedValue:
+    """
+    Converts value for dump
+
+    :param value: Value or None (uninitialized variable)
+    :return: Value in dump
+    """
+    if value is None:
+        return None
+
+    return value.val_type.value, value.content
+
+
+def dump_frame(memory_frame: MemoryFrame) -> Dict[str, DumpedValue]:
+    """
+    Converts memory frame for dump
+
+    :param memory_frame: Memory frame
+    :return: Values of variables by their names
+    """
+    return {
+        name: dump_value(variable.value if variable.initialized else None)
+        for name, variable in memory_frame.variables.items()
+    }
+
+
+def format_value(value: DumpedValue) -> str:
+    """
+    Formats value from dump like a constant of IPPcode22
+
+    :param value: Value in dump
+    :return: Formatted value
+    """
+    if value is None:
+        return "(uninitialized)"
+
+    data_type, content = value
+    if data_type == "bool":
+        content = "true" if content else "false"
+    elif data_type == "nil":
+        content = "nil"
+
+    return f"{data_type}@{content}"
+
+
+def format_dump(dump: dict, last: Optional[int] = None) -> str:
+    """
+    Formats dump as a text report
+
+    :param dump: Dump (see build_dump())
+    :param last: Number of shown latest executed instructions or None for all remembered ones
+    :return: Text report
+    """
+    instructions = dump["instructions"]
+
+    def describe(position: int) -> str:
+        """Describes instruction at the position by its order and operation code"""
+        if position not in instructions:
+            return f"position {position} (end of program)"
+        order, op_code = instructions[position]
+
+        return f"order {order} {op_code}"
+
+    def describe_frame(frame: Dict[str, DumpedValue], indentation: str = "  ") -> List[str]:
+        """Lists variables of the frame"""
+        if not frame:
+            return [f"{indentation}(empty)"]
+
+        return [f"{indentation}{name} = {format_value(value)}" for name, value in frame.items()]
+
+    history = dump["history"]
+    shown = history[-last:] if last is not None and last > 0 else history
+    first_number = dump["executed"] - len(shown)
+
+    lines = [
+        f"Exit code {dump['exit_code']} after {dump['executed']} executed instructions",
+        f"Failed at: {describe(dump['pc'])}",
+        "",
+        f"Latest executed instructions ({len(shown)} of {len(history)} remembered, oldest first):",
+    ]
+    lines += [f"  {first_number + index + 1:>12}  {describe(position)}" for index, position in enumerate(shown)]
+
+    lines += ["", "Global frame:"] + describe_frame(dump["global"])
+    lines.append("Local frames (the top one last):")
+    if not dump["local"]:
+        lines.append("  (none)")
+    for number, frame in enumerate(dump["local"]):
+        lines.append(f"  #{number}")
+        lines += describe_frame(frame, "    ")
+    lines.append("Temporary frame:")
+    lines += describe_frame(dump["temporary"]) if dump["temporary"] is not None else ["  (undefined)"]
+
+    lines.append("Data stack (the top last):")
+    lines += [f"  {format_value(value)}" for value in dump["data_stack"]] or ["  (empty)"]
+    lines.append("Call stack (return points, the top last):")
+    lines += [f"  {describe(position)}" for position in dump["call_stack"]] or ["  (empty)"]
+
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    """
+    Main function of the viewer of dumps
+
+    :return: Exit code
+    """
+    arg_parser = ArgumentParser(description="Viewer of dumps of failed interpretations")
+    arg_parser.add_argument("dump", type=str, help="Dump file written by interpret.py --crash-dump")
+    arg_parser.add_argument("--last", metavar="n", type=int, default=50,
+                            help="Number of shown latest executed instructions (0 for all remembered ones)")
+    args = arg_parser.parse_args()
+
+    try:
+        dump = load_dump(args.dump)
+    except (OSError, ValueError) as e:
+        print(f"Dump can't be loaded: {e}")
+
+        return ExitCode.INPUT_FILE_ERROR
+
+    print(format_dump(dump, args.last), end="")
+
+    return ExitCode.SUCCESS
+
+
+if __name__ == '__main__':
+    exit(main())
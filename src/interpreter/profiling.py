@@ -0,0 +1,262 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from interpreter.code import Program, Instruction
+from interpreter.hooks import ExecutionHook
+
+if TYPE_CHECKING:
+    from interpreter.interpretation import Interpreter
+
+JSON_SUFFIX = ".json"
+"""Suffix added to the path of the text report for the machine-readable report"""
+
+
+class Profiler(ExecutionHook):
+    """
+    Profiler of interpretation (executions and time of every instruction)
+
+    Executions are counted exactly. Time is measured only for sampled executions (with random gaps, so sampling doesn't
+    resonate with loops of the program) and it is scaled by the sampling ratio. Reading the clock costs about as much
+    as executing a simple instruction, timing of every one of them would distort the profile.
+    """
+
+    DEFAULT_SAMPLE_INTERVAL = 10
+    """Default average number of executed instructions per timed one"""
+
+    CALIBRATION_ROUNDS = 1000
+    """Number of measurements of the overhead of the clock"""
+
+    def __init__(self, sample_interval: int = DEFAULT_SAMPLE_INTERVAL, seed: int = 0):
+        """
+        Class constructor
+
+        :param sample_interval: Average number of executed instructions per timed one (1 for timing of all of them)
+        :param seed: Seed of random gaps between samples (profiles of the same run are the same)
+        """
+        self.__sample_interval = sample_interval
+        self.__random = random.Random(seed)
+
+        self.__counts: Dict[int, int] = {}
+        self.__samples: Dict[int, int] = {}
+        self.__sampled_times: Dict[int, float] = {}
+
+        self.__clock_overhead = self.__calibrate()
+        self.__countdown = self.__next_gap()
+        self.__sample_start: Optional[float] = None
+
+    @property
+    def counts(self) -> Dict[int, int]:
+        """
+        Getter for numbers of executions
+
+        :return: Number of executions of instructions by their positions in the program
+        """
+        return self.__counts
+
+    @property
+    def sampled_executions(self) -> int:
+        """
+        Getter for number of timed executions
+
+        :return: Number of executions whose time has been measured
+        """
+        return sum(self.__samples.values())
+
+    @property
+    def sample_interval(self) -> int:
+        """
+        Getter for sample interval
+
+        :return: Average number of executed instructions per timed one
+        """
+        return self.__sample_interval
+
+    def before_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Counts execution of the instruction and starts timing of sampled executions
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        self.__counts[position] = self.__counts.get(position, 0) + 1
+
+        self.__countdown -= 1
+        if self.__countdown == 0:
+            self.__countdown = self.__next_gap()
+            self.__sample_start = time.perf_counter()
+
+    def after_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Finishes timing of sampled execution
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        if self.__sample_start is None:
+            return
+
+        # Instructions ending the program (EXIT, errors) are measured too
+        elapsed = time.perf_counter() - self.__sample_start - self.__clock_overhead
+        self.__sample_start = None
+        self.__samples[position] = self.__samples.get(position, 0) + 1
+        self.__sampled_times[position] = self.__sampled_times.get(position, 0.0) + max(elapsed, 0.0)
+
+    def times(self) -> Dict[int, float]:
+        """
+        Estimates time spent by executing instructions
+
+        :return: Estimated total time of executions of instructions (by their positions) in seconds
+        """
+        sampled = self.sampled_executions
+        if sampled == 0:
+            return {position: 0.0 for position in self.__counts}
+
+        scale = sum(self.__counts.values()) / sampled
+
+        return {position: self.__sampled_times.get(position, 0.0) * scale for position in self.__counts}
+
+    def __next_gap(self) -> int:
+        """
+        Generates number of executions until the next timed one
+
+        :return: Random gap with mean equal to the sample interval
+        """
+        if self.__sample_interval == 1:
+            return 1
+
+        return self.__random.randint(1, 2 * self.__sample_interval - 1)
+
+    def __calibrate(self) -> float:
+        """
+        Measures overhead of reading the clock (it is subtracted from measured times)
+
+        :return: The smallest time between two readings of the clock in seconds
+        """
+        clock = time.perf_counter
+        overhead = float("inf")
+        for _ in range(self.CALIBRATION_ROUNDS):
+            start = clock()
+            overhead = min(overhead, clock() - start)
+
+        return overhead
+
+
+def build_profile(profiler: Profiler, program: Program, duration: float) -> dict:
+    """
+    Builds profile of the run (machine-readable form of the report)
+
+    :param profiler: Profiler used by the run
+    :param program: Interpreted program
+    :param duration: Duration of the whole run in seconds
+    :return: Profile with totals, statistics of operation codes and statistics of instructions (both sorted by time)
+    """
+    counts = profiler.counts
+    times = profiler.times()
+
+    instructions = []
+    op_codes: Dict[str, Dict[str, float]] = {}
+    for position, count in counts.items():
+        op_code = program.get_instruction_at(position).op_code.value
+        instructions.append({
+            "order": program.get_order_at(position),
+            "op_code": op_code,
+            "count": count,
+            "time": times[position],
+        })
+
+        statistics = op_codes.setdefault(op_code, {"count": 0, "time": 0.0})
+        statistics["count"] += count
+        statistics["time"] += times[position]
+
+    instructions.sort(key=lambda item: (-item["time"], -item["count"], item["order"]))
+
+    return {
+        "duration": duration,
+        "executed": sum(counts.values()),
+        "sampled": profiler.sampled_executions,
+        "sample_interval": profiler.sample_interval,
+        "op_codes": dict(sorted(op_codes.items(), key=lambda item: (-item[1]["time"], -item[1]["count"], item[0]))),
+        "instructions": instructions,
+    }
+
+
+def format_report(profile: dict) -> str:
+    """
+    Formats profile as a text report
+
+    :param profile: Profile of the run (see build_profile())
+    :return: Text report with tables of operation codes and instructions sorted by time
+    """
+    total_time = sum(statistics["time"] for statistics in profile["op_codes"].values())
+    executed = profile["executed"]
+
+    def share(part: float, whole: float) -> float:
+        """Computes percentage (zero for empty whole)"""
+        return 100 * part / whole if whole else 0.0
+
+    def row(name: str, count: int, spent: float) -> Tuple[str, str, str, str, str]:
+        """Formats cells of one row"""
+        return (name, str(count), f"{share(count, executed):.1f}", f"{spent * 1000:.3f}",
+                f"{share(spent, total_time):.1f}")
+
+    lines = [
+        f"Executed instructions: {executed} (timed {profile['sampled']}, sample interval {profile['sample_interval']})",
+        f"Time of instructions: {total_time:.6f} s (estimated), whole run: {profile['duration']:.6f} s",
+        "",
+    ]
+
+    op_code_rows = [row(op_code, statistics["count"], statistics["time"])
+                    for op_code, statistics in profile["op_codes"].items()]
+    lines += format_table(("Opcode", "Count", "Count %", "Time ms", "Time %"), op_code_rows)
+    lines.append("")
+
+    instruction_rows = [row(f"{item['order']} {item['op_code']}", item["count"], item["time"])
+                        for item in profile["instructions"]]
+    lines += format_table(("Instruction", "Count", "Count %", "Time ms", "Time %"), instruction_rows)
+
+    return "\n".join(lines) + "\n"
+
+
+def format_table(header: Tuple[str, ...], rows: List[Tuple[str, ...]]) -> List[str]:
+    """
+    Formats table with the first column aligned to the left and the others to the right
+
+    :param header: Names of columns
+    :param rows: Values of cells
+    :return: Lines of the table
+    """
+    widths = [max(len(cells[column]) for cells in [header] + rows) for column in range(len(header))]
+
+    return [
+        "  ".join(cell.ljust(width) if column == 0 else cell.rjust(width)
+                  for column, (cell, width) in enumerate(zip(cells, widths)))
+        for cells in [header] + rows
+    ]
+
+
+def write_profile(profiler: Profiler, program: Program, duration: float, path: str) -> None:
+    """
+    Writes text report of the profile and its machine-readable form (to path with JSON_SUFFIX)
+
+    :param profiler: Profiler used by the run
+    :param program: Interpreted program
+    :param duration: Duration of the whole run in seconds
+    :param path: Path to the file for the text report
+    :raise OSError: Files can't be written
+    """
+    profile = build_profile(profiler, program, duration)
+
+    with open(path, "w") as file:
+        file.write(format_report(profile))
+    with open(path + JSON_SUFFIX, "w") as file:
+        json.dump(profile, file, indent=2)
+        file.write("\n")
@@ -0,0 +1,320 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import codecs
+import gzip
+import hashlib
+import struct
+from typing import BinaryIO, List, Optional
+
+from interpreter.error import InvalidRecordingException
+from interpreter.streams import InputReader
+
+
+class Recording:
+    """
+    Log of one interpretation: hash of the program, results of READ instructions, produced output (with its encoding)
+    and exit code
+
+    The log is stored in a gzip-compressed file as a sequence of records: 1 byte of record type, 4 bytes of payload
+    length (big endian) and the payload.
+    """
+
+    MAGIC = b"IPPREC\x01"
+    """Header of the file with recording (format identification and version)"""
+
+    PROGRAM_HASH = b"P"
+    """Record type: SHA-256 hash of XML source code representation"""
+    READ_LINE = b"R"
+    """Record type: line returned to READ instruction (UTF-8)"""
+    END_OF_INPUT = b"E"
+    """Record type: end of input returned to READ instruction"""
+    OUTPUT = b"O"
+    """Record type: standard output of the program"""
+    OUTPUT_ENCODING = b"C"
+    """Record type: encoding of the standard output and handling of encoding errors (ASCII, separated by colon)"""
+    EXIT_CODE = b"X"
+    """Record type: exit code of the interpretation (32-bit signed integer, big endian)"""
+
+    def __init__(self, program_hash: bytes, reads: Optional[List[Optional[str]]] = None, output: bytes = b"",
+                 exit_code: int = 0, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        Class constructor
+
+        :param program_hash: SHA-256 hash of XML source code representation
+        :param reads: Lines returned to READ instructions (None for the end of input)
+        :param output: Standard output of the program
+        :param exit_code: Exit code of the interpretation
+        :param encoding: Encoding of the standard output
+        :param errors: Handling of encoding errors of the standard output (see str.encode())
+        """
+        self.__program_hash = program_hash
+        self.__reads = reads if reads is not None else []
+        self.__output = output
+        self.__exit_code = exit_code
+        self.__encoding = codecs.lookup(encoding).name
+        self.__errors = errors
+
+    @property
+    def program_hash(self) -> bytes:
+        """
+        Getter for program hash
+
+        :return: SHA-256 hash of XML source code representation
+        """
+        return self.__program_hash
+
+    @property
+    def reads(self) -> List[Optional[str]]:
+        """
+        Getter for recorded inputs
+
+        :return: Lines returned to READ instructions (None for the end of input)
+        """
+        return self.__reads
+
+    @property
+    def output(self) -> bytes:
+        """
+        Getter for recorded output
+
+        :return: Standard output of the program
+        """
+        return self.__output
+
+    @property
+    def exit_code(self) -> int:
+        """
+        Getter for recorded exit code
+
+        :return: Exit code of the interpretation
+        """
+        return self.__exit_code
+
+    @property
+    def encoding(self) -> str:
+        """
+        Getter for encoding of recorded output
+
+        :return: Normalized name of the encoding of the standard output
+        """
+        return self.__encoding
+
+    @property
+    def errors(self) -> str:
+        """
+        Getter for handling of encoding errors of recorded output
+
+        :return: Handling of encoding errors (see str.encode())
+        """
+        return self.__errors
+
+    @staticmethod
+    def hash_program(source: bytes) -> bytes:
+        """
+        Computes hash identifying the program
+
+        :param source: XML source code representation
+        :return: SHA-256 hash of the source
+        """
+        return hashlib.sha256(source).digest()
+
+    def save(self, recording_file: str) -> None:
+        """
+        Saves the recording to a file
+
+        :param recording_file: Path to the file
+        """
+        with gzip.open(recording_file, "wb") as file:
+            file.write(self.MAGIC)
+
+            self.__write_record(file, self.PROGRAM_HASH, self.program_hash)
+            for line in self.reads:
+                if line is None:
+                    self.__write_record(file, self.END_OF_INPUT, b"")
+                else:
+                    # Lines from standard input could contain escaped undecodable bytes
+                    self.__write_record(file, self.READ_LINE, line.encode("utf-8", "surrogatepass"))
+            self.__write_record(file, self.OUTPUT_ENCODING, f"{self.encoding}:{self.errors}".encode("ascii"))
+            self.__write_record(file, self.OUTPUT, self.output)
+            self.__write_record(file, self.EXIT_CODE, struct.pack(">i", self.exit_code))
+
+    @classmethod
+    def load(cls, recording_file: str) -> 'Recording':
+        """
+        Loads the recording from a file
+
+        :param recording_file: Path to the file
+        :return: Loaded recording
+        :raise InvalidRecordingException: File doesn't contain valid recording
+        """
+        try:
+            with gzip.open(recording_file, "rb") as file:
+                if file.read(len(cls.MAGIC)) != cls.MAGIC:
+                    raise InvalidRecordingException("File doesn't contain a recording")
+
+                program_hash = b""
+                reads: List[Optional[str]] = []
+                output = bytearray()
+                exit_code = 0
+                # Recordings without the encoding record have been made with UTF-8 output
+                encoding, errors = "utf-8", "strict"
+                while True:
+                    header = file.read(5)
+                    if not header:
+                        break
+                    if len(header) != 5:
+                        raise InvalidRecordingException("Recording is truncated")
+
+                    record_type, length = header[:1], struct.unpack(">I", header[1:])[0]
+                    payload = file.read(length)
+                    if len(payload) != length:
+                        raise InvalidRecordingException("Recording is truncated")
+
+                    if record_type == cls.PROGRAM_HASH:
+                        program_hash = payload
+                    elif record_type == cls.READ_LINE:
+                        reads.append(payload.decode("utf-8", "surrogatepass"))
+                    elif record_type == cls.END_OF_INPUT:
+                        reads.append(None)
+                    elif record_type == cls.OUTPUT_ENCODING:
+                        encoding, _, errors = payload.decode("ascii").partition(":")
+                        codecs.lookup(encoding)
+                    elif record_type == cls.OUTPUT:
+                        output += payload
+                    elif record_type == cls.EXIT_CODE:
+                        exit_code = struct.unpack(">i", payload)[0]
+                    else:
+                        raise InvalidRecordingException("Unknown record type in the recording")
+        except (OSError, EOFError, UnicodeDecodeError, LookupError, struct.error):
+            raise InvalidRecordingException("Recording couldn't been read")
+
+        return cls(program_hash, reads, bytes(output), exit_code, encoding, errors or "strict")
+
+    @staticmethod
+    def __write_record(file: BinaryIO, record_type: bytes, payload: bytes) -> None:
+        """
+        Writes a record to the file
+
+        :param file: Opened file with the recording
+        :param record_type: Type of the record
+        :param payload: Data of the record
+        """
+        file.write(record_type + struct.pack(">I", len(payload)))
+        file.write(payload)
+
+
+class RecordingInputReader(InputReader):
+    """Input reader storing all lines read from another reader"""
+
+    def __init__(self, input_reader: InputReader):
+        """
+        Class constructor
+
+        :param input_reader: Reader providing the lines
+        """
+        self.__input_reader = input_reader
+        self.__reads: List[Optional[str]] = []
+
+    @property
+    def reads(self) -> List[Optional[str]]:
+        """
+        Getter for read lines
+
+        :return: All lines returned so far (None for the end of input)
+        """
+        return self.__reads
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        :raise UnicodeDecodeError: Line can't be decoded
+        """
+        line = self.__input_reader.read_line()
+        self.__reads.append(line)
+
+        return line
+
+    def close(self) -> None:
+        """Releases resources held by the reader"""
+        self.__input_reader.close()
+
+
+class ReplayInputReader(InputReader):
+    """Input reader returning lines from a recording (without any I/O)"""
+
+    def __init__(self, reads: List[Optional[str]]):
+        """
+        Class constructor
+
+        :param reads: Recorded lines (None for the end of input)
+        """
+        self.__reads = reads
+        self.__position = 0
+        self.__overrun = False
+
+    @property
+    def diverged(self) -> bool:
+        """
+        Checks if the replayed program read different number of lines than the recorded one
+
+        :return: True if too many or too few lines have been read
+        """
+        return self.__overrun or self.__position != len(self.__reads)
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Recorded line or None if there are no more lines (end of input)
+        """
+        if self.__position == len(self.__reads):
+            self.__overrun = True
+
+            return None
+
+        line = self.__reads[self.__position]
+        self.__position += 1
+
+        return line
+
+
+class TeeStream:
+    """Binary stream copying all written data into memory"""
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Class constructor
+
+        :param stream: Stream where to write data to
+        """
+        self.__stream = stream
+        self.__copy = bytearray()
+
+    @property
+    def copy(self) -> bytes:
+        """
+        Getter for copy of written data
+
+        :return: All data written so far
+        """
+        return bytes(self.__copy)
+
+    def write(self, data: bytes) -> int:
+        """
+        Writes data to the stream
+
+        :param data: Data to write
+        :return: Number of written bytes
+        """
+        self.__copy += data
+
+        return self.__stream.write(data)
+
+    def flush(self) -> None:
+        """Flushes the stream"""
+        self.__stream.flush()
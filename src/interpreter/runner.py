@@ -0,0 +1,268 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import locale
+from io import BytesIO, StringIO
+from typing import Callable, List, Optional, Tuple, TextIO, TYPE_CHECKING
+from xml.etree.ElementTree import ElementTree
+
+from interpreter.code import Program
+from interpreter.interpretation import Loader, Interpreter
+from interpreter.streams import OutputSink, InputReader
+from interpreter.error import ExitCode, BadInstructionOrderException, BadXmlStructureException, \
+    XmlParsingErrorException, InvalidDataTypeException, NonExistingVarException, GetValueFromNotInitVarException, \
+    UsingUndefinedMemoryFrameException, MissingInstructionArgException, TooFewInstructionArgsException, \
+    ZeroDivisionException, ExitValueOutOfRangeException, EmptyLocalMemoryException, UsingUndefinedLabelException, \
+    PopEmptyStackException, InvalidAsciiPositionException, IndexingOutsideStringException, \
+    VariableRedefinitionException, InvalidInstructionOpCode, InvalidInstructionArgumentValueException, \
+    DuplicateLabelException, InstructionLimitExceededException, InterpretationTimeoutException, \
+    InterpretationInterruptedException
+
+if TYPE_CHECKING:
+    from interpreter.hooks import ExecutionHook
+    from interpreter.memoization import Memoizer
+
+
+class RunResult:
+    """Result of interpretation done in memory (without any I/O)"""
+
+    def __init__(self, exit_code: int, stdout: bytes, stderr: bytes, executed_instructions: int = 0,
+                 limit_exceeded: bool = False, peak_data_stack: int = 0, peak_call_stack: int = 0):
+        """
+        Class constructor
+
+        :param exit_code: Exit code of the interpretation (the same as the exit code of interpret.py)
+        :param stdout: Standard output of the program
+        :param stderr: Standard error output of the program (and error report for internal errors)
+        :param executed_instructions: Number of executed instructions
+        :param limit_exceeded: Has been the interpretation stopped because of the instruction limit?
+        :param peak_data_stack: Maximum number of values in the data stack
+        :param peak_call_stack: Maximum depth of nested calls
+        """
+        self.__exit_code = exit_code
+        self.__stdout = stdout
+        self.__stderr = stderr
+        self.__executed_instructions = executed_instructions
+        self.__limit_exceeded = limit_exceeded
+        self.__peak_data_stack = peak_data_stack
+        self.__peak_call_stack = peak_call_stack
+
+    @property
+    def exit_code(self) -> int:
+        """
+        Getter for exit code
+
+        :return: Exit code of the interpretation
+        """
+        return self.__exit_code
+
+    @property
+    def stdout(self) -> bytes:
+        """
+        Getter for standard output
+
+        :return: Standard output of the program
+        """
+        return self.__stdout
+
+    @property
+    def stderr(self) -> bytes:
+        """
+        Getter for standard error output
+
+        :return: Standard error output of the program
+        """
+        return self.__stderr
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of executed instructions
+        """
+        return self.__executed_instructions
+
+    @property
+    def limit_exceeded(self) -> bool:
+        """
+        Getter for exceeding of instruction limit
+
+        :return: Has been the interpretation stopped because of the instruction limit?
+        """
+        return self.__limit_exceeded
+
+    @property
+    def peak_data_stack(self) -> int:
+        """
+        Getter for peak size of the data stack
+
+        :return: Maximum number of values in the data stack
+        """
+        return self.__peak_data_stack
+
+    @property
+    def peak_call_stack(self) -> int:
+        """
+        Getter for peak depth of the call stack
+
+        :return: Maximum depth of nested calls
+        """
+        return self.__peak_call_stack
+
+
+def load_program(loader: Loader, error_stream: Optional[TextIO] = None) -> Tuple[Optional[Program], int]:
+    """
+    Loads the program
+
+    :param loader: Loader of the program
+    :param error_stream: Stream for reports of internal errors or None for sys.stderr
+    :return: Loaded program (None if it couldn't been loaded) and exit code
+    """
+    # For unexpected errors (primarily for debugging):
+    # noinspection PyBroadException
+    try:
+        return loader.load_program(), ExitCode.SUCCESS
+    except (BadInstructionOrderException, BadXmlStructureException, InvalidInstructionOpCode):
+        return None, ExitCode.BAD_XML_STRUCTURE
+    except XmlParsingErrorException:
+        return None, ExitCode.NOT_WELL_FORMED_XML
+    except InvalidInstructionArgumentValueException:
+        return None, ExitCode.BAD_OPERAND_VALUE
+    except DuplicateLabelException:
+        return None, ExitCode.SEMANTIC_ERROR
+    except Exception:
+        import traceback
+
+        traceback.print_exc(file=error_stream)
+
+        # For unexpected errors (primarily for debugging)
+        return None, ExitCode.INTERNAL_ERROR
+
+
+def run_program(interpreter: Interpreter, program: Program, error_stream: Optional[TextIO] = None,
+                time_limit: Optional[float] = None, after_slice: Optional[Callable[[], None]] = None,
+                quota: int = Interpreter.DEFAULT_QUOTA) -> int:
+    """
+    Interprets the program
+
+    :param interpreter: Interpreter to use
+    :param program: Loaded program
+    :param error_stream: Stream for reports of internal errors or None for sys.stderr
+    :param time_limit: Time limit of the interpretation in seconds or None for no limit (it is checked between
+        slices of instructions, so it works without signals, e.g. in threads)
+    :param after_slice: Function called after every slice of instructions (outputs are flushed then) or None
+    :param quota: Number of instructions in one slice (used only with time_limit or after_slice)
+    :return: Exit code
+    :raise InstructionLimitExceededException: Too many executed instructions
+    :raise InterpretationTimeoutException: Time limit exceeded
+    :raise InterpretationInterruptedException: Interpretation stopped by after_slice
+    """
+    try:
+        if time_limit is None and after_slice is None:
+            return interpreter.run(program)
+
+        import time
+
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        while not interpreter.run_slice(program, quota):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise InterpretationTimeoutException("Time limit of interpretation exceeded")
+            if after_slice is not None:
+                after_slice()
+
+        return interpreter.exit_code
+    except (InstructionLimitExceededException, InterpretationTimeoutException, InterpretationInterruptedException):
+        # Not an error of the program, the caller decides what to do
+        raise
+    except Exception as e:
+        return runtime_error_exit_code(e, error_stream)
+
+
+def runtime_error_exit_code(error: Exception, error_stream: Optional[TextIO] = None) -> int:
+    """
+    Converts error raised by interpretation to exit code
+
+    :param error: Error raised by the interpreter
+    :param error_stream: Stream for reports of internal errors or None for sys.stderr
+    :return: Exit code
+    """
+    if isinstance(error, InvalidDataTypeException):
+        return ExitCode.BAD_OPERAND_TYPES
+    elif isinstance(error, (MissingInstructionArgException, TooFewInstructionArgsException,
+                            InvalidInstructionArgumentValueException)):
+        return ExitCode.BAD_XML_STRUCTURE
+    elif isinstance(error, NonExistingVarException):
+        return ExitCode.NON_EXISTING_VARIABLE
+    elif isinstance(error, GetValueFromNotInitVarException):
+        return ExitCode.MISSING_VALUE
+    elif isinstance(error, (UsingUndefinedMemoryFrameException, EmptyLocalMemoryException)):
+        return ExitCode.NON_EXISTING_FRAME
+    elif isinstance(error, (ZeroDivisionException, ExitValueOutOfRangeException)):
+        return ExitCode.BAD_OPERAND_VALUE
+    elif isinstance(error, UsingUndefinedLabelException):
+        return ExitCode.SEMANTIC_ERROR
+    elif isinstance(error, PopEmptyStackException):
+        return ExitCode.MISSING_VALUE
+    elif isinstance(error, (InvalidAsciiPositionException, IndexingOutsideStringException)):
+        return ExitCode.BAD_STRING_USAGE
+    elif isinstance(error, VariableRedefinitionException):
+        return ExitCode.SEMANTIC_ERROR
+
+    # For unexpected errors (primarily for debugging)
+    import traceback
+
+    traceback.print_exception(type(error), error, error.__traceback__, file=error_stream)
+
+    return ExitCode.INTERNAL_ERROR
+
+
+def load_program_from_bytes(source: bytes) -> Tuple[Optional[Program], int, bytes]:
+    """
+    Loads the program from XML source code representation stored in memory
+
+    :param source: XML source code representation
+    :return: Loaded program (None if it couldn't been loaded), exit code and error report (for internal errors)
+    """
+    error_stream = StringIO()
+    program, exit_code = load_program(Loader(ElementTree(), BytesIO(source)), error_stream)
+
+    return program, exit_code, error_stream.getvalue().encode(locale.getpreferredencoding(False), "backslashreplace")
+
+
+def run_in_memory(program: Program, input_data: bytes, instruction_limit: Optional[int] = None,
+                  time_limit: Optional[float] = None, memoizer: Optional['Memoizer'] = None,
+                  hooks: Optional[List['ExecutionHook']] = None) -> RunResult:
+    """
+    Interprets the program with inputs and outputs stored in memory
+
+    Inputs are decoded like a file entered by --input, outputs are encoded like standard outputs redirected to files,
+    so the result is the same as the result of interpret.py.
+
+    :param program: Loaded program (it isn't modified, so it can be shared by more interpretations)
+    :param input_data: Content of the file with inputs
+    :param instruction_limit: Maximum number of executed instructions or None for no limit
+    :param time_limit: Time limit of the interpretation in seconds or None for no limit
+    :param memoizer: Store of results of pure subroutines (created for the program) or None for no memoization
+    :param hooks: Execution hooks or None
+    :return: Result of the interpretation
+    :raise InterpretationTimeoutException: Time limit exceeded (by time_limit or raised by caller's signal handler)
+    """
+    encoding = locale.getpreferredencoding(False)
+    stdout, stderr, error_stream = BytesIO(), BytesIO(), StringIO()
+    interpreter = Interpreter(InputReader.for_bytes(input_data), OutputSink(stdout, encoding),
+                              OutputSink(stderr, encoding, "backslashreplace"), instruction_limit, memoizer, hooks)
+
+    try:
+        exit_code = run_program(interpreter, program, error_stream, time_limit)
+        limit_exceeded = False
+    except InstructionLimitExceededException:
+        exit_code = ExitCode.INTERNAL_ERROR
+        limit_exceeded = True
+
+    return RunResult(exit_code, stdout.getvalue(),
+                     stderr.getvalue() + error_stream.getvalue().encode(encoding, "backslashreplace"),
+                     interpreter.executed_instructions, limit_exceeded, interpreter.data_stack.peak_size,
+                     interpreter.call_stack.peak_size)
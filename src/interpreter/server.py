@@ -0,0 +1,445 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import hashlib
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from socketserver import ThreadingMixIn, UnixStreamServer, StreamRequestHandler
+from typing import BinaryIO, Optional, Tuple
+
+from interpreter.code import Program
+from interpreter.error import InvalidServerMessageException
+from interpreter.metrics import Metrics
+from interpreter.runner import RunResult, load_program_from_bytes, run_in_memory
+
+# Protocol
+# ========
+# Every message is a frame: 4 bytes of payload length (unsigned, big endian) and the payload. All numbers in payloads
+# are big endian, byte strings are prefixed by their length (4 bytes, unsigned).
+#
+# Request payload:
+#   1 byte      kind of program: "X" (XML source code representation) or "H" (SHA-256 hash of XML source code
+#               representation sent before, saves parsing and transfer of the same program)
+#   string      XML source code representation or its hash
+#   string      content of the file with inputs (like --input)
+#   8 bytes     maximum number of executed instructions (unsigned, 0 means no limit)
+#
+# Response payload:
+#   1 byte      status (see STATUS_* constants)
+#   4 bytes     exit code (signed, the same as exit code of interpret.py)
+#   32 bytes    SHA-256 hash of XML source code representation (can be used in next requests)
+#   string      standard output of the program
+#   string      standard error output of the program
+
+PROGRAM_XML = b"X"
+"""Kind of program in request: XML source code representation"""
+PROGRAM_HASH = b"H"
+"""Kind of program in request: hash of XML source code representation"""
+
+STATUS_OK = 0
+"""Response status: interpretation has finished (successfully or with an error given by exit code)"""
+STATUS_UNKNOWN_PROGRAM = 1
+"""Response status: program with the hash isn't cached (the request must be repeated with XML)"""
+STATUS_LIMIT_EXCEEDED = 2
+"""Response status: interpretation has been stopped because of the instruction limit"""
+STATUS_BAD_REQUEST = 3
+"""Response status: request couldn't been decoded"""
+
+HASH_SIZE = 32
+"""Size of program hash in bytes"""
+
+
+class ProgramCache:
+    """LRU cache of loaded programs with limited (estimated) memory usage, shared by all server threads"""
+
+    def __init__(self, max_size: int):
+        """
+        Class constructor
+
+        :param max_size: Maximum estimated size of cached programs in bytes
+        """
+        self.__max_size = max_size
+        self.__size = 0
+        self.__programs: 'OrderedDict[bytes, Tuple[Program, int]]' = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """
+        Getter for size of the cache
+
+        :return: Estimated size of cached programs in bytes
+        """
+        return self.__size
+
+    def get(self, program_hash: bytes) -> Optional[Program]:
+        """
+        Gets a program from the cache (it becomes the most recently used one)
+
+        :param program_hash: Hash of XML source code representation
+        :return: Cached program or None if the program isn't cached
+        """
+        with self.__lock:
+            if program_hash not in self.__programs:
+                return None
+
+            self.__programs.move_to_end(program_hash)
+
+            return self.__programs[program_hash][0]
+
+    def put(self, program_hash: bytes, program: Program) -> None:
+        """
+        Stores a program into the cache (the least recently used programs are dropped when the cache is full)
+
+        :param program_hash: Hash of XML source code representation
+        :param program: Loaded program
+        """
+        program_size = estimate_program_size(program)
+        if program_size > self.__max_size:
+            return
+
+        with self.__lock:
+            if program_hash in self.__programs:
+                return
+
+            self.__programs[program_hash] = (program, program_size)
+            self.__size += program_size
+
+            while self.__size > self.__max_size:
+                _, (_, dropped_size) = self.__programs.popitem(last=False)
+                self.__size -= dropped_size
+
+
+class InterpreterServer(ThreadingMixIn, UnixStreamServer):
+    """Long-lived interpreter listening on a Unix socket (every connection is handled by its own thread)"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, cache_size: int, metrics: Optional[Metrics] = None):
+        """
+        Class constructor
+
+        :param socket_path: Path to the Unix socket (stale socket from previous run is removed)
+        :param cache_size: Maximum estimated size of cached programs in bytes
+        :param metrics: Metrics updated after every run or None
+        """
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)
+
+        self.__socket_path = socket_path
+        self.__cache = ProgramCache(cache_size)
+        self.__metrics = metrics
+
+        super().__init__(socket_path, RequestHandler)
+
+    @property
+    def cache(self) -> ProgramCache:
+        """
+        Getter for program cache
+
+        :return: Cache of loaded programs
+        """
+        return self.__cache
+
+    def server_close(self) -> None:
+        """Closes the server and removes its socket"""
+        super().server_close()
+
+        if os.path.exists(self.__socket_path):
+            os.unlink(self.__socket_path)
+
+    def handle_request_payload(self, payload: bytes) -> bytes:
+        """
+        Handles one request
+
+        :param payload: Payload of the request
+        :return: Payload of the response
+        """
+        try:
+            kind, program_data, input_data, instruction_limit = decode_request(payload)
+        except InvalidServerMessageException as e:
+            return encode_response(STATUS_BAD_REQUEST, 0, bytes(HASH_SIZE), b"", str(e).encode())
+
+        if kind == PROGRAM_HASH:
+            program_hash = program_data
+            program = self.__cache.get(program_hash)
+            if program is None:
+                return encode_response(STATUS_UNKNOWN_PROGRAM, 0, program_hash, b"", b"")
+        else:
+            program_hash = hashlib.sha256(program_data).digest()
+            program = self.__cache.get(program_hash)
+            if program is None:
+                start = time.perf_counter()
+                program, exit_code, error_report = load_program_from_bytes(program_data)
+                if self.__metrics is not None:
+                    self.__metrics.program_loaded(time.perf_counter() - start)
+                if program is None:
+                    if self.__metrics is not None:
+                        self.__metrics.run_started()
+                        self.__metrics.run_finished(RunResult(exit_code, b"", error_report), 0.0, len(input_data))
+
+                    return encode_response(STATUS_OK, exit_code, program_hash, b"", error_report)
+
+                self.__cache.put(program_hash, program)
+
+        if self.__metrics is not None:
+            self.__metrics.run_started()
+        start = time.perf_counter()
+
+        # Every run has its own memory and stacks, the program is only read
+        result = run_in_memory(program, input_data, instruction_limit if instruction_limit > 0 else None)
+        status = STATUS_LIMIT_EXCEEDED if result.limit_exceeded else STATUS_OK
+        if self.__metrics is not None:
+            self.__metrics.run_finished(result, time.perf_counter() - start, len(input_data))
+
+        return encode_response(status, result.exit_code, program_hash, result.stdout, result.stderr)
+
+
+class RequestHandler(StreamRequestHandler):
+    """Handler of one client connection (the client can send more requests one by one)"""
+
+    def handle(self) -> None:
+        """Handles requests until the client closes the connection"""
+        while True:
+            try:
+                payload = read_frame(self.rfile)
+            except InvalidServerMessageException:
+                return
+            if payload is None:
+                return
+
+            # noinspection PyUnresolvedReferences
+            write_frame(self.wfile, self.server.handle_request_payload(payload))
+
+
+class ServerClient:
+    """Client of interpreter server"""
+
+    def __init__(self, socket_path: str):
+        """
+        Class constructor
+
+        :param socket_path: Path to the server's Unix socket
+        """
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.connect(socket_path)
+        self.__reader = self.__socket.makefile("rb")
+        self.__writer = self.__socket.makefile("wb")
+
+    def run(self, source: bytes, input_data: bytes = b"", instruction_limit: int = 0) -> Tuple[int, RunResult]:
+        """
+        Interprets a program on the server (only its hash is sent if the server has it cached)
+
+        :param source: XML source code representation
+        :param input_data: Content of the file with inputs
+        :param instruction_limit: Maximum number of executed instructions (0 means no limit)
+        :return: Response status and result of the interpretation
+        :raise InvalidServerMessageException: Server has closed the connection or sent invalid response
+        """
+        program_hash = hashlib.sha256(source).digest()
+        status, result, _ = self.request(PROGRAM_HASH, program_hash, input_data, instruction_limit)
+        if status == STATUS_UNKNOWN_PROGRAM:
+            status, result, _ = self.request(PROGRAM_XML, source, input_data, instruction_limit)
+
+        return status, result
+
+    def request(self, kind: bytes, program_data: bytes, input_data: bytes,
+                instruction_limit: int) -> Tuple[int, RunResult, bytes]:
+        """
+        Sends one request to the server
+
+        :param kind: Kind of program (PROGRAM_XML or PROGRAM_HASH)
+        :param program_data: XML source code representation or its hash
+        :param input_data: Content of the file with inputs
+        :param instruction_limit: Maximum number of executed instructions (0 means no limit)
+        :return: Response status, result of the interpretation and hash of the program
+        :raise InvalidServerMessageException: Server has closed the connection or sent invalid response
+        """
+        write_frame(self.__writer, encode_request(kind, program_data, input_data, instruction_limit))
+
+        payload = read_frame(self.__reader)
+        if payload is None:
+            raise InvalidServerMessageException("Server has closed the connection")
+
+        return decode_response(payload)
+
+    def close(self) -> None:
+        """Closes the connection"""
+        self.__reader.close()
+        self.__writer.close()
+        self.__socket.close()
+
+
+def read_frame(stream: BinaryIO) -> Optional[bytes]:
+    """
+    Reads one frame from the stream
+
+    :param stream: Binary stream
+    :return: Payload of the frame or None if the stream has been closed before the frame
+    :raise InvalidServerMessageException: Stream has been closed inside the frame
+    """
+    header = stream.read(4)
+    if not header:
+        return None
+    if len(header) != 4:
+        raise InvalidServerMessageException("Incomplete frame header")
+
+    length = struct.unpack(">I", header)[0]
+    payload = stream.read(length)
+    if len(payload) != length:
+        raise InvalidServerMessageException("Incomplete frame payload")
+
+    return payload
+
+
+def write_frame(stream: BinaryIO, payload: bytes) -> None:
+    """
+    Writes one frame to the stream
+
+    :param stream: Binary stream
+    :param payload: Payload of the frame
+    """
+    stream.write(struct.pack(">I", len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+
+def encode_request(kind: bytes, program_data: bytes, input_data: bytes, instruction_limit: int) -> bytes:
+    """
+    Encodes request payload
+
+    :param kind: Kind of program (PROGRAM_XML or PROGRAM_HASH)
+    :param program_data: XML source code representation or its hash
+    :param input_data: Content of the file with inputs
+    :param instruction_limit: Maximum number of executed instructions (0 means no limit)
+    :return: Payload of the request
+    """
+    return b"".join((
+        kind,
+        struct.pack(">I", len(program_data)), program_data,
+        struct.pack(">I", len(input_data)), input_data,
+        struct.pack(">Q", instruction_limit)
+    ))
+
+
+def decode_request(payload: bytes) -> Tuple[bytes, bytes, bytes, int]:
+    """
+    Decodes request payload
+
+    :param payload: Payload of the request
+    :return: Kind of program, XML source code representation or its hash, content of the file with inputs
+        and instruction limit
+    :raise InvalidServerMessageException: Payload isn't a valid request
+    """
+    try:
+        kind = payload[:1]
+        program_data, position = unpack_string(payload, 1)
+        input_data, position = unpack_string(payload, position)
+        instruction_limit = struct.unpack_from(">Q", payload, position)[0]
+    except struct.error:
+        raise InvalidServerMessageException("Request is truncated")
+
+    if kind not in (PROGRAM_XML, PROGRAM_HASH):
+        raise InvalidServerMessageException("Unknown kind of program")
+    if kind == PROGRAM_HASH and len(program_data) != HASH_SIZE:
+        raise InvalidServerMessageException("Invalid program hash")
+
+    return kind, program_data, input_data, instruction_limit
+
+
+def encode_response(status: int, exit_code: int, program_hash: bytes, stdout: bytes, stderr: bytes) -> bytes:
+    """
+    Encodes response payload
+
+    :param status: Status of the response
+    :param exit_code: Exit code of the interpretation
+    :param program_hash: Hash of XML source code representation
+    :param stdout: Standard output of the program
+    :param stderr: Standard error output of the program
+    :return: Payload of the response
+    """
+    return b"".join((
+        struct.pack(">Bi", status, exit_code), program_hash,
+        struct.pack(">I", len(stdout)), stdout,
+        struct.pack(">I", len(stderr)), stderr
+    ))
+
+
+def decode_response(payload: bytes) -> Tuple[int, RunResult, bytes]:
+    """
+    Decodes response payload
+
+    :param payload: Payload of the response
+    :return: Status, result of the interpretation and hash of the program
+    :raise InvalidServerMessageException: Payload isn't a valid response
+    """
+    try:
+        status, exit_code = struct.unpack_from(">Bi", payload)
+        program_hash = payload[5:5 + HASH_SIZE]
+        stdout, position = unpack_string(payload, 5 + HASH_SIZE)
+        stderr, position = unpack_string(payload, position)
+    except struct.error:
+        raise InvalidServerMessageException("Response is truncated")
+
+    return status, RunResult(exit_code, stdout, stderr, limit_exceeded=status == STATUS_LIMIT_EXCEEDED), program_hash
+
+
+def unpack_string(payload: bytes, position: int) -> Tuple[bytes, int]:
+    """
+    Unpacks byte string prefixed by its length
+
+    :param payload: Payload containing the string
+    :param position: Position of the string's length
+    :return: Unpacked string and position behind it
+    :raise struct.error: Payload is truncated
+    """
+    length = struct.unpack_from(">I", payload, position)[0]
+    position += 4
+    if position + length > len(payload):
+        raise struct.error("String exceeds the payload")
+
+    return payload[position:position + length], position + length
+
+
+def estimate_program_size(program: Program) -> int:
+    """
+    Estimates memory occupied by the loaded program
+
+    :param program: Loaded program
+    :return: Estimated size in bytes
+    """
+    size = sys.getsizeof(program) + sys.getsizeof(program.instructions)
+    for instruction in program.instructions:
+        size += sys.getsizeof(instruction) + sys.getsizeof(instruction.args)
+        for argument in instruction.args.values():
+            size += sys.getsizeof(argument) + sys.getsizeof(argument.raw_value)
+
+    return size
+
+
+def serve(socket_path: str, cache_size: int, metrics: Optional[Metrics] = None) -> None:
+    """
+    Runs the server until it is interrupted (SIGINT or SIGTERM)
+
+    :param socket_path: Path to the Unix socket
+    :param cache_size: Maximum estimated size of cached programs in bytes
+    :param metrics: Metrics updated after every run or None
+    """
+    # Both signals stop the server in the same way (background processes could have SIGINT ignored)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with InterpreterServer(socket_path, cache_size, metrics) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
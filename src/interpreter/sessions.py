@@ -0,0 +1,200 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import asyncio
+import locale
+from io import BytesIO, StringIO
+from typing import Optional
+
+from interpreter.code import Program
+from interpreter.error import InstructionLimitExceededException, InterpretationTimeoutException, \
+    InterpretationInterruptedException
+from interpreter.interpretation import Interpreter
+from interpreter.runner import runtime_error_exit_code
+from interpreter.streams import AsyncInputReader, OutputSink
+
+
+class StreamWriterAdapter:
+    """Binary stream writing into asyncio stream writer (for usage by OutputSink)"""
+
+    def __init__(self, writer):
+        """
+        Class constructor
+
+        :param writer: Asyncio stream writer (asyncio.StreamWriter or object with the same write() method)
+        """
+        self.__writer = writer
+
+    def write(self, data: bytes) -> int:
+        """
+        Writes data to the writer's buffer (sending is done by the event loop)
+
+        :param data: Data to write
+        :return: Number of written bytes
+        """
+        self.__writer.write(bytes(data))
+
+        return len(data)
+
+    def flush(self) -> None:
+        """Does nothing (asyncio writers are drained asynchronously)"""
+        pass
+
+
+class Session:
+    """One interpretation running in asyncio event loop (all its state is stored in the instance)"""
+
+    def __init__(self, program: Program, reader, writer, quota: int = Interpreter.DEFAULT_QUOTA,
+                 instruction_limit: Optional[int] = None):
+        """
+        Class constructor
+
+        :param program: Loaded program (it is only read, so more sessions can share it)
+        :param reader: Asyncio stream with inputs of the program
+        :param writer: Asyncio stream writer for standard output of the program
+        :param quota: Number of instructions executed before giving control to other sessions
+        :param instruction_limit: Maximum number of executed instructions or None for no limit
+        """
+        self.__program = program
+        self.__writer = writer
+        self.__quota = quota
+        self.__encoding = locale.getpreferredencoding(False)
+        self.__stderr = BytesIO()
+        self.__error_report = StringIO()
+
+        # Outputs are passed to the writer after every line, so clients get them while the program waits for input
+        stdout = OutputSink(StreamWriterAdapter(writer), self.__encoding, line_buffered=True)
+        self.__interpreter = Interpreter(AsyncInputReader(reader, self.__encoding), stdout,
+                                         OutputSink(self.__stderr, self.__encoding, "backslashreplace"),
+                                         instruction_limit)
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of instructions executed so far
+        """
+        return self.__interpreter.executed_instructions
+
+    @property
+    def stderr(self) -> bytes:
+        """
+        Getter for standard error output of the program
+
+        :return: Standard error output (and report of internal error)
+        """
+        return self.__stderr.getvalue() + self.__error_report.getvalue().encode(self.__encoding, "backslashreplace")
+
+    async def run(self) -> int:
+        """
+        Runs the interpretation
+
+        :return: Exit code (the same as exit code of interpret.py)
+        :raise InstructionLimitExceededException: Too many executed instructions
+        :raise InterpretationTimeoutException: Time limit exceeded (raised by caller's signal handler)
+        :raise InterpretationInterruptedException: Interpretation stopped by the caller
+        """
+        try:
+            return await self.__interpreter.run_async(self.__program, self.__quota)
+        except (InstructionLimitExceededException, InterpretationTimeoutException, InterpretationInterruptedException):
+            # Not an error of the program, the caller decides what to do
+            raise
+        except Exception as e:
+            return runtime_error_exit_code(e, self.__error_report)
+        finally:
+            drain = getattr(self.__writer, "drain", None)
+            if drain is not None:
+                await drain()
+
+
+class SessionScheduler:
+    """
+    Runner of many concurrent sessions in one process
+
+    Every session gives control back after its instruction quota (or when it waits for input). Asyncio runs ready
+    tasks in FIFO order, so CPU time is shared round-robin in slices of the quotas.
+    """
+
+    def __init__(self, quota: int = Interpreter.DEFAULT_QUOTA, max_sessions: Optional[int] = None):
+        """
+        Class constructor
+
+        :param quota: Default instruction quota of sessions
+        :param max_sessions: Maximum number of sessions running at the same time (others wait) or None for no limit
+        """
+        self.__quota = quota
+        self.__max_sessions = max_sessions
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__executed_instructions = 0
+        self.__finished_sessions = 0
+
+    @property
+    def executed_instructions(self) -> int:
+        """
+        Getter for number of executed instructions
+
+        :return: Number of instructions executed by all finished sessions
+        """
+        return self.__executed_instructions
+
+    @property
+    def finished_sessions(self) -> int:
+        """
+        Getter for number of finished sessions
+
+        :return: Number of sessions that have already ended
+        """
+        return self.__finished_sessions
+
+    async def run_session(self, program: Program, reader, writer, quota: Optional[int] = None,
+                          instruction_limit: Optional[int] = None) -> int:
+        """
+        Runs one session
+
+        :param program: Loaded program
+        :param reader: Asyncio stream with inputs of the program
+        :param writer: Asyncio stream writer for standard output of the program
+        :param quota: Instruction quota of the session or None for default one (bigger quota means bigger share of CPU)
+        :param instruction_limit: Maximum number of executed instructions or None for no limit
+        :return: Exit code
+        :raise InstructionLimitExceededException: Too many executed instructions
+        :raise InterpretationTimeoutException: Time limit exceeded (raised by caller's signal handler)
+        :raise InterpretationInterruptedException: Interpretation stopped by the caller
+        """
+        session = Session(program, reader, writer, quota if quota is not None else self.__quota, instruction_limit)
+
+        # Semaphore must be created inside the running event loop
+        if self.__semaphore is None and self.__max_sessions is not None:
+            self.__semaphore = asyncio.Semaphore(self.__max_sessions)
+
+        if self.__semaphore is not None:
+            await self.__semaphore.acquire()
+        try:
+            return await session.run()
+        finally:
+            if self.__semaphore is not None:
+                self.__semaphore.release()
+
+            self.__executed_instructions += session.executed_instructions
+            self.__finished_sessions += 1
+
+    async def serve(self, program: Program, socket_path: str) -> None:
+        """
+        Runs the program for every client connected to Unix socket (client's data are inputs of the program, output
+        is sent back)
+
+        :param program: Loaded program
+        :param socket_path: Path to the Unix socket
+        """
+        async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await self.run_session(program, reader, writer)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(handle_client, socket_path)
+        async with server:
+            await server.serve_forever()
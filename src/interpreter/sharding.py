@@ -0,0 +1,215 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import mmap
+import os
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import ElementTree, Element, XMLParser, ParseError
+
+from interpreter.error import BadInstructionOrderException
+from interpreter.code import Program, Instruction, Argument, OpCode, ArgType
+from interpreter.interpretation import Loader
+
+# Instruction in compact form for transferring between processes: order, operation code and arguments
+# (number, type and raw value)
+PackedInstruction = Tuple[int, str, Tuple[Tuple[int, str, str], ...]]
+
+# Loaded shard: instructions in document order and the first error found in the shard (with order of the broken
+# instruction if it has been loaded before the error occurred)
+ShardResult = Tuple[List[PackedInstruction], Optional[Tuple[Optional[int], Exception]]]
+
+OP_CODES: Dict[str, OpCode] = {op_code.value: op_code for op_code in OpCode}
+ARG_TYPES: Dict[str, ArgType] = {arg_type.value: arg_type for arg_type in ArgType}
+
+
+class ShardedLoader:
+    """
+    Instruction loader parsing large XML files in a pool of processes
+
+    The file is split at instruction boundaries into shards. Every shard is wrapped into the original prolog and
+    program element, so it is a standalone XML document, which can be parsed independently. When the file can't be
+    split safely (it is too small, isn't well-formed, contains constructs spanning the boundaries, etc.), the ordinary
+    single-process loader is used, so errors are always reported in the same way.
+    """
+
+    MIN_SHARD_SIZE = 4 * 1024 * 1024
+    """Minimal size of the shard in bytes (smaller files are loaded by a single process)"""
+
+    def __init__(self, sources_file: str, jobs: int, min_shard_size: int = MIN_SHARD_SIZE):
+        """
+        Class constructor
+
+        :param sources_file: Path to file where to read XML source code representation from
+        :param jobs: Maximum number of processes used for parsing
+        :param min_shard_size: Minimal size of the shard in bytes
+        """
+        self.__sources_file = sources_file
+        self.__jobs = jobs
+        self.__min_shard_size = min_shard_size
+
+    def load_program(self) -> Program:
+        """
+        Loads a program from file with its XML representation
+
+        :return: Loaded program
+        :raise BadInstructionOrderException: Duplicate or negative instruction order
+        :raise BadXmlStructureException: Bad instruction location, missing attributes or values
+        :raise InvalidInstructionOpCode: Invalid instruction opcode
+        :raise InvalidInstructionArgumentValueException: Invalid instruction argument value
+        :raise DuplicateLabelException: Duplicate labels
+        """
+        file_size = os.path.getsize(self.__sources_file)
+        shard_count = min(self.__jobs, file_size // self.__min_shard_size)
+        if shard_count < 2:
+            return self.__load_sequentially()
+
+        with open(self.__sources_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            boundaries = self.__find_boundaries(data, shard_count)
+            if boundaries is None:
+                return self.__load_sequentially()
+
+            # Prolog with program element's start tag and the end tag are shared by all shards
+            head_end, tail_start = boundaries[0], boundaries[-1]
+            try:
+                xml_program = parse_document(data[:head_end] + data[tail_start:])
+            except ParseError:
+                return self.__load_sequentially()
+
+        # Process pool is expensive to import, so it is imported only when it is really used
+        from concurrent.futures import ProcessPoolExecutor
+
+        shard_ranges = list(zip(boundaries[:-1], boundaries[1:]))
+        with ProcessPoolExecutor(max_workers=len(shard_ranges)) as executor:
+            shard_results = list(executor.map(
+                load_shard,
+                [self.__sources_file] * len(shard_ranges),
+                [head_end] * len(shard_ranges),
+                [start for start, _ in shard_ranges],
+                [end for _, end in shard_ranges],
+                [tail_start] * len(shard_ranges)
+            ))
+
+        # Any shard that couldn't be parsed means the split is unusable (or the file is broken), single-process
+        # loader decides which of these cases it is
+        if any(result is None for result in shard_results):
+            return self.__load_sequentially()
+
+        Loader.check_program_element(xml_program)
+
+        return Program(self.__merge_shards(shard_results))
+
+    def __load_sequentially(self) -> Program:
+        """
+        Loads a program by the ordinary single-process loader
+
+        :return: Loaded program
+        """
+        return Loader(ElementTree(), self.__sources_file).load_program()
+
+    @staticmethod
+    def __find_boundaries(data: mmap.mmap, shard_count: int) -> Optional[List[int]]:
+        """
+        Finds positions where to split the file
+
+        :param data: Content of the file
+        :param shard_count: Wanted number of shards
+        :return: Start of the first instruction, starts of the shards and start of the program's end tag
+            or None if no instruction or end tag is available
+        """
+        first_instruction = data.find(b"<instruction")
+        program_end = data.rfind(b"</program")
+        if first_instruction == -1 or program_end < first_instruction:
+            return None
+
+        boundaries = [first_instruction]
+        shard_size = (program_end - first_instruction) // shard_count
+        for shard_number in range(1, shard_count):
+            boundary = data.find(b"<instruction", first_instruction + shard_number * shard_size, program_end)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+
+        boundaries.append(program_end)
+
+        return boundaries
+
+    @staticmethod
+    def __merge_shards(shard_results: List[ShardResult]) -> Dict[int, Instruction]:
+        """
+        Merges loaded shards in document order
+
+        Errors are raised in the same order as the single-process loader would raise them.
+
+        :param shard_results: Loaded shards
+        :return: All instructions stored like: "order: Instruction"
+        :raise BadInstructionOrderException: Duplicate or negative instruction order
+        :raise BadXmlStructureException: Bad instruction location, missing attributes or values
+        :raise InvalidInstructionOpCode: Invalid instruction opcode
+        """
+        instructions: Dict[int, Instruction] = {}
+        for shard_instructions, shard_error in shard_results:
+            for order, op_code, args in shard_instructions:
+                if order in instructions:
+                    raise BadInstructionOrderException("Duplicate instruction order")
+
+                instructions[order] = Instruction(OP_CODES[op_code], {
+                    arg_num: Argument(ARG_TYPES[arg_type], value) for arg_num, arg_type, value in args
+                })
+
+            if shard_error is not None:
+                error_order, error = shard_error
+                if error_order is not None and error_order in instructions:
+                    raise BadInstructionOrderException("Duplicate instruction order")
+
+                raise error
+
+        return instructions
+
+
+def parse_document(data: bytes) -> Element:
+    """
+    Parses XML document stored in memory
+
+    :param data: XML document
+    :return: Root element of the document
+    :raise ParseError: XML isn't well-formed
+    """
+    parser = XMLParser()
+    parser.feed(data)
+
+    return parser.close()
+
+
+def load_shard(sources_file: str, head_end: int, start: int, end: int, tail_start: int) -> Optional[ShardResult]:
+    """
+    Loads instructions from one shard of the file (runs in worker process)
+
+    :param sources_file: Path to file with XML source code representation
+    :param head_end: End of the prolog and program element's start tag
+    :param start: Start of the shard
+    :param end: End of the shard
+    :param tail_start: Start of the program element's end tag
+    :return: Loaded shard or None if the shard isn't well-formed
+    """
+    with open(sources_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        try:
+            xml_program = parse_document(data[:head_end] + data[start:end] + data[tail_start:])
+        except ParseError:
+            return None
+
+    # Instructions are transferred in compact form, because (un)pickling whole objects is slower than the parsing
+    instructions: List[PackedInstruction] = []
+    for xml_instruction in xml_program:
+        order = None
+        try:
+            order = Loader.load_instruction_order(xml_instruction)
+            instruction = Loader.load_instruction(xml_instruction)
+        except Exception as e:
+            return instructions, (order, e)
+
+        instructions.append((order, instruction.op_code.value, tuple(
+            (arg_num, argument.arg_type.value, argument.raw_value) for arg_num, argument in instruction.args.items()
+        )))
+
+    return instructions, None
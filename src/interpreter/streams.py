@@ -0,0 +1,484 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+import locale
+import mmap
+from array import array
+from io import BytesIO, TextIOWrapper
+from typing import BinaryIO, TextIO, Optional, Union, Iterable
+
+from interpreter.error import InputNotReadyException
+
+
+class OutputSink:
+    """Buffered binary output of interpreted program (text is encoded directly into a byte buffer)"""
+
+    DEFAULT_BUFFER_SIZE = 64 * 1024
+    """Default size of the buffer in bytes"""
+
+    def __init__(self, stream: BinaryIO, encoding: str = "utf-8", errors: str = "strict",
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, line_buffered: bool = False):
+        """
+        Class constructor
+
+        :param stream: Binary stream where to write the output to
+        :param encoding: Encoding of the output
+        :param errors: Handling of encoding errors (see str.encode())
+        :param buffer_size: Number of buffered bytes that causes flushing (0 means flushing after every write)
+        :param line_buffered: Should the buffer be flushed after every line?
+        """
+        self.__stream = stream
+        self.__encoding = encoding
+        self.__errors = errors
+        self.__buffer_size = buffer_size
+        self.__line_buffered = line_buffered
+
+        self.__buffer = bytearray()
+
+    @classmethod
+    def for_text_stream(cls, text_stream: TextIO, buffer_size: Optional[int] = None,
+                        line_buffered: Optional[bool] = None, binary_stream: Optional[BinaryIO] = None) -> 'OutputSink':
+        """
+        Creates sink writing to binary layer of a text stream (with the same encoding as the text stream)
+
+        :param text_stream: Text stream with binary buffer (like sys.stdout)
+        :param buffer_size: Number of buffered bytes that causes flushing or None for default size
+        :param line_buffered: Should the buffer be flushed after every line? None means only for terminals
+        :param binary_stream: Stream to write into instead of the binary layer (a wrapper of it, etc.)
+        :return: Created sink
+        """
+        if buffer_size is None:
+            buffer_size = cls.DEFAULT_BUFFER_SIZE
+        if line_buffered is None:
+            line_buffered = text_stream.isatty()
+
+        # Text layer could contain some data written before
+        text_stream.flush()
+
+        if binary_stream is None:
+            binary_stream = text_stream.buffer
+
+        return cls(binary_stream, text_stream.encoding, text_stream.errors or "strict", buffer_size, line_buffered)
+
+    def write(self, text: str) -> None:
+        """
+        Writes a text to the output
+
+        :param text: Text to write
+        :raise UnicodeEncodeError: Text can't be encoded
+        """
+        self.__buffer += text.encode(self.__encoding, self.__errors)
+
+        if len(self.__buffer) >= self.__buffer_size or (self.__line_buffered and "\n" in text):
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes buffered data to the stream"""
+        if self.__buffer:
+            self.__stream.write(self.__buffer)
+            self.__buffer.clear()
+
+        self.__stream.flush()
+
+
+class InputReader:
+    """Source of input lines for READ instruction (base class)"""
+
+    @classmethod
+    def for_file(cls, input_file: str) -> 'InputReader':
+        """
+        Creates reader of a file with inputs
+
+        The file is decoded like by open() in text mode (locale encoding and universal newlines).
+
+        :param input_file: Path to the file with inputs
+        :return: Created reader
+        """
+        encoding = locale.getpreferredencoding(False)
+        if not is_ascii_compatible(encoding):
+            return TextInputReader(open(input_file, encoding=encoding), True)
+
+        return MappedFileInputReader(input_file, encoding)
+
+    @classmethod
+    def for_bytes(cls, data: bytes) -> 'InputReader':
+        """
+        Creates reader of inputs stored in memory
+
+        The data are decoded in the same way as a file with inputs (see for_file()).
+
+        :param data: Content of the file with inputs
+        :return: Created reader
+        """
+        encoding = locale.getpreferredencoding(False)
+        if not is_ascii_compatible(encoding):
+            return TextInputReader(TextIOWrapper(BytesIO(data), encoding=encoding))
+
+        return BufferInputReader(data, encoding)
+
+    @classmethod
+    def for_text_stream(cls, text_stream: TextIO) -> 'InputReader':
+        """
+        Creates reader of a text stream (like sys.stdin)
+
+        Data are read from the binary layer of the stream and decoded like by the text layer.
+
+        :param text_stream: Text stream with binary buffer
+        :return: Created reader
+        """
+        encoding = text_stream.encoding
+        if not hasattr(text_stream, "buffer") or not is_ascii_compatible(encoding):
+            return TextInputReader(text_stream)
+
+        return StreamInputReader(text_stream.buffer, encoding, text_stream.errors or "strict")
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        :raise UnicodeDecodeError: Line can't be decoded
+        """
+        raise NotImplementedError
+
+    def is_input_ready(self) -> bool:
+        """
+        Checks if the next line (or end of input) can be read without waiting
+
+        :return: Can be read_line() called now? (readers of ready data are always ready)
+        """
+        return True
+
+    async def wait_for_input(self) -> None:
+        """Waits until the next line (or end of input) is available (readers of ready data don't wait)"""
+        pass
+
+    def close(self) -> None:
+        """Releases resources held by the reader"""
+        pass
+
+
+class BufferInputReader(InputReader):
+    """Reader of lines stored in a buffer (bytes or memory-mapped file) with lazily built line index"""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], encoding: str = "utf-8", errors: str = "strict",
+                 universal_newlines: bool = True):
+        """
+        Class constructor
+
+        :param buffer: Buffer with inputs
+        :param encoding: Encoding of the inputs (must be ASCII compatible)
+        :param errors: Handling of decoding errors (see bytes.decode())
+        :param universal_newlines: Are "\\r\\n" and "\\r" line separators, too? (otherwise only "\\n" is)
+        """
+        self.__buffer = buffer
+        self.__encoding = encoding
+        self.__errors = errors
+
+        # Position of the next carriage return (it is searched again only when the reader gets behind it)
+        self.__next_cr = buffer.find(b"\r") if universal_newlines else -1
+
+        # Line index: line i is stored in buffer[line_starts[i]:line_ends[i]], the last start is behind indexed lines
+        self.__line_starts = array("Q", [0])
+        self.__line_ends = array("Q")
+        self.__line_number = 0
+
+    @property
+    def line_number(self) -> int:
+        """
+        Getter for line number
+
+        :return: Number of lines read so far
+        """
+        return self.__line_number
+
+    def seek_line(self, line_number: int) -> None:
+        """
+        Moves the reader to the start of some line (the line index is extended when needed)
+
+        :param line_number: Number of the line (counted from 0), too big number means the end of input
+        """
+        while len(self.__line_ends) < line_number and self.__index_next_line():
+            pass
+
+        self.__line_number = min(line_number, len(self.__line_ends))
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        :raise UnicodeDecodeError: Line can't be decoded
+        """
+        line_number = self.__line_number
+        if line_number == len(self.__line_ends) and not self.__index_next_line():
+            return None
+
+        self.__line_number += 1
+
+        return self.__buffer[self.__line_starts[line_number]:self.__line_ends[line_number]].decode(
+            self.__encoding, self.__errors)
+
+    def __index_next_line(self) -> bool:
+        """
+        Adds the next line to the line index
+
+        :return: Has been any line added? (False at the end of input)
+        """
+        start = self.__line_starts[-1]
+        buffer_size = len(self.__buffer)
+        if start >= buffer_size:
+            return False
+
+        end = self.__buffer.find(b"\n", start)
+        if end == -1:
+            end = buffer_size
+
+        if self.__next_cr != -1:
+            if self.__next_cr < start:
+                self.__next_cr = self.__buffer.find(b"\r", start)
+
+            if self.__next_cr != -1 and self.__next_cr < end:
+                end = self.__next_cr
+
+        self.__line_ends.append(end)
+        if end == buffer_size:
+            self.__line_starts.append(end)
+        elif self.__buffer[end:end + 2] == b"\r\n":
+            self.__line_starts.append(end + 2)
+        else:
+            self.__line_starts.append(end + 1)
+
+        return True
+
+
+class MappedFileInputReader(BufferInputReader):
+    """Reader of lines from a memory-mapped file"""
+
+    def __init__(self, input_file: str, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        Class constructor
+
+        :param input_file: Path to the file with inputs
+        :param encoding: Encoding of the inputs (must be ASCII compatible)
+        :param errors: Handling of decoding errors (see bytes.decode())
+        """
+        self.__file = open(input_file, "rb")
+
+        # Empty files can't be mapped
+        try:
+            self.__mapped_file: Optional[mmap.mmap] = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.__mapped_file = None
+
+        super().__init__(self.__mapped_file if self.__mapped_file is not None else b"", encoding, errors)
+
+    def close(self) -> None:
+        """Releases resources held by the reader"""
+        if self.__mapped_file is not None:
+            self.__mapped_file.close()
+
+        self.__file.close()
+
+
+class StreamInputReader(InputReader):
+    """Reader of lines from a binary stream (pipe, terminal, etc.) reading data in large blocks"""
+
+    BLOCK_SIZE = 64 * 1024
+    """Maximum number of bytes read at once"""
+
+    def __init__(self, stream: BinaryIO, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        Class constructor
+
+        Only "\\n" is a line separator (like in sys.stdin).
+
+        :param stream: Binary stream with inputs
+        :param encoding: Encoding of the inputs (must be ASCII compatible)
+        :param errors: Handling of decoding errors (see bytes.decode())
+        """
+        self.__stream = stream
+        self.__encoding = encoding
+        self.__errors = errors
+
+        self.__buffer = bytearray()
+        self.__position = 0
+        self.__end_of_stream = False
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        :raise UnicodeDecodeError: Line can't be decoded
+        """
+        end = self.__buffer.find(b"\n", self.__position)
+        while end == -1 and not self.__end_of_stream:
+            # Already searched part doesn't need to be searched again (reading moves unread data to the start)
+            searched_size = len(self.__buffer) - self.__position
+            self.__read_block()
+            end = self.__buffer.find(b"\n", searched_size)
+
+        if end == -1:
+            # The last line doesn't need to be terminated
+            if self.__position >= len(self.__buffer):
+                return None
+
+            end = len(self.__buffer)
+
+        line = self.__buffer[self.__position:end].decode(self.__encoding, self.__errors)
+        self.__position = end + 1
+
+        return line
+
+    def __read_block(self) -> None:
+        """Reads the next block of data from the stream (already read lines are dropped from the buffer)"""
+        del self.__buffer[:self.__position]
+        self.__position = 0
+
+        read1 = getattr(self.__stream, "read1", self.__stream.read)
+        block = read1(self.BLOCK_SIZE)
+        if not block:
+            self.__end_of_stream = True
+
+        self.__buffer += block
+
+
+class TextInputReader(InputReader):
+    """Reader of lines from a text stream (used when the binary layer can't be read directly)"""
+
+    def __init__(self, text_stream: TextIO, close_stream: bool = False):
+        """
+        Class constructor
+
+        :param text_stream: Text stream with inputs
+        :param close_stream: Should the stream be closed together with the reader?
+        """
+        self.__text_stream = text_stream
+        self.__close_stream = close_stream
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        """
+        line = self.__text_stream.readline()
+        if line == "":
+            return None
+
+        return line[:-1] if line.endswith("\n") else line
+
+    def close(self) -> None:
+        """Releases resources held by the reader"""
+        if self.__close_stream:
+            self.__text_stream.close()
+
+
+class IterableInputReader(InputReader):
+    """Reader of lines given by an iterable (e.g. generator of inputs produced on demand)"""
+
+    def __init__(self, lines: Iterable[Union[str, bytes]], encoding: str = "utf-8", errors: str = "strict"):
+        """
+        Class constructor
+
+        :param lines: Lines of inputs (one trailing line separator of every line is removed)
+        :param encoding: Encoding of lines given as bytes
+        :param errors: Handling of decoding errors (see bytes.decode())
+        """
+        self.__lines = iter(lines)
+        self.__encoding = encoding
+        self.__errors = errors
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        :raise UnicodeDecodeError: Line can't be decoded
+        """
+        line = next(self.__lines, None)
+        if line is None:
+            return None
+
+        if isinstance(line, bytes):
+            line = line.decode(self.__encoding, self.__errors)
+
+        if line.endswith("\r\n"):
+            return line[:-2]
+
+        return line[:-1] if line.endswith(("\n", "\r")) else line
+
+
+class AsyncInputReader(InputReader):
+    """Reader of lines from asyncio stream (READ instruction fails with InputNotReadyException until data arrive)"""
+
+    def __init__(self, stream, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        Class constructor
+
+        Only "\\n" is a line separator (like in sys.stdin).
+
+        :param stream: Asyncio stream with inputs (asyncio.StreamReader or object with the same readline() method)
+        :param encoding: Encoding of the inputs
+        :param errors: Handling of decoding errors (see bytes.decode())
+        """
+        self.__stream = stream
+        self.__encoding = encoding
+        self.__errors = errors
+
+        self.__line: Optional[bytes] = None
+        self.__end_of_stream = False
+
+    def read_line(self) -> Optional[str]:
+        """
+        Reads a line of input (without line separator)
+
+        :return: Read line or None if there are no more lines (end of input)
+        :raise InputNotReadyException: Line hasn't been received yet (wait_for_input() must be awaited first)
+        :raise UnicodeDecodeError: Line can't be decoded
+        """
+        if self.__line is None:
+            if self.__end_of_stream:
+                return None
+
+            raise InputNotReadyException("Input line hasn't been received yet")
+
+        line, self.__line = self.__line, None
+
+        return (line[:-1] if line.endswith(b"\n") else line).decode(self.__encoding, self.__errors)
+
+    def is_input_ready(self) -> bool:
+        """
+        Checks if the next line (or end of input) has already been received
+
+        :return: Can be read_line() called now?
+        """
+        return self.__line is not None or self.__end_of_stream
+
+    async def wait_for_input(self) -> None:
+        """Waits until the next line (or end of input) is available"""
+        if self.is_input_ready():
+            return
+
+        line = await self.__stream.readline()
+        if line:
+            self.__line = line
+        else:
+            self.__end_of_stream = True
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """
+    Checks if the encoding is ASCII compatible (ASCII characters, especially line separators, are encoded as bytes
+    with the same values), so lines can be found before decoding
+
+    :param encoding: Name of the encoding
+    :return: Is the encoding ASCII compatible?
+    """
+    try:
+        return "a\r\n".encode(encoding) == b"a\r\n"
+    except LookupError:
+        return False
@@ -0,0 +1,84 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from interpreter.code import Program
+from interpreter.error import InterpretationTimeoutException
+from interpreter.runner import RunResult, run_in_memory
+
+
+def run_with_limits(program: Program, input_data: bytes, instruction_limit: Optional[int] = None,
+                    time_limit: Optional[float] = None) -> Optional[RunResult]:
+    """
+    Interprets the program in memory (safe to call from more threads at the same time)
+
+    :param program: Loaded program (it is only read, so more threads can share it)
+    :param input_data: Content of the file with inputs
+    :param instruction_limit: Maximum number of executed instructions or None for no limit
+    :param time_limit: Time limit of the interpretation in seconds or None for no limit
+    :return: Result of the interpretation or None for exceeded time limit
+    """
+    try:
+        return run_in_memory(program, input_data, instruction_limit, time_limit)
+    except InterpretationTimeoutException:
+        return None
+
+
+class ThreadedRunner:
+    """
+    Runner of interpretations of one program in a pool of threads
+
+    Interpreters keep all their state in the instance and don't touch any global state (standard streams, exit
+    of the process), so they can run concurrently. With GIL, threads help when the program waits for I/O of the host
+    application, on free-threaded Python they run in parallel.
+    """
+
+    def __init__(self, program: Program, workers: Optional[int] = None, instruction_limit: Optional[int] = None,
+                 time_limit: Optional[float] = None):
+        """
+        Class constructor
+
+        :param program: Loaded program shared by all runs
+        :param workers: Number of threads or None for default of ThreadPoolExecutor
+        :param instruction_limit: Maximum number of executed instructions of one run or None for no limit
+        :param time_limit: Time limit of one run in seconds or None for no limit
+        """
+        self.__program = program
+        self.__instruction_limit = instruction_limit
+        self.__time_limit = time_limit
+        self.__executor = ThreadPoolExecutor(workers, "interpreter")
+
+    def __enter__(self) -> "ThreadedRunner":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+
+    def submit(self, input_data: bytes) -> Future:
+        """
+        Starts interpretation with given inputs
+
+        :param input_data: Content of the file with inputs
+        :return: Future with result of the interpretation (None for exceeded time limit)
+        """
+        return self.__executor.submit(run_with_limits, self.__program, input_data, self.__instruction_limit,
+                                      self.__time_limit)
+
+    def map(self, inputs: Iterable[bytes]) -> Iterator[Optional[RunResult]]:
+        """
+        Interprets the program with every given input
+
+        :param inputs: Contents of files with inputs
+        :return: Results of interpretations in the order of inputs (None for exceeded time limit)
+        """
+        futures = [self.submit(input_data) for input_data in inputs]
+
+        return (future.result() for future in futures)
+
+    def shutdown(self) -> None:
+        """Waits for running interpretations and stops the threads"""
+        self.__executor.shutdown()
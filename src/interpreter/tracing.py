@@ -0,0 +1,255 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Tracing of interpretation into Chrome trace-event format (viewable in Perfetto, chrome://tracing, speedscope, ...)
+
+Recorded events:
+
+* spans of subroutines (from CALL to RETURN, named by the label),
+* spans of READ and WRITE instructions (READ includes waiting for input),
+* instant events of CREATEFRAME, PUSHFRAME and POPFRAME,
+* spans of writes of buffered outputs into their streams (flushes).
+
+Events are kept in memory as tuples and converted to JSON when the trace is written, so tracing doesn't distort
+timing by I/O.
+"""
+
+import json
+import os
+import time
+from typing import Callable, List, Tuple, BinaryIO, TYPE_CHECKING
+
+from interpreter.code import Instruction, OpCode, Program
+from interpreter.hooks import ExecutionHook
+
+if TYPE_CHECKING:
+    from interpreter.interpretation import Interpreter
+
+# Event: phase, name, category, time (seconds from the start of tracing), duration (for complete events), position
+# of the instruction in the program (or -1)
+Event = Tuple[str, str, str, float, float, int]
+
+SPAN_OP_CODES = {OpCode.READ, OpCode.WRITE}
+"""Instructions recorded as spans"""
+
+
+class Tracer(ExecutionHook):
+    """Recorder of trace events of interpretation"""
+
+    DEFAULT_MAX_EVENTS = 1_000_000
+    """Default maximum number of recorded events (the rest of the run isn't traced)"""
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Class constructor
+
+        :param max_events: Maximum number of recorded events
+        """
+        self.__max_events = max_events
+        self.__events: List[Event] = []
+        self.__dropped = 0
+
+        # Subroutine spans opened by CALL and not closed by RETURN yet, calls not opened because of the limit (they
+        # are always the innermost ones, so their RETURNs come first)
+        self.__open_calls = 0
+        self.__suppressed_calls = 0
+        self.__span_start = 0.0
+
+        self.__start = time.perf_counter()
+
+    @property
+    def events(self) -> List[Event]:
+        """
+        Getter for recorded events
+
+        :return: Events in the order of recording
+        """
+        return self.__events
+
+    @property
+    def dropped(self) -> int:
+        """
+        Getter for number of dropped events
+
+        :return: Number of events not recorded because of the limit
+        """
+        return self.__dropped
+
+    def before_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Starts span of READ and WRITE instructions
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        if instruction.op_code in SPAN_OP_CODES:
+            self.__span_start = time.perf_counter()
+
+    def after_instruction(self, interpreter: 'Interpreter', position: int, instruction: Instruction) -> None:
+        """
+        Records span of READ and WRITE instructions
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param instruction: Executed instruction
+        """
+        if instruction.op_code in SPAN_OP_CODES:
+            self.__record("X", instruction.op_code.value, "io", self.__span_start,
+                          time.perf_counter() - self.__span_start, position)
+
+    def on_call(self, interpreter: 'Interpreter', position: int, label: str) -> None:
+        """
+        Opens span of the called subroutine
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the CALL instruction
+        :param label: Label of the subroutine
+        """
+        if self.__record("B", label, "call", time.perf_counter(), 0.0, position):
+            self.__open_calls += 1
+        else:
+            self.__suppressed_calls += 1
+
+    def on_return(self, interpreter: 'Interpreter', position: int) -> None:
+        """
+        Closes span of the current subroutine
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the RETURN instruction
+        """
+        # Span of the call hasn't been opened because of the limit, so the span of the caller stays open
+        if self.__suppressed_calls > 0:
+            self.__suppressed_calls -= 1
+        # Calls made before resuming from a checkpoint haven't been opened
+        elif self.__open_calls > 0:
+            self.__open_calls -= 1
+            self.__record("E", "", "call", time.perf_counter(), 0.0, position)
+
+    def on_frame(self, interpreter: 'Interpreter', position: int, op_code: OpCode) -> None:
+        """
+        Records operation with memory frames
+
+        :param interpreter: Interpreter executing the program
+        :param position: Position of the instruction
+        :param op_code: Operation code of the instruction
+        """
+        self.__record("i", op_code.value, "frame", time.perf_counter(), 0.0, position)
+
+    def wrap_stream(self, stream: BinaryIO, name: str) -> 'TracedStream':
+        """
+        Wraps output stream, so its writes (flushes of buffered output) are recorded
+
+        :param stream: Binary stream
+        :param name: Name of the stream in the trace
+        :return: Wrapped stream
+        """
+        return TracedStream(stream, f"flush {name}", self.__record)
+
+    def finish(self) -> None:
+        """Closes spans of subroutines that haven't returned (must be called at the end of the run)"""
+        end = time.perf_counter()
+        self.__suppressed_calls = 0
+        while self.__open_calls > 0:
+            self.__open_calls -= 1
+            self.__events.append(("E", "", "call", end - self.__start, 0.0, -1))
+
+    def __record(self, phase: str, name: str, category: str, moment: float, duration: float, position: int) -> bool:
+        """
+        Records an event
+
+        :param phase: Phase of the event (B - begin, E - end, X - complete, i - instant)
+        :param name: Name of the event
+        :param category: Category of the event
+        :param moment: Time of the event (from time.perf_counter())
+        :param duration: Duration of complete event in seconds
+        :param position: Position of the instruction in the program or -1
+        :return: Has the event been recorded? (ends of spans are recorded always, so opened spans get closed)
+        """
+        if len(self.__events) >= self.__max_events and phase != "E":
+            self.__dropped += 1
+
+            return False
+
+        self.__events.append((phase, name, category, moment - self.__start, duration, position))
+
+        return True
+
+
+class TracedStream:
+    """Binary output stream recording its writes as trace events"""
+
+    def __init__(self, stream: BinaryIO, name: str, record: Callable[[str, str, str, float, float, int], None]):
+        """
+        Class constructor
+
+        :param stream: Wrapped stream
+        :param name: Name of write events
+        :param record: Function recording events
+        """
+        self.__stream = stream
+        self.__name = name
+        self.__record = record
+
+    def write(self, data: bytes) -> int:
+        """
+        Writes data into the wrapped stream
+
+        :param data: Written data
+        :return: Number of written bytes
+        """
+        start = time.perf_counter()
+        written = self.__stream.write(data)
+        self.__record("X", self.__name, "io", start, time.perf_counter() - start, -1)
+
+        return written
+
+    def flush(self) -> None:
+        """Flushes the wrapped stream"""
+        self.__stream.flush()
+
+
+def trace_events(tracer: Tracer, program: Program) -> List[dict]:
+    """
+    Converts recorded events into trace-event format
+
+    :param tracer: Tracer used by the run (it has been finished)
+    :param program: Traced program
+    :return: Events (times are in microseconds)
+    """
+    process_id = os.getpid()
+    events = [{"ph": "M", "name": "process_name", "pid": process_id, "tid": 0, "args": {"name": "interpret.py"}}]
+    for phase, name, category, moment, duration, position in tracer.events:
+        event = {"ph": phase, "name": name, "cat": category, "ts": moment * 1_000_000, "pid": process_id, "tid": 0}
+        if phase == "X":
+            event["dur"] = duration * 1_000_000
+        elif phase == "i":
+            event["s"] = "t"
+        if position >= 0:
+            event["args"] = {"order": program.get_order_at(position)}
+        events.append(event)
+
+    return events
+
+
+def write_trace(tracer: Tracer, program: Program, path: str) -> None:
+    """
+    Writes trace in JSON object format of trace events
+
+    :param tracer: Tracer used by the run (it has been finished)
+    :param program: Traced program
+    :param path: Path to the file for the trace
+    :raise OSError: File can't be written
+    """
+    trace = {
+        "traceEvents": trace_events(tracer, program),
+        "displayTimeUnit": "ms",
+        "otherData": {"dropped_events": tracer.dropped},
+    }
+
+    with open(path, "w") as file:
+        json.dump(trace, file)
+        file.write("\n")
@@ -0,0 +1,143 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Test cases in the layout used by test.php
+
+A test case is a group of files with the same name in one directory: name.src (source code), name.in (inputs),
+name.out (expected standard output) and name.rc (expected exit code). Missing files have the same defaults as
+in test.php (empty inputs and output, exit code 0), but they aren't created.
+"""
+
+import os
+from enum import Enum
+from typing import List, Optional
+
+TEST_FILE_EXTENSIONS = (".src", ".in", ".out", ".rc")
+"""Extensions of files of test cases"""
+
+
+class TestStatus(Enum):
+    """Result of a test case (the same states as in test.php and a timeout)"""
+    SUCCESS = "passed"
+    BAD_EXIT_CODE = "bad exit code"
+    BAD_OUTPUT = "bad output"
+    TIMEOUT = "timeout"
+
+
+class TestCase:
+    """One test case"""
+
+    def __init__(self, root_dir: str, path: str):
+        """
+        Class constructor
+
+        :param root_dir: Root directory of tests
+        :param path: Path to the test case from the root directory (without extension)
+        """
+        self.__root_dir = root_dir
+        self.__path = path
+
+    @property
+    def path(self) -> str:
+        """
+        Getter for path to the test case
+
+        :return: Path from the root directory of tests (without extension)
+        """
+        return self.__path
+
+    @property
+    def source(self) -> bytes:
+        """
+        Getter for source code
+
+        :return: Content of name.src (empty if it doesn't exist)
+        """
+        return self.__read(".src") or b""
+
+    @property
+    def input(self) -> bytes:
+        """
+        Getter for inputs
+
+        :return: Content of name.in (empty if it doesn't exist)
+        """
+        return self.__read(".in") or b""
+
+    @property
+    def reference_output(self) -> bytes:
+        """
+        Getter for expected standard output
+
+        :return: Content of name.out (empty if it doesn't exist)
+        """
+        return self.__read(".out") or b""
+
+    @property
+    def reference_exit_code(self) -> int:
+        """
+        Getter for expected exit code
+
+        :return: Content of name.rc (0 if it doesn't exist)
+        """
+        content = self.__read(".rc")
+
+        return int(content) if content is not None and content.strip() else 0
+
+    def verify(self, exit_code: int, output: bytes) -> TestStatus:
+        """
+        Compares result of the interpretation with the reference one (like test.php, output is checked only if
+        the expected exit code is 0)
+
+        :param exit_code: Exit code of the interpretation
+        :param output: Standard output of the interpretation
+        :return: Status of the test case
+        """
+        reference_exit_code = self.reference_exit_code
+        if exit_code != reference_exit_code:
+            return TestStatus.BAD_EXIT_CODE
+        if reference_exit_code == 0 and output != self.reference_output:
+            return TestStatus.BAD_OUTPUT
+
+        return TestStatus.SUCCESS
+
+    def __read(self, extension: str) -> Optional[bytes]:
+        """
+        Reads file of the test case
+
+        :param extension: Extension of the file
+        :return: Content of the file or None if it doesn't exist
+        :raise OSError: File exists but it can't be read
+        """
+        file_path = os.path.join(self.__root_dir, self.__path + extension)
+        if not os.path.isfile(file_path):
+            return None
+
+        with open(file_path, "rb") as file:
+            return file.read()
+
+
+def discover(root_dir: str, recursive: bool = False) -> List[TestCase]:
+    """
+    Finds test cases in the directory (hidden files are skipped)
+
+    :param root_dir: Root directory of tests
+    :param recursive: Should be searched subdirectories too?
+    :return: Test cases sorted by their paths
+    """
+    paths = set()
+    for directory, subdirectories, files in os.walk(root_dir):
+        if not recursive:
+            subdirectories.clear()
+
+        relative_dir = os.path.relpath(directory, root_dir)
+        for file in files:
+            name, extension = os.path.splitext(file)
+            if file.startswith(".") or extension not in TEST_FILE_EXTENSIONS:
+                continue
+            paths.add(os.path.normpath(os.path.join(relative_dir, name)))
+
+    return [TestCase(root_dir, path) for path in sorted(paths)]
@@ -0,0 +1,30 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Programs written as lists of instructions (used by benchmarks, fuzzing and tests instead of XML files)"""
+
+from typing import List
+from xml.sax.saxutils import escape
+
+# Instruction: operation code and arguments as (type, value in IPPcode22 notation)
+Instruction = tuple
+
+
+def to_xml(instructions: List[Instruction]) -> bytes:
+    """
+    Creates XML representation of the program (values are escaped)
+
+    :param instructions: Instructions of the program
+    :return: XML representation
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<program language="IPPcode22">']
+    for order, (op_code, *args) in enumerate(instructions, 1):
+        lines.append(f'  <instruction order="{order}" opcode="{op_code}">')
+        for arg_num, (arg_type, value) in enumerate(args, 1):
+            lines.append(f'    <arg{arg_num} type="{arg_type}">{escape(value)}</arg{arg_num}>')
+        lines.append('  </instruction>')
+    lines.append('</program>')
+
+    return "\n".join(lines).encode()
@@ -0,0 +1,235 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Parallel runner of test cases of the interpreter
+
+Test cases in the layout of test.php (see testing.cases) are interpreted in-process (no new interpreter is started
+for a test case) by a pool of worker processes, so the duration of the suite is bounded by the number of cores.
+Test cases with IPPcode22 source code (the default, like test.php without --int-only) are translated to XML
+by parse.php first; with --int-only the source files already contain the XML representation.
+
+Usage (from src directory): python3 -m testing.run --directory=../test/supplementary-tests --recursive --int-only
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import time
+from argparse import ArgumentParser
+from typing import Iterator, List, Optional, Tuple
+
+from interpreter.error import ExitCode, InterpretationTimeoutException
+from interpreter.profiling import format_table
+from interpreter.runner import load_program_from_bytes, run_in_memory
+from testing.cases import TestCase, TestStatus, discover
+
+# Result of one test case: path, status, exit code, standard output, standard error output and duration
+CaseResult = Tuple[str, TestStatus, int, bytes, bytes, float]
+
+# Settings shared by worker processes (set by init_worker())
+shared_root_dir: str = "."
+shared_parse_command: Optional[List[str]] = None
+shared_timeout: Optional[float] = None
+
+
+def init_worker(root_dir: str, parse_command: Optional[List[str]], timeout: Optional[float]) -> None:
+    """
+    Prepares process for running test cases
+
+    :param root_dir: Root directory of tests
+    :param parse_command: Command translating IPPcode22 source code to XML or None if sources are already in XML
+    :param timeout: Time limit of one interpretation in seconds or None for no limit
+    """
+    global shared_root_dir, shared_parse_command, shared_timeout
+
+    shared_root_dir, shared_parse_command, shared_timeout = root_dir, parse_command, timeout
+
+    # Parent handles interruption (workers are terminated by it)
+    if multiprocessing.parent_process() is not None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def translate(source: bytes) -> Tuple[int, bytes, bytes]:
+    """
+    Translates IPPcode22 source code to XML representation by the parser
+
+    :param source: Source code
+    :return: Exit code of the parser, XML representation and standard error output of the parser
+    """
+    try:
+        process = subprocess.run(shared_parse_command, input=source, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        return ExitCode.INTERNAL_ERROR, b"", f"Parser can't be started: {e}\n".encode()
+
+    return process.returncode, process.stdout, process.stderr
+
+
+def run_case(path: str) -> CaseResult:
+    """
+    Interprets one test case and verifies its result (runs in worker process)
+
+    :param path: Path to the test case from the root directory of tests
+    :return: Result of the test case
+    """
+    test_case = TestCase(shared_root_dir, path)
+    start = time.perf_counter()
+
+    source = test_case.source
+    if shared_parse_command is not None:
+        exit_code, source, stderr = translate(source)
+        if exit_code != 0:
+            # Errors of the parser are results of the test case too (lexical and syntax error tests)
+            return path, test_case.verify(exit_code, b""), exit_code, b"", stderr, time.perf_counter() - start
+
+    program, exit_code, stderr = load_program_from_bytes(source)
+    if program is None:
+        return path, test_case.verify(exit_code, b""), exit_code, b"", stderr, time.perf_counter() - start
+
+    try:
+        result = run_in_memory(program, test_case.input, time_limit=shared_timeout)
+    except InterpretationTimeoutException:
+        return path, TestStatus.TIMEOUT, ExitCode.INTERNAL_ERROR, b"", b"", time.perf_counter() - start
+
+    status = test_case.verify(result.exit_code, result.stdout)
+
+    return path, status, result.exit_code, result.stdout, result.stderr, time.perf_counter() - start
+
+
+def run_cases(test_cases: List[TestCase], root_dir: str, parse_command: Optional[List[str]],
+              timeout: Optional[float], jobs: int) -> Iterator[CaseResult]:
+    """
+    Runs test cases in-process (one job) or by a pool of worker processes
+
+    :param test_cases: Test cases to run
+    :param root_dir: Root directory of tests
+    :param parse_command: Command translating IPPcode22 source code to XML or None if sources are already in XML
+    :param timeout: Time limit of one interpretation in seconds or None for no limit
+    :param jobs: Number of worker processes
+    :return: Iterator of results of test cases (in order of completion)
+    """
+    paths = [test_case.path for test_case in test_cases]
+    if jobs == 1 or len(paths) < 2:
+        init_worker(root_dir, parse_command, timeout)
+        yield from map(run_case, paths)
+
+        return
+
+    pool = multiprocessing.Pool(jobs, init_worker, (root_dir, parse_command, timeout))
+    try:
+        yield from pool.imap_unordered(run_case, paths, max(1, len(paths) // (jobs * 4)))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def describe_failure(test_case: TestCase, result: CaseResult) -> List[str]:
+    """
+    Describes failed test case
+
+    :param test_case: Failed test case
+    :param result: Its result
+    :return: Lines of the description
+    """
+    path, status, exit_code, stdout, stderr, _ = result
+    lines = [f"FAIL {path}: {status.value}"]
+    if status == TestStatus.BAD_EXIT_CODE:
+        lines.append(f"  expected exit code {test_case.reference_exit_code}, got {exit_code}")
+    elif status == TestStatus.BAD_OUTPUT:
+        expected = test_case.reference_output
+        position = next((index for index, (first, second) in enumerate(zip(expected, stdout)) if first != second),
+                        min(len(expected), len(stdout)))
+        lines.append(f"  outputs differ at byte {position}: expected {expected[position:position + 40]!r}, "
+                     f"got {stdout[position:position + 40]!r}")
+    if stderr and status != TestStatus.SUCCESS:
+        lines.append(f"  stderr: {stderr.strip().splitlines()[-1][:200]!r}")
+
+    return lines
+
+
+def main() -> int:
+    """
+    Main function of the test runner
+
+    :return: Exit code (0 if all test cases passed, 1 otherwise)
+    """
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    arg_parser = ArgumentParser(description="Parallel runner of test cases in the layout of test.php")
+    arg_parser.add_argument("--directory", metavar="path", type=str, default=".",
+                            help="Directory with test cases (current directory by default)")
+    arg_parser.add_argument("--recursive", action="store_true", default=False,
+                            help="Search test cases in subdirectories too")
+    arg_parser.add_argument("--int-only", action="store_true", default=False,
+                            help="Source files contain XML representation (the parser isn't used)")
+    arg_parser.add_argument("--parse-script", metavar="file", type=str, default=os.path.join(src_dir, "parse.php"),
+                            help="Parser translating IPPcode22 source code to XML")
+    arg_parser.add_argument("--php", metavar="command", type=str, default="php8.1",
+                            help="PHP interpreter running the parser")
+    arg_parser.add_argument("--jobs", metavar="n", type=int, default=os.cpu_count() or 1,
+                            help="Number of worker processes (1 runs test cases in this process)")
+    arg_parser.add_argument("--timeout", metavar="seconds", type=float, default=None,
+                            help="Time limit of one interpretation")
+    arg_parser.add_argument("--slowest", metavar="n", type=int, default=10,
+                            help="Number of the slowest test cases listed in the report")
+    arg_parser.add_argument("--json", metavar="file", type=str, default=None,
+                            help="File where to write results of test cases (one JSON object per line)")
+    args = arg_parser.parse_args()
+
+    if args.jobs < 1 or args.slowest < 0 or (args.timeout is not None and args.timeout <= 0):
+        print("Number of jobs must be positive, number of the slowest test cases and timeout can't be negative")
+
+        return 1
+    if not os.path.isdir(args.directory):
+        print(f"Directory {args.directory} doesn't exist")
+
+        return 1
+
+    parse_command = None if args.int_only else [args.php, args.parse_script]
+    if parse_command is not None and shutil.which(args.php) is None:
+        print(f"PHP interpreter {args.php} isn't available (use --php or --int-only)")
+
+        return 1
+
+    test_cases = discover(args.directory, args.recursive)
+    by_path = {test_case.path: test_case for test_case in test_cases}
+    print(f"Running {len(test_cases)} test cases from {args.directory} by {args.jobs} jobs")
+
+    start = time.perf_counter()
+    results: List[CaseResult] = []
+    manifest = open(args.json, "w") if args.json is not None else None
+    try:
+        for result in run_cases(test_cases, args.directory, parse_command, args.timeout, args.jobs):
+            results.append(result)
+            path, status, exit_code, _, _, duration = result
+            if status != TestStatus.SUCCESS:
+                print("\n".join(describe_failure(by_path[path], result)))
+            if manifest is not None:
+                manifest.write(json.dumps({"test": path, "status": status.name, "exit_code": int(exit_code),
+                                           "duration": duration}) + "\n")
+    finally:
+        if manifest is not None:
+            manifest.close()
+    wall_time = time.perf_counter() - start
+
+    slowest = sorted(results, key=lambda result: result[5], reverse=True)[:args.slowest]
+    if slowest:
+        print("Slowest test cases:")
+        rows = [(path, status.value, f"{duration * 1000:.1f} ms") for path, status, _, _, _, duration in slowest]
+        print("\n".join(format_table(("test case", "status", "duration"), rows)))
+
+    failed = sum(1 for result in results if result[1] != TestStatus.SUCCESS)
+    case_time = sum(result[5] for result in results)
+    print(f"Passed {len(results) - failed}/{len(results)} test cases in {wall_time:.2f} s "
+          f"(sum of durations of test cases {case_time:.2f} s)")
+
+    return 1 if failed > 0 else 0
+
+
+if __name__ == '__main__':
+    exit(main())
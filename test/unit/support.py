@@ -0,0 +1,111 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""
+Shared helpers of unit tests
+
+Tests compare the optimised and alternative engines with the plain interpreter (run_in_memory() without any options),
+which is the reference implementation. Programs are written as lists of instructions in the notation
+of testing.programs: (opcode, (type, value), ...).
+
+Usage (from the repository root): python3 -m unittest discover -s test/unit
+"""
+
+import os
+import sys
+from typing import List, Tuple
+
+# Modules of the interpreter are in src directory
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from testing.programs import Instruction, to_xml  # noqa: E402
+from interpreter.code import Program  # noqa: E402
+from interpreter.runner import RunResult, load_program_from_bytes, run_in_memory  # noqa: E402
+
+
+def load(instructions: List[Instruction]) -> Program:
+    """
+    Loads program written as a list of instructions
+
+    :param instructions: Instructions of the program
+    :return: Loaded program
+    """
+    program, exit_code, error_report = load_program_from_bytes(to_xml(instructions))
+    if program is None:
+        raise ValueError(f"Program can't be loaded (exit code {exit_code}): {error_report!r}")
+
+    return program
+
+
+def describe_program(program: Program) -> List[Tuple]:
+    """
+    Describes loaded program for comparisons
+
+    :param program: Loaded program
+    :return: Order, opcode and arguments (number, type, raw value) of every instruction in the order of execution
+    """
+    return [
+        (program.get_order_at(position), instruction.op_code,
+         tuple((number, argument.arg_type, argument.raw_value)
+               for number, argument in sorted(instruction.args.items())))
+        for position, instruction in enumerate(program.instructions)
+    ]
+
+
+def describe_result(result: RunResult) -> Tuple:
+    """
+    Describes result of interpretation for comparisons
+
+    :param result: Result of interpretation
+    :return: Exit code, standard output and standard error output
+    """
+    return int(result.exit_code), result.stdout, result.stderr
+
+
+def reference(program: Program, input_data: bytes = b"") -> RunResult:
+    """
+    Interprets the program by the plain interpreter
+
+    :param program: Loaded program
+    :param input_data: Content of the file with inputs
+    :return: Result of the interpretation
+    """
+    return run_in_memory(program, input_data)
+
+
+def var(name: str) -> Tuple[str, str]:
+    """
+    Creates variable operand
+
+    :param name: Name of the variable with its frame
+    :return: Operand
+    """
+    return "var", name
+
+
+def const(data_type: str, value) -> Tuple[str, str]:
+    """
+    Creates constant operand
+
+    :param data_type: Data type of the constant
+    :param value: Value of the constant
+    :return: Operand
+    """
+    if data_type == "bool":
+        value = "true" if value else "false"
+
+    return data_type, str(value)
+
+
+def label(name: str) -> Tuple[str, str]:
+    """
+    Creates label operand
+
+    :param name: Name of the label
+    :return: Operand
+    """
+    return "label", name
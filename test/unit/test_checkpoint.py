@@ -0,0 +1,234 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Interpretation resumed from a checkpoint must give the same results as the uninterrupted one"""
+
+import locale
+import os
+import tempfile
+import unittest
+
+from support import const, describe_result, label, load, reference, to_xml, var
+from interpreter.checkpoint import MAGIC, RECORD_HEADER, CheckpointWriter, load_checkpoint, rewind_output, \
+    run_with_checkpoints
+from interpreter.error import InvalidCheckpointException
+from interpreter.interpretation import Interpreter
+from interpreter.replay import Recording
+from interpreter.runner import run_program
+from interpreter.streams import InputReader, OutputSink
+
+RECURSIVE_PROGRAM = [
+    ("DEFVAR", var("GF@n")),
+    ("DEFVAR", var("GF@total")),
+    ("DEFVAR", var("GF@line")),
+    ("READ", var("GF@n"), ("type", "int")),
+    ("MOVE", var("GF@total"), const("int", 0)),
+    ("CREATEFRAME",),
+    ("DEFVAR", var("TF@n")),
+    ("MOVE", var("TF@n"), var("GF@n")),
+    ("CALL", label("count")),
+    ("WRITE", var("GF@total")),
+    ("READ", var("GF@line"), ("type", "string")),
+    ("WRITE", var("GF@line")),
+    ("DPRINT", var("GF@total")),
+    ("EXIT", const("int", 4)),
+    # Writes numbers from n down to 0 and back (every level has own frame and value on the data stack)
+    ("LABEL", label("count")),
+    ("PUSHFRAME",),
+    ("DEFVAR", var("LF@m")),
+    ("PUSHS", var("LF@n")),
+    ("WRITE", var("LF@n")),
+    ("WRITE", const("string", "\\032")),
+    ("ADD", var("GF@total"), var("GF@total"), var("LF@n")),
+    ("DPRINT", var("LF@n")),
+    ("JUMPIFEQ", label("count_end"), var("LF@n"), const("int", 0)),
+    ("CREATEFRAME",),
+    ("DEFVAR", var("TF@n")),
+    ("SUB", var("TF@n"), var("LF@n"), const("int", 1)),
+    ("CALL", label("count")),
+    ("LABEL", label("count_end")),
+    ("POPS", var("LF@m")),
+    ("WRITE", var("LF@m")),
+    ("WRITE", const("string", ",")),
+    ("POPFRAME",),
+    ("RETURN",),
+]
+"""Program with deep recursion, outputs to both streams and inputs read before and after the recursion"""
+
+INPUT_DATA = "30\nžluťoučký kůň\n".encode()
+"""Inputs of the program"""
+
+EVERY = 7
+"""Number of instructions between checkpoints"""
+
+
+class SnapshotWriter(CheckpointWriter):
+    """Writer keeping content of the checkpoint file after every checkpoint"""
+
+    def __init__(self, checkpoint_file: str, program_hash: bytes):
+        """
+        Class constructor
+
+        :param checkpoint_file: Path to the checkpoint file
+        :param program_hash: Hash of the program
+        """
+        super().__init__(checkpoint_file, program_hash)
+
+        self.checkpoint_file = checkpoint_file
+        self.snapshots = []
+
+    def write(self, interpreter, stdout=None, stderr=None) -> None:
+        """Writes a checkpoint and keeps the content of the file with the number of executed instructions"""
+        super().write(interpreter, stdout, stderr)
+
+        with open(self.checkpoint_file, "rb") as file:
+            self.snapshots.append((interpreter.executed_instructions, file.read()))
+
+
+class CheckpointTest(unittest.TestCase):
+    """Saving and restoring of interpretations"""
+
+    def setUp(self) -> None:
+        """Interprets the program with checkpoints"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.program = load(RECURSIVE_PROGRAM)
+        self.program_hash = Recording.hash_program(to_xml(RECURSIVE_PROGRAM))
+        self.expected = reference(self.program, INPUT_DATA)
+
+        self.writer = SnapshotWriter(self.path("checkpoint"), self.program_hash)
+        with open(self.path("stdout"), "w+b") as stdout, open(self.path("stderr"), "w+b") as stderr:
+            interpreter = self.create_interpreter(stdout, stderr)
+            self.exit_code = run_with_checkpoints(interpreter, self.program, self.writer, EVERY, stdout, stderr)
+
+    def tearDown(self) -> None:
+        """Removes files of the interpretation"""
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        """
+        Creates path to a file in the temporary directory
+
+        :param name: Name of the file
+        :return: Path to the file
+        """
+        return os.path.join(self.directory.name, name)
+
+    @staticmethod
+    def create_interpreter(stdout, stderr) -> Interpreter:
+        """
+        Creates interpreter with outputs encoded like the outputs of the plain interpreter (run_in_memory())
+
+        :param stdout: Binary stream for the standard output
+        :param stderr: Binary stream for the standard error output
+        :return: Created interpreter
+        """
+        encoding = locale.getpreferredencoding(False)
+
+        return Interpreter(InputReader.for_bytes(INPUT_DATA), OutputSink(stdout, encoding),
+                           OutputSink(stderr, encoding, "backslashreplace"))
+
+    def load_checkpoint_data(self, checkpoint_data: bytes):
+        """
+        Loads checkpoint from content of a checkpoint file
+
+        :param checkpoint_data: Content of the checkpoint file
+        :return: Loaded checkpoint
+        """
+        with open(self.path("resumed"), "wb") as file:
+            file.write(checkpoint_data)
+
+        return load_checkpoint(self.path("resumed"), self.program_hash)
+
+    def resume(self, checkpoint_data: bytes):
+        """
+        Resumes the interpretation from a checkpoint with outputs of the whole interpretation in the output files
+        (like after interpretation killed after the checkpoint)
+
+        :param checkpoint_data: Content of the checkpoint file
+        :return: Exit code, standard output and standard error output of the resumed interpretation
+        """
+        checkpoint = self.load_checkpoint_data(checkpoint_data)
+        with open(self.path("stdout"), "r+b") as stdout, open(self.path("stderr"), "r+b") as stderr:
+            stdout.seek(0, os.SEEK_END)
+            stderr.seek(0, os.SEEK_END)
+            interpreter = self.create_interpreter(stdout, stderr)
+            checkpoint.restore(interpreter)
+            stdout_position, stderr_position = checkpoint.output_positions
+            rewind_output(stdout, stdout_position)
+            rewind_output(stderr, stderr_position)
+
+            exit_code = run_program(interpreter, self.program)
+
+        with open(self.path("stdout"), "rb") as stdout, open(self.path("stderr"), "rb") as stderr:
+            return int(exit_code), stdout.read(), stderr.read()
+
+    def test_round_trip(self):
+        """Interpretation resumed from any checkpoint ends with the same results as the uninterrupted one"""
+        with open(self.path("stdout"), "rb") as stdout, open(self.path("stderr"), "rb") as stderr:
+            self.assertEqual(describe_result(self.expected), (int(self.exit_code), stdout.read(), stderr.read()))
+        self.assertGreater(len(self.writer.snapshots), 20)
+
+        for executed_instructions, checkpoint_data in self.writer.snapshots:
+            self.assertEqual(describe_result(self.expected), self.resume(checkpoint_data), executed_instructions)
+
+    def test_delta_records(self):
+        """Changes are appended to the file until it is larger than COMPACTION_RATIO times its full record, then
+        the file is rewritten with a new full record"""
+        header_size = len(MAGIC) + len(self.program_hash)
+        appended = []
+        for (_, previous), (executed_instructions, checkpoint_data) in zip(self.writer.snapshots,
+                                                                           self.writer.snapshots[1:]):
+            full_size = RECORD_HEADER.size + RECORD_HEADER.unpack_from(previous, header_size)[0]
+            compacted = len(previous) - header_size > CheckpointWriter.COMPACTION_RATIO * full_size
+            appended.append(not compacted)
+
+            if compacted:
+                # The new file contains only the full record
+                full_size = RECORD_HEADER.size + RECORD_HEADER.unpack_from(checkpoint_data, header_size)[0]
+                self.assertEqual(header_size + full_size, len(checkpoint_data))
+            else:
+                self.assertEqual(previous, checkpoint_data[:len(previous)])
+            self.assertEqual(executed_instructions, self.load_checkpoint_data(checkpoint_data).executed_instructions)
+
+        self.assertIn(True, appended)
+        self.assertIn(False, appended)
+
+    def test_damaged_record(self):
+        """Incomplete last record is ignored, the state is restored from the previous ones"""
+        for (previous_executed, previous), (_, checkpoint_data) in zip(self.writer.snapshots,
+                                                                       self.writer.snapshots[1:]):
+            if len(checkpoint_data) <= len(previous):
+                continue
+
+            damaged = checkpoint_data[:-1]
+            self.assertEqual(previous_executed, self.load_checkpoint_data(damaged).executed_instructions)
+            self.assertEqual(describe_result(self.expected), self.resume(damaged))
+
+    def test_other_output_file(self):
+        """Output redirected to another file than the one of the checkpoint isn't rewound"""
+        checkpoint = self.load_checkpoint_data(self.writer.snapshots[-1][1])
+        stdout_position, _ = checkpoint.output_positions
+        with open(self.path("log"), "wb") as file:
+            file.write(b"x" * (stdout_position[0] + 10))
+
+        with open(self.path("log"), "ab") as log:
+            rewind_output(log, stdout_position)
+        with open(self.path("log"), "rb") as file:
+            self.assertEqual(b"x" * (stdout_position[0] + 10), file.read())
+
+    def test_invalid_files(self):
+        """Checkpoints of other programs and files without complete records are rejected"""
+        checkpoint_data = self.writer.snapshots[0][1]
+        self.load_checkpoint_data(checkpoint_data)
+        with self.assertRaises(InvalidCheckpointException):
+            load_checkpoint(self.path("resumed"), bytes(len(self.program_hash)))
+
+        for invalid_data in (b"", checkpoint_data[:40], checkpoint_data[:-1]):
+            with self.assertRaises(InvalidCheckpointException):
+                self.load_checkpoint_data(invalid_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Lockstep execution must give the same results as the plain interpreter"""
+
+import unittest
+
+from support import const, describe_result, label, load, reference, var
+from interpreter import lockstep
+
+INT64_MAX = 2 ** 63 - 1
+INT64_MIN = -2 ** 63
+
+
+def arithmetic_program(op_codes) -> list:
+    """
+    Creates program writing results of arithmetic instructions with two input integers
+
+    :param op_codes: Arithmetic instructions (ADD, SUB, MUL, IDIV)
+    :return: Instructions of the program
+    """
+    instructions = [
+        ("DEFVAR", var("GF@a")),
+        ("DEFVAR", var("GF@b")),
+        ("DEFVAR", var("GF@r")),
+        ("READ", var("GF@a"), ("type", "int")),
+        ("READ", var("GF@b"), ("type", "int")),
+    ]
+    for op_code in op_codes:
+        instructions += [
+            (op_code, var("GF@r"), var("GF@a"), var("GF@b")),
+            ("WRITE", var("GF@r")),
+            ("WRITE", const("string", " ")),
+        ]
+
+    return instructions
+
+
+BRANCHING_PROGRAM = [
+    ("DEFVAR", var("GF@n")),
+    ("DEFVAR", var("GF@acc")),
+    ("DEFVAR", var("GF@c")),
+    ("READ", var("GF@n"), ("type", "int")),
+    ("MOVE", var("GF@acc"), const("int", 0)),
+    # if n < 5 { acc += 100; if n == 2 { acc += 7 } } else { acc -= 1 }
+    ("LT", var("GF@c"), var("GF@n"), const("int", 5)),
+    ("JUMPIFEQ", label("else"), var("GF@c"), const("bool", False)),
+    ("ADD", var("GF@acc"), var("GF@acc"), const("int", 100)),
+    ("JUMPIFNEQ", label("end_inner"), var("GF@n"), const("int", 2)),
+    ("ADD", var("GF@acc"), var("GF@acc"), const("int", 7)),
+    ("LABEL", label("end_inner")),
+    ("JUMP", label("end_if")),
+    ("LABEL", label("else")),
+    ("SUB", var("GF@acc"), var("GF@acc"), const("int", 1)),
+    ("LABEL", label("end_if")),
+    # while n > 0 { acc += n; n -= 1 } (lanes leave the loop after different numbers of iterations)
+    ("LABEL", label("loop")),
+    ("GT", var("GF@c"), var("GF@n"), const("int", 0)),
+    ("JUMPIFEQ", label("done"), var("GF@c"), const("bool", False)),
+    ("ADD", var("GF@acc"), var("GF@acc"), var("GF@n")),
+    ("SUB", var("GF@n"), var("GF@n"), const("int", 1)),
+    ("JUMP", label("loop")),
+    ("LABEL", label("done")),
+    ("WRITE", var("GF@acc")),
+    ("EXIT", const("int", 3)),
+]
+"""Program with nested conditions and a loop whose number of iterations is given by the input"""
+
+
+@unittest.skipUnless(lockstep.is_available(), "lockstep execution requires NumPy")
+class LockstepTest(unittest.TestCase):
+    """Comparison of lockstep execution with the plain interpreter"""
+
+    def assert_same_results(self, instructions, inputs, scalar_inputs):
+        """
+        Checks that lockstep results are the same as results of the plain interpreter
+
+        :param instructions: Instructions of the program
+        :param inputs: Contents of files with inputs
+        :param scalar_inputs: Inputs which have to leave lockstep execution (interpreted by the scalar interpreter)
+        """
+        program = load(instructions)
+        lockstep_results = lockstep.run_lockstep(program, inputs)
+        for input_data, result in zip(inputs, lockstep_results):
+            expected = reference(program, input_data)
+            if input_data in scalar_inputs:
+                self.assertIsNone(result, input_data)
+                continue
+
+            self.assertIsNotNone(result, input_data)
+            self.assertEqual(describe_result(expected), describe_result(result), input_data)
+            self.assertEqual(expected.executed_instructions, result.executed_instructions, input_data)
+
+        all_results = lockstep.interpret_all(program, inputs)
+        self.assertEqual([describe_result(reference(program, input_data)) for input_data in inputs],
+                         [describe_result(result) for result in all_results])
+
+    def test_int64_overflow(self):
+        """Lanes whose values don't fit into int64 are interpreted by the scalar interpreter"""
+        # Sums and differences reaching the bounds of int64 exactly stay in lockstep execution
+        fitting = [(INT64_MAX - 1, 1), (INT64_MIN + 1, 1), (-1, INT64_MAX), (7, -2)]
+        overflowing = [(INT64_MAX, 1), (INT64_MIN, 1), (-2, INT64_MAX), (2 ** 63, 0), (-(2 ** 70), 3)]
+        inputs = [f"{first}\n{second}\n".encode() for first, second in fitting + overflowing]
+        self.assert_same_results(arithmetic_program(("ADD", "SUB")), inputs, set(inputs[len(fitting):]))
+
+        # Products are checked conservatively (in floating point), quotients overflow only for INT64_MIN // -1
+        fitting = [(7, -2), (-7, 2), (2 ** 30, 2 ** 30), (-(2 ** 61), 1), (2 ** 60, -3)]
+        # The last input is division by zero (error of the program, it is reported by the scalar interpreter)
+        overflowing = [(2 ** 32, 2 ** 32), (INT64_MIN, -1), (INT64_MIN, 2), (3, INT64_MAX // 2), (5, 0)]
+        inputs = [f"{first}\n{second}\n".encode() for first, second in fitting + overflowing]
+        self.assert_same_results(arithmetic_program(("MUL", "IDIV")), inputs, set(inputs[len(fitting):]))
+
+    def test_reconvergence(self):
+        """Diverged lanes continue together and get the same results as when they are interpreted alone"""
+        inputs = [f"{number}\n".encode() for number in range(-3, 12)] * 3
+        # Missing input (nil) is a type error of LT, the lane leaves lockstep execution
+        inputs.append(b"")
+
+        self.assert_same_results(BRANCHING_PROGRAM, inputs, {b""})
+
+    def test_non_terminating_lane(self):
+        """Lane in an infinite loop leaves lockstep execution, so the other lanes end (no time limit is given)"""
+        instructions = [
+            ("DEFVAR", var("GF@n")),
+            ("READ", var("GF@n"), ("type", "int")),
+            ("JUMPIFEQ", label("forever"), var("GF@n"), const("int", 0)),
+            ("WRITE", var("GF@n")),
+            ("EXIT", const("int", 0)),
+            ("LABEL", label("forever")),
+            ("JUMP", label("forever")),
+        ]
+        inputs = [f"{number}\n".encode() for number in range(10)]
+        program = load(instructions)
+
+        results = lockstep.run_lockstep(program, inputs)
+        self.assertIsNone(results[0])
+        for input_data, result in zip(inputs[1:], results[1:]):
+            self.assertEqual(describe_result(reference(program, input_data)), describe_result(result))
+
+
+if __name__ == '__main__':
+    unittest.main()
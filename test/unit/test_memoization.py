@@ -0,0 +1,188 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Purity analysis of subroutines and memoized calls must not change results of programs"""
+
+import unittest
+
+from support import const, describe_result, label, load, reference, var
+from interpreter.memoization import Memoizer, analyze_subroutines
+from interpreter.runner import run_in_memory
+
+# Subroutines get their argument in the temporary frame of the caller (TF@arg) and push one result
+SUBROUTINES = {
+    # Pure: everything it observes is the argument
+    "pure": [
+        ("PUSHFRAME",),
+        ("DEFVAR", var("LF@res")),
+        ("ADD", var("LF@res"), var("LF@arg"), const("int", 10)),
+        ("PUSHS", var("LF@res")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    # Pure and recursive: sum of numbers from 0 to the argument
+    "sum": [
+        ("PUSHFRAME",),
+        ("DEFVAR", var("LF@res")),
+        ("JUMPIFEQ", label("sum_base"), var("LF@arg"), const("int", 0)),
+        ("CREATEFRAME",),
+        ("DEFVAR", var("TF@arg")),
+        ("SUB", var("TF@arg"), var("LF@arg"), const("int", 1)),
+        ("CALL", label("sum")),
+        ("POPS", var("LF@res")),
+        ("ADD", var("LF@res"), var("LF@res"), var("LF@arg")),
+        ("PUSHS", var("LF@res")),
+        ("POPFRAME",),
+        ("RETURN",),
+        ("LABEL", label("sum_base")),
+        ("PUSHS", const("int", 0)),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    # Reads and changes the global frame
+    "global": [
+        ("PUSHFRAME",),
+        ("DEFVAR", var("LF@res")),
+        ("ADD", var("LF@res"), var("LF@arg"), var("GF@counter")),
+        ("ADD", var("GF@counter"), var("GF@counter"), const("int", 1)),
+        ("PUSHS", var("LF@res")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    "write": [
+        ("PUSHFRAME",),
+        ("WRITE", var("LF@arg")),
+        ("PUSHS", var("LF@arg")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    "read": [
+        ("PUSHFRAME",),
+        ("DEFVAR", var("LF@res")),
+        ("READ", var("LF@res"), ("type", "int")),
+        ("PUSHS", var("LF@res")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    "dprint": [
+        ("PUSHFRAME",),
+        ("DPRINT", var("LF@arg")),
+        ("PUSHS", var("LF@arg")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    # Reads the local frame of the caller (it hasn't pushed its own frame)
+    "caller_frame": [
+        ("PUSHS", var("LF@x")),
+        ("RETURN",),
+    ],
+    # Pops the local frame of the caller and reads it through the temporary frame
+    "pop_caller_frame": [
+        ("POPFRAME",),
+        ("PUSHS", var("TF@x")),
+        ("PUSHFRAME",),
+        ("RETURN",),
+    ],
+    # Calls impure subroutine
+    "call_impure": [
+        ("PUSHFRAME",),
+        ("CREATEFRAME",),
+        ("DEFVAR", var("TF@arg")),
+        ("MOVE", var("TF@arg"), var("LF@arg")),
+        ("CALL", label("write")),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+    # Leaves different numbers of values on the data stack
+    "unbalanced": [
+        ("PUSHFRAME",),
+        ("JUMPIFEQ", label("unbalanced_skip"), var("LF@arg"), const("int", 0)),
+        ("PUSHS", const("int", 1)),
+        ("LABEL", label("unbalanced_skip")),
+        ("PUSHS", const("int", 2)),
+        ("POPFRAME",),
+        ("RETURN",),
+    ],
+}
+"""Subroutines by their labels"""
+
+PURE_SUBROUTINES = {"pure", "sum"}
+"""Labels of subroutines the analysis must find pure"""
+
+
+def create_program() -> list:
+    """
+    Creates program calling every subroutine repeatedly with the same arguments (state observed by impure subroutines
+    changes between the calls)
+
+    :return: Instructions of the program
+    """
+    instructions = [
+        ("DEFVAR", var("GF@counter")),
+        ("MOVE", var("GF@counter"), const("int", 0)),
+        ("DEFVAR", var("GF@result")),
+        ("CREATEFRAME",),
+        ("PUSHFRAME",),
+        ("DEFVAR", var("LF@x")),
+        ("MOVE", var("LF@x"), const("int", 1)),
+    ]
+    for subroutine in SUBROUTINES:
+        for argument in (3, 3, 5, 3):
+            instructions += [
+                ("CREATEFRAME",),
+                ("DEFVAR", var("TF@arg")),
+                ("MOVE", var("TF@arg"), const("int", argument)),
+                ("CALL", label(subroutine)),
+                ("POPS", var("GF@result")),
+                ("WRITE", var("GF@result")),
+                ("WRITE", const("string", " ")),
+                ("ADD", var("LF@x"), var("LF@x"), const("int", 1)),
+            ]
+    instructions.append(("EXIT", const("int", 0)))
+
+    for subroutine, body in SUBROUTINES.items():
+        instructions += [("LABEL", label(subroutine))] + body
+
+    return instructions
+
+
+class MemoizationTest(unittest.TestCase):
+    """Purity analysis and memoized interpretation"""
+
+    def test_analysis(self):
+        """Only subroutines depending on nothing but their arguments are pure"""
+        effects = analyze_subroutines(load(create_program()))
+
+        self.assertEqual(PURE_SUBROUTINES, set(effects))
+        for effect in effects.values():
+            # Argument is in the temporary frame, one value is pushed
+            self.assertEqual((0, 1, True), (effect.consumed, effect.net, effect.uses_frame))
+
+    def test_results(self):
+        """Memoized interpretation gives the same results as the plain interpreter (calls of pure subroutines are
+        memoized)"""
+        program = load(create_program())
+        input_data = b"".join(f"{number}\n".encode() for number in range(100, 110))
+        memoizer = Memoizer(program)
+
+        self.assertEqual(describe_result(reference(program, input_data)),
+                         describe_result(run_in_memory(program, input_data, memoizer=memoizer)))
+        self.assertEqual(PURE_SUBROUTINES, set(memoizer.statistics))
+        self.assertEqual({"hits": 2, "misses": 2, "entries": 2}, memoizer.statistics["pure"])
+        self.assertGreater(memoizer.statistics["sum"]["hits"], 0)
+
+    def test_reuse(self):
+        """Memoizer reused by the next interpretation replays stored results (with the same effects)"""
+        program = load(create_program())
+        memoizer = Memoizer(program)
+        results = [run_in_memory(program, b"1\n2\n3\n4\n", memoizer=memoizer) for _ in range(2)]
+
+        expected = describe_result(reference(program, b"1\n2\n3\n4\n"))
+        self.assertEqual([expected, expected], [describe_result(result) for result in results])
+        self.assertEqual(8, memoizer.statistics["pure"]["hits"] + memoizer.statistics["pure"]["misses"])
+
+
+if __name__ == '__main__':
+    unittest.main()
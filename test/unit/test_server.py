@@ -0,0 +1,169 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Length-prefixed protocol of the interpreter server and its LRU cache of programs"""
+
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from io import BytesIO
+
+from support import const, describe_result, label, load, reference, to_xml, var
+from interpreter.error import InvalidServerMessageException
+from interpreter.server import HASH_SIZE, PROGRAM_HASH, PROGRAM_XML, STATUS_BAD_REQUEST, STATUS_LIMIT_EXCEEDED, \
+    STATUS_OK, STATUS_UNKNOWN_PROGRAM, InterpreterServer, ProgramCache, ServerClient, decode_request, \
+    decode_response, encode_request, encode_response, estimate_program_size, read_frame, write_frame
+
+ECHO_PROGRAM = [
+    ("DEFVAR", var("GF@line")),
+    ("READ", var("GF@line"), ("type", "string")),
+    ("WRITE", var("GF@line")),
+    ("DPRINT", const("string", "done")),
+    ("EXIT", const("int", 7)),
+]
+"""Program writing the first input line to stdout and a message to stderr"""
+
+LOOP_PROGRAM = [
+    ("LABEL", label("loop")),
+    ("JUMP", label("loop")),
+]
+"""Program that never ends"""
+
+
+class ProtocolTest(unittest.TestCase):
+    """Encoding and decoding of frames and messages"""
+
+    def test_frames(self):
+        """Frames are read back in the same order, a stream closed inside a frame is an error"""
+        stream = BytesIO()
+        for payload in (b"first", b"", bytes(range(256)) * 100):
+            write_frame(stream, payload)
+        data = stream.getvalue()
+
+        stream = BytesIO(data)
+        self.assertEqual(b"first", read_frame(stream))
+        self.assertEqual(b"", read_frame(stream))
+        self.assertEqual(bytes(range(256)) * 100, read_frame(stream))
+        self.assertIsNone(read_frame(stream))
+
+        for truncated in (data[:2], data[:7]):
+            with self.assertRaises(InvalidServerMessageException):
+                read_frame(BytesIO(truncated))
+
+    def test_messages(self):
+        """Requests and responses are decoded to the encoded values, malformed requests are rejected"""
+        request = encode_request(PROGRAM_XML, b"<program/>", b"1\n2\n", 2 ** 40)
+        self.assertEqual((PROGRAM_XML, b"<program/>", b"1\n2\n", 2 ** 40), decode_request(request))
+
+        program_hash = hashlib.sha256(b"x").digest()
+        status, result, response_hash = decode_response(encode_response(STATUS_LIMIT_EXCEEDED, -1, program_hash,
+                                                                        b"out", b"err"))
+        self.assertEqual((STATUS_LIMIT_EXCEEDED, program_hash), (status, response_hash))
+        self.assertEqual((-1, b"out", b"err", True), (result.exit_code, result.stdout, result.stderr,
+                                                      result.limit_exceeded))
+
+        malformed_requests = (
+            request[:-1],
+            b"Z" + request[1:],
+            encode_request(PROGRAM_HASH, b"short", b"", 0),
+            encode_request(PROGRAM_XML, b"", b"", 0)[:5] + b"\xff\xff\xff\xff",
+        )
+        for malformed_request in malformed_requests:
+            with self.assertRaises(InvalidServerMessageException):
+                decode_request(malformed_request)
+
+
+class ProgramCacheTest(unittest.TestCase):
+    """LRU eviction of cached programs"""
+
+    def test_eviction(self):
+        """The least recently used programs are dropped when the size limit is reached"""
+        programs = [load([("WRITE", const("int", number))] * (number + 1)) for number in range(4)]
+        sizes = [estimate_program_size(program) for program in programs]
+        hashes = [bytes([number]) * HASH_SIZE for number in range(4)]
+
+        # Programs 0, 1 and 2 fit, program 3 needs space of one of them
+        cache = ProgramCache(sizes[0] + sizes[1] + sizes[2] + sizes[3] - 1)
+        for program_hash, program in zip(hashes[:3], programs[:3]):
+            cache.put(program_hash, program)
+        self.assertEqual(sum(sizes[:3]), cache.size)
+
+        # Program 0 becomes the most recently used one, so program 1 is dropped
+        self.assertIs(programs[0], cache.get(hashes[0]))
+        cache.put(hashes[3], programs[3])
+        self.assertIsNone(cache.get(hashes[1]))
+        for number in (0, 2, 3):
+            self.assertIs(programs[number], cache.get(hashes[number]))
+        self.assertEqual(sizes[0] + sizes[2] + sizes[3], cache.size)
+
+        # Program larger than the whole cache isn't stored (nothing is dropped)
+        small_cache = ProgramCache(sizes[0])
+        small_cache.put(hashes[0], programs[0])
+        small_cache.put(hashes[3], programs[3])
+        self.assertIs(programs[0], small_cache.get(hashes[0]))
+        self.assertIsNone(small_cache.get(hashes[3]))
+
+
+class InterpreterServerTest(unittest.TestCase):
+    """Requests sent to the running server"""
+
+    def setUp(self) -> None:
+        """Starts the server on a Unix socket in a temporary directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, "server.sock")
+        self.server = InterpreterServer(self.socket_path, 1024 * 1024)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ServerClient(self.socket_path)
+
+    def tearDown(self) -> None:
+        """Stops the server"""
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_results(self):
+        """Results of runs are the same as results of the plain interpreter (program is sent once)"""
+        source = to_xml(ECHO_PROGRAM)
+        program_hash = hashlib.sha256(source).digest()
+
+        status, _, _ = self.client.request(PROGRAM_HASH, program_hash, b"", 0)
+        self.assertEqual(STATUS_UNKNOWN_PROGRAM, status)
+
+        for input_data in (b"hello\n", b"", "žluťoučký kůň\n".encode()):
+            status, result = self.client.run(source, input_data)
+            self.assertEqual(STATUS_OK, status)
+            self.assertEqual(describe_result(reference(load(ECHO_PROGRAM), input_data)), describe_result(result))
+
+        # The program has been cached by the first run
+        status, result, response_hash = self.client.request(PROGRAM_HASH, program_hash, b"again\n", 0)
+        self.assertEqual((STATUS_OK, program_hash, b"again"), (status, response_hash, result.stdout))
+
+    def test_errors(self):
+        """Invalid programs, bad requests and instruction limits are reported by their statuses"""
+        status, result, _ = self.client.request(PROGRAM_XML, b"<program", b"", 0)
+        self.assertEqual((STATUS_OK, 31), (status, result.exit_code))
+
+        status, result = self.client.run(to_xml(LOOP_PROGRAM), b"", 1000)
+        self.assertEqual(STATUS_LIMIT_EXCEEDED, status)
+        self.assertTrue(result.limit_exceeded)
+
+        # The connection stays usable after a bad request
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socket_path)
+            stream = connection.makefile("rwb")
+            for payload in (b"Z", encode_request(PROGRAM_XML, to_xml(ECHO_PROGRAM), b"still here\n", 0)):
+                write_frame(stream, payload)
+            responses = [decode_response(read_frame(stream)) for _ in range(2)]
+            stream.close()
+        self.assertEqual(STATUS_BAD_REQUEST, responses[0][0])
+        self.assertEqual((STATUS_OK, b"still here"), (responses[1][0], responses[1][1].stdout))
+
+
+if __name__ == '__main__':
+    unittest.main()
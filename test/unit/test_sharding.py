@@ -0,0 +1,103 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Sharded loading must give the same program (and the same errors) as the serial loader"""
+
+import os
+import tempfile
+import unittest
+from random import Random
+from xml.etree.ElementTree import ElementTree
+
+from support import describe_program, describe_result, reference, to_xml
+from fuzzing.generator import generate_input, generate_program
+from interpreter.error import BadInstructionOrderException, DuplicateLabelException, InvalidInstructionOpCode
+from interpreter.interpretation import Loader
+from interpreter.sharding import ShardedLoader
+
+JOBS = 4
+"""Number of processes of the sharded loader"""
+
+MIN_SHARD_SIZE = 1024
+"""Size of shards small enough for sharding of test programs"""
+
+
+class ShardedLoaderTest(unittest.TestCase):
+    """Comparison of sharded and serial loading"""
+
+    def setUp(self) -> None:
+        """Creates directory for program files"""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        """Removes program files"""
+        self.directory.cleanup()
+
+    def write_program(self, source: bytes) -> str:
+        """
+        Stores XML source code representation into a file
+
+        :param source: XML source code representation
+        :return: Path to the file
+        """
+        path = os.path.join(self.directory.name, "program.xml")
+        with open(path, "wb") as file:
+            file.write(source)
+
+        self.assertGreaterEqual(len(source) // MIN_SHARD_SIZE, JOBS, "program is too small to be sharded")
+
+        return path
+
+    def test_random_programs(self):
+        """Random programs are loaded to the same instructions and interpreted in the same way"""
+        random = Random(26)
+        for _ in range(5):
+            path = self.write_program(to_xml(generate_program(random, True, 200)))
+
+            serial = Loader(ElementTree(), path).load_program()
+            sharded = ShardedLoader(path, JOBS, MIN_SHARD_SIZE).load_program()
+            self.assertEqual(describe_program(serial), describe_program(sharded))
+
+            input_data = generate_input(random)
+            self.assertEqual(describe_result(reference(serial, input_data)),
+                             describe_result(reference(sharded, input_data)))
+
+    def test_unsorted_orders(self):
+        """Instructions are sorted by their orders across shards"""
+        instructions = [("DEFVAR", ("var", f"GF@v{number}")) for number in range(200)]
+        source = to_xml(instructions).decode()
+        # Orders are reversed (the last instruction in the file is executed first) and they have gaps
+        for order in range(1, len(instructions) + 1):
+            source = source.replace(f'order="{order}"', f'order="x{(len(instructions) - order) * 3 + 5}"')
+        path = self.write_program(source.replace('order="x', 'order="').encode())
+
+        serial = Loader(ElementTree(), path).load_program()
+        sharded = ShardedLoader(path, JOBS, MIN_SHARD_SIZE).load_program()
+        self.assertEqual(describe_program(serial), describe_program(sharded))
+        self.assertEqual("GF@v199", sharded.instructions[0].args[0].raw_value)
+
+    def test_errors_across_shards(self):
+        """Errors found by comparing instructions of different shards are the same as errors of serial loading"""
+        instructions = [("DEFVAR", ("var", f"GF@v{number}")) for number in range(200)]
+        label_instructions = [("LABEL", ("label", "same"))] + instructions + [("LABEL", ("label", "same"))]
+        source = to_xml(instructions).decode()
+        broken_sources = {
+            # The first and the last instruction have the same order
+            BadInstructionOrderException: source.replace('order="200"', 'order="1"'),
+            DuplicateLabelException: to_xml(label_instructions).decode(),
+            InvalidInstructionOpCode: source.replace('opcode="DEFVAR">\n    <arg1 type="var">GF@v199',
+                                                     'opcode="UNKNOWN">\n    <arg1 type="var">GF@v199'),
+        }
+
+        for exception_type, broken_source in broken_sources.items():
+            path = self.write_program(broken_source.encode())
+            with self.assertRaises(exception_type):
+                Loader(ElementTree(), path).load_program()
+            with self.assertRaises(exception_type):
+                ShardedLoader(path, JOBS, MIN_SHARD_SIZE).load_program()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# This is a part of IPP project
+#
+# Author: Michal Šmahel (xsmahe01)
+# Date: 2022
+
+"""Spans of subroutines recorded by the tracer must stay paired when the limit of events is reached"""
+
+import unittest
+
+from support import const, describe_result, label, load, reference
+from interpreter.runner import run_in_memory
+from interpreter.tracing import Tracer
+
+NESTED_CALLS_PROGRAM = [
+    ("CALL", label("outer")),
+    ("EXIT", const("int", 0)),
+    ("LABEL", label("outer")),
+    ("CREATEFRAME",),
+    ("CREATEFRAME",),
+    ("CREATEFRAME",),
+    ("CALL", label("inner")),
+    ("RETURN",),
+    ("LABEL", label("inner")),
+    ("CREATEFRAME",),
+    ("RETURN",),
+]
+"""Program calling subroutine from subroutine after some frame operations (recorded as instant events)"""
+
+
+class TracerTest(unittest.TestCase):
+    """Events recorded by the tracer"""
+
+    def trace(self, max_events: int) -> list:
+        """
+        Traces the program
+
+        :param max_events: Maximum number of recorded events
+        :return: Phases and names of the recorded events with orders of their instructions
+        """
+        program = load(NESTED_CALLS_PROGRAM)
+        tracer = Tracer(max_events)
+        result = run_in_memory(program, b"", hooks=[tracer])
+        tracer.finish()
+        self.assertEqual(describe_result(reference(program)), describe_result(result))
+
+        return [(phase, name, program.get_order_at(position) if position >= 0 else None)
+                for phase, name, _, _, _, position in tracer.events]
+
+    def test_all_events(self):
+        """Every span is closed by the RETURN of its subroutine"""
+        self.assertEqual([("B", "outer", 1), ("i", "CREATEFRAME", 4), ("i", "CREATEFRAME", 5),
+                          ("i", "CREATEFRAME", 6), ("B", "inner", 7), ("i", "CREATEFRAME", 10), ("E", "", 11),
+                          ("E", "", 8)], self.trace(100))
+
+    def test_limit(self):
+        """RETURN of a call whose span hasn't been opened doesn't close the span of the caller"""
+        self.assertEqual([("B", "outer", 1), ("i", "CREATEFRAME", 4), ("i", "CREATEFRAME", 5),
+                          ("i", "CREATEFRAME", 6), ("E", "", 8)], self.trace(4))
+
+
+if __name__ == '__main__':
+    unittest.main()